@@ -0,0 +1,26 @@
+"""Document Content Hash
+
+Revision ID: f1b7d7c41384
+Revises: 77d07dffae64
+Create Date: 2023-11-08 10:14:27.417092
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "f1b7d7c41384"
+down_revision = "77d07dffae64"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document",
+        sa.Column("content_hash", sa.String(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document", "content_hash")
@@ -0,0 +1,26 @@
+"""Document Access Hash
+
+Revision ID: f2d81461cdff
+Revises: f1b7d7c41384
+Create Date: 2023-11-10 16:02:51.284310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "f2d81461cdff"
+down_revision = "f1b7d7c41384"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document",
+        sa.Column("access_hash", sa.String(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document", "access_hash")
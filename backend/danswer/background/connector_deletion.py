@@ -44,6 +44,19 @@ logger = setup_logger()
 _DELETION_BATCH_SIZE = 1000
 
 
+def _build_document_index_progress_logger(
+    action: str, total: int
+) -> Callable[[int], None]:
+    num_done = 0
+
+    def _log_progress(num_documents: int) -> None:
+        nonlocal num_done
+        num_done += num_documents
+        logger.debug(f"{action} {num_done}/{total} documents in the document index")
+
+    return _log_progress
+
+
 def _delete_connector_credential_pair_batch(
     document_ids: list[str],
     connector_id: int,
@@ -64,7 +77,12 @@ def _delete_connector_credential_pair_batch(
             document_id for document_id, cnt in document_connector_cnts if cnt == 1
         ]
         logger.debug(f"Deleting documents: {document_ids_to_delete}")
-        document_index.delete(doc_ids=document_ids_to_delete)
+        document_index.delete(
+            doc_ids=document_ids_to_delete,
+            progress_callback=_build_document_index_progress_logger(
+                "Deleted", len(document_ids_to_delete)
+            ),
+        )
         delete_documents_complete(
             db_session=db_session,
             document_ids=document_ids_to_delete,
@@ -90,7 +108,12 @@ def _delete_connector_credential_pair_batch(
             for document_id, access in access_for_documents.items()
         ]
         logger.debug(f"Updating documents: {document_ids_to_update}")
-        document_index.update(update_requests=update_requests)
+        document_index.update(
+            update_requests=update_requests,
+            progress_callback=_build_document_index_progress_logger(
+                "Updated", len(update_requests)
+            ),
+        )
         delete_document_by_connector_credential_pair(
             db_session=db_session,
             document_ids=document_ids_to_update,
@@ -6,8 +6,11 @@ import torch
 from sqlalchemy.orm import Session
 
 from danswer.background.indexing.checkpointing import get_time_windows_for_index_attempt
+from danswer.configs.app_configs import INDEXING_PIPELINE_QUEUE_SIZE
 from danswer.connectors.factory import instantiate_connector
+from danswer.connectors.interfaces import BaseConnector
 from danswer.connectors.interfaces import GenerateDocumentsOutput
+from danswer.connectors.interfaces import IndexingAwareConnector
 from danswer.connectors.interfaces import LoadConnector
 from danswer.connectors.interfaces import PollConnector
 from danswer.connectors.models import IndexAttemptMetadata
@@ -24,9 +27,10 @@ from danswer.db.index_attempt import mark_attempt_succeeded
 from danswer.db.index_attempt import update_docs_indexed
 from danswer.db.models import IndexAttempt
 from danswer.db.models import IndexingStatus
-from danswer.indexing.indexing_pipeline import build_indexing_pipeline
+from danswer.indexing.indexing_pipeline import build_indexing_pipeline_stages
 from danswer.utils.logger import IndexAttemptSingleton
 from danswer.utils.logger import setup_logger
+from danswer.utils.staged_pipeline import StagedPipeline
 
 logger = setup_logger()
 
@@ -36,7 +40,7 @@ def _get_document_generator(
     attempt: IndexAttempt,
     start_time: datetime,
     end_time: datetime,
-) -> GenerateDocumentsOutput:
+) -> tuple[BaseConnector, GenerateDocumentsOutput]:
     """NOTE: `start_time` and `end_time` are only used for poll connectors"""
     task = attempt.connector.input_type
 
@@ -46,6 +50,7 @@ def _get_document_generator(
             task,
             attempt.connector.connector_specific_config,
             attempt.credential.credential_json,
+            connector_id=attempt.connector_id,
         )
         if new_credential_json is not None:
             backend_update_credential_json(
@@ -77,7 +82,12 @@ def _get_document_generator(
         # Event types cannot be handled by a background type
         raise RuntimeError(f"Invalid task type: {task}")
 
-    return doc_batch_generator
+    return runnable_connector, doc_batch_generator
+
+
+def _log_pipeline_metrics(pipeline: StagedPipeline) -> None:
+    for stage_metrics in pipeline.metrics:
+        logger.info(f"Indexing pipeline stage {stage_metrics}")
 
 
 def _run_indexing(
@@ -100,9 +110,14 @@ def _run_indexing(
         attempt_status=IndexingStatus.IN_PROGRESS,
     )
 
-    indexing_pipeline = build_indexing_pipeline()
     db_connector = index_attempt.connector
     db_credential = index_attempt.credential
+    indexing_stages = build_indexing_pipeline_stages(
+        index_attempt_metadata=IndexAttemptMetadata(
+            connector_id=db_connector.id,
+            credential_id=db_credential.id,
+        ),
+    )
     last_successful_index_time = get_last_successful_attempt_time(
         connector_id=db_connector.id,
         credential_id=db_credential.id,
@@ -121,35 +136,39 @@ def _run_indexing(
             source_type=db_connector.source,
         )
     ):
-        doc_batch_generator = _get_document_generator(
+        runnable_connector, doc_batch_generator = _get_document_generator(
             db_session=db_session,
             attempt=index_attempt,
             start_time=window_start,
             end_time=window_end,
         )
 
+        # fetch -> chunk -> embed -> index run concurrently, the bookkeeping below runs
+        # as each batch is written
+        pipeline = StagedPipeline(
+            stages=indexing_stages, queue_size=INDEXING_PIPELINE_QUEUE_SIZE
+        )
+        failed_document_ids: list[str] = []
         try:
-            for doc_batch in doc_batch_generator:
+            for (
+                batch_document_ids,
+                new_docs,
+                total_batch_chunks,
+                batch_failed_document_ids,
+            ) in pipeline.run(doc_batch_generator):
+                failed_document_ids.extend(batch_failed_document_ids)
+                if isinstance(runnable_connector, IndexingAwareConnector):
+                    runnable_connector.on_documents_indexed(batch_document_ids)
+
                 # check if connector is disabled mid run and stop if so
                 db_session.refresh(db_connector)
                 if db_connector.disabled:
                     # let the `except` block handle this
                     raise RuntimeError("Connector was disabled mid run")
 
-                logger.debug(
-                    f"Indexing batch of documents: {[doc.to_short_descriptor() for doc in doc_batch]}"
-                )
-
-                new_docs, total_batch_chunks = indexing_pipeline(
-                    documents=doc_batch,
-                    index_attempt_metadata=IndexAttemptMetadata(
-                        connector_id=db_connector.id,
-                        credential_id=db_credential.id,
-                    ),
-                )
                 net_doc_change += new_docs
                 chunk_count += total_batch_chunks
-                document_count += len(doc_batch)
+                document_count += len(batch_document_ids)
 
                 # commit transaction so that the `update` below begins
                 # with a brand new transaction. Postgres uses the start
@@ -166,6 +185,15 @@ def _run_indexing(
                     new_docs_indexed=net_doc_change,
                 )
 
+            if failed_document_ids:
+                # the other documents are indexed, but the window has to be fetched
+                # again on the next run to pick up the failed ones
+                raise RuntimeError(
+                    f"Failed to index {len(failed_document_ids)} documents: "
+                    f"{', '.join(failed_document_ids)}"
+                )
+
+            _log_pipeline_metrics(pipeline)
             run_end_dt = window_end
             update_connector_credential_pair(
                 db_session=db_session,
@@ -176,6 +204,8 @@ def _run_indexing(
                 run_dt=run_end_dt,
             )
         except Exception as e:
+            pipeline.stop()
+            _log_pipeline_metrics(pipeline)
             logger.info(
                 f"Connector run ran into exception after elapsed time: {time.time() - start_time} seconds"
             )
@@ -12,6 +12,7 @@ from sqlalchemy.orm import Session
 from danswer.background.indexing.job_client import SimpleJob
 from danswer.background.indexing.job_client import SimpleJobClient
 from danswer.background.indexing.run_indexing import run_indexing_entrypoint
+from danswer.configs.app_configs import CHUNKER_NUM_PROCESSES
 from danswer.configs.app_configs import EXPERIMENTAL_SIMPLE_JOB_CLIENT_ENABLED
 from danswer.configs.app_configs import MODEL_SERVER_HOST
 from danswer.configs.app_configs import NUM_INDEXING_WORKERS
@@ -251,6 +252,10 @@ def update_loop(delay: int = 10, num_workers: int = NUM_INDEXING_WORKERS) -> Non
     if EXPERIMENTAL_SIMPLE_JOB_CLIENT_ENABLED:
         client = SimpleJobClient(n_workers=num_workers)
     else:
+        if CHUNKER_NUM_PROCESSES > 0:
+            # The chunker starts its own pool of worker processes, which Dask workers
+            # can't do when they are daemonic (the default)
+            dask.config.set({"distributed.worker.daemon": False})
         cluster = LocalCluster(
             n_workers=num_workers,
             threads_per_worker=1,
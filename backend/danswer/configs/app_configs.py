@@ -95,6 +95,21 @@ VESPA_DEPLOYMENT_ZIP = (
 )
 # Number of documents in a batch during indexing (further batching done by chunks before passing to bi-encoder)
 INDEX_BATCH_SIZE = 16
+# Indexing runs connector fetching, chunking, embedding and writes to the document index
+# concurrently, with at most INDEXING_PIPELINE_QUEUE_SIZE batches waiting between stages
+INDEXING_PIPELINE_QUEUE_SIZE = int(os.environ.get("INDEXING_PIPELINE_QUEUE_SIZE") or 2)
+INDEXING_PIPELINE_CHUNK_WORKERS = int(
+    os.environ.get("INDEXING_PIPELINE_CHUNK_WORKERS") or 1
+)
+INDEXING_PIPELINE_EMBED_WORKERS = int(
+    os.environ.get("INDEXING_PIPELINE_EMBED_WORKERS") or 1
+)
+# Documents whose content hash matches the last indexed version only get their access
+# and document sets refreshed. Set to false to force a full re-index, e.g. after the
+# document index was wiped without resetting Postgres
+SKIP_UNCHANGED_DOCUMENTS = (
+    os.environ.get("SKIP_UNCHANGED_DOCUMENTS", "").lower() != "false"
+)
 
 # Below are intended to match the env variables names used by the official postgres docker image
 # https://hub.docker.com/_/postgres
@@ -110,11 +125,42 @@ POSTGRES_DB = os.environ.get("POSTGRES_DB") or "postgres"
 #####
 GOOGLE_DRIVE_INCLUDE_SHARED = False
 GOOGLE_DRIVE_FOLLOW_SHORTCUTS = False
+# Files of a batch are downloaded/exported by this many threads in parallel, with all
+# threads of a connector sharing a limit of GOOGLE_DRIVE_REQUESTS_PER_SECOND to stay
+# within the Drive API quota
+GOOGLE_DRIVE_NUM_THREADS = int(os.environ.get("GOOGLE_DRIVE_NUM_THREADS") or 8)
+GOOGLE_DRIVE_REQUESTS_PER_SECOND = float(
+    os.environ.get("GOOGLE_DRIVE_REQUESTS_PER_SECOND") or 10
+)
+# Requests of these connectors are limited per credential, across all threads and
+# indexing worker processes using it. Rate limited responses pause all of them for the
+# response's Retry-After
+SLACK_CONNECTOR_REQUESTS_PER_SECOND = float(
+    os.environ.get("SLACK_CONNECTOR_REQUESTS_PER_SECOND") or 1
+)
+ZENDESK_CONNECTOR_REQUESTS_PER_SECOND = float(
+    os.environ.get("ZENDESK_CONNECTOR_REQUESTS_PER_SECOND") or 3
+)
+CONFLUENCE_CONNECTOR_REQUESTS_PER_SECOND = float(
+    os.environ.get("CONFLUENCE_CONNECTOR_REQUESTS_PER_SECOND") or 10
+)
 
 FILE_CONNECTOR_TMP_STORAGE_PATH = os.environ.get(
     "FILE_CONNECTOR_TMP_STORAGE_PATH", "/home/file_connector_storage"
 )
 
+# PDF and DOCX files downloaded by the connectors are kept in memory up to this size and
+# spilled to a temporary file beyond it
+FILE_EXTRACTION_SPOOL_MAX_MEMORY_BYTES = int(
+    os.environ.get("FILE_EXTRACTION_SPOOL_MAX_MEMORY_BYTES") or 8 * 1024 * 1024
+)
+# Text extraction of a single file stops after this many characters, 0 for no limit
+FILE_EXTRACTION_MAX_CHARS = int(
+    os.environ.get("FILE_EXTRACTION_MAX_CHARS") or 5_000_000
+)
+# PDF pages are extracted one at a time and grouped into a section per this many pages
+PDF_PAGES_PER_SECTION = int(os.environ.get("PDF_PAGES_PER_SECTION") or 10)
+
 # TODO these should be available for frontend configuration, via advanced options expandable
 WEB_CONNECTOR_IGNORED_CLASSES = os.environ.get(
     "WEB_CONNECTOR_IGNORED_CLASSES", "sidebar,footer"
@@ -125,6 +171,17 @@ WEB_CONNECTOR_IGNORED_ELEMENTS = os.environ.get(
 WEB_CONNECTOR_OAUTH_CLIENT_ID = os.environ.get("WEB_CONNECTOR_OAUTH_CLIENT_ID")
 WEB_CONNECTOR_OAUTH_CLIENT_SECRET = os.environ.get("WEB_CONNECTOR_OAUTH_CLIENT_SECRET")
 WEB_CONNECTOR_OAUTH_TOKEN_URL = os.environ.get("WEB_CONNECTOR_OAUTH_TOKEN_URL")
+# Pages are crawled by this many concurrent workers, each with its own browser page
+WEB_CONNECTOR_NUM_WORKERS = int(os.environ.get("WEB_CONNECTOR_NUM_WORKERS") or 8)
+# At most this many requests to the same host are in flight at once, started at least
+# WEB_CONNECTOR_CRAWL_DELAY seconds apart (or the site's robots.txt Crawl-delay if longer)
+WEB_CONNECTOR_MAX_REQUESTS_PER_HOST = int(
+    os.environ.get("WEB_CONNECTOR_MAX_REQUESTS_PER_HOST") or 4
+)
+WEB_CONNECTOR_CRAWL_DELAY = float(os.environ.get("WEB_CONNECTOR_CRAWL_DELAY") or 0)
+# "browser" renders every page with Playwright, "http" fetches pages without running
+# their JavaScript and "auto" checks per site whether rendering changes the content
+WEB_CONNECTOR_FETCH_MODE = os.environ.get("WEB_CONNECTOR_FETCH_MODE") or "auto"
 
 NOTION_CONNECTOR_ENABLE_RECURSIVE_PAGE_LOOKUP = (
     os.environ.get("NOTION_CONNECTOR_ENABLE_RECURSIVE_PAGE_LOOKUP", "").lower()
@@ -185,6 +242,10 @@ if os.environ.get("EDIT_KEYWORD_QUERY"):
     EDIT_KEYWORD_QUERY = os.environ.get("EDIT_KEYWORD_QUERY", "").lower() == "true"
 else:
     EDIT_KEYWORD_QUERY = not os.environ.get("DOCUMENT_ENCODER_MODEL")
+# Cache of retrieval + rerank results, invalidated whenever the document index is
+# written to. Set the size to 0 to disable the cache
+SEARCH_RESULT_CACHE_SIZE = int(os.environ.get("SEARCH_RESULT_CACHE_SIZE") or 512)
+SEARCH_RESULT_CACHE_TTL = int(os.environ.get("SEARCH_RESULT_CACHE_TTL") or 300)
 
 
 #####
@@ -198,6 +259,14 @@ ENABLE_MINI_CHUNK = os.environ.get("ENABLE_MINI_CHUNK", "").lower() == "true"
 # Slightly larger since the sentence aware split is a max cutoff so most minichunks will be under MINI_CHUNK_SIZE
 # tokens. But we need it to be at least as big as 1/4th chunk size to avoid having a tiny mini-chunk at the end
 MINI_CHUNK_SIZE = 150
+# Chunking is CPU bound Python, set this to chunk documents in a pool of worker processes
+# instead of in the indexing process (0 to disable)
+CHUNKER_NUM_PROCESSES = int(os.environ.get("CHUNKER_NUM_PROCESSES") or 0)
+# Batches with less text than this (in characters) are still chunked in process, the cost
+# of sending the documents to the workers outweighs the gain for those
+CHUNKER_POOL_MIN_BATCH_CHARS = int(
+    os.environ.get("CHUNKER_POOL_MIN_BATCH_CHARS") or 100_000
+)
 
 
 #####
@@ -208,6 +277,19 @@ MINI_CHUNK_SIZE = 150
 MODEL_SERVER_HOST = os.environ.get("MODEL_SERVER_HOST") or None
 MODEL_SERVER_ALLOWED_HOST = os.environ.get("MODEL_SERVER_HOST") or "0.0.0.0"
 MODEL_SERVER_PORT = int(os.environ.get("MODEL_SERVER_PORT") or "9000")
+# Concurrent requests to the model server are coalesced into a single batch per model.
+# A batch is run once it holds MODEL_SERVER_MAX_BATCH_SIZE texts (or passages for the
+# cross-encoders) or MODEL_SERVER_MAX_BATCH_WAIT_MS has passed since the first request
+MODEL_SERVER_MAX_BATCH_SIZE = int(os.environ.get("MODEL_SERVER_MAX_BATCH_SIZE") or 128)
+MODEL_SERVER_MAX_BATCH_WAIT_MS = int(
+    os.environ.get("MODEL_SERVER_MAX_BATCH_WAIT_MS") or 5
+)
+# Embeddings are returned by the model server as a binary matrix of this dtype, "float16"
+# halves the payload at a precision loss well below what affects retrieval. Set to "json"
+# to use the JSON response instead
+MODEL_SERVER_EMBEDDING_TRANSPORT = (
+    os.environ.get("MODEL_SERVER_EMBEDDING_TRANSPORT") or "float32"
+).lower()
 
 
 #####
@@ -234,6 +316,29 @@ CONTINUE_ON_CONNECTOR_FAILURE = os.environ.get(
 # fairly large amount of memory in order to increase substantially, since
 # each worker loads the embedding models into memory.
 NUM_INDEXING_WORKERS = int(os.environ.get("NUM_INDEXING_WORKERS") or 1)
+# On disk cache of chunk embeddings so that re-indexing an edited document only embeds
+# the chunks which changed. Least recently used entries are evicted past the max number
+# of entries (~800 bytes each for the default model), set to 0 to disable the cache
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH") or os.path.join(
+    DYNAMIC_CONFIG_DIR_PATH, "embedding_cache.sqlite"
+)
+EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES") or 500_000
+)
+# ETag, Last-Modified and content hash of the pages crawled by each web connector. On the
+# next crawl pages are requested conditionally and skipped, before being rendered, if
+# they haven't changed. Set WEB_CONNECTOR_SKIP_UNCHANGED_PAGES to false to re-crawl all
+WEB_CONNECTOR_PAGE_STATE_PATH = os.environ.get(
+    "WEB_CONNECTOR_PAGE_STATE_PATH"
+) or os.path.join(DYNAMIC_CONFIG_DIR_PATH, "web_page_state.sqlite")
+WEB_CONNECTOR_SKIP_UNCHANGED_PAGES = (
+    os.environ.get("WEB_CONNECTOR_SKIP_UNCHANGED_PAGES", "").lower() != "false"
+)
+# Token buckets of the connectors whose request rate is limited per credential, shared
+# by the indexing worker processes
+CONNECTOR_RATE_LIMIT_STATE_PATH = os.environ.get(
+    "CONNECTOR_RATE_LIMIT_STATE_PATH"
+) or os.path.join(DYNAMIC_CONFIG_DIR_PATH, "connector_rate_limits.sqlite")
 JOB_TIMEOUT = 60 * 60 * 6  # 6 hours default
 # Logs every model prompt and output, mostly used for development or exploration purposes
 LOG_ALL_MODEL_INTERACTIONS = (
@@ -22,6 +22,7 @@ MATCH_HIGHLIGHTS = "match_highlights"
 # are still useful as a search result but not for QA.
 IGNORE_FOR_QA = "ignore_for_qa"
 GEN_AI_API_KEY_STORAGE_KEY = "genai_api_key"
+INDEX_GENERATION_STORAGE_KEY = "document_index_generation"
 PUBLIC_DOC_PAT = "PUBLIC"
 PUBLIC_DOCUMENT_SET = "__PUBLIC"
 QUOTE = "quote"
@@ -28,9 +28,32 @@ ASYM_QUERY_PREFIX = os.environ.get("ASYM_QUERY_PREFIX", "")
 ASYM_PASSAGE_PREFIX = os.environ.get("ASYM_PASSAGE_PREFIX", "")
 # Purely an optimization, memory limitation consideration
 BATCH_SIZE_ENCODE_CHUNKS = 8
+# Texts to embed are sorted by token length and packed into batches of similar length.
+# A batch is capped at this many padded tokens (default: BATCH_SIZE_ENCODE_CHUNKS full
+# length chunks) and ENCODE_BATCH_MAX_TEXTS texts, so short texts go in larger batches
+ENCODE_BATCH_TOKEN_BUDGET = int(
+    os.environ.get("ENCODE_BATCH_TOKEN_BUDGET")
+    or BATCH_SIZE_ENCODE_CHUNKS * DOC_EMBEDDING_CONTEXT_SIZE
+)
+ENCODE_BATCH_MAX_TEXTS = int(os.environ.get("ENCODE_BATCH_MAX_TEXTS") or 64)
 # This controls the minimum number of pytorch "threads" to allocate to the embedding
 # model. If torch finds more threads on its own, this value is not used.
 MIN_THREADS_ML_MODELS = int(os.environ.get("MIN_THREADS_ML_MODELS") or 1)
+# "torch" or "onnx". With "onnx" the bi-encoder and cross-encoders are exported to ONNX
+# with int8 dynamic quantization on first load and run on ONNX Runtime, which is faster
+# on CPU only deployments. Exports are cached in ONNX_MODEL_CACHE_DIR
+MODEL_INFERENCE_BACKEND = (os.environ.get("MODEL_INFERENCE_BACKEND") or "torch").lower()
+ONNX_MODEL_CACHE_DIR = os.environ.get("ONNX_MODEL_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "danswer", "onnx"
+)
+# Exported models are compared against the torch models on a fixed sample of texts, the
+# export is discarded (and torch used) if the cosine similarity of the embeddings or the
+# correlation of the reranking scores is below this
+ONNX_MIN_SAMPLE_AGREEMENT = float(os.environ.get("ONNX_MIN_SAMPLE_AGREEMENT") or 0.99)
+# Number of query embeddings kept in memory so repeated questions skip the bi-encoder
+# entirely, set to 0 to disable. Entries expire after QUERY_EMBEDDING_CACHE_TTL seconds
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE") or 1024)
+QUERY_EMBEDDING_CACHE_TTL = int(os.environ.get("QUERY_EMBEDDING_CACHE_TTL") or 3600)
 
 
 # Cross Encoder Settings
@@ -53,6 +76,15 @@ QUERY_MAX_CONTEXT_SIZE = 256
 
 # Danswer custom Deep Learning Models
 INTENT_MODEL_VERSION = "danswer/intent-model"
+# "torch", "onnx" or "tensorflow". The published intent model only has TensorFlow weights,
+# the torch runtime converts them once and caches the result in INTENT_MODEL_CACHE_DIR,
+# after which TensorFlow is never imported. The onnx runtime exports the converted model
+# to ONNX_MODEL_CACHE_DIR. The images convert the weights during the build so TensorFlow
+# isn't installed in them, outside of the images it is in requirements/tensorflow.txt
+INTENT_MODEL_RUNTIME = (os.environ.get("INTENT_MODEL_RUNTIME") or "torch").lower()
+INTENT_MODEL_CACHE_DIR = os.environ.get("INTENT_MODEL_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "danswer", "intent"
+)
 
 
 #####
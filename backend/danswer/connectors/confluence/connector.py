@@ -10,10 +10,20 @@ from atlassian import Confluence  # type:ignore
 from requests import HTTPError
 
 from danswer.configs.app_configs import CONFLUENCE_CONNECTOR_LABELS_TO_SKIP
+from danswer.configs.app_configs import CONFLUENCE_CONNECTOR_REQUESTS_PER_SECOND
 from danswer.configs.app_configs import CONTINUE_ON_CONNECTOR_FAILURE
 from danswer.configs.app_configs import INDEX_BATCH_SIZE
 from danswer.configs.constants import DocumentSource
 from danswer.connectors.cross_connector_utils.html_utils import parse_html_page_basic
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    build_credential_key,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    get_shared_token_bucket,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    RateLimitedSession,
+)
 from danswer.connectors.interfaces import GenerateDocumentsOutput
 from danswer.connectors.interfaces import LoadConnector
 from danswer.connectors.interfaces import PollConnector
@@ -127,6 +137,10 @@ class ConfluenceConnector(LoadConnector, PollConnector):
     def load_credentials(self, credentials: dict[str, Any]) -> dict[str, Any] | None:
         username = credentials["confluence_username"]
         access_token = credentials["confluence_access_token"]
+        rate_limiter = get_shared_token_bucket(
+            build_credential_key("confluence", self.wiki_base, access_token),
+            rate=CONFLUENCE_CONNECTOR_REQUESTS_PER_SECOND,
+        )
         self.confluence_client = Confluence(
             url=self.wiki_base,
             # passing in username causes issues for Confluence data center
@@ -134,6 +148,7 @@ class ConfluenceConnector(LoadConnector, PollConnector):
             password=access_token if self.is_cloud else None,
             token=access_token if not self.is_cloud else None,
             cloud=self.is_cloud,
+            session=RateLimitedSession(rate_limiter),
         )
         return None
 
@@ -1,22 +1,60 @@
 import json
 import os
+import tempfile
 import zipfile
 from collections.abc import Generator
+from collections.abc import Iterable
 from pathlib import Path
 from typing import Any
 from typing import IO
 
+import docx2txt  # type:ignore
 from pypdf import PdfReader
 
+from danswer.configs.app_configs import FILE_EXTRACTION_MAX_CHARS
+from danswer.configs.app_configs import FILE_EXTRACTION_SPOOL_MAX_MEMORY_BYTES
+from danswer.configs.app_configs import PDF_PAGES_PER_SECTION
+from danswer.connectors.models import Section
 from danswer.utils.logger import setup_logger
 
 
 logger = setup_logger()
 
 _METADATA_FLAG = "#DANSWER_METADATA="
+_SPOOL_CHUNK_SIZE = 1024 * 1024
 
 
-def read_pdf_file(file: IO[Any], file_name: str, pdf_pass: str | None = None) -> str:
+def make_spooled_file() -> IO[bytes]:
+    """In memory until it grows past FILE_EXTRACTION_SPOOL_MAX_MEMORY_BYTES, then
+    written to a temporary file on disk"""
+    return tempfile.SpooledTemporaryFile(
+        max_size=FILE_EXTRACTION_SPOOL_MAX_MEMORY_BYTES
+    )
+
+
+def spool_chunks(chunks: Iterable[bytes]) -> IO[bytes]:
+    """Writes `chunks` (e.g. a streamed download) to a spooled file, returned rewound
+    for reading. The caller is responsible for closing it"""
+    spooled_file = make_spooled_file()
+    try:
+        for chunk in chunks:
+            spooled_file.write(chunk)
+    except BaseException:
+        spooled_file.close()
+        raise
+    spooled_file.seek(0)
+    return spooled_file
+
+
+def spool_file(file: IO[bytes]) -> IO[bytes]:
+    """Copies a stream which is expensive to seek in, e.g. a zip member which is
+    decompressed from the start on every backwards seek, to a spooled file"""
+    return spool_chunks(iter(lambda: file.read(_SPOOL_CHUNK_SIZE), b""))
+
+
+def _open_pdf(
+    file: IO[Any], file_name: str, pdf_pass: str | None = None
+) -> PdfReader | None:
     pdf_reader = PdfReader(file)
 
     # if marked as encrypted and a password is provided, try to decrypt
@@ -33,13 +71,84 @@ def read_pdf_file(file: IO[Any], file_name: str, pdf_pass: str | None = None) ->
         if not decrypt_success:
             # By user request, keep files that are unreadable just so they
             # can be discoverable by title.
-            return ""
+            return None
+
+    return pdf_reader
+
+
+def read_pdf_sections(
+    file: IO[Any],
+    file_name: str,
+    link: str,
+    pdf_pass: str | None = None,
+    pages_per_section: int = PDF_PAGES_PER_SECTION,
+    max_chars: int = FILE_EXTRACTION_MAX_CHARS,
+) -> list[Section]:
+    """Extracts the text one page at a time, with every `pages_per_section` pages in a
+    Section. Extraction stops once `max_chars` characters were extracted (0 for no
+    limit), so the remaining pages of very large files are never parsed. If a page
+    fails, the pages extracted before it are kept."""
+    pdf_reader = _open_pdf(file, file_name, pdf_pass)
+    if pdf_reader is None:
+        return []
+
+    sections: list[Section] = []
+    page_texts: list[str] = []
+    num_chars = 0
+
+    def _close_section() -> None:
+        section_text = "\n".join(page_texts)
+        if section_text.strip():
+            sections.append(Section(link=link, text=section_text))
+        page_texts.clear()
 
     try:
-        return "\n".join(page.extract_text() for page in pdf_reader.pages)
+        num_pages = len(pdf_reader.pages)
+        for page_ind, page in enumerate(pdf_reader.pages):
+            if max_chars and num_chars >= max_chars:
+                logger.warning(
+                    f"Stopped extracting PDF {file_name} at page {page_ind} of "
+                    f"{num_pages}, reached the limit of {max_chars} characters"
+                )
+                break
+
+            page_text = page.extract_text()
+            if max_chars:
+                page_text = page_text[: max_chars - num_chars]
+            num_chars += len(page_text)
+            page_texts.append(page_text)
+            if len(page_texts) >= pages_per_section:
+                _close_section()
     except Exception:
         logger.exception(f"Failed to read PDF {file_name}")
-        return ""
+
+    _close_section()
+    return sections
+
+
+def read_pdf_file(file: IO[Any], file_name: str, pdf_pass: str | None = None) -> str:
+    return "\n".join(
+        section.text
+        for section in read_pdf_sections(
+            file=file, file_name=file_name, link="", pdf_pass=pdf_pass
+        )
+    )
+
+
+def read_docx_sections(
+    file: IO[Any],
+    file_name: str,
+    link: str,
+    max_chars: int = FILE_EXTRACTION_MAX_CHARS,
+) -> list[Section]:
+    """DOCX files have no pages, the text is a single Section"""
+    text = docx2txt.process(file)
+    if max_chars and len(text) > max_chars:
+        logger.warning(
+            f"Truncated DOCX {file_name} to the limit of {max_chars} characters"
+        )
+        text = text[:max_chars]
+    return [Section(link=link, text=text)] if text.strip() else []
 
 
 def is_macos_resource_fork_file(file_name: str) -> bool:
@@ -1,10 +1,21 @@
+import email.utils
+import hashlib
+import math
+import sqlite3
+import threading
 import time
+from collections import deque
 from collections.abc import Callable
+from datetime import datetime
+from datetime import timezone
 from functools import wraps
 from typing import Any
 from typing import cast
 from typing import TypeVar
 
+import requests
+
+from danswer.configs.app_configs import CONNECTOR_RATE_LIMIT_STATE_PATH
 from danswer.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -24,7 +35,8 @@ class _RateLimitDecorator:
     Implementation inspired by the `ratelimit` library:
     https://github.com/tomasbasham/ratelimit.
 
-    NOTE: is not thread safe.
+    NOTE: limits the calls of a single process, see `TokenBucket` and
+    `get_shared_token_bucket` to share a limit across threads and processes.
     """
 
     def __init__(
@@ -41,18 +53,24 @@ class _RateLimitDecorator:
         self.sleep_backoff = sleep_backoff
         self.max_num_sleep = max_num_sleep
 
-        self.call_history: list[float] = []
-        self.curr_calls = 0
+        self.call_history: deque[float] = deque()
+        self._lock = threading.Lock()
 
-    def __call__(self, func: F) -> F:
-        @wraps(func)
-        def wrapped_func(*args: list, **kwargs: dict[str, Any]) -> Any:
+    def _try_add_call(self) -> bool:
+        with self._lock:
             # cleanup calls which are no longer relevant
             self._cleanup()
+            if len(self.call_history) >= self.max_calls:
+                return False
+            self.call_history.append(time.monotonic())
+            return True
 
-            # check if we've exceeded the rate limit
+    def __call__(self, func: F) -> F:
+        @wraps(func)
+        def wrapped_func(*args: list, **kwargs: dict[str, Any]) -> Any:
+            # check if we've exceeded the rate limit, the lock is not held while sleeping
             sleep_cnt = 0
-            while len(self.call_history) == self.max_calls:
+            while not self._try_add_call():
                 sleep_time = self.sleep_time * (self.sleep_backoff**sleep_cnt)
                 logger.info(
                     f"Rate limit exceeded for function {func.__name__}. "
@@ -65,22 +83,200 @@ class _RateLimitDecorator:
                         f"Exceeded '{self.max_num_sleep}' retries for function '{func.__name__}'"
                     )
 
-                self._cleanup()
-
-            # add the current call to the call history
-            self.call_history.append(time.monotonic())
             return func(*args, **kwargs)
 
         return cast(F, wrapped_func)
 
     def _cleanup(self) -> None:
-        curr_time = time.monotonic()
-        time_to_expire_before = curr_time - self.period
-        self.call_history = [
-            call_time
-            for call_time in self.call_history
-            if call_time > time_to_expire_before
-        ]
+        # calls are in order, so the expired ones are at the front
+        time_to_expire_before = time.monotonic() - self.period
+        while self.call_history and self.call_history[0] <= time_to_expire_before:
+            self.call_history.popleft()
 
 
 rate_limit_builder = _RateLimitDecorator
+
+
+class TokenBucket:
+    """Thread safe token bucket allowing `rate` calls per second on average, with bursts
+    of up to `capacity` calls. Callers reserve their token under the lock and sleep
+    outside of it, so waiting callers are served in the order they arrived. The state
+    is just the balance and when it was last refilled, so every call is O(1)."""
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, balance: float, elapsed: float) -> float:
+        return min(self.capacity, balance + max(elapsed, 0) * self.rate)
+
+    def _update_balance(self, update: Callable[[float], float]) -> float:
+        """Refills the bucket and replaces its balance with `update` of it, returns
+        the new balance"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = update(self._refill(self._tokens, now - self._last_refill))
+            self._last_refill = now
+            return self._tokens
+
+    def acquire(self, tokens: float = 1) -> float:
+        """Blocks until `tokens` are available, returns the time waited in seconds"""
+        # may go negative, which is the debt of the callers already waiting
+        balance = self._update_balance(lambda balance: balance - tokens)
+        wait_time = max(-balance / self.rate, 0)
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+    def pause(self, seconds: float) -> None:
+        """Hands out no more tokens for `seconds`, e.g. per the Retry-After header of
+        a rate limited response. Callers already waiting for a token are not held
+        back."""
+        self._update_balance(lambda balance: min(balance, -seconds * self.rate))
+
+
+class SharedTokenBucket(TokenBucket):
+    """TokenBucket whose balance is kept in a SQLite file, shared by every process
+    using the same `key` and file, e.g. the indexing workers fetching with the same
+    credential. The balance is updated in a single transaction per call, SQLite
+    handles the cross process locking. Times are wall clock times as monotonic clocks
+    can't be compared between processes."""
+
+    def __init__(
+        self, key: str, rate: float, db_path: str, capacity: float | None = None
+    ) -> None:
+        super().__init__(rate, capacity)
+        self.key = key
+        # transactions are started explicitly to lock the database before reading
+        self._conn = sqlite3.connect(
+            db_path, timeout=60, check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS token_bucket "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _update_balance(self, update: Callable[[float], float]) -> float:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM token_bucket WHERE key = ?",
+                    (self.key,),
+                ).fetchone()
+                now = time.time()
+                balance = update(
+                    self.capacity if row is None else self._refill(row[0], now - row[1])
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO token_bucket (key, tokens, updated_at) "
+                    "VALUES (?, ?, ?)",
+                    (self.key, balance, now),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return balance
+
+
+_SHARED_TOKEN_BUCKETS: dict[str, TokenBucket] = {}
+_SHARED_TOKEN_BUCKETS_LOCK = threading.Lock()
+
+
+def build_credential_key(source: str, *secrets: str) -> str:
+    """Identifies a credential for `get_shared_token_bucket` without keeping its
+    secrets"""
+    return f"{source}:{hashlib.sha256(chr(0).join(secrets).encode()).hexdigest()[:32]}"
+
+
+def get_shared_token_bucket(
+    key: str, rate: float, capacity: float | None = None
+) -> TokenBucket:
+    """Token bucket shared by all threads using `key`, and by all processes through
+    CONNECTOR_RATE_LIMIT_STATE_PATH. If that file can't be opened the bucket is only
+    shared within this process."""
+    with _SHARED_TOKEN_BUCKETS_LOCK:
+        if key not in _SHARED_TOKEN_BUCKETS:
+            try:
+                _SHARED_TOKEN_BUCKETS[key] = SharedTokenBucket(
+                    key,
+                    rate,
+                    db_path=CONNECTOR_RATE_LIMIT_STATE_PATH,
+                    capacity=capacity,
+                )
+            except sqlite3.Error as e:
+                logger.warning(
+                    f"Unable to open the rate limit state at "
+                    f"'{CONNECTOR_RATE_LIMIT_STATE_PATH}', limiting '{key}' per "
+                    f"process: {e}"
+                )
+                _SHARED_TOKEN_BUCKETS[key] = TokenBucket(rate, capacity)
+        return _SHARED_TOKEN_BUCKETS[key]
+
+
+def parse_retry_after(retry_after: str | None) -> float | None:
+    """Seconds to wait per a Retry-After header, which is either a number of seconds
+    or an HTTP date"""
+    if not retry_after:
+        return None
+    try:
+        seconds = float(retry_after)
+        return max(seconds, 0) if math.isfinite(seconds) else None
+    except ValueError:
+        pass
+
+    try:
+        retry_time = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_time.tzinfo is None:
+        retry_time = retry_time.replace(tzinfo=timezone.utc)
+    return max((retry_time - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+class RateLimitedSession(requests.Session):
+    """Session taking a token from `rate_limiter` for every request. Rate limited
+    (429) responses pause the limiter for their Retry-After and are retried, up to
+    `max_retries` times after which the 429 response is returned."""
+
+    def __init__(
+        self,
+        rate_limiter: TokenBucket,
+        max_retries: int = 5,
+        default_retry_after: float = 10,  # in seconds, if the response has none
+    ) -> None:
+        super().__init__()
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.default_retry_after = default_retry_after
+
+    def request(  # type: ignore[override]
+        self, method: str | bytes, url: str | bytes, *args: Any, **kwargs: Any
+    ) -> requests.Response:
+        num_retries = 0
+        while True:
+            self.rate_limiter.acquire()
+            response = super().request(method, url, *args, **kwargs)
+            if (
+                response.status_code != requests.codes.too_many_requests
+                or num_retries >= self.max_retries
+            ):
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is None:
+                retry_after = self.default_retry_after
+            logger.info(
+                f"Rate limited on {response.url!r}, retrying after {retry_after}s"
+            )
+            self.rate_limiter.pause(retry_after)
+            num_retries += 1
@@ -94,8 +94,15 @@ def instantiate_connector(
     input_type: InputType,
     connector_specific_config: dict[str, Any],
     credentials: dict[str, Any],
+    connector_id: int | None = None,
 ) -> tuple[BaseConnector, dict[str, Any] | None]:
     connector_class = identify_connector_class(source, input_type)
+    if connector_class is WebConnector and connector_id is not None:
+        # keeps the state of the crawled pages per connector
+        connector_specific_config = {
+            **connector_specific_config,
+            "connector_id": connector_id,
+        }
     connector = connector_class(**connector_specific_config)
     new_credentials = connector.load_credentials(credentials)
 
@@ -10,7 +10,8 @@ from danswer.configs.app_configs import INDEX_BATCH_SIZE
 from danswer.configs.constants import DocumentSource
 from danswer.connectors.cross_connector_utils.file_utils import load_files_from_zip
 from danswer.connectors.cross_connector_utils.file_utils import read_file
-from danswer.connectors.cross_connector_utils.file_utils import read_pdf_file
+from danswer.connectors.cross_connector_utils.file_utils import read_pdf_sections
+from danswer.connectors.cross_connector_utils.file_utils import spool_file
 from danswer.connectors.file.utils import check_file_ext_is_valid
 from danswer.connectors.file.utils import get_file_ext
 from danswer.connectors.interfaces import GenerateDocumentsOutput
@@ -30,7 +31,12 @@ def _open_files_at_location(
 
     if extension == ".zip":
         for file_info, file in load_files_from_zip(file_path, ignore_dirs=True):
-            yield file_info.filename, file
+            if get_file_ext(file_info.filename) == ".pdf":
+                # the PDF reader seeks around the file, which is slow on zip members
+                with spool_file(file) as spooled_file:
+                    yield file_info.filename, spooled_file
+            else:
+                yield file_info.filename, file
     elif extension == ".txt" or extension == ".pdf":
         mode = "r"
         if extension == ".pdf":
@@ -52,19 +58,18 @@ def _process_file(
         logger.warning(f"Skipping file '{file_name}' with extension '{extension}'")
         return []
 
-    metadata: dict[str, Any] = {}
-
     if extension == ".pdf":
-        file_content_raw = read_pdf_file(
-            file=file, file_name=file_name, pdf_pass=pdf_pass
-        )
+        sections = read_pdf_sections(
+            file=file, file_name=file_name, link="", pdf_pass=pdf_pass
+        ) or [Section(link="", text="")]
     else:
         file_content_raw, metadata = read_file(file)
+        sections = [Section(link=metadata.get("link", ""), text=file_content_raw)]
 
     return [
         Document(
             id=file_name,
-            sections=[Section(link=metadata.get("link", ""), text=file_content_raw)],
+            sections=sections,
             source=DocumentSource.FILE,
             semantic_identifier=file_name,
             doc_updated_at=time_updated,
@@ -1,26 +1,32 @@
-import io
-import tempfile
+import threading
 from collections.abc import Iterator
 from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from datetime import timezone
 from enum import Enum
 from itertools import chain
 from typing import Any
 from typing import cast
+from typing import IO
 
-import docx2txt  # type:ignore
 from google.auth.credentials import Credentials  # type: ignore
 from googleapiclient import discovery  # type: ignore
 from googleapiclient.errors import HttpError  # type: ignore
+from googleapiclient.http import MediaIoBaseDownload  # type: ignore
 
 from danswer.configs.app_configs import CONTINUE_ON_CONNECTOR_FAILURE
 from danswer.configs.app_configs import GOOGLE_DRIVE_FOLLOW_SHORTCUTS
 from danswer.configs.app_configs import GOOGLE_DRIVE_INCLUDE_SHARED
+from danswer.configs.app_configs import GOOGLE_DRIVE_NUM_THREADS
+from danswer.configs.app_configs import GOOGLE_DRIVE_REQUESTS_PER_SECOND
 from danswer.configs.app_configs import INDEX_BATCH_SIZE
 from danswer.configs.constants import DocumentSource
 from danswer.configs.constants import IGNORE_FOR_QA
-from danswer.connectors.cross_connector_utils.file_utils import read_pdf_file
+from danswer.connectors.cross_connector_utils.file_utils import make_spooled_file
+from danswer.connectors.cross_connector_utils.file_utils import read_docx_sections
+from danswer.connectors.cross_connector_utils.file_utils import read_pdf_sections
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import TokenBucket
 from danswer.connectors.cross_connector_utils.retry_wrapper import retry_builder
 from danswer.connectors.google_drive.connector_auth import (
     get_google_drive_creds_for_authorized_user,
@@ -51,6 +57,8 @@ DRIVE_START_TIME_OFFSET = 60 * 10
 DRIVE_FOLDER_TYPE = "application/vnd.google-apps.folder"
 DRIVE_SHORTCUT_TYPE = "application/vnd.google-apps.shortcut"
 UNSUPPORTED_FILE_TYPE_CONTENT = ""  # keep empty for now
+# PDF and DOCX files are downloaded in chunks of this size, each chunk is one request
+DRIVE_DOWNLOAD_CHUNK_SIZE = 4 * 1024 * 1024
 
 
 class GDriveMimeType(str, Enum):
@@ -290,39 +298,79 @@ def get_all_files_batched(
                 )
 
 
-def extract_text(file: dict[str, str], service: discovery.Resource) -> str:
+def _text_sections(file: GoogleDriveFileType, text: str) -> list[Section]:
+    return [Section(link=file["webViewLink"], text=text)] if text else []
+
+
+def _download_file(
+    service: discovery.Resource,
+    file_id: str,
+    rate_limiter: TokenBucket | None = None,
+) -> IO[bytes]:
+    """Downloads the file in chunks to a spooled file, returned rewound for reading"""
+    spooled_file = make_spooled_file()
+    try:
+        downloader = MediaIoBaseDownload(
+            spooled_file,
+            service.files().get_media(fileId=file_id),
+            chunksize=DRIVE_DOWNLOAD_CHUNK_SIZE,
+        )
+        done = False
+        while not done:
+            # every chunk is a request against the quota
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            _, done = downloader.next_chunk()
+    except BaseException:
+        spooled_file.close()
+        raise
+    spooled_file.seek(0)
+    return spooled_file
+
+
+def extract_sections(
+    file: GoogleDriveFileType,
+    service: discovery.Resource,
+    rate_limiter: TokenBucket | None = None,
+) -> list[Section]:
+    """The sections of the file's text, none if it has no text"""
     mime_type = file["mimeType"]
     if mime_type not in set(item.value for item in GDriveMimeType):
         # Unsupported file types can still have a title, finding this way is still useful
-        return UNSUPPORTED_FILE_TYPE_CONTENT
+        return _text_sections(file, UNSUPPORTED_FILE_TYPE_CONTENT)
 
     if mime_type == GDriveMimeType.DOC.value:
-        return (
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        return _text_sections(
+            file,
             service.files()
             .export(fileId=file["id"], mimeType="text/plain")
             .execute()
-            .decode("utf-8")
+            .decode("utf-8"),
         )
     elif mime_type == GDriveMimeType.SPREADSHEET.value:
-        return (
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        return _text_sections(
+            file,
             service.files()
             .export(fileId=file["id"], mimeType="text/csv")
             .execute()
-            .decode("utf-8")
+            .decode("utf-8"),
         )
     elif mime_type == GDriveMimeType.WORD_DOC.value:
-        response = service.files().get_media(fileId=file["id"]).execute()
-        word_stream = io.BytesIO(response)
-        with tempfile.NamedTemporaryFile(delete=False) as temp:
-            temp.write(word_stream.getvalue())
-            temp_path = temp.name
-        return docx2txt.process(temp_path)
+        with _download_file(service, file["id"], rate_limiter) as docx_file:
+            return read_docx_sections(
+                file=docx_file, file_name=file["name"], link=file["webViewLink"]
+            )
     elif mime_type == GDriveMimeType.PDF.value:
-        response = service.files().get_media(fileId=file["id"]).execute()
-        file_contents = read_pdf_file(file=io.BytesIO(response), file_name=file["name"])
-        return file_contents
+        with _download_file(service, file["id"], rate_limiter) as pdf_file:
+            return read_pdf_sections(
+                file=pdf_file, file_name=file["name"], link=file["webViewLink"]
+            )
 
-    return UNSUPPORTED_FILE_TYPE_CONTENT
+    return _text_sections(file, UNSUPPORTED_FILE_TYPE_CONTENT)
 
 
 class GoogleDriveConnector(LoadConnector, PollConnector):
@@ -335,13 +383,18 @@ class GoogleDriveConnector(LoadConnector, PollConnector):
         include_shared: bool = GOOGLE_DRIVE_INCLUDE_SHARED,
         follow_shortcuts: bool = GOOGLE_DRIVE_FOLLOW_SHORTCUTS,
         continue_on_failure: bool = CONTINUE_ON_CONNECTOR_FAILURE,
+        num_threads: int = GOOGLE_DRIVE_NUM_THREADS,
+        requests_per_second: float = GOOGLE_DRIVE_REQUESTS_PER_SECOND,
     ) -> None:
         self.folder_paths = folder_paths or []
         self.batch_size = batch_size
         self.include_shared = include_shared
         self.follow_shortcuts = follow_shortcuts
         self.continue_on_failure = continue_on_failure
+        self.num_threads = max(num_threads, 1)
+        self.rate_limiter = TokenBucket(rate=requests_per_second)
         self.creds: Credentials | None = None
+        self._thread_local = threading.local()
 
     @staticmethod
     def _process_folder_paths(
@@ -421,6 +474,42 @@ class GoogleDriveConnector(LoadConnector, PollConnector):
         self.creds = creds
         return new_creds_dict
 
+    def _get_thread_service(self) -> discovery.Resource:
+        """The API client isn't thread safe, each extraction thread builds its own"""
+        service = getattr(self._thread_local, "service", None)
+        if service is None:
+            service = discovery.build("drive", "v3", credentials=self.creds)
+            self._thread_local.service = service
+        return service
+
+    def _file_to_document(self, file: GoogleDriveFileType) -> Document | None:
+        try:
+            sections = extract_sections(
+                file, self._get_thread_service(), self.rate_limiter
+            )
+            has_text = bool(sections)
+            if has_text:
+                sections[0].text = file["name"] + " - " + sections[0].text
+            else:
+                sections = [Section(link=file["webViewLink"], text=file["name"])]
+
+            return Document(
+                id=file["webViewLink"],
+                sections=sections,
+                source=DocumentSource.GOOGLE_DRIVE,
+                semantic_identifier=file["name"],
+                doc_updated_at=datetime.fromisoformat(file["modifiedTime"]).astimezone(
+                    timezone.utc
+                ),
+                metadata={} if has_text else {IGNORE_FOR_QA: True},
+            )
+        except Exception as e:
+            if not self.continue_on_failure:
+                raise e
+
+            logger.exception("Ran into exception when pulling a file from Google Drive")
+            return None
+
     def _fetch_docs_from_drive(
         self,
         start: SecondsSinceUnixEpoch | None = None,
@@ -452,39 +541,16 @@ class GoogleDriveConnector(LoadConnector, PollConnector):
                 for folder_id in folder_ids
             ]
         )
-        for files_batch in file_batches:
-            doc_batch = []
-            for file in files_batch:
-                try:
-                    text_contents = extract_text(file, service)
-                    if text_contents:
-                        full_context = file["name"] + " - " + text_contents
-                    else:
-                        full_context = file["name"]
-
-                    doc_batch.append(
-                        Document(
-                            id=file["webViewLink"],
-                            sections=[
-                                Section(link=file["webViewLink"], text=full_context)
-                            ],
-                            source=DocumentSource.GOOGLE_DRIVE,
-                            semantic_identifier=file["name"],
-                            doc_updated_at=datetime.fromisoformat(
-                                file["modifiedTime"]
-                            ).astimezone(timezone.utc),
-                            metadata={} if text_contents else {IGNORE_FOR_QA: True},
-                        )
-                    )
-                except Exception as e:
-                    if not self.continue_on_failure:
-                        raise e
-
-                    logger.exception(
-                        "Ran into exception when pulling a file from Google Drive"
-                    )
-
-            yield doc_batch
+        # The files of a batch are downloaded concurrently, map keeps the batch order
+        with ThreadPoolExecutor(
+            max_workers=self.num_threads, thread_name_prefix="gdrive_extract"
+        ) as executor:
+            for files_batch in file_batches:
+                yield [
+                    doc
+                    for doc in executor.map(self._file_to_document, files_batch)
+                    if doc is not None
+                ]
 
     def load_from_state(self) -> GenerateDocumentsOutput:
         yield from self._fetch_docs_from_drive()
@@ -55,3 +55,15 @@ class EventConnector(BaseConnector):
     @abc.abstractmethod
     def handle_event(self, event: Any) -> GenerateDocumentsOutput:
         raise NotImplementedError
+
+
+# Keeps its own record of the fetched documents, which must only be updated once the
+# documents are in the document index. Otherwise a batch which failed to index would be
+# skipped by the next run
+class IndexingAwareConnector(BaseConnector):
+    @abc.abstractmethod
+    def on_documents_indexed(self, document_ids: list[str]) -> None:
+        """Called with the ids of each batch of documents once it has been written to
+        the document index, possibly from another thread than the one fetching the
+        documents"""
+        raise NotImplementedError
@@ -21,6 +21,7 @@ from danswer.connectors.models import ConnectorMissingCredentialError
 from danswer.connectors.models import Document
 from danswer.connectors.models import Section
 from danswer.connectors.slack.utils import get_message_link
+from danswer.connectors.slack.utils import get_slack_rate_limiter
 from danswer.connectors.slack.utils import make_slack_api_call_logged
 from danswer.connectors.slack.utils import make_slack_api_call_paginated
 from danswer.connectors.slack.utils import make_slack_api_rate_limited
@@ -36,18 +37,27 @@ MessageType = dict[str, Any]
 ThreadType = list[MessageType]
 
 
+def _rate_limited_slack_api_call(
+    call: Callable[..., SlackResponse]
+) -> Callable[..., SlackResponse]:
+    # calls are methods of the client, whose token the rate limit applies to
+    client = cast(WebClient, getattr(call, "__self__"))
+    return make_slack_api_rate_limited(
+        make_slack_api_call_logged(call),
+        rate_limiter=get_slack_rate_limiter(client),
+    )
+
+
 def _make_paginated_slack_api_call(
     call: Callable[..., SlackResponse], **kwargs: Any
 ) -> Generator[dict[str, Any], None, None]:
-    return make_slack_api_call_paginated(
-        make_slack_api_rate_limited(make_slack_api_call_logged(call))
-    )(**kwargs)
+    return make_slack_api_call_paginated(_rate_limited_slack_api_call(call))(**kwargs)
 
 
 def _make_slack_api_call(
     call: Callable[..., SlackResponse], **kwargs: Any
 ) -> SlackResponse:
-    return make_slack_api_rate_limited(make_slack_api_call_logged(call))(**kwargs)
+    return _rate_limited_slack_api_call(call)(**kwargs)
 
 
 def get_channel_info(client: WebClient, channel_id: str) -> ChannelType:
@@ -10,6 +10,17 @@ from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from slack_sdk.web import SlackResponse
 
+from danswer.configs.app_configs import SLACK_CONNECTOR_REQUESTS_PER_SECOND
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    build_credential_key,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    get_shared_token_bucket,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    parse_retry_after,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import TokenBucket
 from danswer.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -66,15 +77,29 @@ def make_slack_api_call_paginated(
     return paginated_call
 
 
+def get_slack_rate_limiter(client: WebClient) -> TokenBucket:
+    """Limiter shared by every thread and indexing worker using the client's token"""
+    return get_shared_token_bucket(
+        build_credential_key("slack", client.token or ""),
+        rate=SLACK_CONNECTOR_REQUESTS_PER_SECOND,
+    )
+
+
 def make_slack_api_rate_limited(
-    call: Callable[..., SlackResponse], max_retries: int = 3
+    call: Callable[..., SlackResponse],
+    max_retries: int = 3,
+    rate_limiter: TokenBucket | None = None,
 ) -> Callable[..., SlackResponse]:
-    """Wraps calls to slack API so that they automatically handle rate limiting"""
+    """Wraps calls to slack API so that they automatically handle rate limiting.
+    With a `rate_limiter`, each call first takes a token from it and being rate limited
+    pauses it, so that the other callers sharing it also back off"""
 
     @wraps(call)
     def rate_limited_call(**kwargs: Any) -> SlackResponse:
         for _ in range(max_retries):
             try:
+                if rate_limiter is not None:
+                    rate_limiter.acquire()
                 # Make the API call
                 response = call(**kwargs)
 
@@ -86,11 +111,19 @@ def make_slack_api_rate_limited(
             except SlackApiError as e:
                 if e.response["error"] == "ratelimited":
                     # Handle rate limiting: get the 'Retry-After' header value and sleep for that duration
-                    retry_after = int(e.response.headers.get("Retry-After", 1))
+                    retry_after = parse_retry_after(
+                        e.response.headers.get("Retry-After")
+                    )
+                    if retry_after is None:
+                        retry_after = 1
                     logger.info(
                         f"Slack call rate limited, retrying after {retry_after} seconds. Exception: {e}"
                     )
-                    time.sleep(retry_after)
+                    if rate_limiter is not None:
+                        # the next acquire waits for the pause to end
+                        rate_limiter.pause(retry_after)
+                    else:
+                        time.sleep(retry_after)
                 else:
                     # Raise the error for non-transient errors
                     raise
@@ -113,9 +146,10 @@ class SlackTextCleaner:
     def _get_slack_name(self, user_id: str) -> str:
         if user_id not in self._id_to_name_map:
             try:
-                response = make_slack_api_rate_limited(self._client.users_info)(
-                    user=user_id
-                )
+                response = make_slack_api_rate_limited(
+                    self._client.users_info,
+                    rate_limiter=get_slack_rate_limiter(self._client),
+                )(user=user_id)
                 # prefer display name if set, since that is what is shown in Slack
                 self._id_to_name_map[user_id] = (
                     response["user"]["profile"]["display_name"]
@@ -1,30 +1,34 @@
-import io
+import asyncio
+import threading
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
 from enum import Enum
 from typing import Any
-from typing import cast
-from typing import Tuple
-from urllib.parse import urljoin
-from urllib.parse import urlparse
 
 import requests
 from bs4 import BeautifulSoup
 from oauthlib.oauth2 import BackendApplicationClient
-from playwright.sync_api import BrowserContext
-from playwright.sync_api import Playwright
-from playwright.sync_api import sync_playwright
 from requests_oauthlib import OAuth2Session  # type:ignore
 
 from danswer.configs.app_configs import INDEX_BATCH_SIZE
 from danswer.configs.app_configs import WEB_CONNECTOR_OAUTH_CLIENT_ID
 from danswer.configs.app_configs import WEB_CONNECTOR_OAUTH_CLIENT_SECRET
 from danswer.configs.app_configs import WEB_CONNECTOR_OAUTH_TOKEN_URL
+from danswer.configs.app_configs import WEB_CONNECTOR_PAGE_STATE_PATH
+from danswer.configs.app_configs import WEB_CONNECTOR_SKIP_UNCHANGED_PAGES
 from danswer.configs.constants import DocumentSource
-from danswer.connectors.cross_connector_utils.file_utils import read_pdf_file
-from danswer.connectors.cross_connector_utils.html_utils import web_html_cleanup
 from danswer.connectors.interfaces import GenerateDocumentsOutput
+from danswer.connectors.interfaces import IndexingAwareConnector
 from danswer.connectors.interfaces import LoadConnector
+from danswer.connectors.interfaces import PollConnector
+from danswer.connectors.interfaces import SecondsSinceUnixEpoch
 from danswer.connectors.models import Document
-from danswer.connectors.models import Section
+from danswer.connectors.web.crawler import normalize_url
+from danswer.connectors.web.crawler import WebCrawler
+from danswer.connectors.web.page_state import open_page_state_store
+from danswer.connectors.web.page_state import PageState
+from danswer.connectors.web.page_state import WebPageStateStore
 from danswer.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -41,66 +45,51 @@ class WEB_CONNECTOR_VALID_SETTINGS(str, Enum):
     UPLOAD = "upload"
 
 
-def is_valid_url(url: str) -> bool:
-    try:
-        result = urlparse(url)
-        return all([result.scheme, result.netloc])
-    except ValueError:
-        return False
-
-
-def get_internal_links(
-    base_url: str, url: str, soup: BeautifulSoup, should_ignore_pound: bool = True
-) -> set[str]:
-    internal_links = set()
-    for link in cast(list[dict[str, Any]], soup.find_all("a")):
-        href = cast(str | None, link.get("href"))
-        if not href:
-            continue
-
-        if should_ignore_pound and "#" in href:
-            href = href.split("#")[0]
-
-        if not is_valid_url(href):
-            # Relative path handling
-            href = urljoin(url, href)
-
-        if urlparse(href).netloc == urlparse(url).netloc and base_url in href:
-            internal_links.add(href)
-    return internal_links
-
-
-def start_playwright() -> Tuple[Playwright, BrowserContext]:
-    playwright = sync_playwright().start()
-    browser = playwright.chromium.launch(headless=True)
-
-    context = browser.new_context()
-
-    if (
+def get_oauth_headers() -> dict[str, str]:
+    """Headers authenticating the crawler if the site is behind OAuth"""
+    if not (
         WEB_CONNECTOR_OAUTH_CLIENT_ID
         and WEB_CONNECTOR_OAUTH_CLIENT_SECRET
         and WEB_CONNECTOR_OAUTH_TOKEN_URL
     ):
-        client = BackendApplicationClient(client_id=WEB_CONNECTOR_OAUTH_CLIENT_ID)
-        oauth = OAuth2Session(client=client)
-        token = oauth.fetch_token(
-            token_url=WEB_CONNECTOR_OAUTH_TOKEN_URL,
-            client_id=WEB_CONNECTOR_OAUTH_CLIENT_ID,
-            client_secret=WEB_CONNECTOR_OAUTH_CLIENT_SECRET,
-        )
-        context.set_extra_http_headers(
-            {"Authorization": "Bearer {}".format(token["access_token"])}
-        )
+        return {}
 
-    return playwright, context
+    client = BackendApplicationClient(client_id=WEB_CONNECTOR_OAUTH_CLIENT_ID)
+    oauth = OAuth2Session(client=client)
+    token = oauth.fetch_token(
+        token_url=WEB_CONNECTOR_OAUTH_TOKEN_URL,
+        client_id=WEB_CONNECTOR_OAUTH_CLIENT_ID,
+        client_secret=WEB_CONNECTOR_OAUTH_CLIENT_SECRET,
+    )
+    return {"Authorization": "Bearer {}".format(token["access_token"])}
 
 
-def extract_urls_from_sitemap(sitemap_url: str) -> list[str]:
+def _parse_lastmod(lastmod: str) -> datetime | None:
+    try:
+        modified_time = datetime.fromisoformat(lastmod.strip())
+    except ValueError:
+        return None
+    if "T" not in lastmod:
+        # a date only, the page may have been modified until the end of that day
+        modified_time += timedelta(days=1)
+    if modified_time.tzinfo is None:
+        modified_time = modified_time.replace(tzinfo=timezone.utc)
+    return modified_time
+
+
+def extract_urls_from_sitemap(sitemap_url: str) -> dict[str, datetime | None]:
+    """The URLs of the sitemap, in order, with their `lastmod` time if the sitemap has
+    one for them"""
     response = requests.get(sitemap_url)
     response.raise_for_status()
 
     soup = BeautifulSoup(response.content, "html.parser")
-    urls = [loc_tag.text for loc_tag in soup.find_all("loc")]
+    urls: dict[str, datetime | None] = {}
+    for loc_tag in soup.find_all("loc"):
+        lastmod_tag = loc_tag.parent.find("lastmod") if loc_tag.parent else None
+        urls[loc_tag.text.strip()] = (
+            _parse_lastmod(lastmod_tag.text) if lastmod_tag else None
+        )
 
     return urls
 
@@ -117,17 +106,31 @@ def _read_urls_file(location: str) -> list[str]:
     return urls
 
 
-class WebConnector(LoadConnector):
+class WebConnector(LoadConnector, PollConnector, IndexingAwareConnector):
     def __init__(
         self,
         base_url: str,  # Can't change this without disrupting existing users
         web_connector_type: str = WEB_CONNECTOR_VALID_SETTINGS.RECURSIVE.value,
         mintlify_cleanup: bool = True,  # Mostly ok to apply to other websites as well
         batch_size: int = INDEX_BATCH_SIZE,
+        # set when run by the indexing job, the state of the crawled pages is kept per
+        # connector to skip unchanged pages in the next crawl
+        connector_id: int | None = None,
     ) -> None:
         self.mintlify_cleanup = mintlify_cleanup
         self.batch_size = batch_size
+        self.connector_id = connector_id
         self.recursive = False
+        # `lastmod` of the sitemap URLs, pages not modified since the last crawl are
+        # skipped
+        self.url_modified_times: dict[str, datetime | None] = {}
+        # normalized URL and state of the crawled pages by document id, only saved once
+        # the document is indexed so that a failed batch isn't skipped as unchanged in
+        # the next crawl. Likewise for the start time of a finished crawl, which is
+        # saved once all of its pages are indexed
+        self._unindexed_pages: dict[str, tuple[str, PageState | None]] = {}
+        self._finished_crawl_time: datetime | None = None
+        self._unindexed_pages_lock = threading.Lock()
 
         if web_connector_type == WEB_CONNECTOR_VALID_SETTINGS.RECURSIVE.value:
             self.recursive = True
@@ -138,7 +141,10 @@ class WebConnector(LoadConnector):
             self.to_visit_list = [_ensure_valid_url(base_url)]
 
         elif web_connector_type == WEB_CONNECTOR_VALID_SETTINGS.SITEMAP:
-            self.to_visit_list = extract_urls_from_sitemap(_ensure_valid_url(base_url))
+            self.url_modified_times = extract_urls_from_sitemap(
+                _ensure_valid_url(base_url)
+            )
+            self.to_visit_list = list(self.url_modified_times)
 
         elif web_connector_type == WEB_CONNECTOR_VALID_SETTINGS.UPLOAD:
             self.to_visit_list = _read_urls_file(base_url)
@@ -153,98 +159,145 @@ class WebConnector(LoadConnector):
             logger.warning("Unexpected credentials provided for Web Connector")
         return None
 
-    def load_from_state(self) -> GenerateDocumentsOutput:
-        """Traverses through all pages found on the website
-        and converts them into documents"""
-        visited_links: set[str] = set()
-        to_visit: list[str] = self.to_visit_list
-        base_url = to_visit[0]  # For the recursive case
-        doc_batch: list[Document] = []
-
-        playwright, context = start_playwright()
-        restart_playwright = False
-        while to_visit:
-            current_url = to_visit.pop()
-            if current_url in visited_links:
-                continue
-            visited_links.add(current_url)
-
-            logger.info(f"Visiting {current_url}")
-
-            try:
-                if restart_playwright:
-                    playwright, context = start_playwright()
-                    restart_playwright = False
-
-                if current_url.split(".")[-1] == "pdf":
-                    # PDF files are not checked for links
-                    response = requests.get(current_url)
-                    page_text = read_pdf_file(
-                        file=io.BytesIO(response.content), file_name=current_url
-                    )
+    def _open_page_state_store(self) -> WebPageStateStore | None:
+        if self.connector_id is None or not WEB_CONNECTOR_SKIP_UNCHANGED_PAGES:
+            return None
+        return open_page_state_store(WEB_CONNECTOR_PAGE_STATE_PATH, self.connector_id)
+
+    def _crawl(
+        self, modified_after: datetime | None = None, since_last_crawl: bool = False
+    ) -> GenerateDocumentsOutput:
+        """`since_last_crawl` sets `modified_after` to the start of the last crawl whose
+        pages were all indexed"""
+        crawl_time = datetime.now(tz=timezone.utc)
+        page_states: dict[str, PageState] | None = None
+        page_state_store = self._open_page_state_store()
+        if page_state_store:
+            page_states = page_state_store.load()
+            if since_last_crawl:
+                modified_after = page_state_store.load_last_crawl_time()
+            page_state_store.close()
+        with self._unindexed_pages_lock:
+            self._unindexed_pages = {}
+            self._finished_crawl_time = None
+
+        to_visit = [
+            url
+            for url in self.to_visit_list
+            if modified_after is None
+            or (modified_time := self.url_modified_times.get(url)) is None
+            or modified_time >= modified_after
+        ]
+        if len(to_visit) < len(self.to_visit_list):
+            logger.info(
+                f"Skipping {len(self.to_visit_list) - len(to_visit)} pages not "
+                f"modified since {modified_after}"
+            )
 
-                    doc_batch.append(
-                        Document(
-                            id=current_url,
-                            sections=[Section(link=current_url, text=page_text)],
-                            source=DocumentSource.WEB,
-                            semantic_identifier=current_url.split(".")[-1],
-                            metadata={},
-                        )
-                    )
-                    continue
-
-                page = context.new_page()
-                page.goto(current_url)
-                final_page = page.url
-                if final_page != current_url:
-                    logger.info(f"Redirected to {final_page}")
-                    current_url = final_page
-                    if current_url in visited_links:
-                        logger.info("Redirected page already indexed")
-                        continue
-                    visited_links.add(current_url)
-
-                content = page.content()
-                soup = BeautifulSoup(content, "html.parser")
-
-                if self.recursive:
-                    internal_links = get_internal_links(base_url, current_url, soup)
-                    for link in internal_links:
-                        if link not in visited_links:
-                            to_visit.append(link)
-
-                parsed_html = web_html_cleanup(soup, self.mintlify_cleanup)
+        crawler = WebCrawler(
+            start_urls=to_visit,
+            link_base_url=self.to_visit_list[0] if self.recursive else None,
+            mintlify_cleanup=self.mintlify_cleanup,
+            headers=get_oauth_headers(),
+            page_states=page_states,
+        )
+        # the crawler is async, its workers run while the next page is awaited
+        loop = asyncio.new_event_loop()
+        crawled_pages = crawler.crawl()
+        doc_batch: list[Document] = []
+        try:
+            while True:
+                try:
+                    page = loop.run_until_complete(crawled_pages.__anext__())
+                except StopAsyncIteration:
+                    break
 
                 doc_batch.append(
                     Document(
-                        id=current_url,
-                        sections=[
-                            Section(link=current_url, text=parsed_html.cleaned_text)
-                        ],
+                        id=page.url,
+                        sections=page.sections,
                         source=DocumentSource.WEB,
-                        semantic_identifier=parsed_html.title or current_url,
+                        semantic_identifier=page.title or page.url,
                         metadata={},
                     )
                 )
+                if page_states is not None:
+                    with self._unindexed_pages_lock:
+                        self._unindexed_pages[page.url] = (
+                            normalize_url(page.url),
+                            page.page_state,
+                        )
 
-                page.close()
-            except Exception as e:
-                logger.error(f"Failed to fetch '{current_url}': {e}")
-                playwright.stop()
-                restart_playwright = True
-                continue
-
-            if len(doc_batch) >= self.batch_size:
-                playwright.stop()
-                restart_playwright = True
-                yield doc_batch
-                doc_batch = []
+                if len(doc_batch) >= self.batch_size:
+                    yield doc_batch
+                    doc_batch = []
+        finally:
+            loop.run_until_complete(crawled_pages.aclose())
+            loop.close()
 
         if doc_batch:
-            playwright.stop()
             yield doc_batch
 
+        if crawler.num_unchanged_pages:
+            logger.info(f"Skipped {crawler.num_unchanged_pages} unchanged pages")
+        if crawler.num_failed_pages:
+            # the pages are then not skipped by their `lastmod` in the next crawl
+            logger.info(
+                f"Not recording the crawl time, {crawler.num_failed_pages} pages failed"
+            )
+        elif page_states is not None:
+            with self._unindexed_pages_lock:
+                self._finished_crawl_time = crawl_time
+            self._save_crawl_time_if_indexed()
+
+    def _save_crawl_time_if_indexed(self) -> None:
+        with self._unindexed_pages_lock:
+            crawl_time = self._finished_crawl_time
+            if crawl_time is None or self._unindexed_pages:
+                return
+            self._finished_crawl_time = None
+
+        page_state_store = self._open_page_state_store()
+        if page_state_store:
+            page_state_store.put_last_crawl_time(crawl_time)
+            page_state_store.close()
+
+    def on_documents_indexed(self, document_ids: list[str]) -> None:
+        with self._unindexed_pages_lock:
+            indexed_pages = [
+                self._unindexed_pages.pop(document_id)
+                for document_id in document_ids
+                if document_id in self._unindexed_pages
+            ]
+
+        url_to_state = {
+            url: page_state
+            for url, page_state in indexed_pages
+            if page_state is not None
+        }
+        if url_to_state:
+            page_state_store = self._open_page_state_store()
+            if page_state_store:
+                page_state_store.put_many(url_to_state)
+                page_state_store.close()
+
+        self._save_crawl_time_if_indexed()
+
+    def load_from_state(self) -> GenerateDocumentsOutput:
+        """Traverses through all pages found on the website
+        and converts them into documents. Sitemap pages whose `lastmod` is before the
+        last crawl are skipped, if the pages of that crawl were all indexed"""
+        yield from self._crawl(since_last_crawl=True)
+
+    def poll_source(
+        self, start: SecondsSinceUnixEpoch, end: SecondsSinceUnixEpoch
+    ) -> GenerateDocumentsOutput:
+        """Like `load_from_state`, except for skipping the sitemap pages whose
+        `lastmod` is before `start`"""
+        yield from self._crawl(
+            modified_after=datetime.fromtimestamp(start, tz=timezone.utc)
+        )
+
 
 if __name__ == "__main__":
     connector = WebConnector("https://docs.danswer.dev/")
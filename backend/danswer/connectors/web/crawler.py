@@ -0,0 +1,668 @@
+"""Concurrent crawler behind the Web connector. Pages are fetched by a pool of asyncio
+workers sharing one browser, or with plain HTTP requests for sites whose pages don't
+need their JavaScript run, while the frontier keeps the requests to each host polite.
+Pages seen by a previous crawl are first requested conditionally and skipped if they
+haven't changed."""
+import abc
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+from dataclasses import field
+from enum import Enum
+from functools import partial
+from typing import Any
+from typing import cast
+from urllib.parse import parse_qsl
+from urllib.parse import urlencode
+from urllib.parse import urljoin
+from urllib.parse import urlparse
+from urllib.parse import urlunparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from bs4 import BeautifulSoup
+from playwright.async_api import async_playwright
+from playwright.async_api import Browser
+from playwright.async_api import BrowserContext
+from playwright.async_api import Playwright
+
+from danswer.configs.app_configs import WEB_CONNECTOR_CRAWL_DELAY
+from danswer.configs.app_configs import WEB_CONNECTOR_FETCH_MODE
+from danswer.configs.app_configs import WEB_CONNECTOR_MAX_REQUESTS_PER_HOST
+from danswer.configs.app_configs import WEB_CONNECTOR_NUM_WORKERS
+from danswer.connectors.cross_connector_utils.file_utils import make_spooled_file
+from danswer.connectors.cross_connector_utils.file_utils import read_pdf_sections
+from danswer.connectors.cross_connector_utils.html_utils import web_html_cleanup
+from danswer.connectors.models import Section
+from danswer.connectors.web.page_state import hash_page_content
+from danswer.connectors.web.page_state import PageState
+from danswer.utils.logger import setup_logger
+
+logger = setup_logger()
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_HTTP_TIMEOUT_SECONDS = 30
+_PDF_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# A site is fetched without a browser if its pages have at least this fraction of the
+# text and links without their JavaScript run
+_STATIC_PAGE_MIN_CONTENT_RATIO = 0.9
+
+
+class FetchMode(str, Enum):
+    AUTO = "auto"
+    BROWSER = "browser"
+    HTTP = "http"
+
+
+def is_valid_url(url: str) -> bool:
+    try:
+        result = urlparse(url)
+        return all([result.scheme, result.netloc])
+    except ValueError:
+        return False
+
+
+def get_internal_links(
+    base_url: str, url: str, soup: BeautifulSoup, should_ignore_pound: bool = True
+) -> set[str]:
+    internal_links = set()
+    for link in cast(list[dict[str, Any]], soup.find_all("a")):
+        href = cast(str | None, link.get("href"))
+        if not href:
+            continue
+
+        if should_ignore_pound and "#" in href:
+            href = href.split("#")[0]
+
+        if not is_valid_url(href):
+            # Relative path handling
+            href = urljoin(url, href)
+
+        if urlparse(href).netloc == urlparse(url).netloc and base_url in href:
+            internal_links.add(href)
+    return internal_links
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of `url` used to recognize the same page under different URLs,
+    e.g. differing only in the case of the host, a default port, a fragment or the
+    order of the query parameters"""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = (parsed.hostname or "").lower()
+    if parsed.port is not None and _DEFAULT_PORTS.get(scheme) != parsed.port:
+        netloc = f"{netloc}:{parsed.port}"
+    if parsed.username:
+        netloc = f"{parsed.username}@{netloc}"
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, netloc, parsed.path or "/", parsed.params, query, ""))
+
+
+def get_host(url: str) -> str:
+    return urlparse(normalize_url(url)).netloc
+
+
+def is_pdf_url(url: str) -> bool:
+    return url.split(".")[-1] == "pdf"
+
+
+@dataclass
+class _HostQueue:
+    crawl_delay: float
+    urls: deque[str] = field(default_factory=deque)
+    num_active: int = 0
+    next_request_time: float = 0.0
+
+
+class CrawlFrontier:
+    """URLs left to crawl, deduplicated on their normalized form. URLs are queued per
+    host so that at most `max_requests_per_host` requests to a host are in progress at
+    once, started at least the host's crawl delay apart."""
+
+    def __init__(self, max_requests_per_host: int, crawl_delay: float) -> None:
+        self.max_requests_per_host = max_requests_per_host
+        self.crawl_delay = crawl_delay
+        self._seen: set[str] = set()
+        self._hosts: dict[str, _HostQueue] = {}
+        self._num_queued = 0
+        self._num_active = 0
+
+    def _get_host_queue(self, host: str) -> _HostQueue:
+        if host not in self._hosts:
+            self._hosts[host] = _HostQueue(crawl_delay=self.crawl_delay)
+        return self._hosts[host]
+
+    def set_crawl_delay(self, host: str, crawl_delay: float) -> None:
+        self._get_host_queue(host).crawl_delay = crawl_delay
+
+    def mark_seen(self, url: str) -> bool:
+        """Returns False if the page was already seen"""
+        normalized_url = normalize_url(url)
+        if normalized_url in self._seen:
+            return False
+        self._seen.add(normalized_url)
+        return True
+
+    def add(self, url: str) -> bool:
+        """Queues `url` unless the page was already seen"""
+        if not self.mark_seen(url):
+            return False
+        self._get_host_queue(get_host(url)).urls.append(url)
+        self._num_queued += 1
+        return True
+
+    @property
+    def is_exhausted(self) -> bool:
+        return self._num_queued == 0 and self._num_active == 0
+
+    def pop(self, now: float) -> str | None:
+        """The next URL which may be requested at `now`, counted as in progress until
+        it is released. None if no host has a request available right now."""
+        for host_queue in self._hosts.values():
+            if (
+                host_queue.urls
+                and host_queue.num_active < self.max_requests_per_host
+                and host_queue.next_request_time <= now
+            ):
+                host_queue.num_active += 1
+                host_queue.next_request_time = now + host_queue.crawl_delay
+                self._num_queued -= 1
+                self._num_active += 1
+                return host_queue.urls.popleft()
+        return None
+
+    def next_request_time(self) -> float | None:
+        """When a crawl delay allows the next request, None if requests are only held
+        back by the requests in progress"""
+        request_times = [
+            host_queue.next_request_time
+            for host_queue in self._hosts.values()
+            if host_queue.urls and host_queue.num_active < self.max_requests_per_host
+        ]
+        return min(request_times, default=None)
+
+    def release(self, url: str) -> None:
+        self._hosts[get_host(url)].num_active -= 1
+        self._num_active -= 1
+
+
+@dataclass
+class FetchedPage:
+    # after any redirects
+    url: str
+    html: str
+    # of the raw response, None if it's not available
+    content_hash: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def to_page_state(self, links: set[str]) -> PageState | None:
+        if self.content_hash is None:
+            return None
+        return PageState(
+            content_hash=self.content_hash,
+            etag=self.etag,
+            last_modified=self.last_modified,
+            links=sorted(links),
+        )
+
+
+class PageFetcher(abc.ABC):
+    @abc.abstractmethod
+    async def fetch_html(self, url: str) -> FetchedPage:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class HttpFetcher(PageFetcher):
+    """Fetches pages without running their JavaScript"""
+
+    def __init__(
+        self,
+        headers: dict[str, str],
+        max_connections: int,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._client = httpx.AsyncClient(
+            headers=headers,
+            follow_redirects=True,
+            timeout=_HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=max_connections),
+            transport=transport,
+        )
+
+    @staticmethod
+    def _to_fetched_page(response: httpx.Response) -> FetchedPage:
+        return FetchedPage(
+            url=str(response.url),
+            html=response.text,
+            content_hash=hash_page_content([response.content]),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+
+    async def fetch_html(self, url: str) -> FetchedPage:
+        response = await self._client.get(url)
+        response.raise_for_status()
+        return self._to_fetched_page(response)
+
+    async def fetch_html_if_changed(
+        self, url: str, page_state: PageState
+    ) -> FetchedPage | None:
+        """None if the page is unchanged since `page_state`, either per the server's
+        304 response to a conditional request or per the content hash"""
+        response = await self._client.get(url, headers=page_state.conditional_headers())
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            return None
+        response.raise_for_status()
+        fetched_page = self._to_fetched_page(response)
+        if fetched_page.content_hash == page_state.content_hash:
+            return None
+        return fetched_page
+
+    async def fetch_pdf(
+        self, url: str, page_state: PageState | None = None
+    ) -> tuple[list[Section], PageState] | None:
+        """Sections of the PDF and its new state, None if it's unchanged since
+        `page_state`"""
+        # streamed to a spooled file rather than held in memory
+        with make_spooled_file() as pdf_file:
+            async with self._client.stream(
+                "GET",
+                url,
+                headers=page_state.conditional_headers() if page_state else None,
+            ) as response:
+                if response.status_code == httpx.codes.NOT_MODIFIED:
+                    return None
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(_PDF_DOWNLOAD_CHUNK_SIZE):
+                    pdf_file.write(chunk)
+
+            pdf_file.seek(0)
+            new_page_state = PageState(
+                content_hash=hash_page_content(
+                    iter(partial(pdf_file.read, _PDF_DOWNLOAD_CHUNK_SIZE), b"")
+                ),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+            if page_state and new_page_state.content_hash == page_state.content_hash:
+                return None
+
+            pdf_file.seek(0)
+            sections = await asyncio.to_thread(
+                read_pdf_sections, file=pdf_file, file_name=url, link=url
+            )
+            return sections, new_page_state
+
+    async def get_crawl_delay(self, url: str) -> float | None:
+        """Crawl-delay (or Request-rate) of the robots.txt of the site of `url`"""
+        parsed_url = urlparse(url)
+        try:
+            response = await self._client.get(
+                f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt"
+            )
+        except httpx.HTTPError:
+            return None
+        if response.status_code != 200:
+            return None
+
+        robots = RobotFileParser()
+        robots.parse(response.text.splitlines())
+        crawl_delay = robots.crawl_delay("*")
+        if crawl_delay is not None:
+            return float(crawl_delay)
+        request_rate = robots.request_rate("*")
+        if request_rate is not None and request_rate.requests > 0:
+            return request_rate.seconds / request_rate.requests
+        return None
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class BrowserFetcher(PageFetcher):
+    """Renders pages in a headless browser, each fetch in its own page. The browser is
+    started on the first fetch and restarted if it crashes."""
+
+    def __init__(self, headers: dict[str, str]) -> None:
+        self.headers = headers
+        self._playwright: Playwright | None = None
+        self._browser: Browser | None = None
+        self._context: BrowserContext | None = None
+        self._lock = asyncio.Lock()
+
+    async def _get_context(self) -> BrowserContext:
+        async with self._lock:
+            if (
+                self._context is None
+                or self._browser is None
+                or not self._browser.is_connected()
+            ):
+                await self._stop()
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                self._context = await self._browser.new_context()
+                if self.headers:
+                    await self._context.set_extra_http_headers(self.headers)
+            return self._context
+
+    async def fetch_html(self, url: str) -> FetchedPage:
+        context = await self._get_context()
+        page = await context.new_page()
+        try:
+            response = await page.goto(url)
+            html = await page.content()
+            if response is None:
+                return FetchedPage(url=page.url, html=html)
+            return FetchedPage(
+                url=page.url,
+                html=html,
+                content_hash=hash_page_content([await response.body()]),
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+            )
+        finally:
+            await page.close()
+
+    async def _stop(self) -> None:
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._playwright = self._browser = self._context = None
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._stop()
+
+
+def _count_links_and_text(html: str, mintlify_cleanup: bool) -> tuple[int, int]:
+    soup = BeautifulSoup(html, "html.parser")
+    num_links = len(soup.find_all("a", href=True))
+    return num_links, len(web_html_cleanup(soup, mintlify_cleanup).cleaned_text)
+
+
+def needs_javascript(
+    plain_page: FetchedPage, rendered_page: FetchedPage, mintlify_cleanup: bool
+) -> bool:
+    """Whether rendering the page, i.e. running its JavaScript, adds to its content"""
+    if plain_page.url != rendered_page.url:
+        return True
+    plain_links, plain_text = _count_links_and_text(plain_page.html, mintlify_cleanup)
+    rendered_links, rendered_text = _count_links_and_text(
+        rendered_page.html, mintlify_cleanup
+    )
+    return (
+        plain_text < _STATIC_PAGE_MIN_CONTENT_RATIO * rendered_text
+        or plain_links < _STATIC_PAGE_MIN_CONTENT_RATIO * rendered_links
+    )
+
+
+@dataclass
+class CrawledPage:
+    url: str
+    title: str | None
+    sections: list[Section]
+    # to skip the page in the next crawl if it doesn't change
+    page_state: PageState | None = None
+
+
+class WebCrawler:
+    """Crawls `start_urls` and, if `link_base_url` is set, the pages under it linked
+    from the crawled pages. Pages in `page_states` (by normalized URL) are skipped if
+    they haven't changed since, their links are still followed. Meant for a single
+    crawl."""
+
+    def __init__(
+        self,
+        start_urls: list[str],
+        link_base_url: str | None = None,
+        mintlify_cleanup: bool = True,
+        headers: dict[str, str] | None = None,
+        fetch_mode: str = WEB_CONNECTOR_FETCH_MODE,
+        num_workers: int = WEB_CONNECTOR_NUM_WORKERS,
+        max_requests_per_host: int = WEB_CONNECTOR_MAX_REQUESTS_PER_HOST,
+        crawl_delay: float = WEB_CONNECTOR_CRAWL_DELAY,
+        http_fetcher: HttpFetcher | None = None,
+        browser_fetcher: PageFetcher | None = None,
+        page_states: dict[str, PageState] | None = None,
+    ) -> None:
+        self.start_urls = start_urls
+        self.link_base_url = link_base_url
+        self.mintlify_cleanup = mintlify_cleanup
+        self.headers = headers or {}
+        self.fetch_mode = FetchMode(fetch_mode)
+        self.num_workers = num_workers
+        self.http_fetcher = http_fetcher
+        self.browser_fetcher = browser_fetcher
+        self.page_states = page_states or {}
+        self.num_unchanged_pages = 0
+        self.num_failed_pages = 0
+
+        self.frontier = CrawlFrontier(max_requests_per_host, crawl_delay)
+        for url in start_urls:
+            self.frontier.add(url)
+        # fetch mode of each host once detected, in auto mode
+        self.host_fetch_modes: dict[str, FetchMode] = {}
+        self._detecting_hosts: set[str] = set()
+        self._frontier_changed: asyncio.Condition | None = None
+
+    async def _set_crawl_delays(self, http_fetcher: HttpFetcher) -> None:
+        """Slows down to the robots.txt crawl delay of the hosts being crawled"""
+        host_urls = {get_host(url): url for url in self.start_urls}
+        crawl_delays = await asyncio.gather(
+            *(http_fetcher.get_crawl_delay(url) for url in host_urls.values())
+        )
+        for host, crawl_delay in zip(host_urls, crawl_delays):
+            if crawl_delay is not None and crawl_delay > self.frontier.crawl_delay:
+                logger.info(
+                    f"Using the robots.txt crawl delay of {host}: {crawl_delay}s"
+                )
+                self.frontier.set_crawl_delay(host, crawl_delay)
+
+    async def _notify_frontier_changed(self) -> None:
+        assert self._frontier_changed is not None
+        async with self._frontier_changed:
+            self._frontier_changed.notify_all()
+
+    async def _next_url(self) -> str | None:
+        """Waits until the frontier has a URL which may be requested, None once the
+        crawl is done"""
+        assert self._frontier_changed is not None
+        async with self._frontier_changed:
+            while not self.frontier.is_exhausted:
+                now = time.monotonic()
+                url = self.frontier.pop(now)
+                if url is not None:
+                    return url
+
+                next_request_time = self.frontier.next_request_time()
+                try:
+                    await asyncio.wait_for(
+                        self._frontier_changed.wait(),
+                        None if next_request_time is None else next_request_time - now,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        return None
+
+    async def _fetch_html(
+        self, url: str, http_fetcher: HttpFetcher, browser_fetcher: PageFetcher
+    ) -> FetchedPage:
+        host = get_host(url)
+        fetch_mode = self.host_fetch_modes.get(host, self.fetch_mode)
+        if fetch_mode == FetchMode.HTTP:
+            return await http_fetcher.fetch_html(url)
+        if fetch_mode == FetchMode.BROWSER or host in self._detecting_hosts:
+            return await browser_fetcher.fetch_html(url)
+
+        # the first page of the host is fetched both ways to find out if its pages
+        # need to be rendered
+        self._detecting_hosts.add(host)
+        try:
+            rendered_page, plain_page = await asyncio.gather(
+                browser_fetcher.fetch_html(url),
+                http_fetcher.fetch_html(url),
+                return_exceptions=True,
+            )
+            if isinstance(rendered_page, BaseException):
+                raise rendered_page
+            if isinstance(plain_page, BaseException) or await asyncio.to_thread(
+                needs_javascript, plain_page, rendered_page, self.mintlify_cleanup
+            ):
+                self.host_fetch_modes[host] = FetchMode.BROWSER
+            else:
+                self.host_fetch_modes[host] = FetchMode.HTTP
+            logger.info(
+                f"Fetching the pages of {host} with {self.host_fetch_modes[host].value}"
+            )
+            return rendered_page
+        finally:
+            self._detecting_hosts.discard(host)
+
+    def _parse_page(self, page: FetchedPage) -> tuple[set[str], CrawledPage]:
+        soup = BeautifulSoup(page.html, "html.parser")
+        # the links are collected first as the cleanup strips parts of the page
+        internal_links = (
+            get_internal_links(self.link_base_url, page.url, soup)
+            if self.link_base_url
+            else set()
+        )
+        parsed_html = web_html_cleanup(soup, self.mintlify_cleanup)
+        return internal_links, CrawledPage(
+            url=page.url,
+            title=parsed_html.title,
+            sections=[Section(link=page.url, text=parsed_html.cleaned_text)],
+            page_state=page.to_page_state(internal_links),
+        )
+
+    async def _skip_unchanged_page(self, url: str, page_state: PageState) -> None:
+        logger.info(f"Skipping unchanged {url}")
+        self.num_unchanged_pages += 1
+        if self.link_base_url is not None and any(
+            [
+                self.frontier.add(link)
+                for link in page_state.links
+                if self.link_base_url in link
+            ]
+        ):
+            await self._notify_frontier_changed()
+
+    async def _crawl_url(
+        self, url: str, http_fetcher: HttpFetcher, browser_fetcher: PageFetcher
+    ) -> CrawledPage | None:
+        logger.info(f"Visiting {url}")
+        page_state = self.page_states.get(normalize_url(url))
+        if is_pdf_url(url):
+            # PDF files are not checked for links
+            pdf = await http_fetcher.fetch_pdf(url, page_state)
+            if pdf is None:
+                assert page_state is not None
+                await self._skip_unchanged_page(url, page_state)
+                return None
+            sections, new_page_state = pdf
+            return CrawledPage(
+                url=url,
+                title=None,
+                sections=sections or [Section(link=url, text="")],
+                page_state=new_page_state,
+            )
+
+        fetched_page: FetchedPage | None = None
+        if page_state is not None:
+            try:
+                plain_page = await http_fetcher.fetch_html_if_changed(url, page_state)
+            except httpx.HTTPError as e:
+                logger.info(f"Unable to check if {url} changed, fetching it: {e}")
+            else:
+                if plain_page is None:
+                    await self._skip_unchanged_page(url, page_state)
+                    return None
+                if (
+                    self.host_fetch_modes.get(get_host(url), self.fetch_mode)
+                    == FetchMode.HTTP
+                ):
+                    fetched_page = plain_page
+
+        if fetched_page is None:
+            fetched_page = await self._fetch_html(url, http_fetcher, browser_fetcher)
+        if normalize_url(fetched_page.url) != normalize_url(url):
+            logger.info(f"Redirected to {fetched_page.url}")
+            if not self.frontier.mark_seen(fetched_page.url):
+                logger.info("Redirected page already indexed")
+                return None
+
+        internal_links, crawled_page = await asyncio.to_thread(
+            self._parse_page, fetched_page
+        )
+        if any([self.frontier.add(link) for link in internal_links]):
+            await self._notify_frontier_changed()
+        return crawled_page
+
+    async def _run_worker(
+        self,
+        results: asyncio.Queue[CrawledPage | None],
+        http_fetcher: HttpFetcher,
+        browser_fetcher: PageFetcher,
+    ) -> None:
+        try:
+            while (url := await self._next_url()) is not None:
+                try:
+                    crawled_page = await self._crawl_url(
+                        url, http_fetcher, browser_fetcher
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to fetch '{url}': {e}")
+                    self.num_failed_pages += 1
+                    crawled_page = None
+                finally:
+                    self.frontier.release(url)
+                    await self._notify_frontier_changed()
+
+                if crawled_page is not None:
+                    await results.put(crawled_page)
+        except Exception:
+            logger.exception("Web crawler worker failed")
+            # pages may have been missed, same as a page failing
+            self.num_failed_pages += 1
+        # marks this worker as done
+        await results.put(None)
+
+    async def crawl(self) -> AsyncGenerator[CrawledPage, None]:
+        """Yields the crawled pages in the order they finish. The workers only make
+        progress while the next page is awaited, i.e. at most `num_workers` pages are
+        crawled ahead of the consumer."""
+        self._frontier_changed = asyncio.Condition()
+        http_fetcher = self.http_fetcher or HttpFetcher(
+            self.headers, max_connections=self.num_workers
+        )
+        browser_fetcher = self.browser_fetcher or BrowserFetcher(self.headers)
+
+        results: asyncio.Queue[CrawledPage | None] = asyncio.Queue(
+            maxsize=self.num_workers
+        )
+        workers: list[asyncio.Task] = []
+        try:
+            await self._set_crawl_delays(http_fetcher)
+            workers = [
+                asyncio.create_task(
+                    self._run_worker(results, http_fetcher, browser_fetcher)
+                )
+                for _ in range(self.num_workers)
+            ]
+            num_done = 0
+            while num_done < len(workers):
+                crawled_page = await results.get()
+                if crawled_page is None:
+                    num_done += 1
+                    continue
+                yield crawled_page
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await browser_fetcher.close()
+            await http_fetcher.close()
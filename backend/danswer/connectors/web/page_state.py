@@ -0,0 +1,137 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import datetime
+from datetime import timezone
+
+from danswer.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+def hash_page_content(chunks: Iterable[bytes]) -> str:
+    content_hash = hashlib.sha256()
+    for chunk in chunks:
+        content_hash.update(chunk)
+    return content_hash.hexdigest()
+
+
+@dataclass
+class PageState:
+    """What a previous crawl saw of a page, to request it conditionally and to keep
+    following its links if it hasn't changed"""
+
+    content_hash: str
+    etag: str | None = None
+    last_modified: str | None = None
+    links: list[str] = field(default_factory=list)
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class WebPageStateStore:
+    """SQLite backed state of the pages crawled by each web connector, keyed by the
+    connector id and the normalized page URL, along with the start time of the last
+    crawl whose pages were all indexed. Safe to share between threads and between the
+    indexing worker processes (SQLite handles the cross process locking)."""
+
+    def __init__(self, db_path: str, connector_id: int) -> None:
+        self.connector_id = connector_id
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS web_page_state "
+                "(connector_id INTEGER NOT NULL, url TEXT NOT NULL, "
+                "content_hash TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+                "links TEXT NOT NULL, PRIMARY KEY (connector_id, url))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS web_crawl "
+                "(connector_id INTEGER PRIMARY KEY, last_crawl_time REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def load(self) -> dict[str, PageState]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, content_hash, etag, last_modified, links "
+                "FROM web_page_state WHERE connector_id = ?",
+                (self.connector_id,),
+            ).fetchall()
+        return {
+            url: PageState(
+                content_hash=content_hash,
+                etag=etag,
+                last_modified=last_modified,
+                links=json.loads(links),
+            )
+            for url, content_hash, etag, last_modified, links in rows
+        }
+
+    def put_many(self, url_to_state: dict[str, PageState]) -> None:
+        if not url_to_state:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO web_page_state "
+                "(connector_id, url, content_hash, etag, last_modified, links) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        self.connector_id,
+                        url,
+                        state.content_hash,
+                        state.etag,
+                        state.last_modified,
+                        json.dumps(state.links),
+                    )
+                    for url, state in url_to_state.items()
+                ],
+            )
+            self._conn.commit()
+
+    def load_last_crawl_time(self) -> datetime | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_crawl_time FROM web_crawl WHERE connector_id = ?",
+                (self.connector_id,),
+            ).fetchone()
+        return datetime.fromtimestamp(row[0], tz=timezone.utc) if row else None
+
+    def put_last_crawl_time(self, crawl_time: datetime) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO web_crawl (connector_id, last_crawl_time) "
+                "VALUES (?, ?)",
+                (self.connector_id, crawl_time.timestamp()),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_page_state_store(db_path: str, connector_id: int) -> WebPageStateStore | None:
+    """None if the store can't be opened, the pages are then crawled without it"""
+    try:
+        return WebPageStateStore(db_path, connector_id)
+    except sqlite3.Error as e:
+        logger.warning(
+            f"Unable to open the web page state at '{db_path}', "
+            f"crawling every page: {e}"
+        )
+        return None
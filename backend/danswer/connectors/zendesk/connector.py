@@ -4,7 +4,17 @@ from zenpy import Zenpy  # type: ignore
 from zenpy.lib.api_objects.help_centre_objects import Article  # type: ignore
 
 from danswer.configs.app_configs import INDEX_BATCH_SIZE
+from danswer.configs.app_configs import ZENDESK_CONNECTOR_REQUESTS_PER_SECOND
 from danswer.configs.constants import DocumentSource
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    build_credential_key,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    get_shared_token_bucket,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    RateLimitedSession,
+)
 from danswer.connectors.interfaces import GenerateDocumentsOutput
 from danswer.connectors.interfaces import LoadConnector
 from danswer.connectors.interfaces import PollConnector
@@ -24,10 +34,17 @@ class ZendeskConnector(LoadConnector, PollConnector):
         self.zendesk_client: Zenpy | None = None
 
     def load_credentials(self, credentials: dict[str, Any]) -> dict[str, Any] | None:
+        # the limit applies to the whole Zendesk account, shared by every connector
+        # and indexing worker using it
+        rate_limiter = get_shared_token_bucket(
+            build_credential_key("zendesk", credentials["zendesk_subdomain"]),
+            rate=ZENDESK_CONNECTOR_REQUESTS_PER_SECOND,
+        )
         self.zendesk_client = Zenpy(
             subdomain=credentials["zendesk_subdomain"],
             email=credentials["zendesk_email"],
             token=credentials["zendesk_token"],
+            session=RateLimitedSession(rate_limiter),
         )
         return None
 
@@ -7,6 +7,7 @@ from sqlalchemy import delete
 from sqlalchemy import func
 from sqlalchemy import or_
 from sqlalchemy import select
+from sqlalchemy import update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
@@ -211,6 +212,54 @@ def upsert_documents_complete(
     )
 
 
+def get_document_content_hashes(
+    db_session: Session, document_ids: list[str]
+) -> dict[str, str | None]:
+    stmt = select(DbDocument.id, DbDocument.content_hash).where(
+        DbDocument.id.in_(document_ids)
+    )
+    return {
+        document_id: content_hash
+        for document_id, content_hash in db_session.execute(stmt).all()
+    }
+
+
+def get_document_access_hashes(
+    db_session: Session, document_ids: list[str]
+) -> dict[str, str | None]:
+    stmt = select(DbDocument.id, DbDocument.access_hash).where(
+        DbDocument.id.in_(document_ids)
+    )
+    return {
+        document_id: access_hash
+        for document_id, access_hash in db_session.execute(stmt).all()
+    }
+
+
+def update_document_hashes(
+    db_session: Session,
+    document_id_to_content_hash: dict[str, str],
+    document_id_to_access_hash: dict[str, str],
+) -> None:
+    if document_id_to_content_hash:
+        db_session.execute(
+            update(DbDocument),
+            [
+                {"id": document_id, "content_hash": content_hash}
+                for document_id, content_hash in document_id_to_content_hash.items()
+            ],
+        )
+    if document_id_to_access_hash:
+        db_session.execute(
+            update(DbDocument),
+            [
+                {"id": document_id, "access_hash": access_hash}
+                for document_id, access_hash in document_id_to_access_hash.items()
+            ],
+        )
+    db_session.commit()
+
+
 def delete_document_by_connector_credential_pair(
     db_session: Session,
     document_ids: list[str],
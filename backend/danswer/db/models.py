@@ -418,6 +418,12 @@ class Document(Base):
     secondary_owners: Mapped[list[str] | None] = mapped_column(
         postgresql.ARRAY(String), nullable=True
     )
+    # Hash of the content last written to the document index, used to skip
+    # re-chunking / re-embedding documents which haven't changed
+    content_hash: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Hash of the access / document sets last written to the document index, used to
+    # only refresh unchanged documents whose access / document sets have changed
+    access_hash: Mapped[str | None] = mapped_column(String, nullable=True)
     # TODO if more sensitive data is added here for display, make sure to add user/group permission
 
     retrieval_feedbacks: Mapped[List[DocumentRetrievalFeedback]] = relationship(
@@ -1,7 +1,13 @@
+import asyncio
+from collections.abc import AsyncIterator
 from collections.abc import Callable
 from collections.abc import Iterator
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 from sqlalchemy.orm import Session
+from starlette.concurrency import iterate_in_threadpool
 
 from danswer.configs.app_configs import DISABLE_GENERATIVE_AI
 from danswer.configs.app_configs import NUM_DOCUMENT_TOKENS_FED_TO_GENERATIVE_MODEL
@@ -14,18 +20,24 @@ from danswer.direct_qa.interfaces import DanswerAnswerPiece
 from danswer.direct_qa.interfaces import StreamingError
 from danswer.direct_qa.models import LLMMetricsContainer
 from danswer.direct_qa.qa_utils import get_usable_chunks
+from danswer.document_index.factory import get_default_async_document_index
 from danswer.document_index.factory import get_default_document_index
+from danswer.indexing.models import InferenceChunk
 from danswer.search.danswer_helper import query_intent
 from danswer.search.models import QueryFlow
 from danswer.search.models import RerankMetricsContainer
 from danswer.search.models import RetrievalMetricsContainer
+from danswer.search.models import SearchType
 from danswer.search.search_runner import chunks_to_search_docs
 from danswer.search.search_runner import danswer_search
+from danswer.search.search_runner import danswer_search_async
 from danswer.secondary_llm_flows.answer_validation import get_answer_validity
 from danswer.secondary_llm_flows.extract_filters import extract_question_time_filters
 from danswer.server.models import QAResponse
+from danswer.server.models import QueryIntent
 from danswer.server.models import QuestionRequest
 from danswer.server.models import RerankedRetrievalDocs
+from danswer.server.models import SearchDoc
 from danswer.server.utils import get_json_line
 from danswer.utils.logger import setup_logger
 from danswer.utils.timing import log_function_time
@@ -33,6 +45,48 @@ from danswer.utils.timing import log_generator_function_time
 
 logger = setup_logger()
 
+# Shared by all requests, the threads mostly wait on the intent model
+_INTENT_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="query-intent")
+
+
+def _predict_intent_in_background(
+    query: str,
+) -> Future[tuple[SearchType, QueryFlow]]:
+    """The intent prediction doesn't depend on the time filters or retrieval,
+    so run it in parallel with them rather than after"""
+    return _INTENT_EXECUTOR.submit(query_intent, query)
+
+
+@log_function_time()
+def _filter_and_search(
+    question: QuestionRequest,
+    user: User | None,
+    db_session: Session,
+    retrieval_metrics_callback: Callable[[RetrievalMetricsContainer], None]
+    | None = None,
+    rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
+) -> tuple[
+    datetime | None,
+    bool,
+    list[InferenceChunk] | None,
+    list[InferenceChunk] | None,
+    int,
+]:
+    time_cutoff, favor_recent = extract_question_time_filters(question)
+    question.filters.time_cutoff = time_cutoff
+    question.favor_recent = favor_recent
+
+    ranked_chunks, unranked_chunks, query_event_id = danswer_search(
+        question=question,
+        user=user,
+        db_session=db_session,
+        document_index=get_default_document_index(),
+        retrieval_metrics_callback=retrieval_metrics_callback,
+        rerank_metrics_callback=rerank_metrics_callback,
+    )
+
+    return time_cutoff, favor_recent, ranked_chunks, unranked_chunks, query_event_id
+
 
 @log_function_time()
 def answer_qa_query(
@@ -52,21 +106,24 @@ def answer_qa_query(
     offset_count = question.offset if question.offset is not None else 0
     logger.info(f"Received QA query: {query}")
 
-    time_cutoff, favor_recent = extract_question_time_filters(question)
-    question.filters.time_cutoff = time_cutoff
-    question.favor_recent = favor_recent
-
-    ranked_chunks, unranked_chunks, query_event_id = danswer_search(
+    # TODO retire this
+    intent_future = _predict_intent_in_background(query)
+
+    (
+        time_cutoff,
+        favor_recent,
+        ranked_chunks,
+        unranked_chunks,
+        query_event_id,
+    ) = _filter_and_search(
         question=question,
         user=user,
         db_session=db_session,
-        document_index=get_default_document_index(),
         retrieval_metrics_callback=retrieval_metrics_callback,
         rerank_metrics_callback=rerank_metrics_callback,
     )
 
-    # TODO retire this
-    predicted_search, predicted_flow = query_intent(query)
+    predicted_search, predicted_flow = intent_future.result()
 
     if not ranked_chunks:
         return QAResponse(
@@ -178,47 +235,47 @@ def answer_qa_query(
     )
 
 
-@log_generator_function_time()
-def answer_qa_query_stream(
+def _stream_answer_after_retrieval(
     question: QuestionRequest,
     user: User | None,
     db_session: Session,
-    disable_generative_answer: bool = DISABLE_GENERATIVE_AI,
+    ranked_chunks: list[InferenceChunk] | None,
+    unranked_chunks: list[InferenceChunk] | None,
+    time_cutoff: datetime | None,
+    favor_recent: bool,
+    intent_future: Future[tuple[SearchType, QueryFlow]],
+    disable_generative_answer: bool,
 ) -> Iterator[str]:
-    logger.debug(
-        f"Received QA query ({question.search_type.value} search): {question.query}"
-    )
-    logger.debug(f"Query filters: {question.filters}")
-
-    answer_so_far: str = ""
-    query = question.query
-    offset_count = question.offset if question.offset is not None else 0
+    """Sends the documents as soon as retrieval is done. If the intent model hasn't
+    finished by then, its prediction follows in its own packet once it has"""
 
-    time_cutoff, favor_recent = extract_question_time_filters(question)
-    question.filters.time_cutoff = time_cutoff
-    question.favor_recent = favor_recent
-
-    ranked_chunks, unranked_chunks, query_event_id = danswer_search(
-        question=question,
-        user=user,
-        db_session=db_session,
-        document_index=get_default_document_index(),
-    )
-
-    # TODO retire this
-    predicted_search, predicted_flow = query_intent(query)
+    def _get_intent() -> tuple[SearchType, QueryFlow]:
+        predicted_search, predicted_flow = intent_future.result()
+        # if generative AI is disabled, set flow as search so frontend
+        # doesn't ask the user if they want to run QA over more documents
+        if disable_generative_answer:
+            predicted_flow = QueryFlow.SEARCH
+        return predicted_search, predicted_flow
+
+    def _intent_packet() -> str:
+        predicted_search, predicted_flow = _get_intent()
+        intent_response = QueryIntent(
+            predicted_flow=predicted_flow, predicted_search=predicted_search
+        ).dict()
+        logger.debug(f"Sending Query Intent: {intent_response}")
+        return get_json_line(intent_response)
 
     top_docs = chunks_to_search_docs(ranked_chunks)
-    unranked_top_docs = chunks_to_search_docs(unranked_chunks)
+    predicted_search: SearchType | None = None
+    predicted_flow: QueryFlow | None = None
+    intent_sent = intent_future.done()
+    if intent_sent:
+        predicted_search, predicted_flow = _get_intent()
 
     initial_response = RerankedRetrievalDocs(
         top_documents=top_docs,
-        unranked_top_documents=unranked_top_docs,
-        # if generative AI is disabled, set flow as search so frontend
-        # doesn't ask the user if they want to run QA over more documents
-        predicted_flow=QueryFlow.SEARCH
-        if disable_generative_answer
-        else predicted_flow,
+        unranked_top_documents=chunks_to_search_docs(unranked_chunks),
+        predicted_flow=predicted_flow,
         predicted_search=predicted_search,
         time_cutoff=time_cutoff,
         favor_recent=favor_recent,
@@ -227,6 +284,35 @@ def answer_qa_query_stream(
     logger.debug(f"Sending Initial Retrival Results: {initial_response}")
     yield get_json_line(initial_response)
 
+    for packet in _stream_answer(
+        question=question,
+        user=user,
+        db_session=db_session,
+        ranked_chunks=ranked_chunks,
+        top_docs=top_docs,
+        disable_generative_answer=disable_generative_answer,
+    ):
+        if not intent_sent and intent_future.done():
+            intent_sent = True
+            yield _intent_packet()
+        yield packet
+
+    if not intent_sent:
+        yield _intent_packet()
+
+
+def _stream_answer(
+    question: QuestionRequest,
+    user: User | None,
+    db_session: Session,
+    ranked_chunks: list[InferenceChunk] | None,
+    top_docs: list[SearchDoc],
+    disable_generative_answer: bool,
+) -> Iterator[str]:
+    answer_so_far: str = ""
+    query = question.query
+    offset_count = question.offset if question.offset is not None else 0
+
     if not ranked_chunks:
         logger.debug("No Documents Found")
         return
@@ -287,3 +373,85 @@ def answer_qa_query_stream(
     )
 
     yield get_json_line({"query_event_id": query_event_id})
+
+
+@log_generator_function_time()
+def answer_qa_query_stream(
+    question: QuestionRequest,
+    user: User | None,
+    db_session: Session,
+    disable_generative_answer: bool = DISABLE_GENERATIVE_AI,
+) -> Iterator[str]:
+    logger.debug(
+        f"Received QA query ({question.search_type.value} search): {question.query}"
+    )
+    logger.debug(f"Query filters: {question.filters}")
+
+    # TODO retire this
+    intent_future = _predict_intent_in_background(question.query)
+
+    (
+        time_cutoff,
+        favor_recent,
+        ranked_chunks,
+        unranked_chunks,
+        _,
+    ) = _filter_and_search(question=question, user=user, db_session=db_session)
+
+    yield from _stream_answer_after_retrieval(
+        question=question,
+        user=user,
+        db_session=db_session,
+        ranked_chunks=ranked_chunks,
+        unranked_chunks=unranked_chunks,
+        time_cutoff=time_cutoff,
+        favor_recent=favor_recent,
+        intent_future=intent_future,
+        disable_generative_answer=disable_generative_answer,
+    )
+
+
+async def answer_qa_query_stream_async(
+    question: QuestionRequest,
+    user: User | None,
+    db_session: Session,
+    disable_generative_answer: bool = DISABLE_GENERATIVE_AI,
+) -> AsyncIterator[str]:
+    """Same flow as `answer_qa_query_stream`, but retrieval doesn't hold a threadpool
+    worker while waiting on Vespa / the model server. The LLM calls are still sync and
+    run in worker threads."""
+    logger.debug(
+        f"Received QA query ({question.search_type.value} search): {question.query}"
+    )
+    logger.debug(f"Query filters: {question.filters}")
+
+    # TODO retire this
+    intent_future = _predict_intent_in_background(question.query)
+
+    time_cutoff, favor_recent = await asyncio.to_thread(
+        extract_question_time_filters, question
+    )
+    question.filters.time_cutoff = time_cutoff
+    question.favor_recent = favor_recent
+
+    ranked_chunks, unranked_chunks, _ = await danswer_search_async(
+        question=question,
+        user=user,
+        db_session=db_session,
+        document_index=get_default_async_document_index(),
+    )
+
+    async for packet in iterate_in_threadpool(
+        _stream_answer_after_retrieval(
+            question=question,
+            user=user,
+            db_session=db_session,
+            ranked_chunks=ranked_chunks,
+            unranked_chunks=unranked_chunks,
+            time_cutoff=time_cutoff,
+            favor_recent=favor_recent,
+            intent_future=intent_future,
+            disable_generative_answer=disable_generative_answer,
+        )
+    ):
+        yield packet
@@ -1,6 +1,8 @@
 import math
 import uuid
 
+import numpy
+
 from danswer.indexing.models import IndexChunk
 from danswer.indexing.models import InferenceChunk
 
@@ -21,6 +23,12 @@ def translate_boost_count_to_multiplier(boost: int) -> float:
     return 2 / (1 + math.exp(-1 * boost / 3))
 
 
+def translate_boost_counts_to_multipliers(boosts: numpy.ndarray) -> numpy.ndarray:
+    """Vectorized version of `translate_boost_count_to_multiplier`"""
+    sigmoid = 1 / (1 + numpy.exp(-1 * boosts / 3))
+    return numpy.where(boosts < 0, 0.5 + sigmoid, 2 * sigmoid)
+
+
 def get_uuid_from_chunk(
     chunk: IndexChunk | InferenceChunk, mini_chunk_ind: int = 0
 ) -> uuid.UUID:
@@ -1,3 +1,4 @@
+from danswer.document_index.interfaces import AsyncDocumentIndex
 from danswer.document_index.interfaces import DocumentIndex
 from danswer.document_index.vespa.index import VespaIndex
 
@@ -5,3 +6,7 @@ from danswer.document_index.vespa.index import VespaIndex
 def get_default_document_index() -> DocumentIndex:
     # Currently only supporting Vespa
     return VespaIndex()
+
+
+def get_default_async_document_index() -> AsyncDocumentIndex:
+    return VespaIndex()
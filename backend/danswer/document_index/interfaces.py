@@ -1,4 +1,5 @@
 import abc
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
@@ -15,6 +16,29 @@ class DocumentInsertionRecord:
     already_existed: bool
 
 
+class DocumentIndexingError(Exception):
+    """Some chunks could not be written to the Document Index. Only their documents
+    failed, the other documents of the batch were indexed."""
+
+    def __init__(
+        self,
+        failed_chunk_ids_by_document_id: dict[str, list[int]],
+        insertion_records: set[DocumentInsertionRecord],
+    ) -> None:
+        self.failed_chunk_ids_by_document_id = failed_chunk_ids_by_document_id
+        self.failed_document_ids = set(failed_chunk_ids_by_document_id)
+        # the documents which were indexed
+        self.insertion_records = insertion_records
+        num_failed_chunks = sum(
+            len(chunk_ids) for chunk_ids in failed_chunk_ids_by_document_id.values()
+        )
+        super().__init__(
+            f"Failed to index {num_failed_chunks} chunks from "
+            f"{len(self.failed_document_ids)} documents: "
+            f"{', '.join(sorted(self.failed_document_ids))}"
+        )
+
+
 @dataclass
 class DocumentMetadata:
     connector_id: int
@@ -58,21 +82,34 @@ class Indexable(abc.ABC):
     def index(
         self, chunks: list[DocMetadataAwareIndexChunk]
     ) -> set[DocumentInsertionRecord]:
-        """Indexes document chunks into the Document Index and return the IDs of all the documents indexed"""
+        """Indexes document chunks into the Document Index and return the IDs of all the documents indexed.
+        Raises a `DocumentIndexingError` if some of the documents failed to index"""
         raise NotImplementedError
 
 
 class Deletable(abc.ABC):
     @abc.abstractmethod
-    def delete(self, doc_ids: list[str]) -> None:
-        """Removes the specified documents from the Index"""
+    def delete(
+        self,
+        doc_ids: list[str],
+        progress_callback: Callable[[int], None] | None = None,
+    ) -> None:
+        """Removes the specified documents from the Index. If provided,
+        `progress_callback` is called with the number of documents handled as
+        the deletion progresses"""
         raise NotImplementedError
 
 
 class Updatable(abc.ABC):
     @abc.abstractmethod
-    def update(self, update_requests: list[UpdateRequest]) -> None:
-        """Updates metadata for the specified documents sets in the Index"""
+    def update(
+        self,
+        update_requests: list[UpdateRequest],
+        progress_callback: Callable[[int], None] | None = None,
+    ) -> None:
+        """Updates metadata for the specified documents sets in the Index. If provided,
+        `progress_callback` is called with the number of documents handled as
+        the update progresses"""
         raise NotImplementedError
 
 
@@ -112,6 +149,42 @@ class HybridCapable(abc.ABC):
         raise NotImplementedError
 
 
+class AsyncKeywordCapable(abc.ABC):
+    @abc.abstractmethod
+    async def keyword_retrieval_async(
+        self,
+        query: str,
+        filters: IndexFilters,
+        favor_recent: bool,
+        num_to_retrieve: int,
+    ) -> list[InferenceChunk]:
+        raise NotImplementedError
+
+
+class AsyncVectorCapable(abc.ABC):
+    @abc.abstractmethod
+    async def semantic_retrieval_async(
+        self,
+        query: str,
+        filters: IndexFilters,
+        favor_recent: bool,
+        num_to_retrieve: int,
+    ) -> list[InferenceChunk]:
+        raise NotImplementedError
+
+
+class AsyncHybridCapable(abc.ABC):
+    @abc.abstractmethod
+    async def hybrid_retrieval_async(
+        self,
+        query: str,
+        filters: IndexFilters,
+        favor_recent: bool,
+        num_to_retrieve: int,
+    ) -> list[InferenceChunk]:
+        raise NotImplementedError
+
+
 class AdminCapable(abc.ABC):
     @abc.abstractmethod
     def admin_retrieval(
@@ -143,3 +216,10 @@ class VectorIndex(VectorCapable, BaseIndex, abc.ABC):
 
 class DocumentIndex(KeywordCapable, VectorCapable, HybridCapable, BaseIndex, abc.ABC):
     pass
+
+
+class AsyncDocumentIndex(
+    AsyncKeywordCapable, AsyncVectorCapable, AsyncHybridCapable, abc.ABC
+):
+    """Retrieval which doesn't block the event loop, for use from the async API
+    server endpoints"""
@@ -0,0 +1,46 @@
+from pydantic import BaseModel
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+
+class HttpPoolStats(BaseModel):
+    num_pools: int
+    # Connections opened over the lifetime of the pools, stays flat when keep-alive works
+    num_connections: int
+    num_requests: int
+
+
+def build_pooled_session(pool_size: int) -> Session:
+    """Session which keeps up to `pool_size` keep-alive connections open per host.
+    The underlying urllib3 connection pools are thread safe so a single session can be
+    shared by all of the indexing / search threads."""
+    session = Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session_pool_stats(session: Session) -> HttpPoolStats:
+    num_pools = 0
+    num_connections = 0
+    num_requests = 0
+    # the same adapter is mounted for both http and https
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        if not isinstance(adapter, HTTPAdapter):
+            continue
+
+        for key in adapter.poolmanager.pools.keys():
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            num_pools += 1
+            num_connections += pool.num_connections
+            num_requests += pool.num_requests
+
+    return HttpPoolStats(
+        num_pools=num_pools,
+        num_connections=num_connections,
+        num_requests=num_requests,
+    )
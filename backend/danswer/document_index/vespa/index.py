@@ -2,6 +2,7 @@ import concurrent.futures
 import json
 import string
 import time
+from collections.abc import Callable
 from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import datetime
@@ -13,7 +14,6 @@ from typing import cast
 import requests
 from requests import HTTPError
 from requests import Response
-from retry import retry
 
 from danswer.configs.app_configs import DOC_TIME_DECAY
 from danswer.configs.app_configs import DOCUMENT_INDEX_NAME
@@ -46,16 +46,24 @@ from danswer.configs.constants import SOURCE_TYPE
 from danswer.configs.constants import TITLE
 from danswer.configs.model_configs import SEARCH_DISTANCE_CUTOFF
 from danswer.document_index.document_index_utils import get_uuid_from_chunk
+from danswer.document_index.interfaces import AsyncDocumentIndex
 from danswer.document_index.interfaces import DocumentIndex
+from danswer.document_index.interfaces import DocumentIndexingError
 from danswer.document_index.interfaces import DocumentInsertionRecord
 from danswer.document_index.interfaces import UpdateRequest
+from danswer.document_index.vespa.http_client import build_pooled_session
+from danswer.document_index.vespa.http_client import get_session_pool_stats
+from danswer.document_index.vespa.http_client import HttpPoolStats
 from danswer.document_index.vespa.utils import remove_invalid_unicode_chars
 from danswer.indexing.models import DocMetadataAwareIndexChunk
 from danswer.indexing.models import InferenceChunk
 from danswer.search.models import IndexFilters
+from danswer.search.search_cache import bump_index_generation
 from danswer.search.search_runner import embed_query
+from danswer.search.search_runner import embed_query_async
 from danswer.search.search_runner import query_processing
 from danswer.search.search_runner import remove_stop_words
+from danswer.utils.async_http import PooledAsyncClient
 from danswer.utils.batching import batch_generator
 from danswer.utils.logger import setup_logger
 
@@ -70,35 +78,51 @@ DOCUMENT_ID_ENDPOINT = (
     f"{VESPA_APP_CONTAINER_URL}/document/v1/default/danswer_chunk/docid"
 )
 SEARCH_ENDPOINT = f"{VESPA_APP_CONTAINER_URL}/search/"
-_BATCH_SIZE = 100  # Specific to Vespa
+# Must match the schema name and the document type in DOCUMENT_ID_ENDPOINT
+_DOCUMENT_TYPE = "danswer_chunk"
+# Documents covered by a single document selection (update / delete) or chunk id query,
+# bounded to keep the expression (sent as a URL parameter) reasonably short
+_DOCUMENTS_PER_SELECTION = 32
+# Vespa's default query profile caps the hits per query at 400
+_QUERY_MAX_HITS = 400
 _NUM_THREADS = (
     16  # since Vespa doesn't allow batching of inserts / updates, we use threads
 )
+# Max number of chunk feed operations pending at once during indexing
+_FEED_MAX_IN_FLIGHT = _NUM_THREADS * 4
+# Vespa responds with 429 / 503 when it can't keep up with the feed, the other 5xx are
+# transient failures of a container node or the proxy in front of it
+_FEED_RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+_FEED_MAX_RETRIES = 5
+_FEED_INITIAL_BACKOFF_SECS = 0.5
 # Specific to Vespa, needed for highlighting matching keywords / section
 CONTENT_SUMMARY = "content_summary"
 
+# Shared by all threads so that connections to Vespa are kept alive and reused rather
+# than doing a new TCP handshake for every chunk
+_VESPA_SESSION = build_pooled_session(pool_size=_NUM_THREADS)
+# Same idea for the async retrieval flow used by the API server endpoints
+_VESPA_ASYNC_CLIENT = PooledAsyncClient(max_connections=_NUM_THREADS)
+
+
+def get_vespa_pool_stats() -> HttpPoolStats:
+    return get_session_pool_stats(_VESPA_SESSION)
+
 
 @dataclass
-class _VespaUpdateRequest:
+class _VespaFeedFailure:
     document_id: str
-    url: str
-    update_request: dict[str, dict]
-
-
-def _does_document_exist(
-    doc_chunk_id: str,
-) -> bool:
-    """Returns whether the document already exists and the users/group whitelists"""
-    doc_fetch_response = requests.get(f"{DOCUMENT_ID_ENDPOINT}/{doc_chunk_id}")
-    if doc_fetch_response.status_code == 404:
-        return False
-
-    if doc_fetch_response.status_code != 200:
-        raise RuntimeError(
-            f"Unexpected fetch document by ID value from Vespa "
-            f"with error {doc_fetch_response.status_code}"
-        )
-    return True
+    chunk_id: int
+    error: str
+
+
+@dataclass
+class _VespaSelectionRequest:
+    """An operation applied to every chunk of the given documents"""
+
+    method: str
+    document_ids: list[str]
+    body: dict[str, dict] | None = None
 
 
 def _vespa_get_updated_at_attribute(t: datetime | None) -> int | None:
@@ -111,74 +135,15 @@ def _vespa_get_updated_at_attribute(t: datetime | None) -> int | None:
     return int(t.timestamp())
 
 
-def _get_vespa_chunk_ids_by_document_id(
-    document_id: str, hits_per_page: int = _BATCH_SIZE
-) -> list[str]:
-    offset = 0
-    doc_chunk_ids = []
-    params: dict[str, int | str] = {
-        "yql": f"select documentid from {DOCUMENT_INDEX_NAME} where document_id contains '{document_id}'",
-        "timeout": "10s",
-        "offset": offset,
-        "hits": hits_per_page,
-    }
-    while True:
-        results = requests.get(SEARCH_ENDPOINT, params=params).json()
-        hits = results["root"].get("children", [])
-
-        doc_chunk_ids.extend(
-            [hit["fields"]["documentid"].split("::", 1)[-1] for hit in hits]
-        )
-        params["offset"] += hits_per_page  # type: ignore
-
-        if len(hits) < hits_per_page:
-            break
-    return doc_chunk_ids
-
-
-def _delete_vespa_doc_chunks(document_id: str) -> bool:
-    doc_chunk_ids = _get_vespa_chunk_ids_by_document_id(document_id)
-
-    failed = False
-    for chunk_id in doc_chunk_ids:
-        success = (
-            requests.delete(f"{DOCUMENT_ID_ENDPOINT}/{chunk_id}").status_code == 200
-        )
-        if not success:
-            failed = True
-            logger.error(f"Failed to delete chunk: {chunk_id}")
-
-    return not failed
-
-
-@retry(tries=3, delay=1, backoff=2)
-def _index_vespa_chunk(
-    chunk: DocMetadataAwareIndexChunk, already_existing_documents: set[str]
-) -> bool:
-    json_header = {
-        "Content-Type": "application/json",
-    }
+def _build_vespa_chunk_fields(chunk: DocMetadataAwareIndexChunk) -> dict[str, Any]:
     document = chunk.source_document
-    # No minichunk documents in vespa, minichunk vectors are stored in the chunk itself
-    vespa_chunk_id = str(get_uuid_from_chunk(chunk))
-
-    # Delete all chunks related to the document if (1) it already exists and
-    # (2) this is our first time running into it during this indexing attempt
-    chunk_exists = _does_document_exist(vespa_chunk_id)
-    if chunk_exists and document.id not in already_existing_documents:
-        deletion_success = _delete_vespa_doc_chunks(document.id)
-        if not deletion_success:
-            raise RuntimeError(
-                f"Failed to delete pre-existing chunks for with document with id: {document.id}"
-            )
 
     embeddings = chunk.embeddings
-    embeddings_name_vector_map = {"full_chunk": embeddings.full_embedding}
-    if embeddings.mini_chunk_embeddings:
-        for ind, m_c_embed in enumerate(embeddings.mini_chunk_embeddings):
-            embeddings_name_vector_map[f"mini_chunk_{ind}"] = m_c_embed
+    embeddings_name_vector_map = {"full_chunk": embeddings.full_embedding.tolist()}
+    for ind, m_c_embed in enumerate(embeddings.mini_chunk_embeddings):
+        embeddings_name_vector_map[f"mini_chunk_{ind}"] = m_c_embed.tolist()
 
-    vespa_document_fields = {
+    return {
         DOCUMENT_ID: document.id,
         CHUNK_ID: chunk.chunk_id,
         BLURB: chunk.blurb,
@@ -202,98 +167,303 @@ def _index_vespa_chunk(
         DOCUMENT_SETS: {document_set: 1 for document_set in chunk.document_sets},
     }
 
-    def _index_chunk(
-        url: str,
-        headers: dict[str, str],
-        fields: dict[str, Any],
-        log_error: bool = True,
-    ) -> Response:
-        logger.debug(f'Indexing to URL "{url}"')
-        res = requests.post(url, headers=headers, json={"fields": fields})
-        try:
-            res.raise_for_status()
-            return res
-        except Exception as e:
-            if log_error:
-                logger.error(
-                    f"Failed to index document: '{document.id}'. Got response: '{res.text}'"
-                )
-            raise e
 
-    vespa_url = f"{DOCUMENT_ID_ENDPOINT}/{vespa_chunk_id}"
-    try:
-        _index_chunk(
-            url=vespa_url,
-            headers=json_header,
-            fields=vespa_document_fields,
-            log_error=False,
-        )
-    except HTTPError as e:
-        if cast(Response, e.response).status_code != 400:
-            raise e
+def _post_with_backpressure(
+    url: str,
+    fields: dict[str, Any],
+    max_retries: int = _FEED_MAX_RETRIES,
+    initial_backoff: float = _FEED_INITIAL_BACKOFF_SECS,
+) -> Response:
+    """Vespa answers with 429 / 503 when its feed queues are full, back off and retry
+    rather than failing the chunk. Other transient 5xx responses, connection errors and
+    timeouts are retried the same way."""
+    backoff = initial_backoff
+    attempt = 0
+    while True:
+        try:
+            res = _VESPA_SESSION.post(url, json={"fields": fields})
+            if (
+                res.status_code not in _FEED_RETRYABLE_STATUS_CODES
+                or attempt >= max_retries
+            ):
+                return res
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= max_retries:
+                raise
+
+        logger.debug(f"Vespa feed failed transiently, retrying '{url}' in {backoff}s")
+        time.sleep(backoff)
+        backoff *= 2
+        attempt += 1
+
+
+def _feed_vespa_chunk(chunk: DocMetadataAwareIndexChunk) -> None:
+    # No minichunk documents in vespa, minichunk vectors are stored in the chunk itself
+    vespa_url = f"{DOCUMENT_ID_ENDPOINT}/{get_uuid_from_chunk(chunk)}"
+    vespa_document_fields = _build_vespa_chunk_fields(chunk)
 
+    logger.debug(f'Indexing to URL "{vespa_url}"')
+    res = _post_with_backpressure(vespa_url, vespa_document_fields)
+    if res.status_code == 400:
         # if it's a 400 response, try again with invalid unicode chars removed
         # only doing this on error to avoid having to go through the content
         # char by char every time
-        vespa_document_fields[BLURB] = remove_invalid_unicode_chars(
-            cast(str, vespa_document_fields[BLURB])
-        )
-        vespa_document_fields[SEMANTIC_IDENTIFIER] = remove_invalid_unicode_chars(
-            cast(str, vespa_document_fields[SEMANTIC_IDENTIFIER])
-        )
-        vespa_document_fields[CONTENT] = remove_invalid_unicode_chars(
-            cast(str, vespa_document_fields[CONTENT])
+        for field_name in [BLURB, SEMANTIC_IDENTIFIER, CONTENT, CONTENT_SUMMARY]:
+            vespa_document_fields[field_name] = remove_invalid_unicode_chars(
+                cast(str, vespa_document_fields[field_name])
+            )
+        res = _post_with_backpressure(vespa_url, vespa_document_fields)
+
+    try:
+        res.raise_for_status()
+    except HTTPError as e:
+        raise HTTPError(
+            f"Failed to index chunk {chunk.chunk_id} of document "
+            f"'{chunk.source_document.id}'. Got response: '{res.text}'"
+        ) from e
+
+
+def _feed_vespa_chunks(
+    chunks: list[DocMetadataAwareIndexChunk],
+    max_in_flight: int = _FEED_MAX_IN_FLIGHT,
+) -> list[_VespaFeedFailure]:
+    """Streams the chunks to Vespa, keeping at most `max_in_flight` operations pending
+    at once so that memory stays bounded and a slow Vespa slows down the feed rather
+    than queueing up everything. Each chunk is its own put request over the pooled
+    keep-alive connections, /document/v1 has no multi-document feed and Vespa's HTTP/2
+    feed client is Java only. Returns the chunks that could not be indexed."""
+    failures: list[_VespaFeedFailure] = []
+    chunk_iter = iter(chunks)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_NUM_THREADS) as executor:
+        in_flight: dict[
+            concurrent.futures.Future[None], DocMetadataAwareIndexChunk
+        ] = {}
+        while True:
+            for chunk in chunk_iter:
+                in_flight[executor.submit(_feed_vespa_chunk, chunk)] = chunk
+                if len(in_flight) >= max_in_flight:
+                    break
+
+            if not in_flight:
+                break
+
+            done, _ = concurrent.futures.wait(
+                in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                chunk = in_flight.pop(future)
+                exception = future.exception()
+                if exception is not None:
+                    logger.error(str(exception))
+                    failures.append(
+                        _VespaFeedFailure(
+                            document_id=chunk.source_document.id,
+                            chunk_id=chunk.chunk_id,
+                            error=str(exception),
+                        )
+                    )
+
+    return failures
+
+
+def _build_document_id_selection(document_ids: list[str]) -> str:
+    """Vespa document selection matching all chunks of the given documents"""
+    escaped_ids = [
+        document_id.replace("\\", "\\\\").replace('"', '\\"')
+        for document_id in document_ids
+    ]
+    return " or ".join(
+        f'{_DOCUMENT_TYPE}.{DOCUMENT_ID}=="{escaped_id}"' for escaped_id in escaped_ids
+    )
+
+
+def _escape_yql_string(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _query_vespa_chunk_id_hits(
+    document_ids: list[str], min_chunk_id: int = 0
+) -> tuple[list[dict[str, Any]], int]:
+    """One page of the chunks of the given documents, ordered by chunk id, along with
+    the total number of matching chunks"""
+    document_id_conditions = " or ".join(
+        f'{DOCUMENT_ID} contains "{_escape_yql_string(document_id)}"'
+        for document_id in document_ids
+    )
+    params: dict[str, str | int] = {
+        "yql": (
+            f"select documentid, {DOCUMENT_ID}, {CHUNK_ID} from {DOCUMENT_INDEX_NAME} "
+            f"where ({document_id_conditions}) and {CHUNK_ID} >= {min_chunk_id} "
+            f"order by {CHUNK_ID} asc"
+        ),
+        "hits": _QUERY_MAX_HITS,
+        "ranking": "unranked",
+        "timeout": "10s",
+    }
+    res = _VESPA_SESSION.get(SEARCH_ENDPOINT, params=params)
+    res.raise_for_status()
+    root = res.json()["root"]
+    return root.get("children", []), root.get("fields", {}).get("totalCount", 0)
+
+
+def _query_vespa_chunk_ids(document_ids: list[str]) -> dict[str, set[str]]:
+    """Finds all existing chunks of the given documents with a query on the fast-search
+    `document_id` attribute, a dictionary lookup rather than a scan of the corpus. If
+    the chunks don't fit in one page of hits the documents are split up, the chunks of
+    a single document are paged through by chunk id (unique within a document)."""
+    hits, total_count = _query_vespa_chunk_id_hits(document_ids)
+    if total_count > len(hits):
+        if len(document_ids) > 1:
+            middle = len(document_ids) // 2
+            return {
+                **_query_vespa_chunk_ids(document_ids[:middle]),
+                **_query_vespa_chunk_ids(document_ids[middle:]),
+            }
+
+        page = hits
+        while len(page) == _QUERY_MAX_HITS:
+            page, _ = _query_vespa_chunk_id_hits(
+                document_ids, min_chunk_id=hits[-1]["fields"][CHUNK_ID] + 1
+            )
+            hits.extend(page)
+
+    chunk_ids_by_document_id: dict[str, set[str]] = {}
+    for hit in hits:
+        # Vespa ids look like id:default:danswer_chunk::<chunk uuid>
+        chunk_id = hit["fields"]["documentid"].split("::", 1)[-1]
+        document_id = hit["fields"][DOCUMENT_ID]
+        chunk_ids_by_document_id.setdefault(document_id, set()).add(chunk_id)
+    return chunk_ids_by_document_id
+
+
+def _get_existing_chunk_ids_by_document_id(
+    document_ids: list[str],
+    documents_per_query: int = _DOCUMENTS_PER_SELECTION,
+) -> dict[str, set[str]]:
+    """Only the documents which have at least one chunk in the index are returned"""
+    chunk_ids_by_document_id: dict[str, set[str]] = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_NUM_THREADS) as executor:
+        futures = [
+            executor.submit(_query_vespa_chunk_ids, document_id_batch)
+            for document_id_batch in batch_generator(document_ids, documents_per_query)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            chunk_ids_by_document_id.update(future.result())
+
+    return chunk_ids_by_document_id
+
+
+def _delete_vespa_chunks(chunk_ids: list[str]) -> None:
+    def _delete_chunk(chunk_id: str) -> bool:
+        return (
+            _VESPA_SESSION.delete(f"{DOCUMENT_ID_ENDPOINT}/{chunk_id}").status_code
+            == 200
         )
-        vespa_document_fields[CONTENT_SUMMARY] = remove_invalid_unicode_chars(
-            cast(str, vespa_document_fields[CONTENT_SUMMARY])
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_NUM_THREADS) as executor:
+        future_to_chunk_id = {
+            executor.submit(_delete_chunk, chunk_id): chunk_id for chunk_id in chunk_ids
+        }
+        failed_chunk_ids = [
+            future_to_chunk_id[future]
+            for future in concurrent.futures.as_completed(future_to_chunk_id)
+            if not future.result()
+        ]
+
+    if failed_chunk_ids:
+        raise RuntimeError(f"Failed to delete chunks: {', '.join(failed_chunk_ids)}")
+
+
+def _run_vespa_selection_request(request: _VespaSelectionRequest) -> None:
+    """Vespa processes selection based updates / deletes in time slices and hands back
+    a continuation token until all matching chunks have been handled"""
+    params: dict[str, str] = {
+        "selection": _build_document_id_selection(request.document_ids),
+        "cluster": DOCUMENT_INDEX_NAME,
+    }
+    while True:
+        logger.debug(
+            f"Running {request.method} for documents {request.document_ids} "
+            f"with body {request.body}"
         )
-        _index_chunk(
-            url=vespa_url,
-            headers=json_header,
-            fields=vespa_document_fields,
-            log_error=True,
+        res = _VESPA_SESSION.request(
+            request.method, DOCUMENT_ID_ENDPOINT, params=params, json=request.body
         )
+        try:
+            res.raise_for_status()
+        except HTTPError as e:
+            raise HTTPError(
+                f"Failed to {request.method} documents: {request.document_ids}. "
+                f"Got response: '{res.text}'"
+            ) from e
+
+        continuation = res.json().get("continuation")
+        if not continuation:
+            break
+        params["continuation"] = continuation
 
-    return chunk_exists
+
+def _run_vespa_selection_requests(
+    requests_to_run: list[_VespaSelectionRequest],
+    progress_callback: Callable[[int], None] | None = None,
+) -> None:
+    """Runs the requests in parallel, calling `progress_callback` with the number of
+    documents handled each time a request finishes"""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=_NUM_THREADS) as executor:
+        future_to_request = {
+            executor.submit(_run_vespa_selection_request, request): request
+            for request in requests_to_run
+        }
+        for future in concurrent.futures.as_completed(future_to_request):
+            future.result()
+            if progress_callback:
+                progress_callback(len(future_to_request[future].document_ids))
 
 
 def _index_vespa_chunks(
     chunks: list[DocMetadataAwareIndexChunk],
 ) -> set[DocumentInsertionRecord]:
-    insertion_records: set[DocumentInsertionRecord] = set()
-    # document ids of documents that existed BEFORE this indexing
-    already_existing_documents: set[str] = set()
-
-    # use threads to parallelize since Vespa doesn't allow batching of updates
-    with concurrent.futures.ThreadPoolExecutor(max_workers=_NUM_THREADS) as executor:
-        for chunk_batch in batch_generator(chunks, _BATCH_SIZE):
-            future_to_chunk = {
-                executor.submit(
-                    _index_vespa_chunk, chunk, already_existing_documents
-                ): chunk
-                for chunk in chunk_batch
-            }
-            for future in concurrent.futures.as_completed(future_to_chunk):
-                chunk = future_to_chunk[future]
-                chunk_already_existed = future.result()
-                if chunk_already_existed:
-                    already_existing_documents.add(chunk.source_document.id)
-
-                # In the logic below, we check if the chunk comes from a doc that has already been
-                # added to already_existing_document. This works because the chunks are ordered
-                # and because the Document chunks are not separated into different batches.
-                # The first chunk is processed first and if it exists, then its entire document
-                # is marked as already existing, so if the document length increases and new chunks
-                # are added, they must come last in processing and the doc would already be in
-                # already existing documents.
-                insertion_records.add(
-                    DocumentInsertionRecord(
-                        document_id=chunk.source_document.id,
-                        already_existed=chunk.source_document.id
-                        in already_existing_documents,
-                    )
-                )
+    document_ids = list(dict.fromkeys(chunk.source_document.id for chunk in chunks))
+    # chunks of the documents that existed BEFORE this indexing, the Document chunks
+    # are never separated into different batches so this is the full set of chunks
+    existing_chunk_ids = _get_existing_chunk_ids_by_document_id(document_ids)
+
+    # Feeding overwrites chunks with the same ID in place, so the Document stays
+    # searchable throughout. Only the chunks past the new end of the Document are
+    # cleaned up afterwards
+    failed_chunk_ids_by_document_id: dict[str, list[int]] = {}
+    for failure in _feed_vespa_chunks(chunks):
+        failed_chunk_ids_by_document_id.setdefault(failure.document_id, []).append(
+            failure.chunk_id
+        )
 
+    # The stale chunks of a failed Document are kept, it is indexed again next run
+    new_chunk_ids = {str(get_uuid_from_chunk(chunk)) for chunk in chunks}
+    stale_chunk_ids = [
+        chunk_id
+        for document_id, doc_chunk_ids in existing_chunk_ids.items()
+        if document_id not in failed_chunk_ids_by_document_id
+        for chunk_id in doc_chunk_ids
+        if chunk_id not in new_chunk_ids
+    ]
+    if stale_chunk_ids:
+        logger.debug(f"Deleting {len(stale_chunk_ids)} stale chunks")
+        _delete_vespa_chunks(stale_chunk_ids)
+
+    insertion_records = {
+        DocumentInsertionRecord(
+            document_id=document_id,
+            already_existed=document_id in existing_chunk_ids,
+        )
+        for document_id in document_ids
+        if document_id not in failed_chunk_ids_by_document_id
+    }
+    if failed_chunk_ids_by_document_id:
+        raise DocumentIndexingError(
+            failed_chunk_ids_by_document_id=failed_chunk_ids_by_document_id,
+            insertion_records=insertion_records,
+        )
     return insertion_records
 
 
@@ -429,14 +599,7 @@ def _vespa_hit_to_inference_chunk(hit: dict[str, Any]) -> InferenceChunk:
     )
 
 
-def _query_vespa(query_params: Mapping[str, str | int]) -> list[InferenceChunk]:
-    if "query" in query_params and not cast(str, query_params["query"]).strip():
-        raise ValueError("No/empty query received")
-    response = requests.get(SEARCH_ENDPOINT, params=query_params)
-    response.raise_for_status()
-
-    hits = response.json()["root"].get("children", [])
-
+def _hits_to_inference_chunks(hits: list[dict[str, Any]]) -> list[InferenceChunk]:
     for hit in hits:
         if hit["fields"].get(CONTENT) is None:
             identifier = hit["fields"].get("documentid") or hit["id"]
@@ -452,7 +615,27 @@ def _query_vespa(query_params: Mapping[str, str | int]) -> list[InferenceChunk]:
     return inference_chunks
 
 
-class VespaIndex(DocumentIndex):
+def _query_vespa(query_params: Mapping[str, str | int]) -> list[InferenceChunk]:
+    if "query" in query_params and not cast(str, query_params["query"]).strip():
+        raise ValueError("No/empty query received")
+    response = _VESPA_SESSION.get(SEARCH_ENDPOINT, params=query_params)
+    response.raise_for_status()
+
+    return _hits_to_inference_chunks(response.json()["root"].get("children", []))
+
+
+async def _query_vespa_async(
+    query_params: Mapping[str, str | int]
+) -> list[InferenceChunk]:
+    if "query" in query_params and not cast(str, query_params["query"]).strip():
+        raise ValueError("No/empty query received")
+    response = await _VESPA_ASYNC_CLIENT.get().get(SEARCH_ENDPOINT, params=query_params)
+    response.raise_for_status()
+
+    return _hits_to_inference_chunks(response.json()["root"].get("children", []))
+
+
+class VespaIndex(DocumentIndex, AsyncDocumentIndex):
     yql_base = (
         f"select "
         f"documentid, "
@@ -487,7 +670,7 @@ class VespaIndex(DocumentIndex):
         logger.debug(f"Sending Vespa zip to {deploy_url}")
         headers = {"Content-Type": "application/zip"}
         with open(self.deployment_zip, "rb") as f:
-            response = requests.post(deploy_url, headers=headers, data=f)
+            response = _VESPA_SESSION.post(deploy_url, headers=headers, data=f)
             if response.status_code != 200:
                 raise RuntimeError(
                     f"Failed to prepare Vespa Danswer Index. Response: {response.text}"
@@ -497,50 +680,23 @@ class VespaIndex(DocumentIndex):
         self,
         chunks: list[DocMetadataAwareIndexChunk],
     ) -> set[DocumentInsertionRecord]:
-        return _index_vespa_chunks(chunks=chunks)
-
-    @staticmethod
-    def _apply_updates_batched(
-        updates: list[_VespaUpdateRequest],
-        batch_size: int = _BATCH_SIZE,
+        try:
+            insertion_records = _index_vespa_chunks(chunks=chunks)
+        finally:
+            # Also on failure, some of the chunks may have been written already
+            bump_index_generation()
+        logger.debug(f"Vespa connection pool stats: {get_vespa_pool_stats()}")
+        return insertion_records
+
+    def update(
+        self,
+        update_requests: list[UpdateRequest],
+        progress_callback: Callable[[int], None] | None = None,
     ) -> None:
-        """Runs a batch of updates in parallel via the ThreadPoolExecutor."""
-
-        def _update_chunk(update: _VespaUpdateRequest) -> Response:
-            update_body = json.dumps(update.update_request)
-            logger.debug(
-                f"Updating with request to {update.url} with body {update_body}"
-            )
-            return requests.put(
-                update.url,
-                headers={"Content-Type": "application/json"},
-                data=update_body,
-            )
-
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=_NUM_THREADS
-        ) as executor:
-            for update_batch in batch_generator(updates, batch_size):
-                future_to_document_id = {
-                    executor.submit(
-                        _update_chunk,
-                        update,
-                    ): update.document_id
-                    for update in update_batch
-                }
-                for future in concurrent.futures.as_completed(future_to_document_id):
-                    res = future.result()
-                    try:
-                        res.raise_for_status()
-                    except requests.HTTPError as e:
-                        failure_msg = f"Failed to update document: {future_to_document_id[future]}"
-                        raise requests.HTTPError(failure_msg) from e
-
-    def update(self, update_requests: list[UpdateRequest]) -> None:
         logger.info(f"Updating {len(update_requests)} documents in Vespa")
         start = time.time()
 
-        processed_updates_requests: list[_VespaUpdateRequest] = []
+        selection_requests: list[_VespaSelectionRequest] = []
         for update_request in update_requests:
             update_dict: dict[str, dict] = {"fields": {}}
             if update_request.boost is not None:
@@ -564,38 +720,54 @@ class VespaIndex(DocumentIndex):
                 logger.error("Update request received but nothing to update")
                 continue
 
-            for document_id in update_request.document_ids:
-                for doc_chunk_id in _get_vespa_chunk_ids_by_document_id(document_id):
-                    processed_updates_requests.append(
-                        _VespaUpdateRequest(
-                            document_id=document_id,
-                            url=f"{DOCUMENT_ID_ENDPOINT}/{doc_chunk_id}",
-                            update_request=update_dict,
-                        )
+            for document_id_batch in batch_generator(
+                update_request.document_ids, _DOCUMENTS_PER_SELECTION
+            ):
+                selection_requests.append(
+                    _VespaSelectionRequest(
+                        method="PUT", document_ids=document_id_batch, body=update_dict
                     )
+                )
 
-        self._apply_updates_batched(processed_updates_requests)
+        try:
+            _run_vespa_selection_requests(
+                selection_requests, progress_callback=progress_callback
+            )
+        finally:
+            bump_index_generation()
         logger.info(
             "Finished updating Vespa documents in %s seconds", time.time() - start
         )
 
-    def delete(self, doc_ids: list[str]) -> None:
+    def delete(
+        self,
+        doc_ids: list[str],
+        progress_callback: Callable[[int], None] | None = None,
+    ) -> None:
         logger.info(f"Deleting {len(doc_ids)} documents from Vespa")
-        for doc_id in doc_ids:
-            success = _delete_vespa_doc_chunks(doc_id)
-            if not success:
-                raise RuntimeError(
-                    f"Unable to delete document with document id: {doc_id}"
-                )
+        try:
+            _run_vespa_selection_requests(
+                [
+                    _VespaSelectionRequest(
+                        method="DELETE", document_ids=document_id_batch
+                    )
+                    for document_id_batch in batch_generator(
+                        doc_ids, _DOCUMENTS_PER_SELECTION
+                    )
+                ],
+                progress_callback=progress_callback,
+            )
+        finally:
+            bump_index_generation()
 
-    def keyword_retrieval(
-        self,
+    @staticmethod
+    def _keyword_query_params(
         query: str,
         filters: IndexFilters,
         favor_recent: bool,
-        num_to_retrieve: int = NUM_RETURNED_HITS,
-        edit_keyword_query: bool = EDIT_KEYWORD_QUERY,
-    ) -> list[InferenceChunk]:
+        num_to_retrieve: int,
+        edit_keyword_query: bool,
+    ) -> dict[str, str | int]:
         decay_multiplier = FAVOR_RECENT_DECAY_MULTIPLIER if favor_recent else 1
         vespa_where_clauses = _build_vespa_filters(filters)
         yql = (
@@ -610,7 +782,7 @@ class VespaIndex(DocumentIndex):
 
         final_query = query_processing(query) if edit_keyword_query else query
 
-        params: dict[str, str | int] = {
+        return {
             "yql": yql,
             "query": final_query,
             "input.query(decay_factor)": str(DOC_TIME_DECAY * decay_multiplier),
@@ -619,17 +791,15 @@ class VespaIndex(DocumentIndex):
             "ranking.profile": "keyword_search",
         }
 
-        return _query_vespa(params)
-
-    def semantic_retrieval(
-        self,
+    @staticmethod
+    def _semantic_query_params(
         query: str,
+        query_embedding: list[float],
         filters: IndexFilters,
         favor_recent: bool,
-        num_to_retrieve: int = NUM_RETURNED_HITS,
-        distance_cutoff: float | None = SEARCH_DISTANCE_CUTOFF,
-        edit_keyword_query: bool = EDIT_KEYWORD_QUERY,
-    ) -> list[InferenceChunk]:
+        num_to_retrieve: int,
+        edit_keyword_query: bool,
+    ) -> dict[str, str | int]:
         decay_multiplier = FAVOR_RECENT_DECAY_MULTIPLIER if favor_recent else 1
         vespa_where_clauses = _build_vespa_filters(filters)
         yql = (
@@ -642,13 +812,11 @@ class VespaIndex(DocumentIndex):
             + f'or ({{defaultIndex: "{CONTENT_SUMMARY}"}}userInput(@query)))'
         )
 
-        query_embedding = embed_query(query)
-
         query_keywords = (
             " ".join(remove_stop_words(query)) if edit_keyword_query else query
         )
 
-        params: dict[str, str | int] = {
+        return {
             "yql": yql,
             "query": query_keywords,  # Needed for highlighting
             "input.query(query_embedding)": str(query_embedding),
@@ -658,17 +826,15 @@ class VespaIndex(DocumentIndex):
             "ranking.profile": "semantic_search",
         }
 
-        return _query_vespa(params)
-
-    def hybrid_retrieval(
-        self,
+    @staticmethod
+    def _hybrid_query_params(
         query: str,
+        query_embedding: list[float],
         filters: IndexFilters,
         favor_recent: bool,
         num_to_retrieve: int,
-        distance_cutoff: float | None = SEARCH_DISTANCE_CUTOFF,
-        edit_keyword_query: bool = EDIT_KEYWORD_QUERY,
-    ) -> list[InferenceChunk]:
+        edit_keyword_query: bool,
+    ) -> dict[str, str | int]:
         decay_multiplier = FAVOR_RECENT_DECAY_MULTIPLIER if favor_recent else 1
         vespa_where_clauses = _build_vespa_filters(filters)
         # Needs to be at least as much as the value set in Vespa schema config
@@ -681,13 +847,11 @@ class VespaIndex(DocumentIndex):
             + f'or ({{defaultIndex: "{CONTENT_SUMMARY}"}}userInput(@query)))'
         )
 
-        query_embedding = embed_query(query)
-
         query_keywords = (
             " ".join(remove_stop_words(query)) if edit_keyword_query else query
         )
 
-        params: dict[str, str | int] = {
+        return {
             "yql": yql,
             "query": query_keywords,
             "input.query(query_embedding)": str(query_embedding),
@@ -697,8 +861,108 @@ class VespaIndex(DocumentIndex):
             "ranking.profile": "hybrid_search",
         }
 
+    def keyword_retrieval(
+        self,
+        query: str,
+        filters: IndexFilters,
+        favor_recent: bool,
+        num_to_retrieve: int = NUM_RETURNED_HITS,
+        edit_keyword_query: bool = EDIT_KEYWORD_QUERY,
+    ) -> list[InferenceChunk]:
+        params = self._keyword_query_params(
+            query, filters, favor_recent, num_to_retrieve, edit_keyword_query
+        )
+        return _query_vespa(params)
+
+    async def keyword_retrieval_async(
+        self,
+        query: str,
+        filters: IndexFilters,
+        favor_recent: bool,
+        num_to_retrieve: int = NUM_RETURNED_HITS,
+        edit_keyword_query: bool = EDIT_KEYWORD_QUERY,
+    ) -> list[InferenceChunk]:
+        params = self._keyword_query_params(
+            query, filters, favor_recent, num_to_retrieve, edit_keyword_query
+        )
+        return await _query_vespa_async(params)
+
+    def semantic_retrieval(
+        self,
+        query: str,
+        filters: IndexFilters,
+        favor_recent: bool,
+        num_to_retrieve: int = NUM_RETURNED_HITS,
+        distance_cutoff: float | None = SEARCH_DISTANCE_CUTOFF,
+        edit_keyword_query: bool = EDIT_KEYWORD_QUERY,
+    ) -> list[InferenceChunk]:
+        params = self._semantic_query_params(
+            query,
+            embed_query(query),
+            filters,
+            favor_recent,
+            num_to_retrieve,
+            edit_keyword_query,
+        )
         return _query_vespa(params)
 
+    async def semantic_retrieval_async(
+        self,
+        query: str,
+        filters: IndexFilters,
+        favor_recent: bool,
+        num_to_retrieve: int = NUM_RETURNED_HITS,
+        distance_cutoff: float | None = SEARCH_DISTANCE_CUTOFF,
+        edit_keyword_query: bool = EDIT_KEYWORD_QUERY,
+    ) -> list[InferenceChunk]:
+        params = self._semantic_query_params(
+            query,
+            await embed_query_async(query),
+            filters,
+            favor_recent,
+            num_to_retrieve,
+            edit_keyword_query,
+        )
+        return await _query_vespa_async(params)
+
+    def hybrid_retrieval(
+        self,
+        query: str,
+        filters: IndexFilters,
+        favor_recent: bool,
+        num_to_retrieve: int,
+        distance_cutoff: float | None = SEARCH_DISTANCE_CUTOFF,
+        edit_keyword_query: bool = EDIT_KEYWORD_QUERY,
+    ) -> list[InferenceChunk]:
+        params = self._hybrid_query_params(
+            query,
+            embed_query(query),
+            filters,
+            favor_recent,
+            num_to_retrieve,
+            edit_keyword_query,
+        )
+        return _query_vespa(params)
+
+    async def hybrid_retrieval_async(
+        self,
+        query: str,
+        filters: IndexFilters,
+        favor_recent: bool,
+        num_to_retrieve: int,
+        distance_cutoff: float | None = SEARCH_DISTANCE_CUTOFF,
+        edit_keyword_query: bool = EDIT_KEYWORD_QUERY,
+    ) -> list[InferenceChunk]:
+        params = self._hybrid_query_params(
+            query,
+            await embed_query_async(query),
+            filters,
+            favor_recent,
+            num_to_retrieve,
+            edit_keyword_query,
+        )
+        return await _query_vespa_async(params)
+
     def admin_retrieval(
         self,
         query: str,
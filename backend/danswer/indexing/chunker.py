@@ -1,5 +1,10 @@
 import abc
+import multiprocessing
+import threading
 from collections.abc import Callable
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
 from llama_index.text_splitter import SentenceSplitter
 from transformers import AutoTokenizer  # type:ignore
@@ -7,41 +12,111 @@ from transformers import AutoTokenizer  # type:ignore
 from danswer.configs.app_configs import BLURB_SIZE
 from danswer.configs.app_configs import CHUNK_OVERLAP
 from danswer.configs.app_configs import CHUNK_SIZE
+from danswer.configs.app_configs import CHUNKER_NUM_PROCESSES
+from danswer.configs.app_configs import CHUNKER_POOL_MIN_BATCH_CHARS
 from danswer.configs.app_configs import MINI_CHUNK_SIZE
 from danswer.connectors.models import Document
 from danswer.connectors.models import Section
+from danswer.indexing.models import BaseChunk
 from danswer.indexing.models import DocAwareChunk
 from danswer.search.search_nlp_models import get_default_tokenizer
+from danswer.utils.logger import setup_logger
+from danswer.utils.lru_cache import TTLLRUCache
 from danswer.utils.text_processing import shared_precompare_cleanup
 
 
+logger = setup_logger()
+
 SECTION_SEPARATOR = "\n\n"
 ChunkFunc = Callable[[Document], list[DocAwareChunk]]
 
+# The sentence splitters tokenize the same splits several times while splitting and
+# again while merging them
+_TOKEN_COUNT_CACHE_SIZE = 4096
+# Pre-tokenizers which never produce a token spanning whitespace. With these the token
+# count of sections joined by SECTION_SEPARATOR is the sum of their token counts
+_WHITESPACE_SPLITTING_PRE_TOKENIZERS = {
+    "BertPreTokenizer",
+    "Whitespace",
+    "WhitespaceSplit",
+}
+
+
+_TOKEN_COUNT_CACHE: TTLLRUCache[str, int] = TTLLRUCache(
+    max_size=_TOKEN_COUNT_CACHE_SIZE
+)
+
+
+def _count_tokens(text: str) -> int:
+    token_count = _TOKEN_COUNT_CACHE.get(text)
+    if token_count is None:
+        token_count = len(get_default_tokenizer().tokenize(text))
+        _TOKEN_COUNT_CACHE.put(text, token_count)
+    return token_count
 
-def extract_blurb(text: str, blurb_size: int) -> str:
-    token_count_func = get_default_tokenizer().tokenize
-    blurb_splitter = SentenceSplitter(
-        tokenizer=token_count_func, chunk_size=blurb_size, chunk_overlap=0
+
+def _splitter_tokenize(text: str) -> range:
+    # The splitters only ever take the len() of the tokenized text
+    return range(_count_tokens(text))
+
+
+@lru_cache(maxsize=None)
+def _get_sentence_splitter(chunk_size: int, chunk_overlap: int) -> SentenceSplitter:
+    """Building a splitter loads the sentence tokenizer, so they are reused"""
+    return SentenceSplitter(
+        tokenizer=_splitter_tokenize, chunk_size=chunk_size, chunk_overlap=chunk_overlap
     )
 
-    return blurb_splitter.split_text(text)[0]
+
+@lru_cache(maxsize=None)
+def _has_additive_token_counts(tokenizer: AutoTokenizer) -> bool:
+    if not tokenizer.is_fast:
+        return False
+    pre_tokenizer = tokenizer.backend_tokenizer.pre_tokenizer
+    return type(pre_tokenizer).__name__ in _WHITESPACE_SPLITTING_PRE_TOKENIZERS
+
+
+def _get_token_counts(texts: list[str], tokenizer: AutoTokenizer) -> list[int]:
+    """Same counts as `len(tokenizer.tokenize(text))` but in a single batched call"""
+    if not texts:
+        return []
+    return [
+        len(input_ids)
+        for input_ids in tokenizer(
+            texts,
+            add_special_tokens=False,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )["input_ids"]
+    ]
+
+
+def extract_blurb(text: str, blurb_size: int, token_count: int | None = None) -> str:
+    if token_count is not None:
+        # The splitter returns the stripped text as is if it fits in a single blurb
+        if token_count <= blurb_size and text.strip():
+            return text.strip()
+        _TOKEN_COUNT_CACHE.put(text, token_count)
+
+    return _get_sentence_splitter(chunk_size=blurb_size, chunk_overlap=0).split_text(
+        text
+    )[0]
 
 
 def chunk_large_section(
     section: Section,
     document: Document,
     start_chunk_id: int,
-    tokenizer: AutoTokenizer,
     chunk_size: int = CHUNK_SIZE,
     chunk_overlap: int = CHUNK_OVERLAP,
     blurb_size: int = BLURB_SIZE,
+    section_tok_length: int | None = None,
 ) -> list[DocAwareChunk]:
     section_text = section.text
-    blurb = extract_blurb(section_text, blurb_size)
+    blurb = extract_blurb(section_text, blurb_size, token_count=section_tok_length)
 
-    sentence_aware_splitter = SentenceSplitter(
-        tokenizer=tokenizer.tokenize, chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    sentence_aware_splitter = _get_sentence_splitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
     )
 
     split_texts = sentence_aware_splitter.split_text(section_text)
@@ -67,101 +142,216 @@ def chunk_document(
     blurb_size: int = BLURB_SIZE,
 ) -> list[DocAwareChunk]:
     tokenizer = get_default_tokenizer()
+    # Each section is tokenized once and the token count of the chunk being built is
+    # kept as a running sum, falling back to re-tokenizing the chunk text for
+    # tokenizers where tokens can span the section separator
+    additive_token_counts = _has_additive_token_counts(tokenizer)
+    separator_tok_length = len(tokenizer.tokenize(SECTION_SEPARATOR))
+    section_tok_lengths = _get_token_counts(
+        [section.text for section in document.sections], tokenizer
+    )
 
     chunks: list[DocAwareChunk] = []
     link_offsets: dict[int, str] = {}
     chunk_text = ""
-    for section in document.sections:
-        section_tok_length = len(tokenizer.tokenize(section.text))
-        current_tok_length = len(tokenizer.tokenize(chunk_text))
-        curr_offset_len = len(shared_precompare_cleanup(chunk_text))
+    # The cleanup is per character and drops the separator entirely, so the offsets can
+    # also be kept as a running sum
+    curr_offset_len = 0
+    current_tok_length = 0
+
+    def _close_chunk() -> None:
+        chunks.append(
+            DocAwareChunk(
+                source_document=document,
+                chunk_id=len(chunks),
+                blurb=extract_blurb(
+                    chunk_text,
+                    blurb_size,
+                    token_count=current_tok_length if additive_token_counts else None,
+                ),
+                content=chunk_text,
+                source_links=link_offsets,
+                section_continuation=False,
+            )
+        )
+
+    for section, section_tok_length in zip(document.sections, section_tok_lengths):
+        if not additive_token_counts:
+            current_tok_length = len(tokenizer.tokenize(chunk_text))
 
         # Large sections are considered self-contained/unique therefore they start a new chunk and are not concatenated
         # at the end by other sections
         if section_tok_length > chunk_tok_size:
             if chunk_text:
-                chunks.append(
-                    DocAwareChunk(
-                        source_document=document,
-                        chunk_id=len(chunks),
-                        blurb=extract_blurb(chunk_text, blurb_size),
-                        content=chunk_text,
-                        source_links=link_offsets,
-                        section_continuation=False,
-                    )
-                )
+                _close_chunk()
                 link_offsets = {}
                 chunk_text = ""
+                curr_offset_len = 0
+                current_tok_length = 0
 
             large_section_chunks = chunk_large_section(
                 section=section,
                 document=document,
                 start_chunk_id=len(chunks),
-                tokenizer=tokenizer,
                 chunk_size=chunk_tok_size,
                 chunk_overlap=subsection_overlap,
                 blurb_size=blurb_size,
+                section_tok_length=section_tok_length,
             )
             chunks.extend(large_section_chunks)
             continue
 
+        section_offset_len = len(shared_precompare_cleanup(section.text))
         # In the case where the whole section is shorter than a chunk, either adding to chunk or start a new one
         if (
-            current_tok_length
-            + len(tokenizer.tokenize(SECTION_SEPARATOR))
-            + section_tok_length
+            current_tok_length + separator_tok_length + section_tok_length
             <= chunk_tok_size
         ):
-            chunk_text += (
-                SECTION_SEPARATOR + section.text if chunk_text else section.text
-            )
             link_offsets[curr_offset_len] = section.link
+            if chunk_text:
+                chunk_text += SECTION_SEPARATOR + section.text
+                current_tok_length += separator_tok_length + section_tok_length
+            else:
+                chunk_text = section.text
+                current_tok_length = section_tok_length
+            curr_offset_len += section_offset_len
         else:
-            chunks.append(
-                DocAwareChunk(
-                    source_document=document,
-                    chunk_id=len(chunks),
-                    blurb=extract_blurb(chunk_text, blurb_size),
-                    content=chunk_text,
-                    source_links=link_offsets,
-                    section_continuation=False,
-                )
-            )
+            _close_chunk()
             link_offsets = {0: section.link}
             chunk_text = section.text
+            curr_offset_len = section_offset_len
+            current_tok_length = section_tok_length
 
     # Once we hit the end, if we're still in the process of building a chunk, add what we have
     if chunk_text:
-        chunks.append(
-            DocAwareChunk(
-                source_document=document,
-                chunk_id=len(chunks),
-                blurb=extract_blurb(chunk_text, blurb_size),
-                content=chunk_text,
-                source_links=link_offsets,
-                section_continuation=False,
-            )
-        )
+        _close_chunk()
     return chunks
 
 
 def split_chunk_text_into_mini_chunks(
     chunk_text: str, mini_chunk_size: int = MINI_CHUNK_SIZE
 ) -> list[str]:
-    token_count_func = get_default_tokenizer().tokenize
-    sentence_aware_splitter = SentenceSplitter(
-        tokenizer=token_count_func, chunk_size=mini_chunk_size, chunk_overlap=0
+    sentence_aware_splitter = _get_sentence_splitter(
+        chunk_size=mini_chunk_size, chunk_overlap=0
     )
 
     return sentence_aware_splitter.split_text(chunk_text)
 
 
 class Chunker:
+    @property
+    def name(self) -> str:
+        """Part of the index settings fingerprint, chunkers which produce identical chunks
+        should share a name so that switching between them doesn't re-index everything
+        """
+        return type(self).__name__
+
     @abc.abstractmethod
     def chunk(self, document: Document) -> list[DocAwareChunk]:
         raise NotImplementedError
 
+    def chunk_batch(self, documents: list[Document]) -> Iterator[list[DocAwareChunk]]:
+        """Yields the chunks of each document, in the order of `documents`"""
+        for document in documents:
+            yield self.chunk(document)
+
 
 class DefaultChunker(Chunker):
     def chunk(self, document: Document) -> list[DocAwareChunk]:
         return chunk_document(document)
+
+
+_CHUNKING_POOL: ProcessPoolExecutor | None = None
+_CHUNKING_POOL_LOCK = threading.Lock()
+
+
+def _init_chunking_worker() -> None:
+    get_default_tokenizer()
+    _get_sentence_splitter(chunk_size=BLURB_SIZE, chunk_overlap=0)
+    _get_sentence_splitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+
+
+def _chunk_document_in_worker(document: Document) -> list[BaseChunk]:
+    # The document is dropped from the chunks rather than sent back to the parent
+    return [
+        BaseChunk(
+            chunk_id=chunk.chunk_id,
+            blurb=chunk.blurb,
+            content=chunk.content,
+            source_links=chunk.source_links,
+            section_continuation=chunk.section_continuation,
+        )
+        for chunk in chunk_document(document)
+    ]
+
+
+def _get_chunking_pool(num_processes: int) -> ProcessPoolExecutor:
+    """Shared by every ProcessPoolChunker in the process and kept for its lifetime, so
+    that the workers only load the tokenizer once"""
+    global _CHUNKING_POOL
+    with _CHUNKING_POOL_LOCK:
+        if _CHUNKING_POOL is None:
+            # Not forking, the indexing process is running the pipeline threads
+            _CHUNKING_POOL = ProcessPoolExecutor(
+                max_workers=num_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_chunking_worker,
+            )
+        return _CHUNKING_POOL
+
+
+class ProcessPoolChunker(DefaultChunker):
+    """Same chunks as DefaultChunker, with the documents of a batch chunked in a pool of
+    worker processes. Small batches are chunked in process, as are all batches when
+    running in a daemonic process which can't have children. The indexing Dask workers
+    are started as non-daemonic processes when the pool is enabled."""
+
+    def __init__(
+        self,
+        num_processes: int = CHUNKER_NUM_PROCESSES,
+        min_batch_chars: int = CHUNKER_POOL_MIN_BATCH_CHARS,
+    ) -> None:
+        self.num_processes = num_processes
+        self.min_batch_chars = min_batch_chars
+        self.use_pool = num_processes > 0
+        if self.use_pool and multiprocessing.current_process().daemon:
+            logger.warning(
+                "Chunking in process, worker processes can't be started from a "
+                "daemonic process. Dask workers must be started with "
+                "distributed.worker.daemon set to False"
+            )
+            self.use_pool = False
+
+    @property
+    def name(self) -> str:
+        return DefaultChunker.__name__
+
+    def chunk_batch(self, documents: list[Document]) -> Iterator[list[DocAwareChunk]]:
+        batch_chars = sum(
+            len(section.text) for document in documents for section in document.sections
+        )
+        if not self.use_pool or batch_chars < self.min_batch_chars:
+            yield from super().chunk_batch(documents)
+            return
+
+        pool = _get_chunking_pool(self.num_processes)
+        for document, chunks in zip(
+            documents, pool.map(_chunk_document_in_worker, documents)
+        ):
+            yield [
+                DocAwareChunk(
+                    source_document=document,
+                    chunk_id=chunk.chunk_id,
+                    blurb=chunk.blurb,
+                    content=chunk.content,
+                    source_links=chunk.source_links,
+                    section_continuation=chunk.section_continuation,
+                )
+                for chunk in chunks
+            ]
+
+
+def get_default_chunker() -> Chunker:
+    if CHUNKER_NUM_PROCESSES > 0:
+        return ProcessPoolChunker(num_processes=CHUNKER_NUM_PROCESSES)
+    return DefaultChunker()
@@ -0,0 +1,64 @@
+import hashlib
+import json
+
+from danswer.access.models import DocumentAccess
+from danswer.configs.app_configs import CHUNK_OVERLAP
+from danswer.configs.app_configs import CHUNK_SIZE
+from danswer.configs.app_configs import ENABLE_MINI_CHUNK
+from danswer.configs.app_configs import MINI_CHUNK_SIZE
+from danswer.configs.model_configs import ASYM_PASSAGE_PREFIX
+from danswer.configs.model_configs import DOCUMENT_ENCODER_MODEL
+from danswer.configs.model_configs import NORMALIZE_EMBEDDINGS
+from danswer.connectors.models import Document
+
+
+def get_index_settings_fingerprint(chunker_name: str, embedder_name: str) -> str:
+    """Anything that changes the chunks / embeddings produced for identical content.
+    Changing any of these forces every document to be re-indexed."""
+    return json.dumps(
+        {
+            "chunker": chunker_name,
+            "embedder": embedder_name,
+            "chunk_size": CHUNK_SIZE,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "mini_chunk_size": MINI_CHUNK_SIZE if ENABLE_MINI_CHUNK else None,
+            "model": DOCUMENT_ENCODER_MODEL,
+            "passage_prefix": ASYM_PASSAGE_PREFIX,
+            "normalize": NORMALIZE_EMBEDDINGS,
+        },
+        sort_keys=True,
+    )
+
+
+def compute_document_content_hash(document: Document, index_settings: str) -> str:
+    """Covers every part of the Document that ends up in the document index. Access
+    and document sets are excluded since those are always refreshed from Postgres."""
+    content = {
+        "sections": [[section.link, section.text] for section in document.sections],
+        "source": document.source.value,
+        "semantic_identifier": document.semantic_identifier,
+        "title": document.title,
+        "metadata": document.metadata,
+        "doc_updated_at": document.doc_updated_at.isoformat()
+        if document.doc_updated_at is not None
+        else None,
+        "primary_owners": document.primary_owners,
+        "secondary_owners": document.secondary_owners,
+        "index_settings": index_settings,
+    }
+    # default=str for any metadata values which aren't JSON serializable
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def compute_document_access_hash(
+    access: DocumentAccess, document_sets: list[str]
+) -> str:
+    """Covers the access and document sets written to the document index, these can
+    change without the content changing"""
+    return hashlib.sha256(
+        json.dumps(
+            {"acl": sorted(access.to_acl()), "document_sets": sorted(document_sets)}
+        ).encode()
+    ).hexdigest()
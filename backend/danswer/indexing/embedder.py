@@ -1,24 +1,133 @@
-from sentence_transformers import SentenceTransformer  # type: ignore
+import numpy
 
 from danswer.configs.app_configs import ENABLE_MINI_CHUNK
 from danswer.configs.model_configs import ASYM_PASSAGE_PREFIX
-from danswer.configs.model_configs import BATCH_SIZE_ENCODE_CHUNKS
+from danswer.configs.model_configs import DOC_EMBEDDING_DIM
+from danswer.configs.model_configs import ENCODE_BATCH_MAX_TEXTS
+from danswer.configs.model_configs import ENCODE_BATCH_TOKEN_BUDGET
+from danswer.configs.model_configs import NORMALIZE_EMBEDDINGS
 from danswer.indexing.chunker import split_chunk_text_into_mini_chunks
+from danswer.indexing.embedding_cache import build_embedding_cache_key
+from danswer.indexing.embedding_cache import EmbeddingCache
+from danswer.indexing.embedding_cache import get_embedding_cache
 from danswer.indexing.models import ChunkEmbedding
 from danswer.indexing.models import DocAwareChunk
 from danswer.indexing.models import IndexChunk
 from danswer.search.models import Embedder
 from danswer.search.search_nlp_models import EmbeddingModel
+from danswer.search.search_nlp_models import get_default_tokenizer
+from danswer.utils.length_batching import build_length_bucketed_batches
+from danswer.utils.logger import setup_logger
 from danswer.utils.timing import log_function_time
 
 
+logger = setup_logger()
+
+
+def _get_token_lengths(texts: list[str], max_length: int) -> list[int]:
+    tokenizer = get_default_tokenizer()
+    return [
+        len(input_ids)
+        for input_ids in tokenizer(texts, truncation=True, max_length=max_length)[
+            "input_ids"
+        ]
+    ]
+
+
+def _embed_texts(
+    texts: list[str],
+    embedding_model: EmbeddingModel,
+    max_batch_tokens: int,
+    max_batch_size: int,
+) -> numpy.ndarray:
+    """Returns a single float32 matrix with one row per text"""
+    if not texts:
+        return numpy.empty((0, DOC_EMBEDDING_DIM), dtype=numpy.float32)
+
+    # Batches of similar length texts to avoid padding short texts up to the longest
+    # text in the batch, the rows are written back in the original order
+    embeddings: numpy.ndarray | None = None
+    for batch_inds in build_length_bucketed_batches(
+        lengths=_get_token_lengths(texts, max_length=embedding_model.max_seq_length),
+        max_batch_tokens=max_batch_tokens,
+        max_batch_size=max_batch_size,
+    ):
+        batch_embeddings = embedding_model.encode([texts[ind] for ind in batch_inds])
+        if embeddings is None:
+            embeddings = numpy.empty(
+                (len(texts), batch_embeddings.shape[1]), dtype=numpy.float32
+            )
+        embeddings[batch_inds] = batch_embeddings
+
+    assert embeddings is not None
+    return embeddings
+
+
+def _embed_texts_with_cache(
+    texts: list[str],
+    embedding_model: EmbeddingModel,
+    max_batch_tokens: int,
+    max_batch_size: int,
+    passage_prefix: str,
+    embedding_cache: EmbeddingCache,
+) -> numpy.ndarray:
+    """Only the texts without a cached embedding are sent to the model"""
+    cache_keys = [
+        build_embedding_cache_key(
+            model_name=embedding_model.model_name,
+            normalize_embeddings=NORMALIZE_EMBEDDINGS,
+            passage_prefix=passage_prefix,
+            text=text,
+        )
+        for text in texts
+    ]
+    key_to_embedding = embedding_cache.get_many(cache_keys)
+
+    hit_inds = [ind for ind, key in enumerate(cache_keys) if key in key_to_embedding]
+    missing_inds = [
+        ind for ind, key in enumerate(cache_keys) if key not in key_to_embedding
+    ]
+    new_embeddings = _embed_texts(
+        texts=[texts[ind] for ind in missing_inds],
+        embedding_model=embedding_model,
+        max_batch_tokens=max_batch_tokens,
+        max_batch_size=max_batch_size,
+    )
+    if hit_inds:
+        cached_embeddings = numpy.stack(
+            [key_to_embedding[cache_keys[ind]] for ind in hit_inds]
+        )
+        embeddings = numpy.empty(
+            (len(texts), cached_embeddings.shape[1]), dtype=numpy.float32
+        )
+        embeddings[hit_inds] = cached_embeddings
+        if missing_inds:
+            embeddings[missing_inds] = new_embeddings
+    else:
+        embeddings = new_embeddings
+
+    embedding_cache.put_many({cache_keys[ind]: embeddings[ind] for ind in missing_inds})
+
+    stats = embedding_cache.stats()
+    lookups = stats.hits + stats.misses
+    logger.info(
+        f"Embedding cache hits: {len(texts) - len(missing_inds)}/{len(texts)} texts, "
+        f"overall hit rate {stats.hits / lookups if lookups else 0:.1%} "
+        f"with {stats.size} cached embeddings"
+    )
+
+    return embeddings
+
+
 @log_function_time()
 def encode_chunks(
     chunks: list[DocAwareChunk],
-    embedding_model: SentenceTransformer | None = None,
-    batch_size: int = BATCH_SIZE_ENCODE_CHUNKS,
+    embedding_model: EmbeddingModel | None = None,
+    max_batch_tokens: int = ENCODE_BATCH_TOKEN_BUDGET,
+    max_batch_size: int = ENCODE_BATCH_MAX_TEXTS,
     enable_mini_chunk: bool = ENABLE_MINI_CHUNK,
     passage_prefix: str = ASYM_PASSAGE_PREFIX,
+    use_embedding_cache: bool = True,
 ) -> list[IndexChunk]:
     embedded_chunks: list[IndexChunk] = []
     if embedding_model is None:
@@ -37,23 +146,39 @@ def encode_chunks(
         chunk_texts.extend(prefixed_mini_chunk_texts)
         chunk_mini_chunks_count[chunk_ind] = 1 + len(prefixed_mini_chunk_texts)
 
-    text_batches = [
-        chunk_texts[i : i + batch_size] for i in range(0, len(chunk_texts), batch_size)
-    ]
-
-    embeddings: list[list[float]] = []
-    for text_batch in text_batches:
-        # Normalize embeddings is only configured via model_configs.py, be sure to use right value for the set loss
-        embeddings.extend(embedding_model.encode(text_batch))
+    embedding_cache = get_embedding_cache() if use_embedding_cache else None
+    embeddings = (
+        _embed_texts_with_cache(
+            texts=chunk_texts,
+            embedding_model=embedding_model,
+            max_batch_tokens=max_batch_tokens,
+            max_batch_size=max_batch_size,
+            passage_prefix=passage_prefix,
+            embedding_cache=embedding_cache,
+        )
+        if embedding_cache is not None
+        else _embed_texts(
+            texts=chunk_texts,
+            embedding_model=embedding_model,
+            max_batch_tokens=max_batch_tokens,
+            max_batch_size=max_batch_size,
+        )
+    )
 
     embedding_ind_start = 0
     for chunk_ind, chunk in enumerate(chunks):
         num_embeddings = chunk_mini_chunks_count[chunk_ind]
+        # views into the batch's embedding matrix, not copies
         chunk_embeddings = embeddings[
             embedding_ind_start : embedding_ind_start + num_embeddings
         ]
         new_embedded_chunk = IndexChunk(
-            **{k: getattr(chunk, k) for k in chunk.__dataclass_fields__},
+            chunk_id=chunk.chunk_id,
+            blurb=chunk.blurb,
+            content=chunk.content,
+            source_links=chunk.source_links,
+            section_continuation=chunk.section_continuation,
+            source_document=chunk.source_document,
             embeddings=ChunkEmbedding(
                 full_embedding=chunk_embeddings[0],
                 mini_chunk_embeddings=chunk_embeddings[1:],
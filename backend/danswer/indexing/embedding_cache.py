@@ -0,0 +1,181 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+import numpy
+
+from danswer.configs.app_configs import EMBEDDING_CACHE_MAX_ENTRIES
+from danswer.configs.app_configs import EMBEDDING_CACHE_PATH
+from danswer.indexing.models import Embedding
+from danswer.utils.batching import batch_generator
+from danswer.utils.logger import setup_logger
+from danswer.utils.lru_cache import CacheStats
+
+
+logger = setup_logger()
+
+# SQLite limits the number of variables in a single statement
+_MAX_KEYS_PER_QUERY = 500
+# Evict down to this fraction of the max entries so eviction doesn't run on every write
+_EVICTION_TARGET_FRACTION = 0.9
+# Cache hits only mark their entries as recently used in memory, they are written out
+# with the next write or once this many have accumulated
+_MAX_PENDING_LAST_USED = 10_000
+
+
+def build_embedding_cache_key(
+    model_name: str, normalize_embeddings: bool, passage_prefix: str, text: str
+) -> bytes:
+    return hashlib.sha256(
+        "\0".join(
+            [model_name, str(normalize_embeddings), passage_prefix, text]
+        ).encode()
+    ).digest()
+
+
+class EmbeddingCache:
+    """SQLite backed store of embeddings that survives across indexing runs. Vectors are
+    stored as float16 to keep the file small, the precision loss is far below anything
+    that affects retrieval. Safe to share between threads and between the indexing
+    worker processes (SQLite handles the cross process locking).
+
+    The number of entries is kept as a running count, entries added by other processes
+    are only counted once the count is refreshed before an eviction."""
+
+    def __init__(self, db_path: str, max_entries: int) -> None:
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pending_last_used: dict[bytes, float] = {}
+        self._conn = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding "
+                "(key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS embedding_last_used "
+                "ON embedding (last_used)"
+            )
+            self._conn.commit()
+            self._num_entries = self._count_entries()
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, Embedding]:
+        found: dict[bytes, Embedding] = {}
+        unique_keys = list(set(keys))
+        with self._lock:
+            for key_batch in batch_generator(unique_keys, _MAX_KEYS_PER_QUERY):
+                rows = self._conn.execute(
+                    "SELECT key, vector FROM embedding WHERE key IN "
+                    f"({','.join('?' * len(key_batch))})",
+                    key_batch,
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = numpy.frombuffer(vector, dtype=numpy.float16).astype(
+                        numpy.float32
+                    )
+
+            now = time.time()
+            self._pending_last_used.update((key, now) for key in found)
+            if len(self._pending_last_used) >= _MAX_PENDING_LAST_USED:
+                self._write_pending_last_used()
+                self._conn.commit()
+
+            num_hits = sum(1 for key in keys if key in found)
+            self.hits += num_hits
+            self.misses += len(keys) - num_hits
+        return found
+
+    def put_many(self, key_to_embedding: dict[bytes, Embedding]) -> None:
+        if not key_to_embedding:
+            return
+
+        now = time.time()
+        with self._lock:
+            # The key covers the model and the text so an existing entry already holds
+            # the same embedding, ignoring it keeps the running count exact
+            num_inserted = self._conn.executemany(
+                "INSERT OR IGNORE INTO embedding (key, vector, last_used) "
+                "VALUES (?, ?, ?)",
+                [
+                    (key, numpy.asarray(embedding, dtype=numpy.float16).tobytes(), now)
+                    for key, embedding in key_to_embedding.items()
+                ],
+            ).rowcount
+            self._num_entries += num_inserted
+            if num_inserted < len(key_to_embedding):
+                self._pending_last_used.update((key, now) for key in key_to_embedding)
+            # Written before evicting so recent hits aren't evicted
+            self._write_pending_last_used()
+            if self._num_entries > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _count_entries(self) -> int:
+        (num_entries,) = self._conn.execute("SELECT COUNT(*) FROM embedding").fetchone()
+        return num_entries
+
+    def _write_pending_last_used(self) -> None:
+        if not self._pending_last_used:
+            return
+        self._conn.executemany(
+            "UPDATE embedding SET last_used = ? WHERE key = ?",
+            [(last_used, key) for key, last_used in self._pending_last_used.items()],
+        )
+        self._pending_last_used.clear()
+
+    def _evict(self) -> None:
+        self._num_entries = self._count_entries()
+        if self._num_entries <= self.max_entries:
+            return
+
+        num_to_evict = self._num_entries - int(
+            self.max_entries * _EVICTION_TARGET_FRACTION
+        )
+        self._conn.execute(
+            "DELETE FROM embedding WHERE key IN "
+            "(SELECT key FROM embedding ORDER BY last_used LIMIT ?)",
+            (num_to_evict,),
+        )
+        self._num_entries -= num_to_evict
+        logger.info(f"Evicted {num_to_evict} entries from the embedding cache")
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                size=self._num_entries,
+                max_size=self.max_entries,
+            )
+
+
+_EMBEDDING_CACHE: EmbeddingCache | None = None
+_EMBEDDING_CACHE_UNAVAILABLE = False
+_EMBEDDING_CACHE_LOCK = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    """None if the cache is disabled or the cache file can't be opened"""
+    global _EMBEDDING_CACHE, _EMBEDDING_CACHE_UNAVAILABLE
+    if EMBEDDING_CACHE_MAX_ENTRIES <= 0:
+        return None
+
+    with _EMBEDDING_CACHE_LOCK:
+        if _EMBEDDING_CACHE is None and not _EMBEDDING_CACHE_UNAVAILABLE:
+            try:
+                _EMBEDDING_CACHE = EmbeddingCache(
+                    db_path=EMBEDDING_CACHE_PATH,
+                    max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+                )
+            except sqlite3.Error as e:
+                logger.warning(
+                    f"Unable to open the embedding cache at '{EMBEDDING_CACHE_PATH}', "
+                    f"embedding without it: {e}"
+                )
+                _EMBEDDING_CACHE_UNAVAILABLE = True
+        return _EMBEDDING_CACHE
@@ -1,3 +1,6 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from dataclasses import field
 from functools import partial
 from itertools import chain
 from typing import Protocol
@@ -5,22 +8,36 @@ from typing import Protocol
 from sqlalchemy.orm import Session
 
 from danswer.access.access import get_access_for_documents
+from danswer.access.models import DocumentAccess
+from danswer.configs.app_configs import INDEXING_PIPELINE_CHUNK_WORKERS
+from danswer.configs.app_configs import INDEXING_PIPELINE_EMBED_WORKERS
+from danswer.configs.app_configs import SKIP_UNCHANGED_DOCUMENTS
 from danswer.connectors.models import Document
 from danswer.connectors.models import IndexAttemptMetadata
+from danswer.db.document import get_document_access_hashes
+from danswer.db.document import get_document_content_hashes
 from danswer.db.document import prepare_to_modify_documents
+from danswer.db.document import update_document_hashes
 from danswer.db.document import upsert_documents_complete
 from danswer.db.document_set import fetch_document_sets_for_documents
 from danswer.db.engine import get_sqlalchemy_engine
 from danswer.document_index.factory import get_default_document_index
 from danswer.document_index.interfaces import DocumentIndex
+from danswer.document_index.interfaces import DocumentIndexingError
 from danswer.document_index.interfaces import DocumentMetadata
+from danswer.document_index.interfaces import UpdateRequest
 from danswer.indexing.chunker import Chunker
-from danswer.indexing.chunker import DefaultChunker
+from danswer.indexing.chunker import get_default_chunker
+from danswer.indexing.content_hash import compute_document_access_hash
+from danswer.indexing.content_hash import compute_document_content_hash
+from danswer.indexing.content_hash import get_index_settings_fingerprint
 from danswer.indexing.embedder import DefaultEmbedder
 from danswer.indexing.models import DocAwareChunk
 from danswer.indexing.models import DocMetadataAwareIndexChunk
+from danswer.indexing.models import IndexChunk
 from danswer.search.models import Embedder
 from danswer.utils.logger import setup_logger
+from danswer.utils.staged_pipeline import PipelineStage
 
 logger = setup_logger()
 
@@ -59,17 +76,59 @@ def _upsert_documents(
     )
 
 
-def _indexing_pipeline(
+def _refresh_unchanged_documents(
+    document_ids: list[str],
+    document_id_to_access_info: dict[str, DocumentAccess],
+    document_id_to_document_set: dict[str, list[str]],
+    document_index: DocumentIndex,
+) -> None:
+    """The content is already in the document index, only access / document sets have
+    changed. Documents with identical values are grouped into one request."""
+    grouped_document_ids: dict[
+        tuple[tuple[str, ...], tuple[str, ...]], list[str]
+    ] = defaultdict(list)
+    for document_id in document_ids:
+        acl = tuple(sorted(document_id_to_access_info[document_id].to_acl()))
+        document_sets = tuple(sorted(document_id_to_document_set.get(document_id, [])))
+        grouped_document_ids[(acl, document_sets)].append(document_id)
+
+    document_index.update(
+        [
+            UpdateRequest(
+                document_ids=document_id_group,
+                access=document_id_to_access_info[document_id_group[0]],
+                document_sets=set(document_sets),
+            )
+            for (_, document_sets), document_id_group in grouped_document_ids.items()
+        ]
+    )
+
+
+@dataclass
+class IndexingBatch:
+    """A batch of documents as it moves through the indexing stages. Documents are
+    never split across batches, the document index relies on all chunks of a document
+    being written together."""
+
+    documents: list[Document]
+    document_id_to_content_hash: dict[str, str]
+    changed_documents: list[Document]
+    unchanged_document_ids: list[str]
+    chunks: list[DocAwareChunk]
+    embedded_chunks: list[IndexChunk] = field(default_factory=list)
+
+
+def upsert_and_chunk_documents(
     *,
     chunker: Chunker,
-    embedder: Embedder,
-    document_index: DocumentIndex,
+    index_settings: str,
     documents: list[Document],
     index_attempt_metadata: IndexAttemptMetadata,
-) -> tuple[int, int]:
-    """Takes different pieces of the indexing pipeline and applies it to a batch of documents
-    Note that the documents should already be batched at this point so that it does not inflate the
-    memory requirements"""
+    skip_unchanged_documents: bool = SKIP_UNCHANGED_DOCUMENTS,
+) -> IndexingBatch:
+    logger.debug(
+        f"Indexing batch of documents: {[doc.to_short_descriptor() for doc in documents]}"
+    )
     document_ids = [document.id for document in documents]
 
     with Session(get_sqlalchemy_engine()) as db_session:
@@ -83,13 +142,91 @@ def _indexing_pipeline(
             db_session=db_session,
         )
 
-        chunks: list[DocAwareChunk] = list(
-            chain(*[chunker.chunk(document=document) for document in documents])
+        previous_content_hashes = (
+            get_document_content_hashes(
+                db_session=db_session, document_ids=document_ids
+            )
+            if skip_unchanged_documents
+            else {}
         )
-        logger.debug(
-            f"Indexing the following chunks: {[chunk.to_short_descriptor() for chunk in chunks]}"
+
+    document_id_to_content_hash = {
+        document.id: compute_document_content_hash(document, index_settings)
+        for document in documents
+    }
+    changed_documents = [
+        document
+        for document in documents
+        if previous_content_hashes.get(document.id)
+        != document_id_to_content_hash[document.id]
+    ]
+    unchanged_document_ids = [
+        document.id
+        for document in documents
+        if previous_content_hashes.get(document.id)
+        == document_id_to_content_hash[document.id]
+    ]
+    if unchanged_document_ids:
+        logger.info(
+            f"Skipping chunking / embedding for {len(unchanged_document_ids)} "
+            "unchanged documents"
         )
-        chunks_with_embeddings = embedder.embed(chunks=chunks)
+
+    chunks: list[DocAwareChunk] = list(
+        chain.from_iterable(chunker.chunk_batch(changed_documents))
+    )
+    logger.debug(
+        f"Indexing the following chunks: {[chunk.to_short_descriptor() for chunk in chunks]}"
+    )
+
+    return IndexingBatch(
+        documents=documents,
+        document_id_to_content_hash=document_id_to_content_hash,
+        changed_documents=changed_documents,
+        unchanged_document_ids=unchanged_document_ids,
+        chunks=chunks,
+    )
+
+
+def embed_indexing_batch(*, embedder: Embedder, batch: IndexingBatch) -> IndexingBatch:
+    batch.embedded_chunks = embedder.embed(chunks=batch.chunks) if batch.chunks else []
+    return batch
+
+
+def write_indexing_batch(
+    *, document_index: DocumentIndex, batch: IndexingBatch
+) -> tuple[int, int, set[str]]:
+    """Writes the embedded chunks to the document index along with the latest access /
+    document sets from Postgres. Returns the number of new documents and chunks, and
+    the ids of the documents which could not be written. Those are left out of the
+    counts and keep their previous content hash so that they are indexed again."""
+    document_ids = [document.id for document in batch.documents]
+
+    with Session(get_sqlalchemy_engine()) as db_session:
+        # held until the hashes are committed below
+        prepare_to_modify_documents(db_session=db_session, document_ids=document_ids)
+
+        # Another worker may have indexed a different version of the unchanged
+        # documents since their hashes were compared before chunking. They weren't
+        # chunked in this batch, so they are failed and re-indexed on the next run
+        current_content_hashes = (
+            get_document_content_hashes(
+                db_session=db_session, document_ids=batch.unchanged_document_ids
+            )
+            if batch.unchanged_document_ids
+            else {}
+        )
+        outdated_document_ids = {
+            document_id
+            for document_id in batch.unchanged_document_ids
+            if current_content_hashes.get(document_id)
+            != batch.document_id_to_content_hash[document_id]
+        }
+        if outdated_document_ids:
+            logger.warning(
+                "Documents were indexed by another worker while this batch was "
+                f"processed: {', '.join(sorted(outdated_document_ids))}"
+            )
 
         # Attach the latest status from Postgres (source of truth for access) to each
         # chunk. This access status will be attached to each chunk in the document index
@@ -103,6 +240,13 @@ def _indexing_pipeline(
                 document_ids=document_ids, db_session=db_session
             )
         }
+        document_id_to_access_hash = {
+            document_id: compute_document_access_hash(
+                document_id_to_access_info[document_id],
+                document_id_to_document_set.get(document_id, []),
+            )
+            for document_id in document_ids
+        }
         access_aware_chunks = [
             DocMetadataAwareIndexChunk.from_index_chunk(
                 index_chunk=chunk,
@@ -111,21 +255,118 @@ def _indexing_pipeline(
                     document_id_to_document_set.get(chunk.source_document.id, [])
                 ),
             )
-            for chunk in chunks_with_embeddings
+            for chunk in batch.embedded_chunks
         ]
 
         # A document will not be spread across different batches, so all the
         # documents with chunks in this set, are fully represented by the chunks
         # in this set
-        insertion_records = document_index.index(
-            chunks=access_aware_chunks,
+        failed_document_ids = set(outdated_document_ids)
+        try:
+            insertion_records = (
+                document_index.index(chunks=access_aware_chunks)
+                if access_aware_chunks
+                else set()
+            )
+        except DocumentIndexingError as e:
+            logger.error(str(e))
+            insertion_records = e.insertion_records
+            failed_document_ids |= e.failed_document_ids
+
+        # Only the unchanged documents whose access / document sets differ from what
+        # was last written need an update, usually none of them
+        unchanged_document_ids = [
+            document_id
+            for document_id in batch.unchanged_document_ids
+            if document_id not in outdated_document_ids
+        ]
+        previous_access_hashes = (
+            get_document_access_hashes(
+                db_session=db_session, document_ids=unchanged_document_ids
+            )
+            if unchanged_document_ids
+            else {}
         )
+        refreshed_document_ids = [
+            document_id
+            for document_id in unchanged_document_ids
+            if previous_access_hashes.get(document_id)
+            != document_id_to_access_hash[document_id]
+        ]
+        if refreshed_document_ids:
+            _refresh_unchanged_documents(
+                document_ids=refreshed_document_ids,
+                document_id_to_access_info=document_id_to_access_info,
+                document_id_to_document_set=document_id_to_document_set,
+                document_index=document_index,
+            )
 
-    return len([r for r in insertion_records if r.already_existed is False]), len(
-        chunks
+        # Only recorded once the index write succeeded, otherwise a failed batch
+        # would be skipped on the next run
+        indexed_document_ids = [
+            document.id
+            for document in batch.changed_documents
+            if document.id not in failed_document_ids
+        ]
+        update_document_hashes(
+            db_session=db_session,
+            document_id_to_content_hash={
+                document_id: batch.document_id_to_content_hash[document_id]
+                for document_id in indexed_document_ids
+            },
+            document_id_to_access_hash={
+                document_id: document_id_to_access_hash[document_id]
+                for document_id in indexed_document_ids + refreshed_document_ids
+            },
+        )
+
+    return (
+        len([r for r in insertion_records if r.already_existed is False]),
+        len(
+            [
+                chunk
+                for chunk in batch.chunks
+                if chunk.source_document.id not in failed_document_ids
+            ]
+        ),
+        failed_document_ids,
     )
 
 
+def _get_index_settings(chunker: Chunker, embedder: Embedder) -> str:
+    return get_index_settings_fingerprint(
+        chunker_name=chunker.name, embedder_name=type(embedder).__name__
+    )
+
+
+def _indexing_pipeline(
+    *,
+    chunker: Chunker,
+    embedder: Embedder,
+    document_index: DocumentIndex,
+    documents: list[Document],
+    index_attempt_metadata: IndexAttemptMetadata,
+) -> tuple[int, int]:
+    """Takes different pieces of the indexing pipeline and applies it to a batch of documents
+    Note that the documents should already be batched at this point so that it does not inflate the
+    memory requirements"""
+    batch = upsert_and_chunk_documents(
+        chunker=chunker,
+        index_settings=_get_index_settings(chunker, embedder),
+        documents=documents,
+        index_attempt_metadata=index_attempt_metadata,
+    )
+    batch = embed_indexing_batch(embedder=embedder, batch=batch)
+    new_docs, num_chunks, failed_document_ids = write_indexing_batch(
+        document_index=document_index, batch=batch
+    )
+    if failed_document_ids:
+        raise RuntimeError(
+            f"Failed to index documents: {', '.join(sorted(failed_document_ids))}"
+        )
+    return new_docs, num_chunks
+
+
 def build_indexing_pipeline(
     *,
     chunker: Chunker | None = None,
@@ -133,7 +374,7 @@ def build_indexing_pipeline(
     document_index: DocumentIndex | None = None,
 ) -> IndexingPipelineProtocol:
     """Builds a pipline which takes in a list (batch) of docs and indexes them."""
-    chunker = chunker or DefaultChunker()
+    chunker = chunker or get_default_chunker()
 
     embedder = embedder or DefaultEmbedder()
 
@@ -145,3 +386,59 @@ def build_indexing_pipeline(
         embedder=embedder,
         document_index=document_index,
     )
+
+
+def build_indexing_pipeline_stages(
+    *,
+    index_attempt_metadata: IndexAttemptMetadata,
+    chunker: Chunker | None = None,
+    embedder: Embedder | None = None,
+    document_index: DocumentIndex | None = None,
+    num_chunk_workers: int = INDEXING_PIPELINE_CHUNK_WORKERS,
+    num_embed_workers: int = INDEXING_PIPELINE_EMBED_WORKERS,
+) -> list[PipelineStage]:
+    """Same steps as `build_indexing_pipeline` split into stages for a `StagedPipeline`.
+    Takes in document batches and outputs (ids of the indexed documents, new documents,
+    chunks, ids of the documents which failed) per batch once it is written. Writes to the document index use a single worker so
+    that batches are applied in the order the connector produced them."""
+    stage_chunker = chunker or get_default_chunker()
+    stage_embedder = embedder or DefaultEmbedder()
+    index = document_index or get_default_document_index()
+    index_settings = _get_index_settings(stage_chunker, stage_embedder)
+
+    # The stages pass their input positionally, the steps only take keyword arguments
+    def _chunk(documents: list[Document]) -> IndexingBatch:
+        return upsert_and_chunk_documents(
+            chunker=stage_chunker,
+            index_settings=index_settings,
+            documents=documents,
+            index_attempt_metadata=index_attempt_metadata,
+        )
+
+    def _embed(batch: IndexingBatch) -> IndexingBatch:
+        return embed_indexing_batch(embedder=stage_embedder, batch=batch)
+
+    def _write(batch: IndexingBatch) -> tuple[list[str], int, int, list[str]]:
+        new_docs, num_chunks, failed_document_ids = write_indexing_batch(
+            document_index=index, batch=batch
+        )
+        return (
+            [
+                document.id
+                for document in batch.documents
+                if document.id not in failed_document_ids
+            ],
+            new_docs,
+            num_chunks,
+            [
+                document.id
+                for document in batch.documents
+                if document.id in failed_document_ids
+            ],
+        )
+
+    return [
+        PipelineStage(name="chunk", process=_chunk, num_workers=num_chunk_workers),
+        PipelineStage(name="embed", process=_embed, num_workers=num_embed_workers),
+        PipelineStage(name="index", process=_write),
+    ]
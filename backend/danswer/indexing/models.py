@@ -1,8 +1,9 @@
 from dataclasses import dataclass
-from dataclasses import fields
 from datetime import datetime
 from typing import Any
 
+import numpy
+
 from danswer.access.models import DocumentAccess
 from danswer.connectors.models import Document
 from danswer.utils.logger import setup_logger
@@ -11,16 +12,19 @@ from danswer.utils.logger import setup_logger
 logger = setup_logger()
 
 
-Embedding = list[float]
+# float32 vector, during indexing a view into the embedding matrix of the whole batch
+Embedding = numpy.ndarray
 
 
-@dataclass
+@dataclass(slots=True)
 class ChunkEmbedding:
     full_embedding: Embedding
-    mini_chunk_embeddings: list[Embedding]
+    # one row per mini-chunk, no rows if mini-chunks are disabled
+    mini_chunk_embeddings: numpy.ndarray
 
 
-@dataclass
+# The indexing chunk classes use slots, a batch can hold tens of thousands of them
+@dataclass(slots=True)
 class BaseChunk:
     chunk_id: int
     blurb: str  # The first sentence(s) of the first Section of the chunk
@@ -31,7 +35,7 @@ class BaseChunk:
     section_continuation: bool  # True if this Chunk's start is not at the start of a Section
 
 
-@dataclass
+@dataclass(slots=True)
 class DocAwareChunk(BaseChunk):
     # During indexing flow, we have access to a complete "Document"
     # During inference we only have access to the document id and do not reconstruct the Document
@@ -44,12 +48,12 @@ class DocAwareChunk(BaseChunk):
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class IndexChunk(DocAwareChunk):
     embeddings: ChunkEmbedding
 
 
-@dataclass
+@dataclass(slots=True)
 class DocMetadataAwareIndexChunk(IndexChunk):
     """An `IndexChunk` that contains all necessary metadata to be indexed. This includes
     the following:
@@ -67,11 +71,15 @@ class DocMetadataAwareIndexChunk(IndexChunk):
     def from_index_chunk(
         cls, index_chunk: IndexChunk, access: "DocumentAccess", document_sets: set[str]
     ) -> "DocMetadataAwareIndexChunk":
+        # the fields are shared with the index chunk, including the embedding views
         return cls(
-            **{
-                field.name: getattr(index_chunk, field.name)
-                for field in fields(index_chunk)
-            },
+            chunk_id=index_chunk.chunk_id,
+            blurb=index_chunk.blurb,
+            content=index_chunk.content,
+            source_links=index_chunk.source_links,
+            section_continuation=index_chunk.section_continuation,
+            source_document=index_chunk.source_document,
+            embeddings=index_chunk.embeddings,
             access=access,
             document_sets=document_sets,
         )
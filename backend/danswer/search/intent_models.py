@@ -0,0 +1,119 @@
+"""Runtimes for the intent model. They only differ in the framework running the model,
+the tokenization and the softmax over the logits are shared so their outputs match."""
+import abc
+import os
+import shutil
+import tempfile
+from typing import Any
+
+import numpy
+import torch
+from transformers import AutoModelForSequenceClassification  # type: ignore
+from transformers import AutoTokenizer  # type: ignore
+from transformers.utils import is_tf_available  # type: ignore
+
+from danswer.configs.model_configs import INTENT_MODEL_CACHE_DIR
+from danswer.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Used to check that the runtimes agree, one of each intent (keyword, semantic, QA)
+INTENT_SAMPLE_QUERIES = [
+    "danswer",
+    "confluence connector access token",
+    "SSO setup",
+    "onboarding documents for new engineers",
+    "slack channel for the sales team",
+    "How do I reset my password?",
+    "What is the vacation policy for contractors?",
+    "Why did the nightly indexing job fail?",
+]
+
+
+class IntentClassifier(abc.ABC):
+    def __init__(self, tokenizer: AutoTokenizer, max_seq_length: int) -> None:
+        self.tokenizer = tokenizer
+        self.max_seq_length = max_seq_length
+
+    @abc.abstractmethod
+    def predict_logits(self, query: str) -> numpy.ndarray:
+        """Logits of each intent class for `query`"""
+        raise NotImplementedError
+
+    def predict(self, query: str) -> list[float]:
+        """Probability of each intent class in percent, rounded to 2 decimals"""
+        logits = self.predict_logits(query).astype(numpy.float32)
+        exp_logits = numpy.exp(logits - logits.max())
+        class_percentages = numpy.round(exp_logits / exp_logits.sum() * 100, 2)
+        return list(class_percentages.tolist())
+
+
+class TFIntentClassifier(IntentClassifier):
+    def __init__(
+        self, model_name: str, tokenizer: AutoTokenizer, max_seq_length: int
+    ) -> None:
+        super().__init__(tokenizer, max_seq_length)
+        # TensorFlow is only imported when this runtime is used
+        from transformers import TFDistilBertForSequenceClassification  # type: ignore
+
+        self.model = TFDistilBertForSequenceClassification.from_pretrained(model_name)
+
+    def predict_logits(self, query: str) -> numpy.ndarray:
+        model_input = self.tokenizer(
+            query, return_tensors="tf", truncation=True, padding=True
+        )
+        return self.model(model_input)[0].numpy()[0]
+
+
+def _get_converted_model_dir(model_name: str) -> str:
+    return os.path.join(INTENT_MODEL_CACHE_DIR, model_name.replace("/", "--"))
+
+
+def load_torch_intent_model(model_name: str) -> Any:
+    """Loads the PyTorch weights of the model if it has any. Otherwise its TensorFlow
+    weights are converted, which needs TensorFlow, and the result cached so that this
+    only happens once"""
+    converted_dir = _get_converted_model_dir(model_name)
+    if os.path.exists(os.path.join(converted_dir, "config.json")):
+        return AutoModelForSequenceClassification.from_pretrained(converted_dir)
+
+    try:
+        return AutoModelForSequenceClassification.from_pretrained(model_name)
+    except OSError:
+        if not is_tf_available():
+            raise RuntimeError(
+                f"{model_name} only has TensorFlow weights, converting them needs "
+                "TensorFlow (requirements/tensorflow.txt) or a converted model in "
+                f"INTENT_MODEL_CACHE_DIR ({INTENT_MODEL_CACHE_DIR})"
+            )
+        logger.info(f"Converting the TensorFlow weights of {model_name} to torch")
+
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, from_tf=True)
+    os.makedirs(INTENT_MODEL_CACHE_DIR, exist_ok=True)
+    # saved next to the final location and moved in place once it is complete
+    tmp_dir = tempfile.mkdtemp(dir=INTENT_MODEL_CACHE_DIR)
+    try:
+        model.save_pretrained(tmp_dir)
+        try:
+            os.rename(tmp_dir, converted_dir)
+        except OSError:
+            # another process finished its conversion first
+            pass
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return model
+
+
+class TorchIntentClassifier(IntentClassifier):
+    def __init__(
+        self, model: Any, tokenizer: AutoTokenizer, max_seq_length: int
+    ) -> None:
+        super().__init__(tokenizer, max_seq_length)
+        self.model = model
+
+    def predict_logits(self, query: str) -> numpy.ndarray:
+        model_input = self.tokenizer(
+            query, return_tensors="pt", truncation=True, padding=True
+        )
+        with torch.no_grad():
+            return self.model(**model_input).logits[0].numpy()
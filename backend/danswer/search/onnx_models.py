@@ -0,0 +1,417 @@
+"""ONNX Runtime versions of the bi-encoder, cross-encoders and intent model for CPU only
+deployments. On first load the torch model is exported to ONNX and the result cached on
+disk together with the tokenizer and config. The bi-encoder and cross-encoder weights
+are quantized to int8 (dynamic quantization, activations stay float), the intent model
+is kept in float so that its probabilities match the other runtimes. The classes below
+implement the parts of SentenceTransformer and CrossEncoder used by Danswer so they can
+be used in their place.
+"""
+import os
+import shutil
+import tempfile
+from collections.abc import Callable
+from typing import Any
+
+import numpy
+import torch
+from sentence_transformers import CrossEncoder  # type: ignore
+from sentence_transformers import SentenceTransformer  # type: ignore
+from sentence_transformers.util import import_from_string  # type: ignore
+from transformers import AutoConfig  # type: ignore
+from transformers import AutoTokenizer  # type: ignore
+
+from danswer.configs.model_configs import ONNX_MIN_SAMPLE_AGREEMENT
+from danswer.configs.model_configs import ONNX_MODEL_CACHE_DIR
+from danswer.search.intent_models import INTENT_SAMPLE_QUERIES
+from danswer.search.intent_models import IntentClassifier
+from danswer.search.intent_models import load_torch_intent_model
+from danswer.search.intent_models import TorchIntentClassifier
+from danswer.utils.logger import setup_logger
+
+logger = setup_logger()
+
+_ONNX_OPSET_VERSION = 14
+_MODEL_FILE_NAME = "model.onnx"
+
+# Fixed sample the exports are compared against the torch models on, a mix of relevant
+# and irrelevant passages so that the reranking scores are spread out
+ACCURACY_SAMPLE_QUERY = "How do I connect Danswer to our Confluence space?"
+ACCURACY_SAMPLE_PASSAGES = [
+    "To index Confluence, go to the Admin Panel, pick the Confluence connector and "
+    "provide the URL of the space along with an access token.",
+    "The Confluence connector pulls pages and their comments from a single space, "
+    "pages are re-indexed when they are updated.",
+    "Danswer supports Slack, Google Drive, GitHub, Confluence, Jira and many other "
+    "sources through its connectors.",
+    "Access tokens for Atlassian products are created under Account Settings, "
+    "Security, API tokens.",
+    "Our quarterly offsite will take place in Lisbon, flights are booked by the "
+    "office manager.",
+    "The cafeteria serves vegetarian lunch options every day of the week.",
+    "Vespa is used as the document index and stores both the text and the "
+    "embeddings of every chunk.",
+    "Please submit your expense reports before the end of the month.",
+]
+
+
+def embedding_agreement(
+    torch_embeddings: numpy.ndarray, onnx_embeddings: numpy.ndarray
+) -> float:
+    """Lowest cosine similarity between the embeddings of the same text"""
+    torch_norm = torch_embeddings / numpy.linalg.norm(
+        torch_embeddings, axis=1, keepdims=True
+    )
+    onnx_norm = onnx_embeddings / numpy.linalg.norm(
+        onnx_embeddings, axis=1, keepdims=True
+    )
+    return float(numpy.min(numpy.sum(torch_norm * onnx_norm, axis=1)))
+
+
+def score_agreement(torch_scores: numpy.ndarray, onnx_scores: numpy.ndarray) -> float:
+    """Pearson correlation of the scores, rescaling the scores doesn't change the
+    reranking so absolute differences are less meaningful"""
+    return float(numpy.corrcoef(torch_scores.ravel(), onnx_scores.ravel())[0, 1])
+
+
+def _get_export_dir(model_name: str) -> str:
+    return os.path.join(ONNX_MODEL_CACHE_DIR, model_name.replace("/", "--"))
+
+
+def _create_session(export_dir: str) -> Any:
+    import onnxruntime  # type: ignore
+
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # same number of threads as the torch models are given
+    options.intra_op_num_threads = torch.get_num_threads()
+    return onnxruntime.InferenceSession(
+        os.path.join(export_dir, _MODEL_FILE_NAME),
+        sess_options=options,
+        providers=["CPUExecutionProvider"],
+    )
+
+
+def _export_onnx(
+    module: torch.nn.Module,
+    features: dict[str, torch.Tensor],
+    export_dir: str,
+    quantize: bool = True,
+) -> None:
+    from onnxruntime.quantization import quantize_dynamic  # type: ignore
+    from onnxruntime.quantization import QuantType  # type: ignore
+
+    input_names = list(features)
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["output"] = {0: "batch"}
+
+    model_path = os.path.join(export_dir, _MODEL_FILE_NAME)
+    fp32_path = os.path.join(export_dir, "model_fp32.onnx") if quantize else model_path
+    with torch.no_grad():
+        torch.onnx.export(
+            module,
+            tuple(features.values()),
+            fp32_path,
+            input_names=input_names,
+            output_names=["output"],
+            dynamic_axes=dynamic_axes,
+            opset_version=_ONNX_OPSET_VERSION,
+        )
+    if quantize:
+        quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+
+
+def _load_or_export(model_name: str, export: Callable[[str], float]) -> str | None:
+    """Returns the directory of the cached export of `model_name`. If there is none,
+    `export` is called to export the model into the given directory and return its
+    agreement with the torch model on the accuracy sample. Exports below
+    ONNX_MIN_SAMPLE_AGREEMENT are discarded and None is returned."""
+    export_dir = _get_export_dir(model_name)
+    if os.path.exists(os.path.join(export_dir, _MODEL_FILE_NAME)):
+        return export_dir
+
+    logger.info(f"Exporting {model_name} to ONNX, this is only done once")
+    os.makedirs(ONNX_MODEL_CACHE_DIR, exist_ok=True)
+    # exported next to the final location and moved in place once it is complete
+    tmp_dir = tempfile.mkdtemp(dir=ONNX_MODEL_CACHE_DIR)
+    try:
+        agreement = export(tmp_dir)
+        if agreement < ONNX_MIN_SAMPLE_AGREEMENT:
+            logger.error(
+                f"ONNX export of {model_name} only has an agreement of {agreement:.4f} "
+                f"with the torch model, below {ONNX_MIN_SAMPLE_AGREEMENT}. "
+                "Falling back to torch"
+            )
+            return None
+
+        logger.info(f"ONNX export of {model_name} agreement: {agreement:.4f}")
+        try:
+            os.rename(tmp_dir, export_dir)
+        except OSError:
+            # another process finished its export first, both are equivalent
+            pass
+        return export_dir
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+class _SentenceEmbeddingModule(torch.nn.Module):
+    def __init__(self, model: SentenceTransformer, input_names: list[str]) -> None:
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *inputs: torch.Tensor) -> torch.Tensor:
+        return self.model(dict(zip(self.input_names, inputs)))["sentence_embedding"]
+
+
+class _SequenceClassificationModule(torch.nn.Module):
+    def __init__(self, model: torch.nn.Module, input_names: list[str]) -> None:
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *inputs: torch.Tensor) -> torch.Tensor:
+        return self.model(
+            **dict(zip(self.input_names, inputs)), return_dict=True
+        ).logits
+
+
+def _get_input_names(session: Any) -> list[str]:
+    return [model_input.name for model_input in session.get_inputs()]
+
+
+class OnnxEmbeddingModel:
+    def __init__(self, session: Any, tokenizer: AutoTokenizer, max_seq_length: int):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.max_seq_length = max_seq_length
+        self.input_names = _get_input_names(session)
+
+    @classmethod
+    def from_export_dir(
+        cls, export_dir: str, max_seq_length: int
+    ) -> "OnnxEmbeddingModel":
+        return cls(
+            session=_create_session(export_dir),
+            tokenizer=AutoTokenizer.from_pretrained(export_dir),
+            max_seq_length=max_seq_length,
+        )
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.session.get_outputs()[0].shape[-1]
+
+    def encode(
+        self,
+        sentences: str | list[str],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+    ) -> numpy.ndarray:
+        input_was_string = isinstance(sentences, str)
+        texts = [sentences] if isinstance(sentences, str) else sentences
+
+        embeddings = numpy.empty(
+            (len(texts), self.get_sentence_embedding_dimension()), dtype=numpy.float32
+        )
+        # longest first like SentenceTransformer.encode, so batches are of similar length
+        sorted_inds = numpy.argsort([-len(text) for text in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            batch_inds = sorted_inds[start : start + batch_size]
+            features = self.tokenizer(
+                [texts[ind].strip() for ind in batch_inds],
+                padding=True,
+                truncation="longest_first",
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            embeddings[batch_inds] = self.session.run(
+                None,
+                {name: features[name].astype(numpy.int64) for name in self.input_names},
+            )[0]
+
+        if normalize_embeddings:
+            embeddings /= numpy.maximum(
+                numpy.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12
+            )
+        return embeddings[0] if input_was_string else embeddings
+
+
+class OnnxCrossEncoder:
+    def __init__(
+        self, session: Any, tokenizer: AutoTokenizer, config: Any, max_length: int
+    ) -> None:
+        self.session = session
+        self.tokenizer = tokenizer
+        self.config = config
+        self.max_length = max_length
+        self.input_names = _get_input_names(session)
+
+    @classmethod
+    def from_export_dir(cls, export_dir: str, max_length: int) -> "OnnxCrossEncoder":
+        return cls(
+            session=_create_session(export_dir),
+            tokenizer=AutoTokenizer.from_pretrained(export_dir),
+            config=AutoConfig.from_pretrained(export_dir),
+            max_length=max_length,
+        )
+
+    def _activation(self, logits: numpy.ndarray) -> numpy.ndarray:
+        # same defaults as CrossEncoder
+        activation_name = getattr(
+            self.config, "sbert_ce_default_activation_function", None
+        )
+        if activation_name is not None:
+            activation = import_from_string(activation_name)()
+            return activation(torch.from_numpy(logits)).numpy()
+        if self.config.num_labels == 1:
+            return 1 / (1 + numpy.exp(-logits))
+        return logits
+
+    def predict(
+        self,
+        sentences: tuple[str, str] | list[tuple[str, str]],
+        batch_size: int = 32,
+    ) -> numpy.ndarray:
+        input_was_string = bool(sentences) and isinstance(sentences[0], str)
+        pairs: list[tuple[str, str]] = (
+            [sentences] if input_was_string else sentences  # type: ignore
+        )
+
+        batch_scores = [numpy.empty((0, self.config.num_labels), dtype=numpy.float32)]
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start : start + batch_size]
+            features = self.tokenizer(
+                [first.strip() for first, _ in batch],
+                [second.strip() for _, second in batch],
+                padding=True,
+                truncation="longest_first",
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            logits = self.session.run(
+                None,
+                {name: features[name].astype(numpy.int64) for name in self.input_names},
+            )[0]
+            batch_scores.append(self._activation(logits))
+
+        scores = numpy.concatenate(batch_scores)
+        if self.config.num_labels == 1:
+            scores = scores[:, 0]
+        return scores[0] if input_was_string else scores
+
+
+def load_onnx_embedding_model(
+    model_name: str, max_seq_length: int
+) -> OnnxEmbeddingModel | None:
+    def _export(export_dir: str) -> float:
+        torch_model = SentenceTransformer(model_name, device="cpu")
+        torch_model.max_seq_length = max_seq_length
+        tokenizer = torch_model.tokenizer
+        tokenizer.save_pretrained(export_dir)
+
+        features = tokenizer(
+            ACCURACY_SAMPLE_PASSAGES[:2], padding=True, return_tensors="pt"
+        )
+        input_names = [name for name in tokenizer.model_input_names if name in features]
+        _export_onnx(
+            _SentenceEmbeddingModule(torch_model, input_names),
+            {name: features[name] for name in input_names},
+            export_dir,
+        )
+
+        sample = [ACCURACY_SAMPLE_QUERY] + ACCURACY_SAMPLE_PASSAGES
+        onnx_model = OnnxEmbeddingModel.from_export_dir(export_dir, max_seq_length)
+        return embedding_agreement(
+            torch_model.encode(sample), onnx_model.encode(sample)
+        )
+
+    export_dir = _load_or_export(model_name, _export)
+    if export_dir is None:
+        return None
+    return OnnxEmbeddingModel.from_export_dir(export_dir, max_seq_length)
+
+
+def load_onnx_cross_encoder(
+    model_name: str, max_length: int
+) -> OnnxCrossEncoder | None:
+    def _export(export_dir: str) -> float:
+        torch_model = CrossEncoder(model_name, device="cpu")
+        torch_model.max_length = max_length
+        torch_model.tokenizer.save_pretrained(export_dir)
+        torch_model.config.save_pretrained(export_dir)
+
+        features = torch_model.tokenizer(
+            [ACCURACY_SAMPLE_QUERY] * 2,
+            ACCURACY_SAMPLE_PASSAGES[:2],
+            padding=True,
+            return_tensors="pt",
+        )
+        input_names = [
+            name for name in torch_model.tokenizer.model_input_names if name in features
+        ]
+        _export_onnx(
+            _SequenceClassificationModule(torch_model.model, input_names),
+            {name: features[name] for name in input_names},
+            export_dir,
+        )
+
+        pairs = [
+            (ACCURACY_SAMPLE_QUERY, passage) for passage in ACCURACY_SAMPLE_PASSAGES
+        ]
+        onnx_model = OnnxCrossEncoder.from_export_dir(export_dir, max_length)
+        return score_agreement(torch_model.predict(pairs), onnx_model.predict(pairs))
+
+    export_dir = _load_or_export(model_name, _export)
+    if export_dir is None:
+        return None
+    return OnnxCrossEncoder.from_export_dir(export_dir, max_length)
+
+
+class OnnxIntentClassifier(IntentClassifier):
+    def __init__(
+        self, session: Any, tokenizer: AutoTokenizer, max_seq_length: int
+    ) -> None:
+        super().__init__(tokenizer, max_seq_length)
+        self.session = session
+        self.input_names = _get_input_names(session)
+
+    def predict_logits(self, query: str) -> numpy.ndarray:
+        model_input = self.tokenizer(
+            query, return_tensors="np", truncation=True, padding=True
+        )
+        return self.session.run(
+            None,
+            {name: model_input[name].astype(numpy.int64) for name in self.input_names},
+        )[0][0]
+
+
+def load_onnx_intent_model(
+    model_name: str, tokenizer: AutoTokenizer, max_seq_length: int
+) -> OnnxIntentClassifier | None:
+    def _export(export_dir: str) -> float:
+        torch_classifier = TorchIntentClassifier(
+            load_torch_intent_model(model_name), tokenizer, max_seq_length
+        )
+        features = tokenizer(
+            INTENT_SAMPLE_QUERIES[:2], padding=True, return_tensors="pt"
+        )
+        input_names = [name for name in tokenizer.model_input_names if name in features]
+        _export_onnx(
+            _SequenceClassificationModule(torch_classifier.model, input_names),
+            {name: features[name] for name in input_names},
+            export_dir,
+            quantize=False,
+        )
+
+        onnx_classifier = OnnxIntentClassifier(
+            _create_session(export_dir), tokenizer, max_seq_length
+        )
+        return score_agreement(
+            numpy.array([torch_classifier.predict(q) for q in INTENT_SAMPLE_QUERIES]),
+            numpy.array([onnx_classifier.predict(q) for q in INTENT_SAMPLE_QUERIES]),
+        )
+
+    export_dir = _load_or_export(model_name, _export)
+    if export_dir is None:
+        return None
+    return OnnxIntentClassifier(_create_session(export_dir), tokenizer, max_seq_length)
@@ -0,0 +1,201 @@
+import abc
+import copy
+import hashlib
+import json
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import cast
+
+from danswer.configs.app_configs import SEARCH_RESULT_CACHE_SIZE
+from danswer.configs.app_configs import SEARCH_RESULT_CACHE_TTL
+from danswer.configs.constants import INDEX_GENERATION_STORAGE_KEY
+from danswer.dynamic_configs import get_dynamic_config_store
+from danswer.dynamic_configs.interface import ConfigNotFoundError
+from danswer.dynamic_configs.interface import DynamicConfigStore
+from danswer.indexing.models import InferenceChunk
+from danswer.search.models import SearchQuery
+from danswer.utils.logger import setup_logger
+from danswer.utils.lru_cache import TTLLRUCache
+
+
+logger = setup_logger()
+
+
+@dataclass
+class CachedSearchResult:
+    # Index generation at the time the search started, results from an older
+    # generation may be missing newly indexed docs or contain deleted ones
+    generation: str
+    ranked_chunks: list[InferenceChunk] | None
+    unranked_chunks: list[InferenceChunk] | None
+
+
+class SearchResultCacheBackend(abc.ABC):
+    @abc.abstractmethod
+    def get(self, key: str) -> CachedSearchResult | None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def put(self, key: str, result: CachedSearchResult) -> None:
+        raise NotImplementedError
+
+
+class InMemorySearchResultCacheBackend(SearchResultCacheBackend):
+    def __init__(self, max_size: int, ttl_seconds: float | None) -> None:
+        self._cache: TTLLRUCache[str, CachedSearchResult] = TTLLRUCache(
+            max_size=max_size, ttl_seconds=ttl_seconds
+        )
+
+    def get(self, key: str) -> CachedSearchResult | None:
+        return self._cache.get(key)
+
+    def put(self, key: str, result: CachedSearchResult) -> None:
+        self._cache.put(key, result)
+
+
+class IndexGeneration:
+    """Changes every time the document index is written to. The in-process counter
+    covers writes made by this process, the token in the dynamic config store covers
+    writes made by the background indexing process."""
+
+    def __init__(self, store: DynamicConfigStore) -> None:
+        self.store = store
+        self._local_generation = 0
+        self._lock = threading.Lock()
+
+    def _write_shared_token(self) -> str:
+        # A random token rather than a counter so that concurrent writers can't
+        # both end up storing the same value
+        token = uuid.uuid4().hex
+        self.store.store(INDEX_GENERATION_STORAGE_KEY, token)
+        return token
+
+    def get(self) -> str | None:
+        """Returns None if the shared token can't be read or initialized, in which
+        case results must not be cached since writes from other processes would go
+        unnoticed"""
+        try:
+            try:
+                shared_token = cast(str, self.store.load(INDEX_GENERATION_STORAGE_KEY))
+            except ConfigNotFoundError:
+                shared_token = self._write_shared_token()
+        except Exception as e:
+            logger.warning(f"Unable to read the index generation, not caching: {e}")
+            return None
+
+        return f"{self._local_generation}:{shared_token}"
+
+    def bump(self) -> None:
+        with self._lock:
+            self._local_generation += 1
+
+        try:
+            self._write_shared_token()
+        except Exception as e:
+            logger.warning(f"Unable to update the shared index generation: {e}")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def build_search_cache_key(query: SearchQuery) -> str:
+    filters = query.filters
+    key_components = {
+        "query": normalize_query(query.query),
+        "search_type": query.search_type.value,
+        "source_type": sorted(filters.source_type)
+        if filters.source_type is not None
+        else None,
+        "document_set": sorted(filters.document_set)
+        if filters.document_set is not None
+        else None,
+        "time_cutoff": filters.time_cutoff.isoformat()
+        if filters.time_cutoff is not None
+        else None,
+        # Results are only ever shared between users with identical access
+        "access_control_list": sorted(filters.access_control_list),
+        "favor_recent": query.favor_recent,
+        "num_hits": query.num_hits,
+        "skip_rerank": query.skip_rerank,
+        "num_rerank": query.num_rerank,
+    }
+    return hashlib.sha256(
+        json.dumps(key_components, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def _copy_chunks(chunks: list[InferenceChunk] | None) -> list[InferenceChunk] | None:
+    # Callers are free to modify the returned chunks (e.g. scores), keep the cached
+    # copies untouched
+    return [copy.copy(chunk) for chunk in chunks] if chunks is not None else None
+
+
+class SearchResultCache:
+    def __init__(
+        self, backend: SearchResultCacheBackend, index_generation: IndexGeneration
+    ) -> None:
+        self.backend = backend
+        self.index_generation = index_generation
+
+    def get_generation(self) -> str | None:
+        return self.index_generation.get()
+
+    def get(
+        self, query: SearchQuery, generation: str
+    ) -> tuple[list[InferenceChunk] | None, list[InferenceChunk] | None] | None:
+        try:
+            cached = self.backend.get(build_search_cache_key(query))
+        except Exception as e:
+            logger.warning(f"Failed to read from the search result cache: {e}")
+            return None
+
+        if cached is None or cached.generation != generation:
+            return None
+
+        return _copy_chunks(cached.ranked_chunks), _copy_chunks(cached.unranked_chunks)
+
+    def put(
+        self,
+        query: SearchQuery,
+        generation: str,
+        ranked_chunks: list[InferenceChunk] | None,
+        unranked_chunks: list[InferenceChunk] | None,
+    ) -> None:
+        try:
+            self.backend.put(
+                build_search_cache_key(query),
+                CachedSearchResult(
+                    generation=generation,
+                    ranked_chunks=_copy_chunks(ranked_chunks),
+                    unranked_chunks=_copy_chunks(unranked_chunks),
+                ),
+            )
+        except Exception as e:
+            logger.warning(f"Failed to write to the search result cache: {e}")
+
+
+_INDEX_GENERATION = IndexGeneration(get_dynamic_config_store())
+_SEARCH_RESULT_CACHE: SearchResultCache | None = None
+
+
+def get_search_result_cache() -> SearchResultCache | None:
+    """None if the cache is disabled"""
+    global _SEARCH_RESULT_CACHE
+    if SEARCH_RESULT_CACHE_SIZE <= 0:
+        return None
+
+    if _SEARCH_RESULT_CACHE is None:
+        _SEARCH_RESULT_CACHE = SearchResultCache(
+            backend=InMemorySearchResultCacheBackend(
+                max_size=SEARCH_RESULT_CACHE_SIZE, ttl_seconds=SEARCH_RESULT_CACHE_TTL
+            ),
+            index_generation=_INDEX_GENERATION,
+        )
+    return _SEARCH_RESULT_CACHE
+
+
+def bump_index_generation() -> None:
+    """Call after every write to the document index so cached results are dropped"""
+    _INDEX_GENERATION.bump()
@@ -1,22 +1,39 @@
+import asyncio
+
+import httpx
 import numpy as np
 import requests
-import tensorflow as tf  # type: ignore
 from sentence_transformers import CrossEncoder  # type: ignore
 from sentence_transformers import SentenceTransformer  # type: ignore
 from transformers import AutoTokenizer  # type: ignore
-from transformers import TFDistilBertForSequenceClassification  # type: ignore
 
+from danswer.configs.app_configs import MODEL_SERVER_EMBEDDING_TRANSPORT
 from danswer.configs.app_configs import MODEL_SERVER_HOST
 from danswer.configs.app_configs import MODEL_SERVER_PORT
 from danswer.configs.model_configs import CROSS_EMBED_CONTEXT_SIZE
 from danswer.configs.model_configs import CROSS_ENCODER_MODEL_ENSEMBLE
 from danswer.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
 from danswer.configs.model_configs import DOCUMENT_ENCODER_MODEL
+from danswer.configs.model_configs import INTENT_MODEL_RUNTIME
 from danswer.configs.model_configs import INTENT_MODEL_VERSION
+from danswer.configs.model_configs import MODEL_INFERENCE_BACKEND
 from danswer.configs.model_configs import NORMALIZE_EMBEDDINGS
 from danswer.configs.model_configs import QUERY_MAX_CONTEXT_SIZE
 from danswer.configs.model_configs import SKIP_RERANKING
+from danswer.search.intent_models import IntentClassifier
+from danswer.search.intent_models import load_torch_intent_model
+from danswer.search.intent_models import TFIntentClassifier
+from danswer.search.intent_models import TorchIntentClassifier
+from danswer.search.onnx_models import load_onnx_cross_encoder
+from danswer.search.onnx_models import load_onnx_embedding_model
+from danswer.search.onnx_models import load_onnx_intent_model
+from danswer.search.onnx_models import OnnxCrossEncoder
+from danswer.search.onnx_models import OnnxEmbeddingModel
+from danswer.utils.async_http import PooledAsyncClient
 from danswer.utils.logger import setup_logger
+from shared_models.embedding_transport import deserialize_embeddings
+from shared_models.embedding_transport import get_embeddings_content_type
+from shared_models.embedding_transport import get_embeddings_dtype
 from shared_models.model_server_models import EmbedRequest
 from shared_models.model_server_models import EmbedResponse
 from shared_models.model_server_models import IntentRequest
@@ -28,10 +45,12 @@ logger = setup_logger()
 
 
 _TOKENIZER: None | AutoTokenizer = None
-_EMBED_MODEL: None | SentenceTransformer = None
-_RERANK_MODELS: None | list[CrossEncoder] = None
+_EMBED_MODEL: None | SentenceTransformer | OnnxEmbeddingModel = None
+_RERANK_MODELS: None | list[CrossEncoder | OnnxCrossEncoder] = None
 _INTENT_TOKENIZER: None | AutoTokenizer = None
-_INTENT_MODEL: None | TFDistilBertForSequenceClassification = None
+_INTENT_MODEL: None | IntentClassifier = None
+# Used by the async API server flows to call the model server without blocking
+_MODEL_SERVER_ASYNC_CLIENT = PooledAsyncClient(max_connections=32)
 
 
 def get_default_tokenizer() -> AutoTokenizer:
@@ -44,23 +63,39 @@ def get_default_tokenizer() -> AutoTokenizer:
 def get_local_embedding_model(
     model_name: str = DOCUMENT_ENCODER_MODEL,
     max_context_length: int = DOC_EMBEDDING_CONTEXT_SIZE,
-) -> SentenceTransformer:
+) -> SentenceTransformer | OnnxEmbeddingModel:
     global _EMBED_MODEL
+    if _EMBED_MODEL is None and MODEL_INFERENCE_BACKEND == "onnx":
+        _EMBED_MODEL = load_onnx_embedding_model(model_name, max_context_length)
     if _EMBED_MODEL is None:
         _EMBED_MODEL = SentenceTransformer(model_name)
         _EMBED_MODEL.max_seq_length = max_context_length
     return _EMBED_MODEL
 
 
+def _load_cross_encoder(
+    model_name: str, max_context_length: int
+) -> CrossEncoder | OnnxCrossEncoder:
+    if MODEL_INFERENCE_BACKEND == "onnx":
+        onnx_model = load_onnx_cross_encoder(model_name, max_context_length)
+        if onnx_model is not None:
+            return onnx_model
+
+    model = CrossEncoder(model_name)
+    model.max_length = max_context_length
+    return model
+
+
 def get_local_reranking_model_ensemble(
     model_names: list[str] = CROSS_ENCODER_MODEL_ENSEMBLE,
     max_context_length: int = CROSS_EMBED_CONTEXT_SIZE,
-) -> list[CrossEncoder]:
+) -> list[CrossEncoder | OnnxCrossEncoder]:
     global _RERANK_MODELS
     if _RERANK_MODELS is None:
-        _RERANK_MODELS = [CrossEncoder(model_name) for model_name in model_names]
-        for model in _RERANK_MODELS:
-            model.max_length = max_context_length
+        _RERANK_MODELS = [
+            _load_cross_encoder(model_name, max_context_length)
+            for model_name in model_names
+        ]
     return _RERANK_MODELS
 
 
@@ -71,16 +106,36 @@ def get_intent_model_tokenizer(model_name: str = INTENT_MODEL_VERSION) -> AutoTo
     return _INTENT_TOKENIZER
 
 
+def _load_intent_classifier(
+    model_name: str, max_context_length: int, runtime: str
+) -> IntentClassifier:
+    tokenizer = get_intent_model_tokenizer(model_name)
+    if runtime == "onnx":
+        onnx_classifier = load_onnx_intent_model(
+            model_name, tokenizer, max_context_length
+        )
+        if onnx_classifier is not None:
+            return onnx_classifier
+        runtime = "torch"
+
+    if runtime == "torch":
+        return TorchIntentClassifier(
+            load_torch_intent_model(model_name), tokenizer, max_context_length
+        )
+    if runtime != "tensorflow":
+        raise ValueError(f"Unknown intent model runtime '{runtime}'")
+    return TFIntentClassifier(model_name, tokenizer, max_context_length)
+
+
 def get_local_intent_model(
     model_name: str = INTENT_MODEL_VERSION,
     max_context_length: int = QUERY_MAX_CONTEXT_SIZE,
-) -> TFDistilBertForSequenceClassification:
+) -> IntentClassifier:
     global _INTENT_MODEL
     if _INTENT_MODEL is None:
-        _INTENT_MODEL = TFDistilBertForSequenceClassification.from_pretrained(
-            model_name
+        _INTENT_MODEL = _load_intent_classifier(
+            model_name, max_context_length, INTENT_MODEL_RUNTIME
         )
-        _INTENT_MODEL.max_seq_length = max_context_length
     return _INTENT_MODEL
 
 
@@ -101,11 +156,7 @@ def warm_up_models(
             for cross_encoder in cross_encoders
         ]
 
-    intent_tokenizer = get_intent_model_tokenizer()
-    inputs = intent_tokenizer(
-        warm_up_str, return_tensors="tf", truncation=True, padding=True
-    )
-    get_local_intent_model()(inputs)
+    get_local_intent_model().predict(warm_up_str)
 
 
 class EmbeddingModel:
@@ -124,7 +175,7 @@ class EmbeddingModel:
             else None
         )
 
-    def load_model(self) -> SentenceTransformer | None:
+    def load_model(self) -> SentenceTransformer | OnnxEmbeddingModel | None:
         if self.embed_server_endpoint:
             return None
 
@@ -132,19 +183,44 @@ class EmbeddingModel:
             model_name=self.model_name, max_context_length=self.max_seq_length
         )
 
+    def _get_embed_request_headers(self) -> dict[str, str]:
+        if MODEL_SERVER_EMBEDDING_TRANSPORT == "json":
+            return {}
+        return {
+            "Accept": f"{get_embeddings_content_type(MODEL_SERVER_EMBEDDING_TRANSPORT)}"
+            ", application/json"
+        }
+
+    @staticmethod
+    def _parse_embed_response(content_type: str | None, content: bytes) -> np.ndarray:
+        dtype = get_embeddings_dtype(content_type)
+        if dtype is not None:
+            return deserialize_embeddings(content, dtype)
+
+        # model servers without the binary transport respond with JSON
+        embeddings = EmbedResponse.parse_raw(content).embeddings
+        if not embeddings:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.array(embeddings, dtype=np.float32)
+
     def encode(
         self, texts: list[str], normalize_embeddings: bool = NORMALIZE_EMBEDDINGS
-    ) -> list[list[float]]:
+    ) -> np.ndarray:
+        """Returns a float32 matrix with one row per text"""
         if self.embed_server_endpoint:
             embed_request = EmbedRequest(texts=texts)
 
             try:
                 response = requests.post(
-                    self.embed_server_endpoint, json=embed_request.dict()
+                    self.embed_server_endpoint,
+                    json=embed_request.dict(),
+                    headers=self._get_embed_request_headers(),
                 )
                 response.raise_for_status()
 
-                return EmbedResponse(**response.json()).embeddings
+                return self._parse_embed_response(
+                    response.headers.get("content-type"), response.content
+                )
             except requests.RequestException as e:
                 logger.exception(f"Failed to get Embedding: {e}")
                 raise
@@ -156,7 +232,32 @@ class EmbeddingModel:
 
         return local_model.encode(
             texts, normalize_embeddings=normalize_embeddings
-        ).tolist()
+        ).astype(np.float32, copy=False)
+
+    async def encode_async(
+        self, texts: list[str], normalize_embeddings: bool = NORMALIZE_EMBEDDINGS
+    ) -> np.ndarray:
+        if not self.embed_server_endpoint:
+            # local model inference is CPU bound, keep it off the event loop
+            return await asyncio.to_thread(
+                self.encode, texts, normalize_embeddings=normalize_embeddings
+            )
+
+        embed_request = EmbedRequest(texts=texts)
+        try:
+            response = await _MODEL_SERVER_ASYNC_CLIENT.get().post(
+                self.embed_server_endpoint,
+                json=embed_request.dict(),
+                headers=self._get_embed_request_headers(),
+            )
+            response.raise_for_status()
+
+            return self._parse_embed_response(
+                response.headers.get("content-type"), response.content
+            )
+        except httpx.HTTPError as e:
+            logger.exception(f"Failed to get Embedding: {e}")
+            raise
 
 
 class CrossEncoderEnsembleModel:
@@ -175,7 +276,7 @@ class CrossEncoderEnsembleModel:
             else None
         )
 
-    def load_model(self) -> list[CrossEncoder] | None:
+    def load_model(self) -> list[CrossEncoder | OnnxCrossEncoder] | None:
         if self.rerank_server_endpoint:
             return None
 
@@ -210,6 +311,23 @@ class CrossEncoderEnsembleModel:
 
         return scores
 
+    async def predict_async(self, query: str, passages: list[str]) -> list[list[float]]:
+        if not self.rerank_server_endpoint:
+            # local model inference is CPU bound, keep it off the event loop
+            return await asyncio.to_thread(self.predict, query, passages)
+
+        rerank_request = RerankRequest(query=query, documents=passages)
+        try:
+            response = await _MODEL_SERVER_ASYNC_CLIENT.get().post(
+                self.rerank_server_endpoint, json=rerank_request.dict()
+            )
+            response.raise_for_status()
+
+            return RerankResponse(**response.json()).scores
+        except httpx.HTTPError as e:
+            logger.exception(f"Failed to get Reranking Scores: {e}")
+            raise
+
 
 class IntentModel:
     def __init__(
@@ -227,7 +345,7 @@ class IntentModel:
             else None
         )
 
-    def load_model(self) -> SentenceTransformer | None:
+    def load_model(self) -> IntentClassifier | None:
         if self.intent_server_endpoint:
             return None
 
@@ -253,19 +371,9 @@ class IntentModel:
                 logger.exception(f"Failed to get Embedding: {e}")
                 raise
 
-        tokenizer = get_intent_model_tokenizer()
         local_model = self.load_model()
 
         if local_model is None:
             raise RuntimeError("Failed to load local Intent Model")
 
-        intent_model = get_local_intent_model()
-        model_input = tokenizer(
-            query, return_tensors="tf", truncation=True, padding=True
-        )
-
-        predictions = intent_model(model_input)[0]
-        probabilities = tf.nn.softmax(predictions, axis=-1)
-        class_percentages = np.round(probabilities.numpy() * 100, 2)
-
-        return list(class_percentages.tolist()[0])
+        return local_model.predict(query)
@@ -1,25 +1,27 @@
+import asyncio
 from collections.abc import Callable
-from typing import cast
 
 import numpy
 from nltk.corpus import stopwords  # type:ignore
 from nltk.stem import WordNetLemmatizer  # type:ignore
 from nltk.tokenize import word_tokenize  # type:ignore
-from sentence_transformers import SentenceTransformer  # type: ignore
 from sqlalchemy.orm import Session
 
 from danswer.configs.model_configs import ASYM_QUERY_PREFIX
 from danswer.configs.model_configs import CROSS_ENCODER_RANGE_MAX
 from danswer.configs.model_configs import CROSS_ENCODER_RANGE_MIN
 from danswer.configs.model_configs import NORMALIZE_EMBEDDINGS
+from danswer.configs.model_configs import QUERY_EMBEDDING_CACHE_SIZE
+from danswer.configs.model_configs import QUERY_EMBEDDING_CACHE_TTL
 from danswer.configs.model_configs import SIM_SCORE_RANGE_HIGH
 from danswer.configs.model_configs import SIM_SCORE_RANGE_LOW
 from danswer.db.feedback import create_query_event
 from danswer.db.feedback import update_query_event_retrieved_documents
 from danswer.db.models import User
 from danswer.document_index.document_index_utils import (
-    translate_boost_count_to_multiplier,
+    translate_boost_counts_to_multipliers,
 )
+from danswer.document_index.interfaces import AsyncDocumentIndex
 from danswer.document_index.interfaces import DocumentIndex
 from danswer.indexing.models import InferenceChunk
 from danswer.search.access_filters import build_access_filters_for_user
@@ -30,16 +32,29 @@ from danswer.search.models import RerankMetricsContainer
 from danswer.search.models import RetrievalMetricsContainer
 from danswer.search.models import SearchQuery
 from danswer.search.models import SearchType
+from danswer.search.search_cache import get_search_result_cache
+from danswer.search.search_cache import SearchResultCache
 from danswer.search.search_nlp_models import CrossEncoderEnsembleModel
 from danswer.search.search_nlp_models import EmbeddingModel
 from danswer.server.models import QuestionRequest
 from danswer.server.models import SearchDoc
 from danswer.utils.logger import setup_logger
+from danswer.utils.lru_cache import CacheStats
+from danswer.utils.lru_cache import TTLLRUCache
+from danswer.utils.timing import log_async_function_time
 from danswer.utils.timing import log_function_time
 
 
 logger = setup_logger()
 
+# Keyed on (model name, prefix, normalize flag, query text). Stored as tuples and
+# copied out, so callers modifying their embedding can't change the cached one
+_QUERY_EMBEDDING_CACHE: TTLLRUCache[
+    tuple[str, str, bool, str], tuple[float, ...]
+] = TTLLRUCache(
+    max_size=QUERY_EMBEDDING_CACHE_SIZE, ttl_seconds=QUERY_EMBEDDING_CACHE_TTL
+)
+
 
 def lemmatize_text(text: str) -> list[str]:
     lemmatizer = WordNetLemmatizer()
@@ -64,19 +79,60 @@ def query_processing(
 
 def embed_query(
     query: str,
-    embedding_model: SentenceTransformer | None = None,
+    embedding_model: EmbeddingModel | None = None,
     prefix: str = ASYM_QUERY_PREFIX,
     normalize_embeddings: bool = NORMALIZE_EMBEDDINGS,
+    use_cache: bool = True,
 ) -> list[float]:
     model = embedding_model or EmbeddingModel()
+    cache_key = (model.model_name, prefix, normalize_embeddings, query)
+    if use_cache:
+        cached_embedding = _QUERY_EMBEDDING_CACHE.get(cache_key)
+        if cached_embedding is not None:
+            return list(cached_embedding)
+
     prefixed_query = prefix + query
     query_embedding = model.encode(
         [prefixed_query], normalize_embeddings=normalize_embeddings
-    )[0]
+    )[0].tolist()
+
+    if use_cache:
+        _QUERY_EMBEDDING_CACHE.put(cache_key, tuple(query_embedding))
 
     return query_embedding
 
 
+async def embed_query_async(
+    query: str,
+    embedding_model: EmbeddingModel | None = None,
+    prefix: str = ASYM_QUERY_PREFIX,
+    normalize_embeddings: bool = NORMALIZE_EMBEDDINGS,
+    use_cache: bool = True,
+) -> list[float]:
+    model = embedding_model or EmbeddingModel()
+    cache_key = (model.model_name, prefix, normalize_embeddings, query)
+    if use_cache:
+        cached_embedding = _QUERY_EMBEDDING_CACHE.get(cache_key)
+        if cached_embedding is not None:
+            return list(cached_embedding)
+
+    prefixed_query = prefix + query
+    query_embedding = (
+        await model.encode_async(
+            [prefixed_query], normalize_embeddings=normalize_embeddings
+        )
+    )[0].tolist()
+
+    if use_cache:
+        _QUERY_EMBEDDING_CACHE.put(cache_key, tuple(query_embedding))
+
+    return query_embedding
+
+
+def get_query_embedding_cache_stats() -> CacheStats:
+    return _QUERY_EMBEDDING_CACHE.stats()
+
+
 def chunks_to_search_docs(chunks: list[InferenceChunk] | None) -> list[SearchDoc]:
     search_docs = (
         [
@@ -127,47 +183,84 @@ def doc_index_retrieval(
     return top_chunks
 
 
-@log_function_time()
-def semantic_reranking(
-    query: str,
-    chunks: list[InferenceChunk],
-    rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
-    model_min: int = CROSS_ENCODER_RANGE_MIN,
-    model_max: int = CROSS_ENCODER_RANGE_MAX,
+@log_async_function_time()
+async def doc_index_retrieval_async(
+    query: SearchQuery, document_index: AsyncDocumentIndex
 ) -> list[InferenceChunk]:
-    cross_encoders = CrossEncoderEnsembleModel()
-    passages = [chunk.content for chunk in chunks]
-    sim_scores_floats = cross_encoders.predict(query=query, passages=passages)
+    if query.search_type == SearchType.KEYWORD:
+        top_chunks = await document_index.keyword_retrieval_async(
+            query.query, query.filters, query.favor_recent, query.num_hits
+        )
+
+    elif query.search_type == SearchType.SEMANTIC:
+        top_chunks = await document_index.semantic_retrieval_async(
+            query.query, query.filters, query.favor_recent, query.num_hits
+        )
+
+    elif query.search_type == SearchType.HYBRID:
+        top_chunks = await document_index.hybrid_retrieval_async(
+            query.query, query.filters, query.favor_recent, query.num_hits
+        )
+
+    else:
+        raise RuntimeError("Invalid Search Flow")
+
+    return top_chunks
+
 
-    sim_scores = [numpy.array(scores) for scores in sim_scores_floats]
+def _get_chunk_multipliers(
+    chunks: list[InferenceChunk], include_recency: bool = True
+) -> numpy.ndarray:
+    boosts = translate_boost_counts_to_multipliers(
+        numpy.fromiter((chunk.boost for chunk in chunks), float, count=len(chunks))
+    )
+    if not include_recency:
+        return boosts
+    return boosts * numpy.fromiter(
+        (chunk.recency_bias for chunk in chunks), float, count=len(chunks)
+    )
 
-    raw_sim_scores = cast(numpy.ndarray, sum(sim_scores) / len(sim_scores))
 
-    cross_models_min = numpy.min(sim_scores)
+def _sort_chunks_by_scores(
+    chunks: list[InferenceChunk], scores: numpy.ndarray
+) -> tuple[list[InferenceChunk], numpy.ndarray]:
+    """Sorts highest score first and sets the chunk scores, ties keep their order"""
+    order = numpy.argsort(-scores, kind="stable")
+    sorted_scores = scores[order]
+    sorted_chunks = [chunks[ind] for ind in order]
+    for chunk, score in zip(sorted_chunks, sorted_scores.tolist()):
+        chunk.score = score
+    return sorted_chunks, order
 
-    shifted_sim_scores = sum(
-        [enc_n_scores - cross_models_min for enc_n_scores in sim_scores]
-    ) / len(sim_scores)
 
-    boosts = [translate_boost_count_to_multiplier(chunk.boost) for chunk in chunks]
-    recency_multiplier = [chunk.recency_bias for chunk in chunks]
-    boosted_sim_scores = shifted_sim_scores * boosts * recency_multiplier
+def _rerank_chunks_by_sim_scores(
+    chunks: list[InferenceChunk],
+    sim_scores_floats: list[list[float]],
+    rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
+    model_min: int = CROSS_ENCODER_RANGE_MIN,
+    model_max: int = CROSS_ENCODER_RANGE_MAX,
+) -> list[InferenceChunk]:
+    # Shape is (number of cross encoders, number of chunks)
+    sim_scores = numpy.asarray(sim_scores_floats, dtype=float)
+    raw_sim_scores = sim_scores.mean(axis=0)
+    cross_models_min = sim_scores.min()
+
+    boosted_sim_scores = (raw_sim_scores - cross_models_min) * _get_chunk_multipliers(
+        chunks
+    )
     normalized_b_s_scores = (boosted_sim_scores + cross_models_min - model_min) / (
         model_max - model_min
     )
-    scored_results = list(zip(normalized_b_s_scores, raw_sim_scores, chunks))
-    scored_results.sort(key=lambda x: x[0], reverse=True)
-    ranked_sim_scores, ranked_raw_scores, ranked_chunks = zip(*scored_results)
 
+    ranked_chunks, order = _sort_chunks_by_scores(chunks, normalized_b_s_scores)
+
+    # Lazy formatting, building the strings is slower than the scoring itself
     logger.debug(
-        f"Reranked (Boosted + Time Weighted) similarity scores: {ranked_sim_scores}"
+        "Reranked (Boosted + Time Weighted) similarity scores: %s",
+        normalized_b_s_scores[order],
     )
 
-    # Assign new chunk scores based on reranking
     # TODO if pagination is added, the scores won't make sense with respect to the non-reranked hits
-    for ind, chunk in enumerate(ranked_chunks):
-        chunk.score = ranked_sim_scores[ind]
-
     if rerank_metrics_callback is not None:
         chunk_metrics = [
             ChunkMetric(
@@ -181,11 +274,56 @@ def semantic_reranking(
 
         rerank_metrics_callback(
             RerankMetricsContainer(
-                metrics=chunk_metrics, raw_similarity_scores=ranked_raw_scores
+                metrics=chunk_metrics,
+                raw_similarity_scores=raw_sim_scores[order].tolist(),
             )
         )
 
-    return list(ranked_chunks)
+    return ranked_chunks
+
+
+@log_function_time()
+def semantic_reranking(
+    query: str,
+    chunks: list[InferenceChunk],
+    rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
+    model_min: int = CROSS_ENCODER_RANGE_MIN,
+    model_max: int = CROSS_ENCODER_RANGE_MAX,
+) -> list[InferenceChunk]:
+    cross_encoders = CrossEncoderEnsembleModel()
+    passages = [chunk.content for chunk in chunks]
+    sim_scores_floats = cross_encoders.predict(query=query, passages=passages)
+
+    return _rerank_chunks_by_sim_scores(
+        chunks=chunks,
+        sim_scores_floats=sim_scores_floats,
+        rerank_metrics_callback=rerank_metrics_callback,
+        model_min=model_min,
+        model_max=model_max,
+    )
+
+
+@log_async_function_time()
+async def semantic_reranking_async(
+    query: str,
+    chunks: list[InferenceChunk],
+    rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
+    model_min: int = CROSS_ENCODER_RANGE_MIN,
+    model_max: int = CROSS_ENCODER_RANGE_MAX,
+) -> list[InferenceChunk]:
+    cross_encoders = CrossEncoderEnsembleModel()
+    passages = [chunk.content for chunk in chunks]
+    sim_scores_floats = await cross_encoders.predict_async(
+        query=query, passages=passages
+    )
+
+    return _rerank_chunks_by_sim_scores(
+        chunks=chunks,
+        sim_scores_floats=sim_scores_floats,
+        rerank_metrics_callback=rerank_metrics_callback,
+        model_min=model_min,
+        model_max=model_max,
+    )
 
 
 def apply_boost_legacy(
@@ -193,51 +331,37 @@ def apply_boost_legacy(
     norm_min: float = SIM_SCORE_RANGE_LOW,
     norm_max: float = SIM_SCORE_RANGE_HIGH,
 ) -> list[InferenceChunk]:
-    scores = [chunk.score or 0 for chunk in chunks]
-    boosts = [translate_boost_count_to_multiplier(chunk.boost) for chunk in chunks]
+    scores = numpy.fromiter(
+        (chunk.score or 0 for chunk in chunks), float, count=len(chunks)
+    )
+    boosts = _get_chunk_multipliers(chunks, include_recency=False)
 
-    logger.debug(f"Raw similarity scores: {scores}")
+    logger.debug("Raw similarity scores: %s", scores)
 
-    score_min = min(scores)
-    score_max = max(scores)
+    score_min = scores.min()
+    score_max = scores.max()
     score_range = score_max - score_min
 
     if score_range != 0:
-        boosted_scores = [
-            ((score - score_min) / score_range) * boost
-            for score, boost in zip(scores, boosts)
-        ]
-        unnormed_boosted_scores = [
-            score * score_range + score_min for score in boosted_scores
-        ]
+        boosted_scores = ((scores - score_min) / score_range) * boosts
+        unnormed_boosted_scores = boosted_scores * score_range + score_min
     else:
-        unnormed_boosted_scores = [
-            score * boost for score, boost in zip(scores, boosts)
-        ]
+        unnormed_boosted_scores = scores * boosts
 
-    norm_min = min(norm_min, min(scores))
-    norm_max = max(norm_max, max(scores))
+    norm_min = min(norm_min, score_min)
+    norm_max = max(norm_max, score_max)
     # This should never be 0 unless user has done some weird/wrong settings
     norm_range = norm_max - norm_min
 
     # For score display purposes
     if norm_range != 0:
-        re_normed_scores = [
-            ((score - norm_min) / norm_range) for score in unnormed_boosted_scores
-        ]
+        re_normed_scores = (unnormed_boosted_scores - norm_min) / norm_range
     else:
         re_normed_scores = unnormed_boosted_scores
 
-    rescored_chunks = list(zip(re_normed_scores, chunks))
-    rescored_chunks.sort(key=lambda x: x[0], reverse=True)
-    sorted_boosted_scores, boost_sorted_chunks = zip(*rescored_chunks)
+    final_chunks, order = _sort_chunks_by_scores(chunks, re_normed_scores)
 
-    final_chunks = list(boost_sorted_chunks)
-    final_scores = list(sorted_boosted_scores)
-    for ind, chunk in enumerate(final_chunks):
-        chunk.score = final_scores[ind]
-
-    logger.debug(f"Boost sorted similary scores: {list(final_scores)}")
+    logger.debug("Boost sorted similary scores: %s", re_normed_scores[order])
 
     return final_chunks
 
@@ -247,52 +371,59 @@ def apply_boost(
     norm_min: float = SIM_SCORE_RANGE_LOW,
     norm_max: float = SIM_SCORE_RANGE_HIGH,
 ) -> list[InferenceChunk]:
-    scores = [chunk.score or 0.0 for chunk in chunks]
-    logger.debug(f"Raw similarity scores: {scores}")
-
-    boosts = [translate_boost_count_to_multiplier(chunk.boost) for chunk in chunks]
-    recency_multiplier = [chunk.recency_bias for chunk in chunks]
+    scores = numpy.fromiter(
+        (chunk.score or 0.0 for chunk in chunks), float, count=len(chunks)
+    )
+    logger.debug("Raw similarity scores: %s", scores)
 
-    norm_min = min(norm_min, min(scores))
-    norm_max = max(norm_max, max(scores))
+    norm_min = min(norm_min, scores.min())
+    norm_max = max(norm_max, scores.max())
     # This should never be 0 unless user has done some weird/wrong settings
     norm_range = norm_max - norm_min
 
-    boosted_scores = [
-        (score - norm_min) * boost * recency / norm_range
-        for score, boost, recency in zip(scores, boosts, recency_multiplier)
-    ]
-
-    rescored_chunks = list(zip(boosted_scores, chunks))
-    rescored_chunks.sort(key=lambda x: x[0], reverse=True)
-    sorted_boosted_scores, boost_sorted_chunks = zip(*rescored_chunks)
+    boosted_scores = (scores - norm_min) * _get_chunk_multipliers(chunks) / norm_range
 
-    final_chunks = list(boost_sorted_chunks)
-    final_scores = list(sorted_boosted_scores)
-    for ind, chunk in enumerate(final_chunks):
-        chunk.score = final_scores[ind]
+    final_chunks, order = _sort_chunks_by_scores(chunks, boosted_scores)
 
     logger.debug(
-        f"Boosted + Time Weighted sorted similarity scores: {list(final_scores)}"
+        "Boosted + Time Weighted sorted similarity scores: %s", boosted_scores[order]
     )
 
     return final_chunks
 
 
-def search_chunks(
+def _log_top_chunk_links(search_flow: str, chunks: list[InferenceChunk]) -> None:
+    top_links = [
+        c.source_links[0] if c.source_links is not None else "No Link" for c in chunks
+    ]
+    logger.info(f"Top links from {search_flow} search: {', '.join(top_links)}")
+
+
+def _report_retrieval_metrics(
+    top_chunks: list[InferenceChunk],
+    retrieval_metrics_callback: Callable[[RetrievalMetricsContainer], None],
+) -> None:
+    chunk_metrics = [
+        ChunkMetric(
+            document_id=chunk.document_id,
+            chunk_content_start=chunk.content[:MAX_METRICS_CONTENT],
+            first_link=chunk.source_links[0] if chunk.source_links else None,
+            score=chunk.score if chunk.score is not None else 0,
+        )
+        for chunk in top_chunks
+    ]
+    retrieval_metrics_callback(
+        RetrievalMetricsContainer(keyword_search=True, metrics=chunk_metrics)
+    )
+
+
+def _search_chunks(
     query: SearchQuery,
     document_index: DocumentIndex,
     retrieval_metrics_callback: Callable[[RetrievalMetricsContainer], None]
     | None = None,
     rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
 ) -> tuple[list[InferenceChunk] | None, list[InferenceChunk] | None]:
-    def _log_top_chunk_links(search_flow: str, chunks: list[InferenceChunk]) -> None:
-        top_links = [
-            c.source_links[0] if c.source_links is not None else "No Link"
-            for c in chunks
-        ]
-        logger.info(f"Top links from {search_flow} search: {', '.join(top_links)}")
-
     top_chunks = doc_index_retrieval(query=query, document_index=document_index)
 
     if not top_chunks:
@@ -303,18 +434,7 @@ def search_chunks(
         return None, None
 
     if retrieval_metrics_callback is not None:
-        chunk_metrics = [
-            ChunkMetric(
-                document_id=chunk.document_id,
-                chunk_content_start=chunk.content[:MAX_METRICS_CONTENT],
-                first_link=chunk.source_links[0] if chunk.source_links else None,
-                score=chunk.score if chunk.score is not None else 0,
-            )
-            for chunk in top_chunks
-        ]
-        retrieval_metrics_callback(
-            RetrievalMetricsContainer(keyword_search=True, metrics=chunk_metrics)
-        )
+        _report_retrieval_metrics(top_chunks, retrieval_metrics_callback)
 
     # Keyword Search should never do reranking, no transformers involved in this flow
     if query.search_type == SearchType.KEYWORD:
@@ -339,6 +459,160 @@ def search_chunks(
     return ranked_chunks, top_chunks[query.num_rerank :]
 
 
+async def _search_chunks_async(
+    query: SearchQuery,
+    document_index: AsyncDocumentIndex,
+    retrieval_metrics_callback: Callable[[RetrievalMetricsContainer], None]
+    | None = None,
+    rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
+) -> tuple[list[InferenceChunk] | None, list[InferenceChunk] | None]:
+    """Same flow as `_search_chunks` but doesn't block the event loop on the
+    Vespa / model server round trips"""
+    top_chunks = await doc_index_retrieval_async(
+        query=query, document_index=document_index
+    )
+
+    if not top_chunks:
+        logger.info(
+            f"{query.search_type.value.capitalize()} search returned no results "
+            f"with filters: {query.filters}"
+        )
+        return None, None
+
+    if retrieval_metrics_callback is not None:
+        _report_retrieval_metrics(top_chunks, retrieval_metrics_callback)
+
+    # Keyword Search should never do reranking, no transformers involved in this flow
+    if query.search_type == SearchType.KEYWORD:
+        _log_top_chunk_links(query.search_type.value, top_chunks)
+        return top_chunks, None
+
+    if query.skip_rerank:
+        # Need the range of values to not be too spread out for applying boost
+        # Therefore pass in smaller set of chunks to limit the range for norm-ing
+        boosted_chunks = apply_boost(top_chunks[: query.num_rerank])
+        _log_top_chunk_links(query.search_type.value, boosted_chunks)
+        return boosted_chunks, top_chunks[query.num_rerank :]
+
+    ranked_chunks = await semantic_reranking_async(
+        query.query,
+        top_chunks[: query.num_rerank],
+        rerank_metrics_callback=rerank_metrics_callback,
+    )
+
+    _log_top_chunk_links(query.search_type.value, ranked_chunks)
+
+    return ranked_chunks, top_chunks[query.num_rerank :]
+
+
+def _get_cache_generation(
+    use_cache: bool,
+    retrieval_metrics_callback: Callable[[RetrievalMetricsContainer], None] | None,
+    rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None,
+) -> tuple[SearchResultCache | None, str | None]:
+    # The metrics callbacks are used to evaluate retrieval, those always need a real run
+    if (
+        not use_cache
+        or retrieval_metrics_callback is not None
+        or rerank_metrics_callback is not None
+    ):
+        return None, None
+
+    search_cache = get_search_result_cache()
+    if search_cache is None:
+        return None, None
+
+    # Fetched before searching so that a write which lands mid search makes the
+    # stored result stale rather than being missed
+    return search_cache, search_cache.get_generation()
+
+
+def search_chunks(
+    query: SearchQuery,
+    document_index: DocumentIndex,
+    retrieval_metrics_callback: Callable[[RetrievalMetricsContainer], None]
+    | None = None,
+    rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
+    use_cache: bool = True,
+) -> tuple[list[InferenceChunk] | None, list[InferenceChunk] | None]:
+    search_cache, generation = _get_cache_generation(
+        use_cache, retrieval_metrics_callback, rerank_metrics_callback
+    )
+    if search_cache is not None and generation is not None:
+        cached_result = search_cache.get(query, generation)
+        if cached_result is not None:
+            logger.info("Returning cached search results")
+            return cached_result
+
+    ranked_chunks, unranked_chunks = _search_chunks(
+        query=query,
+        document_index=document_index,
+        retrieval_metrics_callback=retrieval_metrics_callback,
+        rerank_metrics_callback=rerank_metrics_callback,
+    )
+
+    if search_cache is not None and generation is not None:
+        search_cache.put(query, generation, ranked_chunks, unranked_chunks)
+
+    return ranked_chunks, unranked_chunks
+
+
+async def search_chunks_async(
+    query: SearchQuery,
+    document_index: AsyncDocumentIndex,
+    retrieval_metrics_callback: Callable[[RetrievalMetricsContainer], None]
+    | None = None,
+    rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
+    use_cache: bool = True,
+) -> tuple[list[InferenceChunk] | None, list[InferenceChunk] | None]:
+    # the index generation is read from the dynamic config store (file locked reads),
+    # so none of the cache calls run on the event loop
+    search_cache, generation = await asyncio.to_thread(
+        _get_cache_generation,
+        use_cache,
+        retrieval_metrics_callback,
+        rerank_metrics_callback,
+    )
+    if search_cache is not None and generation is not None:
+        cached_result = await asyncio.to_thread(search_cache.get, query, generation)
+        if cached_result is not None:
+            logger.info("Returning cached search results")
+            return cached_result
+
+    ranked_chunks, unranked_chunks = await _search_chunks_async(
+        query=query,
+        document_index=document_index,
+        retrieval_metrics_callback=retrieval_metrics_callback,
+        rerank_metrics_callback=rerank_metrics_callback,
+    )
+
+    if search_cache is not None and generation is not None:
+        await asyncio.to_thread(
+            search_cache.put, query, generation, ranked_chunks, unranked_chunks
+        )
+
+    return ranked_chunks, unranked_chunks
+
+
+def _build_search_query(
+    question: QuestionRequest, user_acl_filters: list[str]
+) -> SearchQuery:
+    final_filters = IndexFilters(
+        source_type=question.filters.source_type,
+        document_set=question.filters.document_set,
+        time_cutoff=question.filters.time_cutoff,
+        access_control_list=user_acl_filters,
+    )
+
+    return SearchQuery(
+        query=question.query,
+        search_type=question.search_type,
+        filters=final_filters,
+        favor_recent=True if question.favor_recent is None else question.favor_recent,
+    )
+
+
+@log_function_time()
 def danswer_search(
     question: QuestionRequest,
     user: User | None,
@@ -357,21 +631,53 @@ def danswer_search(
     )
 
     user_acl_filters = build_access_filters_for_user(user, db_session)
-    final_filters = IndexFilters(
-        source_type=question.filters.source_type,
-        document_set=question.filters.document_set,
-        time_cutoff=question.filters.time_cutoff,
-        access_control_list=user_acl_filters,
+    search_query = _build_search_query(question, user_acl_filters)
+
+    ranked_chunks, unranked_chunks = search_chunks(
+        query=search_query,
+        document_index=document_index,
+        retrieval_metrics_callback=retrieval_metrics_callback,
+        rerank_metrics_callback=rerank_metrics_callback,
     )
 
-    search_query = SearchQuery(
+    retrieved_ids = [doc.document_id for doc in ranked_chunks] if ranked_chunks else []
+
+    update_query_event_retrieved_documents(
+        db_session=db_session,
+        retrieved_document_ids=retrieved_ids,
+        query_id=query_event_id,
+        user_id=None if user is None else user.id,
+    )
+
+    return ranked_chunks, unranked_chunks, query_event_id
+
+
+@log_async_function_time()
+async def danswer_search_async(
+    question: QuestionRequest,
+    user: User | None,
+    db_session: Session,
+    document_index: AsyncDocumentIndex,
+    retrieval_metrics_callback: Callable[[RetrievalMetricsContainer], None]
+    | None = None,
+    rerank_metrics_callback: Callable[[RerankMetricsContainer], None] | None = None,
+) -> tuple[list[InferenceChunk] | None, list[InferenceChunk] | None, int]:
+    # The Postgres session is sync, run those calls in a worker thread
+    query_event_id = await asyncio.to_thread(
+        create_query_event,
         query=question.query,
         search_type=question.search_type,
-        filters=final_filters,
-        favor_recent=True if question.favor_recent is None else question.favor_recent,
+        llm_answer=None,
+        user_id=user.id if user is not None else None,
+        db_session=db_session,
     )
 
-    ranked_chunks, unranked_chunks = search_chunks(
+    user_acl_filters = await asyncio.to_thread(
+        build_access_filters_for_user, user, db_session
+    )
+    search_query = _build_search_query(question, user_acl_filters)
+
+    ranked_chunks, unranked_chunks = await search_chunks_async(
         query=search_query,
         document_index=document_index,
         retrieval_metrics_callback=retrieval_metrics_callback,
@@ -380,7 +686,8 @@ def danswer_search(
 
     retrieved_ids = [doc.document_id for doc in ranked_chunks] if ranked_chunks else []
 
-    update_query_event_retrieved_documents(
+    await asyncio.to_thread(
+        update_query_event_retrieved_documents,
         db_session=db_session,
         retrieved_document_ids=retrieved_ids,
         query_id=query_event_id,
@@ -30,6 +30,7 @@ from danswer.dynamic_configs.interface import ConfigNotFoundError
 from danswer.llm.factory import get_default_llm
 from danswer.llm.utils import get_gen_ai_api_key
 from danswer.llm.utils import test_llm
+from danswer.search.search_runner import get_query_embedding_cache_stats
 from danswer.server.models import ApiKey
 from danswer.server.models import BoostDoc
 from danswer.server.models import BoostUpdateRequest
@@ -39,6 +40,7 @@ from danswer.server.models import HiddenUpdateRequest
 from danswer.server.models import StatusResponse
 from danswer.server.models import UserRoleResponse
 from danswer.utils.logger import setup_logger
+from danswer.utils.lru_cache import CacheStats
 
 router = APIRouter(prefix="/manage")
 logger = setup_logger()
@@ -104,6 +106,13 @@ def document_hidden_update(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get("/admin/query-embedding-cache-stats")
+def get_query_embedding_cache_stats_endpoint(
+    _: User | None = Depends(current_admin_user),
+) -> CacheStats:
+    return get_query_embedding_cache_stats()
+
+
 @router.head("/admin/genai-api-key/validate")
 def validate_existing_genai_api_key(
     _: User = Depends(current_admin_user),
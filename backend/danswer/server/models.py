@@ -177,8 +177,10 @@ class RetrievalDocs(BaseModel):
 
 class RerankedRetrievalDocs(RetrievalDocs):
     unranked_top_documents: list[SearchDoc]
-    predicted_flow: QueryFlow
-    predicted_search: SearchType
+    # None if the intent model hasn't finished by the time retrieval is done, the
+    # prediction is then streamed afterwards as a QueryIntent
+    predicted_flow: QueryFlow | None
+    predicted_search: SearchType | None
     time_cutoff: datetime | None
     favor_recent: bool
 
@@ -190,6 +192,11 @@ class RerankedRetrievalDocs(RetrievalDocs):
         return initial_dict
 
 
+class QueryIntent(BaseModel):
+    predicted_flow: QueryFlow
+    predicted_search: SearchType
+
+
 class CreateChatSessionID(BaseModel):
     chat_session_id: int
 
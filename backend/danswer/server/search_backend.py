@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import HTTPException
@@ -12,14 +14,15 @@ from danswer.db.feedback import create_doc_retrieval_feedback
 from danswer.db.feedback import update_query_event_feedback
 from danswer.db.models import User
 from danswer.direct_qa.answer_question import answer_qa_query
-from danswer.direct_qa.answer_question import answer_qa_query_stream
+from danswer.direct_qa.answer_question import answer_qa_query_stream_async
+from danswer.document_index.factory import get_default_async_document_index
 from danswer.document_index.factory import get_default_document_index
 from danswer.document_index.vespa.index import VespaIndex
 from danswer.search.access_filters import build_access_filters_for_user
 from danswer.search.danswer_helper import recommend_search_flow
 from danswer.search.models import IndexFilters
 from danswer.search.search_runner import chunks_to_search_docs
-from danswer.search.search_runner import danswer_search
+from danswer.search.search_runner import danswer_search_async
 from danswer.secondary_llm_flows.extract_filters import extract_question_time_filters
 from danswer.secondary_llm_flows.query_validation import get_query_answerability
 from danswer.secondary_llm_flows.query_validation import stream_query_answerability
@@ -117,7 +120,7 @@ def stream_query_validation(
 
 
 @router.post("/document-search")
-def handle_search_request(
+async def handle_search_request(
     question: QuestionRequest,
     user: User | None = Depends(current_user),
     db_session: Session = Depends(get_session),
@@ -125,15 +128,18 @@ def handle_search_request(
     query = question.query
     logger.info(f"Received {question.search_type.value} " f"search query: {query}")
 
-    time_cutoff, favor_recent = extract_question_time_filters(question)
+    # LLM call via a sync client, keep it off the event loop
+    time_cutoff, favor_recent = await asyncio.to_thread(
+        extract_question_time_filters, question
+    )
     question.filters.time_cutoff = time_cutoff
     question.favor_recent = favor_recent
 
-    ranked_chunks, unranked_chunks, query_event_id = danswer_search(
+    ranked_chunks, unranked_chunks, query_event_id = await danswer_search_async(
         question=question,
         user=user,
         db_session=db_session,
-        document_index=get_default_document_index(),
+        document_index=get_default_async_document_index(),
     )
 
     if not ranked_chunks:
@@ -169,12 +175,12 @@ def direct_qa(
 
 
 @router.post("/stream-direct-qa")
-def stream_direct_qa(
+async def stream_direct_qa(
     question: QuestionRequest,
     user: User | None = Depends(current_user),
     db_session: Session = Depends(get_session),
 ) -> StreamingResponse:
-    packets = answer_qa_query_stream(
+    packets = answer_qa_query_stream_async(
         question=question, user=user, db_session=db_session
     )
     return StreamingResponse(packets, media_type="application/json")
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+import httpx
+
+
+class PooledAsyncClient:
+    """Lazily builds a connection pooled `httpx.AsyncClient` per event loop. httpx
+    clients can't be shared across event loops (e.g. when called via `asyncio.run` from
+    a script), so each loop gets its own client. A client is closed on its own loop once
+    that loop shuts down and cancels its remaining tasks, as `asyncio.run` does."""
+
+    def __init__(self, max_connections: int) -> None:
+        self.max_connections = max_connections
+        self._clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        # the loops only keep weak references to their tasks
+        self._closing_tasks: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    def get(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is not None:
+                return client
+
+            # loops closed without cancelling their tasks couldn't close their client,
+            # its sockets are closed once it is garbage collected
+            for closed_loop in [other for other in self._clients if other.is_closed()]:
+                del self._clients[closed_loop]
+
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                # match the sync requests based calls which don't time out
+                timeout=None,
+            )
+            self._clients[loop] = client
+            closing_task = loop.create_task(self._close_on_shutdown(loop, client))
+            self._closing_tasks.add(closing_task)
+            closing_task.add_done_callback(self._closing_tasks.discard)
+            return client
+
+    async def _close_on_shutdown(
+        self, loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient
+    ) -> None:
+        try:
+            # only cancelled when the loop shuts down
+            await loop.create_future()
+        finally:
+            with self._lock:
+                self._clients.pop(loop, None)
+            await client.aclose()
@@ -0,0 +1,56 @@
+from collections.abc import Callable
+from typing import cast
+from typing import TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def build_length_bucketed_batches(
+    lengths: list[int], max_batch_tokens: int, max_batch_size: int
+) -> list[list[int]]:
+    """Groups item indices into batches of similar length. Every item in a batch is
+    padded to the longest one, so the budget is checked against the padded size
+    (number of items x longest item). Items over the budget get a batch of their own."""
+    # longest first so the first item of each batch determines its padded length
+    sorted_inds = sorted(
+        range(len(lengths)), key=lambda ind: lengths[ind], reverse=True
+    )
+
+    batches: list[list[int]] = []
+    current_batch: list[int] = []
+    for ind in sorted_inds:
+        padded_length = lengths[current_batch[0]] if current_batch else lengths[ind]
+        if current_batch and (
+            len(current_batch) >= max_batch_size
+            or (len(current_batch) + 1) * padded_length > max_batch_tokens
+        ):
+            batches.append(current_batch)
+            current_batch = []
+        current_batch.append(ind)
+
+    if current_batch:
+        batches.append(current_batch)
+    return batches
+
+
+def run_length_bucketed(
+    items: list[T],
+    lengths: list[int],
+    process_batch: Callable[[list[T]], list[R]],
+    max_batch_tokens: int,
+    max_batch_size: int,
+) -> list[R]:
+    """Runs `process_batch` over length bucketed batches of `items` and returns the
+    results in the original order of `items`"""
+    results: list[R | None] = [None] * len(items)
+    for batch_inds in build_length_bucketed_batches(
+        lengths=lengths,
+        max_batch_tokens=max_batch_tokens,
+        max_batch_size=max_batch_size,
+    ):
+        batch_results = process_batch([items[ind] for ind in batch_inds])
+        for ind, result in zip(batch_inds, batch_results):
+            results[ind] = result
+
+    return cast(list[R], results)
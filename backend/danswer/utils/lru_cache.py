@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Generic
+from typing import TypeVar
+
+from pydantic import BaseModel
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+
+
+class TTLLRUCache(Generic[K, V]):
+    """Thread safe, in-process cache which evicts the least recently used entry once
+    `max_size` is reached and treats entries older than `ttl_seconds` as missing.
+    A `max_size` of 0 disables the cache, a `ttl_seconds` of None means no expiry."""
+
+    def __init__(self, max_size: int, ttl_seconds: float | None = None) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                inserted_at, value = entry
+                if (
+                    self.ttl_seconds is None
+                    or time.monotonic() - inserted_at < self.ttl_seconds
+                ):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+                del self._entries[key]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: K, value: V) -> None:
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                size=len(self._entries),
+                max_size=self.max_size,
+            )
@@ -0,0 +1,206 @@
+import queue
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from danswer.utils.logger import setup_logger
+
+logger = setup_logger()
+
+_QUEUE_POLL_INTERVAL_SECS = 0.1
+_END_OF_STREAM = object()
+
+
+@dataclass
+class PipelineStage:
+    name: str
+    process: Callable[[Any], Any]
+    num_workers: int = 1
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    num_workers: int
+    num_items: int = 0
+    # time spent processing items, summed across the workers of the stage
+    busy_secs: float = 0.0
+    # time spent waiting on the previous stage, high values mean this stage is starved
+    starved_secs: float = 0.0
+    # time spent waiting on the next stage to accept the output (back-pressure)
+    blocked_secs: float = 0.0
+
+    def __str__(self) -> str:
+        items_per_sec = self.num_items / self.busy_secs if self.busy_secs else 0
+        return (
+            f"{self.name} ({self.num_workers} workers): {self.num_items} items, "
+            f"{items_per_sec:.2f} items/s per worker, busy {self.busy_secs:.1f}s, "
+            f"starved {self.starved_secs:.1f}s, blocked {self.blocked_secs:.1f}s"
+        )
+
+
+class StagedPipeline:
+    """Runs each stage in its own worker thread(s) connected by bounded queues, so
+    that slow stages push back on the earlier ones instead of buffering unbounded
+    amounts of work. Items from `source` are pulled by a dedicated fetch thread.
+
+    Outputs of the last stage are yielded by `run` as they complete. With a single
+    worker per stage the output order matches the source order. Any exception
+    raised by the source or a stage stops the pipeline and is re-raised by `run`."""
+
+    def __init__(self, stages: list[PipelineStage], queue_size: int) -> None:
+        if not stages:
+            raise ValueError("Pipeline requires at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+        self.metrics = [StageMetrics(name="fetch", num_workers=1)] + [
+            StageMetrics(name=stage.name, num_workers=stage.num_workers)
+            for stage in stages
+        ]
+
+        self._metrics_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._error: BaseException | None = None
+        self._queues: list[queue.Queue] = []
+        self._num_finished_workers: list[int] = []
+
+    def _put(self, output_queue: queue.Queue, item: Any) -> tuple[bool, float]:
+        start = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                output_queue.put(item, timeout=_QUEUE_POLL_INTERVAL_SECS)
+                return True, time.monotonic() - start
+            except queue.Full:
+                continue
+        return False, time.monotonic() - start
+
+    def _get(self, input_queue: queue.Queue) -> tuple[Any, float]:
+        start = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                return input_queue.get(timeout=_QUEUE_POLL_INTERVAL_SECS), (
+                    time.monotonic() - start
+                )
+            except queue.Empty:
+                continue
+        return _END_OF_STREAM, time.monotonic() - start
+
+    def _fail(self, stage_name: str, e: BaseException) -> None:
+        logger.exception(f"Pipeline stage '{stage_name}' failed")
+        with self._metrics_lock:
+            if self._error is None:
+                self._error = e
+        self._stop.set()
+
+    def _end_stream(self, stage_ind: int) -> None:
+        """Called by each worker of a stage when done, the last one signals the end of
+        the stream to each worker of the next stage (or the consumer)"""
+        with self._metrics_lock:
+            self._num_finished_workers[stage_ind] += 1
+            is_last_worker = (
+                self._num_finished_workers[stage_ind]
+                == self.metrics[stage_ind].num_workers
+            )
+        if not is_last_worker:
+            return
+
+        num_downstream_workers = (
+            self.stages[stage_ind].num_workers if stage_ind < len(self.stages) else 1
+        )
+        for _ in range(num_downstream_workers):
+            self._put(self._queues[stage_ind], _END_OF_STREAM)
+
+    def _run_fetch(self, source: Iterable[Any]) -> None:
+        metrics = self.metrics[0]
+        try:
+            source_iter = iter(source)
+            while not self._stop.is_set():
+                start = time.monotonic()
+                try:
+                    item = next(source_iter)
+                except StopIteration:
+                    break
+                busy_secs = time.monotonic() - start
+
+                put_succeeded, blocked_secs = self._put(self._queues[0], item)
+                with self._metrics_lock:
+                    metrics.num_items += 1
+                    metrics.busy_secs += busy_secs
+                    metrics.blocked_secs += blocked_secs
+                if not put_succeeded:
+                    return
+        except BaseException as e:
+            self._fail(metrics.name, e)
+            return
+
+        self._end_stream(0)
+
+    def _run_stage_worker(self, stage_ind: int) -> None:
+        stage = self.stages[stage_ind]
+        metrics = self.metrics[stage_ind + 1]
+        try:
+            while True:
+                item, starved_secs = self._get(self._queues[stage_ind])
+                if item is _END_OF_STREAM:
+                    break
+
+                start = time.monotonic()
+                output = stage.process(item)
+                busy_secs = time.monotonic() - start
+
+                put_succeeded, blocked_secs = self._put(
+                    self._queues[stage_ind + 1], output
+                )
+                with self._metrics_lock:
+                    metrics.num_items += 1
+                    metrics.busy_secs += busy_secs
+                    metrics.starved_secs += starved_secs
+                    metrics.blocked_secs += blocked_secs
+                if not put_succeeded:
+                    return
+        except BaseException as e:
+            self._fail(stage.name, e)
+            return
+
+        if not self._stop.is_set():
+            self._end_stream(stage_ind + 1)
+
+    def stop(self) -> None:
+        """Workers exit after their current item, for when the consumer stops early"""
+        self._stop.set()
+
+    def run(self, source: Iterable[Any]) -> Iterator[Any]:
+        self._queues = [
+            queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)
+        ]
+        self._num_finished_workers = [0] * (len(self.stages) + 1)
+
+        threads = [
+            threading.Thread(target=self._run_fetch, args=(source,), daemon=True)
+        ]
+        for stage_ind, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(
+                    target=self._run_stage_worker, args=(stage_ind,), daemon=True
+                )
+                for _ in range(stage.num_workers)
+            )
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                output, _ = self._get(self._queues[-1])
+                if output is _END_OF_STREAM:
+                    break
+                yield output
+
+            if self._error is not None:
+                raise self._error
+        finally:
+            # also stops the workers if the consumer stops early
+            self._stop.set()
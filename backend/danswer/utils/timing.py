@@ -1,4 +1,5 @@
 import time
+from collections.abc import Awaitable
 from collections.abc import Callable
 from collections.abc import Generator
 from collections.abc import Iterator
@@ -11,6 +12,7 @@ from danswer.utils.logger import setup_logger
 logger = setup_logger()
 
 F = TypeVar("F", bound=Callable)
+AF = TypeVar("AF", bound=Callable[..., Awaitable])
 FG = TypeVar("FG", bound=Callable[..., Generator | Iterator])
 
 
@@ -39,6 +41,32 @@ def log_function_time(
     return timing_wrapper
 
 
+def log_async_function_time(
+    func_name: str | None = None,
+) -> Callable[[AF], AF]:
+    """Build a timing wrapper for an async function. Logs how long the awaited
+    function took to run.
+    Use like:
+
+    @log_async_function_time()
+    async def my_func():
+        ...
+    """
+
+    def timing_wrapper(func: AF) -> AF:
+        async def wrapped_func(*args: Any, **kwargs: Any) -> Any:
+            start_time = time.time()
+            result = await func(*args, **kwargs)
+            logger.info(
+                f"{func_name or func.__name__} took {time.time() - start_time} seconds"
+            )
+            return result
+
+        return cast(AF, wrapped_func)
+
+    return timing_wrapper
+
+
 def log_generator_function_time(
     func_name: str | None = None,
 ) -> Callable[[FG], FG]:
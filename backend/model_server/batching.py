@@ -0,0 +1,125 @@
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from queue import Empty
+from queue import Queue
+from typing import Generic
+from typing import TypeVar
+
+from danswer.utils.logger import setup_logger
+
+logger = setup_logger()
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class _PendingRequest(Generic[T, R]):
+    def __init__(self, items: list[T]) -> None:
+        self.items = items
+        self.future: Future[list[R]] = Future()
+
+
+class MicroBatcher(Generic[T, R]):
+    """Coalesces the items of concurrent requests into a single call of `process_batch`.
+
+    The worker thread waits at most `max_wait_ms` after the first request arrives for more
+    requests to join the batch, or until `max_batch_size` items have been collected. A single
+    request is never split, so a request larger than `max_batch_size` is processed on its own.
+    `process_batch` must return exactly one result per input item, in order."""
+
+    def __init__(
+        self,
+        process_batch: Callable[[list[T]], list[R]],
+        max_batch_size: int,
+        max_wait_ms: int,
+        name: str = "micro-batcher",
+    ) -> None:
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_secs = max_wait_ms / 1000
+        self.name = name
+        self._queue: Queue[_PendingRequest[T, R]] = Queue()
+        self._worker: threading.Thread | None = None
+        self._worker_lock = threading.Lock()
+        # Request that didn't fit into the previous batch, only touched by the worker
+        self._carry_over: _PendingRequest[T, R] | None = None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name=self.name, daemon=True
+                )
+                self._worker.start()
+
+    def _collect_batch(self) -> list[_PendingRequest[T, R]]:
+        first = self._carry_over or self._queue.get()
+        self._carry_over = None
+        batch = [first]
+        num_items = len(first.items)
+        deadline = time.monotonic() + self.max_wait_secs
+
+        while num_items < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                pending = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except Empty:
+                break
+
+            if num_items + len(pending.items) > self.max_batch_size:
+                # Doesn't fit, start the next batch with it instead
+                self._carry_over = pending
+                break
+
+            batch.append(pending)
+            num_items += len(pending.items)
+
+        return batch
+
+    def _process(self, batch: list[_PendingRequest[T, R]]) -> None:
+        all_items = [item for pending in batch for item in pending.items]
+        try:
+            results = self.process_batch(all_items)
+            if len(results) != len(all_items):
+                raise RuntimeError(
+                    f"{self.name} produced {len(results)} results for {len(all_items)} inputs"
+                )
+        except Exception as e:
+            for pending in batch:
+                pending.future.set_exception(e)
+            return
+
+        logger.debug(
+            f"{self.name} processed {len(batch)} requests with {len(all_items)} items"
+        )
+        offset = 0
+        for pending in batch:
+            pending.future.set_result(results[offset : offset + len(pending.items)])
+            offset += len(pending.items)
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            self._process(batch)
+
+    def submit(self, items: list[T]) -> Future[list[R]]:
+        pending: _PendingRequest[T, R] = _PendingRequest(items)
+        if not items:
+            pending.future.set_result([])
+            return pending.future
+
+        self._ensure_worker()
+        self._queue.put(pending)
+        return pending.future
+
+    def run(self, items: list[T]) -> list[R]:
+        return self.submit(items).result()
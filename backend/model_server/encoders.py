@@ -1,13 +1,25 @@
+import numpy
 from fastapi import APIRouter
+from fastapi import Header
 from fastapi import HTTPException
+from fastapi import Response
 
+from danswer.configs.app_configs import MODEL_SERVER_MAX_BATCH_SIZE
+from danswer.configs.app_configs import MODEL_SERVER_MAX_BATCH_WAIT_MS
 from danswer.configs.model_configs import CROSS_ENCODER_MODEL_ENSEMBLE
 from danswer.configs.model_configs import DOCUMENT_ENCODER_MODEL
+from danswer.configs.model_configs import ENCODE_BATCH_MAX_TEXTS
+from danswer.configs.model_configs import ENCODE_BATCH_TOKEN_BUDGET
 from danswer.configs.model_configs import NORMALIZE_EMBEDDINGS
 from danswer.search.search_nlp_models import get_local_embedding_model
 from danswer.search.search_nlp_models import get_local_reranking_model_ensemble
+from danswer.utils.length_batching import run_length_bucketed
 from danswer.utils.logger import setup_logger
 from danswer.utils.timing import log_function_time
+from model_server.batching import MicroBatcher
+from shared_models.embedding_transport import get_embeddings_content_type
+from shared_models.embedding_transport import get_embeddings_dtype
+from shared_models.embedding_transport import serialize_embeddings
 from shared_models.model_server_models import EmbedRequest
 from shared_models.model_server_models import EmbedResponse
 from shared_models.model_server_models import RerankRequest
@@ -24,14 +36,39 @@ router = APIRouter(prefix="/encoder")
 def embed_text(
     texts: list[str],
     normalize_embeddings: bool = NORMALIZE_EMBEDDINGS,
-) -> list[list[float]]:
+) -> numpy.ndarray:
     model = get_local_embedding_model()
-    embeddings = model.encode(texts, normalize_embeddings=normalize_embeddings)
+    if not texts:
+        return numpy.empty(
+            (0, model.get_sentence_embedding_dimension()), dtype=numpy.float32
+        )
 
-    if not isinstance(embeddings, list):
-        embeddings = embeddings.tolist()
+    # Texts arrive from several requests at once, pack them by token length so that the
+    # short ones (queries, titles) aren't padded up to full length passages
+    lengths = [
+        len(input_ids)
+        for input_ids in model.tokenizer(
+            texts, truncation=True, max_length=model.max_seq_length
+        )["input_ids"]
+    ]
 
-    return embeddings
+    def _encode_bucket(bucket: list[str]) -> list[numpy.ndarray]:
+        return list(
+            model.encode(
+                bucket,
+                batch_size=len(bucket),
+                normalize_embeddings=normalize_embeddings,
+            )
+        )
+
+    embeddings = run_length_bucketed(
+        items=texts,
+        lengths=lengths,
+        process_batch=_encode_bucket,
+        max_batch_tokens=ENCODE_BATCH_TOKEN_BUDGET,
+        max_batch_size=ENCODE_BATCH_MAX_TEXTS,
+    )
+    return numpy.stack(embeddings).astype(numpy.float32, copy=False)
 
 
 @log_function_time()
@@ -44,21 +81,73 @@ def calc_sim_scores(query: str, docs: list[str]) -> list[list[float]]:
     return sim_scores
 
 
-@router.post("/bi-encoder-embed")
+def _embed_batch(texts: list[str]) -> list[numpy.ndarray]:
+    return list(embed_text(texts))
+
+
+def _score_batch(query_doc_pairs: list[tuple[str, str]]) -> list[list[float]]:
+    """Returns the score of every cross-encoder in the ensemble for each pair"""
+    cross_encoders = get_local_reranking_model_ensemble()
+    encoder_scores = [
+        encoder.predict(query_doc_pairs).tolist()  # type: ignore
+        for encoder in cross_encoders
+    ]
+    return [list(pair_scores) for pair_scores in zip(*encoder_scores)]
+
+
+_EMBED_BATCHER: MicroBatcher[str, numpy.ndarray] = MicroBatcher(
+    process_batch=_embed_batch,
+    max_batch_size=MODEL_SERVER_MAX_BATCH_SIZE,
+    max_wait_ms=MODEL_SERVER_MAX_BATCH_WAIT_MS,
+    name="bi-encoder-batcher",
+)
+_RERANK_BATCHER: MicroBatcher[tuple[str, str], list[float]] = MicroBatcher(
+    process_batch=_score_batch,
+    max_batch_size=MODEL_SERVER_MAX_BATCH_SIZE,
+    max_wait_ms=MODEL_SERVER_MAX_BATCH_WAIT_MS,
+    name="cross-encoder-batcher",
+)
+
+
+def embed_text_batched(texts: list[str]) -> numpy.ndarray:
+    if not texts:
+        return embed_text(texts)
+    return numpy.stack(_EMBED_BATCHER.run(texts))
+
+
+def calc_sim_scores_batched(query: str, docs: list[str]) -> list[list[float]]:
+    if not docs:
+        return [[] for _ in get_local_reranking_model_ensemble()]
+
+    pair_scores = _RERANK_BATCHER.run([(query, doc) for doc in docs])
+    # Back to one list of scores per cross-encoder
+    return [list(encoder_scores) for encoder_scores in zip(*pair_scores)]
+
+
+@router.post("/bi-encoder-embed", response_model=EmbedResponse)
 def process_embed_request(
     embed_request: EmbedRequest,
-) -> EmbedResponse:
+    accept: str | None = Header(default=None),
+) -> Response | EmbedResponse:
+    """Responds with the binary embeddings matrix if the client accepts it"""
     try:
-        embeddings = embed_text(texts=embed_request.texts)
-        return EmbedResponse(embeddings=embeddings)
+        embeddings = embed_text_batched(texts=embed_request.texts)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    dtype = get_embeddings_dtype(accept)
+    if dtype is not None:
+        return Response(
+            content=serialize_embeddings(embeddings, dtype),
+            media_type=get_embeddings_content_type(dtype),
+        )
+    return EmbedResponse(embeddings=embeddings.tolist())
+
 
 @router.post("/cross-encoder-scores")
 def process_rerank_request(embed_request: RerankRequest) -> RerankResponse:
     try:
-        sim_scores = calc_sim_scores(
+        sim_scores = calc_sim_scores_batched(
             query=embed_request.query, docs=embed_request.documents
         )
         return RerankResponse(scores=sim_scores)
@@ -0,0 +1,16 @@
+# Run during the image builds, the images only get the converted model and not TensorFlow
+import os
+import sys
+
+# makes it so `PYTHONPATH=.` is not required when running this script
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+from danswer.configs.model_configs import INTENT_MODEL_VERSION  # noqa: E402
+from danswer.search.intent_models import load_torch_intent_model  # noqa: E402
+
+
+if __name__ == "__main__":
+    # Converts the TensorFlow weights into INTENT_MODEL_CACHE_DIR, where the torch and
+    # onnx runtimes load them from
+    load_torch_intent_model(INTENT_MODEL_VERSION)
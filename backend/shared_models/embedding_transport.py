@@ -0,0 +1,73 @@
+"""Binary encoding of embeddings returned by the model server. The body is a header of
+two little-endian uint32 (number of embeddings, dimension) followed by the embeddings
+as a row-major little-endian matrix. The dtype is a parameter of the media type, e.g.
+`application/x-danswer-embeddings; dtype=float16`. Clients ask for it via the Accept
+header, servers which don't support it fall back to JSON."""
+import struct
+
+import numpy
+
+EMBEDDINGS_MEDIA_TYPE = "application/x-danswer-embeddings"
+EMBEDDING_DTYPES: dict[str, numpy.dtype] = {
+    "float32": numpy.dtype("<f4"),
+    "float16": numpy.dtype("<f2"),
+}
+
+_HEADER = struct.Struct("<II")
+
+
+def get_embeddings_content_type(dtype: str) -> str:
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype '{dtype}'")
+    return f"{EMBEDDINGS_MEDIA_TYPE}; dtype={dtype}"
+
+
+def _parse_media_type(media_type: str) -> tuple[str, dict[str, str]]:
+    media_type_name, *raw_params = media_type.split(";")
+    params = {}
+    for raw_param in raw_params:
+        key, _, value = raw_param.partition("=")
+        params[key.strip().lower()] = value.strip().strip('"')
+    return media_type_name.strip().lower(), params
+
+
+def get_embeddings_dtype(content_type: str | None) -> str | None:
+    """The dtype if `content_type` is (or, for an Accept header, includes) the binary
+    embeddings media type with a supported dtype, None otherwise"""
+    if not content_type:
+        return None
+
+    for media_type in content_type.split(","):
+        media_type_name, params = _parse_media_type(media_type)
+        dtype = params.get("dtype", "float32")
+        if media_type_name == EMBEDDINGS_MEDIA_TYPE and dtype in EMBEDDING_DTYPES:
+            return dtype
+    return None
+
+
+def serialize_embeddings(embeddings: numpy.ndarray, dtype: str) -> bytes:
+    num_embeddings, dim = embeddings.shape
+    return _HEADER.pack(num_embeddings, dim) + embeddings.astype(
+        EMBEDDING_DTYPES[dtype], copy=False
+    ).tobytes(order="C")
+
+
+def deserialize_embeddings(content: bytes, dtype: str) -> numpy.ndarray:
+    """Always returns float32, float16 is only used on the wire"""
+    if len(content) < _HEADER.size:
+        raise ValueError("Embeddings payload is missing its header")
+
+    num_embeddings, dim = _HEADER.unpack_from(content)
+    wire_dtype = EMBEDDING_DTYPES[dtype]
+    expected_size = _HEADER.size + num_embeddings * dim * wire_dtype.itemsize
+    if len(content) != expected_size:
+        raise ValueError(
+            f"Embeddings payload is {len(content)} bytes, expected {expected_size} "
+            f"for {num_embeddings} x {dim} {dtype}"
+        )
+
+    return (
+        numpy.frombuffer(content, dtype=wire_dtype, offset=_HEADER.size)
+        .reshape(num_embeddings, dim)
+        .astype(numpy.float32)
+    )
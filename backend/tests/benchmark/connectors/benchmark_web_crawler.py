@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+from danswer.connectors.web.crawler import WebCrawler
+
+
+def make_handler(num_pages: int, latency: float) -> type[BaseHTTPRequestHandler]:
+    """Synthetic docs site, a tree of pages with each linking to its 4 children, served
+    with a fixed latency per request"""
+
+    class _DocsSiteHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            time.sleep(latency)
+            page_name = self.path.strip("/")
+            if self.path == "/robots.txt" or not page_name.isdigit():
+                self.send_response(404)
+                self.end_headers()
+                return
+
+            page_ind = int(page_name)
+            links = "".join(
+                f'<a href="/{link}">page {link}</a>'
+                for link in range(4 * page_ind + 1, min(4 * page_ind + 5, num_pages))
+            )
+            paragraphs = "".join(
+                f"<p>Paragraph {ind} of page {page_ind}</p>" for ind in range(20)
+            )
+            body = (
+                f"<html><head><title>page {page_ind}</title></head>"
+                f"<body>{paragraphs}{links}</body></html>"
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    return _DocsSiteHandler
+
+
+def crawl(base_url: str, num_workers: int, max_requests_per_host: int) -> int:
+    crawler = WebCrawler(
+        start_urls=[f"{base_url}0"],
+        link_base_url=base_url,
+        fetch_mode="http",
+        num_workers=num_workers,
+        max_requests_per_host=max_requests_per_host,
+        crawl_delay=0,
+    )
+
+    async def _crawl() -> int:
+        return len([page async for page in crawler.crawl()])
+
+    return asyncio.run(_crawl())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Crawls a local synthetic site with increasing numbers of workers"
+    )
+    parser.add_argument("--num-pages", type=int, default=500)
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Seconds per request"
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), make_handler(args.num_pages, args.latency)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    try:
+        for num_workers in args.workers:
+            start = time.monotonic()
+            num_crawled = crawl(
+                base_url, num_workers, max_requests_per_host=num_workers
+            )
+            elapsed = time.monotonic() - start
+            print(
+                f"{num_workers:>3} workers: {num_crawled} pages in {elapsed:.2f}s "
+                f"({num_crawled / elapsed:.1f} pages/s)"
+            )
+    finally:
+        server.shutdown()
@@ -0,0 +1,105 @@
+import argparse
+import gc
+import random
+import resource
+import time
+
+import numpy
+
+from danswer.access.models import DocumentAccess
+from danswer.configs.constants import DocumentSource
+from danswer.configs.model_configs import DOC_EMBEDDING_DIM
+from danswer.connectors.models import Document
+from danswer.connectors.models import Section
+from danswer.indexing.embedder import encode_chunks
+from danswer.indexing.models import DocAwareChunk
+from danswer.indexing.models import DocMetadataAwareIndexChunk
+from danswer.search.search_nlp_models import EmbeddingModel
+
+
+class _RandomEmbeddingModel(EmbeddingModel):
+    """Skips the model so that only the memory of the indexing data path is measured"""
+
+    def __init__(self, dim: int) -> None:
+        super().__init__(model_server_host=None)
+        self.dim = dim
+
+    def encode(
+        self, texts: list[str], normalize_embeddings: bool = True
+    ) -> numpy.ndarray:
+        return numpy.random.rand(len(texts), self.dim).astype(numpy.float32)
+
+
+def _peak_rss_mib() -> float:
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_chunks(num_chunks: int, chunks_per_doc: int = 10) -> list[DocAwareChunk]:
+    chunks: list[DocAwareChunk] = []
+    for doc_ind in range(num_chunks // chunks_per_doc):
+        document = Document(
+            id=f"doc_{doc_ind}",
+            sections=[Section(link="https://example.com", text="text")],
+            source=DocumentSource.WEB,
+            semantic_identifier=f"doc_{doc_ind}",
+            metadata={},
+        )
+        chunks.extend(
+            DocAwareChunk(
+                source_document=document,
+                chunk_id=chunk_ind,
+                blurb="blurb",
+                content=" ".join(
+                    random.choices(["alpha", "beta", "gamma"], k=random.randint(5, 50))
+                ),
+                source_links={0: "https://example.com"},
+                section_continuation=False,
+            )
+            for chunk_ind in range(chunks_per_doc)
+        )
+    return chunks
+
+
+def run_benchmark(num_chunks: int, dim: int, enable_mini_chunk: bool) -> None:
+    chunks = make_chunks(num_chunks)
+    gc.collect()
+    start_rss = _peak_rss_mib()
+
+    start = time.perf_counter()
+    embedded_chunks = encode_chunks(
+        chunks,
+        embedding_model=_RandomEmbeddingModel(dim),
+        enable_mini_chunk=enable_mini_chunk,
+        use_embedding_cache=False,
+    )
+    access = DocumentAccess.build(user_ids=[], is_public=True)
+    index_chunks = [
+        DocMetadataAwareIndexChunk.from_index_chunk(
+            index_chunk=chunk, access=access, document_sets=set()
+        )
+        for chunk in embedded_chunks
+    ]
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{len(index_chunks)} chunks embedded in {elapsed:.2f}s, peak RSS "
+        f"{_peak_rss_mib():.0f} MiB (+{_peak_rss_mib() - start_rss:.0f} MiB for "
+        "the embeddings and index chunks)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Peak memory of embedding a batch of chunks and building the "
+        "chunks sent to the document index"
+    )
+    parser.add_argument("--num-chunks", type=int, default=10_000)
+    parser.add_argument("--dim", type=int, default=DOC_EMBEDDING_DIM)
+    parser.add_argument("--mini-chunks", action="store_true")
+    args = parser.parse_args()
+
+    random.seed(0)
+    run_benchmark(
+        num_chunks=args.num_chunks, dim=args.dim, enable_mini_chunk=args.mini_chunks
+    )
@@ -0,0 +1,187 @@
+import argparse
+import random
+import time
+
+from llama_index.text_splitter import SentenceSplitter
+
+from danswer.configs.app_configs import BLURB_SIZE
+from danswer.configs.app_configs import CHUNK_OVERLAP
+from danswer.configs.app_configs import CHUNK_SIZE
+from danswer.configs.constants import DocumentSource
+from danswer.connectors.models import Document
+from danswer.connectors.models import Section
+from danswer.indexing.chunker import chunk_document
+from danswer.indexing.chunker import SECTION_SEPARATOR
+from danswer.indexing.models import DocAwareChunk
+from danswer.search.search_nlp_models import get_default_tokenizer
+from danswer.utils.text_processing import shared_precompare_cleanup
+
+WORDS = (
+    "the index search document connector chunk embedding query answer model "
+    "vespa postgres slack confluence github drive page section link user team "
+    "deploy config pipeline token latency result filter boost recency source"
+).split()
+
+
+def _make_sentence() -> str:
+    words = random.choices(WORDS, k=random.randint(4, 30))
+    return " ".join(words).capitalize() + random.choice([".", ".", "?", "!"])
+
+
+def make_document(num_sections: int) -> Document:
+    """Mostly short sections (think Slack messages or list items) with the occasional
+    section longer than a chunk"""
+    sections = []
+    for ind in range(num_sections):
+        num_sentences = (
+            random.randint(40, 120) if random.random() < 0.02 else random.randint(1, 6)
+        )
+        sections.append(
+            Section(
+                link=f"https://example.com/doc#{ind}",
+                text=" ".join(_make_sentence() for _ in range(num_sentences)),
+            )
+        )
+    return Document(
+        id="benchmark_doc",
+        sections=sections,
+        source=DocumentSource.WEB,
+        semantic_identifier="Benchmark Document",
+        metadata={},
+    )
+
+
+def _baseline_extract_blurb(text: str, blurb_size: int) -> str:
+    blurb_splitter = SentenceSplitter(
+        tokenizer=get_default_tokenizer().tokenize,
+        chunk_size=blurb_size,
+        chunk_overlap=0,
+    )
+    return blurb_splitter.split_text(text)[0]
+
+
+def baseline_chunk_document(
+    document: Document,
+    chunk_tok_size: int = CHUNK_SIZE,
+    subsection_overlap: int = CHUNK_OVERLAP,
+    blurb_size: int = BLURB_SIZE,
+) -> list[DocAwareChunk]:
+    """The chunker before sections were tokenized only once, re-tokenizes the chunk
+    being built for every section and builds a new splitter for every blurb"""
+    tokenizer = get_default_tokenizer()
+
+    def _new_chunk(chunk_id: int, text: str, links: dict[int, str]) -> DocAwareChunk:
+        return DocAwareChunk(
+            source_document=document,
+            chunk_id=chunk_id,
+            blurb=_baseline_extract_blurb(text, blurb_size),
+            content=text,
+            source_links=links,
+            section_continuation=False,
+        )
+
+    chunks: list[DocAwareChunk] = []
+    link_offsets: dict[int, str] = {}
+    chunk_text = ""
+    for section in document.sections:
+        section_tok_length = len(tokenizer.tokenize(section.text))
+        current_tok_length = len(tokenizer.tokenize(chunk_text))
+        curr_offset_len = len(shared_precompare_cleanup(chunk_text))
+
+        if section_tok_length > chunk_tok_size:
+            if chunk_text:
+                chunks.append(_new_chunk(len(chunks), chunk_text, link_offsets))
+                link_offsets = {}
+                chunk_text = ""
+
+            blurb = _baseline_extract_blurb(section.text, blurb_size)
+            splitter = SentenceSplitter(
+                tokenizer=tokenizer.tokenize,
+                chunk_size=chunk_tok_size,
+                chunk_overlap=subsection_overlap,
+            )
+            start_chunk_id = len(chunks)
+            chunks.extend(
+                DocAwareChunk(
+                    source_document=document,
+                    chunk_id=start_chunk_id + chunk_ind,
+                    blurb=blurb,
+                    content=chunk_str,
+                    source_links={0: section.link},
+                    section_continuation=(chunk_ind != 0),
+                )
+                for chunk_ind, chunk_str in enumerate(splitter.split_text(section.text))
+            )
+            continue
+
+        if (
+            current_tok_length
+            + len(tokenizer.tokenize(SECTION_SEPARATOR))
+            + section_tok_length
+            <= chunk_tok_size
+        ):
+            chunk_text += (
+                SECTION_SEPARATOR + section.text if chunk_text else section.text
+            )
+            link_offsets[curr_offset_len] = section.link
+        else:
+            chunks.append(_new_chunk(len(chunks), chunk_text, link_offsets))
+            link_offsets = {0: section.link}
+            chunk_text = section.text
+
+    if chunk_text:
+        chunks.append(_new_chunk(len(chunks), chunk_text, link_offsets))
+    return chunks
+
+
+def _chunk_fields(chunks: list[DocAwareChunk]) -> list[tuple]:
+    return [
+        (
+            chunk.chunk_id,
+            chunk.blurb,
+            chunk.content,
+            chunk.source_links,
+            chunk.section_continuation,
+        )
+        for chunk in chunks
+    ]
+
+
+def run_benchmark(num_sections: int, skip_baseline: bool) -> None:
+    document = make_document(num_sections)
+    # load the tokenizer and sentence tokenizer outside of the timings
+    chunk_document(make_document(5))
+
+    start = time.perf_counter()
+    chunks = chunk_document(document)
+    elapsed = time.perf_counter() - start
+    print(f"chunk_document: {len(chunks)} chunks in {elapsed:.2f}s")
+
+    if skip_baseline:
+        return
+
+    start = time.perf_counter()
+    baseline_chunks = baseline_chunk_document(document)
+    baseline_elapsed = time.perf_counter() - start
+    print(
+        f"Baseline: {len(baseline_chunks)} chunks in {baseline_elapsed:.2f}s "
+        f"({baseline_elapsed / elapsed:.1f}x slower)"
+    )
+
+    if _chunk_fields(chunks) != _chunk_fields(baseline_chunks):
+        raise RuntimeError("Chunks differ from the baseline chunker")
+    print("Chunks are identical to the baseline")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Times chunking a single large document, compared against the "
+        "previous chunker implementation"
+    )
+    parser.add_argument("--num-sections", type=int, default=10_000)
+    parser.add_argument("--skip-baseline", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    run_benchmark(num_sections=args.num_sections, skip_baseline=args.skip_baseline)
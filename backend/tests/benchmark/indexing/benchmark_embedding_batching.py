@@ -0,0 +1,180 @@
+import argparse
+import random
+import time
+from collections.abc import Callable
+
+import torch
+
+from danswer.configs.model_configs import BATCH_SIZE_ENCODE_CHUNKS
+from danswer.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
+from danswer.configs.model_configs import ENCODE_BATCH_MAX_TEXTS
+from danswer.configs.model_configs import ENCODE_BATCH_TOKEN_BUDGET
+from danswer.utils.length_batching import build_length_bucketed_batches
+
+
+def make_corpus(num_texts: int, max_length: int) -> list[str]:
+    """Mostly full size chunks mixed with the short ones that come from the ends of
+    documents, titles and small documents like Slack messages"""
+    texts = []
+    for ind in range(num_texts):
+        if random.random() < 0.5:
+            length = random.randint(max_length // 2, max_length)
+        else:
+            length = random.randint(4, max_length // 8)
+        texts.append(" ".join(f"word{ind}_{word}" for word in range(length)))
+    return texts
+
+
+def load_synthetic_model(
+    max_length: int,
+) -> tuple[Callable[[list[str]], list[int]], Callable[[list[str]], None]]:
+    """Small randomly initialized BERT with one token per whitespace separated word,
+    does not need a model download"""
+    from transformers import BertConfig  # type: ignore
+    from transformers import BertModel  # type: ignore
+
+    model = BertModel(
+        BertConfig(
+            vocab_size=1000,
+            hidden_size=256,
+            num_hidden_layers=4,
+            num_attention_heads=4,
+            intermediate_size=1024,
+            max_position_embeddings=max_length,
+        )
+    ).eval()
+
+    def _get_lengths(texts: list[str]) -> list[int]:
+        return [min(len(text.split()), max_length) for text in texts]
+
+    def _encode(texts: list[str]) -> None:
+        lengths = _get_lengths(texts)
+        padded_length = max(lengths)
+        input_ids = torch.zeros((len(texts), padded_length), dtype=torch.long)
+        attention_mask = torch.zeros((len(texts), padded_length), dtype=torch.long)
+        for row, length in enumerate(lengths):
+            input_ids[row, :length] = torch.randint(1, 1000, (length,))
+            attention_mask[row, :length] = 1
+        with torch.no_grad():
+            model(input_ids=input_ids, attention_mask=attention_mask)
+
+    return _get_lengths, _encode
+
+
+def load_local_model(
+    max_length: int,
+) -> tuple[Callable[[list[str]], list[int]], Callable[[list[str]], None]]:
+    from danswer.search.search_nlp_models import get_local_embedding_model
+
+    model = get_local_embedding_model(max_context_length=max_length)
+
+    def _get_lengths(texts: list[str]) -> list[int]:
+        return [
+            len(input_ids)
+            for input_ids in model.tokenizer(
+                texts, truncation=True, max_length=max_length
+            )["input_ids"]
+        ]
+
+    def _encode(texts: list[str]) -> None:
+        model.encode(texts, batch_size=len(texts))
+
+    return _get_lengths, _encode
+
+
+def run_strategy(
+    name: str,
+    batches: list[list[int]],
+    lengths: list[int],
+    texts: list[str],
+    encode: Callable[[list[str]], None],
+) -> None:
+    real_tokens = sum(lengths)
+    padded_tokens = sum(
+        len(batch) * max(lengths[ind] for ind in batch) for batch in batches
+    )
+
+    start = time.perf_counter()
+    for batch in batches:
+        encode([texts[ind] for ind in batch])
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{name}: {len(batches)} batches, "
+        f"{padded_tokens} padded tokens ({padded_tokens / real_tokens:.2f}x real), "
+        f"{elapsed:.2f}s, {len(texts) / elapsed:.1f} texts/s"
+    )
+
+
+def run_benchmark(
+    num_texts: int,
+    max_length: int,
+    fixed_batch_size: int,
+    max_batch_tokens: int,
+    max_batch_size: int,
+    synthetic: bool,
+) -> None:
+    get_lengths, encode = (
+        load_synthetic_model(max_length) if synthetic else load_local_model(max_length)
+    )
+    texts = make_corpus(num_texts, max_length)
+    lengths = get_lengths(texts)
+    # warm up
+    encode(texts[:fixed_batch_size])
+
+    run_strategy(
+        name=f"Fixed batches of {fixed_batch_size} in document order",
+        batches=[
+            list(range(start, min(start + fixed_batch_size, num_texts)))
+            for start in range(0, num_texts, fixed_batch_size)
+        ],
+        lengths=lengths,
+        texts=texts,
+        encode=encode,
+    )
+    run_strategy(
+        name=f"Length bucketed, {max_batch_tokens} token budget",
+        batches=build_length_bucketed_batches(
+            lengths=lengths,
+            max_batch_tokens=max_batch_tokens,
+            max_batch_size=max_batch_size,
+        ),
+        lengths=lengths,
+        texts=texts,
+        encode=encode,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compares fixed size embedding batches against length bucketed "
+        "batches packed to a token budget"
+    )
+    parser.add_argument("--num-texts", type=int, default=512)
+    parser.add_argument("--max-length", type=int, default=DOC_EMBEDDING_CONTEXT_SIZE)
+    parser.add_argument(
+        "--fixed-batch-size", type=int, default=BATCH_SIZE_ENCODE_CHUNKS
+    )
+    parser.add_argument(
+        "--max-batch-tokens", type=int, default=ENCODE_BATCH_TOKEN_BUDGET
+    )
+    parser.add_argument("--max-batch-size", type=int, default=ENCODE_BATCH_MAX_TEXTS)
+    parser.add_argument(
+        "--synthetic",
+        action="store_true",
+        help="Use a small randomly initialized model instead of the configured "
+        "embedding model",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    torch.manual_seed(args.seed)
+    run_benchmark(
+        num_texts=args.num_texts,
+        max_length=args.max_length,
+        fixed_batch_size=args.fixed_batch_size,
+        max_batch_tokens=args.max_batch_tokens,
+        max_batch_size=args.max_batch_size,
+        synthetic=args.synthetic,
+    )
@@ -0,0 +1,63 @@
+import argparse
+import json
+import time
+from collections.abc import Callable
+
+import numpy
+
+from shared_models.embedding_transport import deserialize_embeddings
+from shared_models.embedding_transport import serialize_embeddings
+from shared_models.model_server_models import EmbedResponse
+
+
+def _time_ms(func: Callable[[], object], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def run_benchmark(batch_sizes: list[int], dim: int, iterations: int) -> None:
+    for batch_size in batch_sizes:
+        embeddings = numpy.random.rand(batch_size, dim).astype(numpy.float32)
+
+        # what the JSON transport does: serialize the response model on the server,
+        # then parse and validate it on the client
+        json_content = json.dumps({"embeddings": embeddings.tolist()}).encode()
+        json_ms = _time_ms(
+            lambda: json.dumps({"embeddings": embeddings.tolist()}), iterations
+        ) + _time_ms(
+            lambda: numpy.array(
+                EmbedResponse.parse_raw(json_content).embeddings, dtype=numpy.float32
+            ),
+            iterations,
+        )
+        print(
+            f"{batch_size} x {dim}: json {len(json_content) / 1024:.0f} KiB "
+            f"{json_ms:.2f} ms"
+        )
+
+        for dtype in ["float32", "float16"]:
+            content = serialize_embeddings(embeddings, dtype)
+            binary_ms = _time_ms(
+                lambda: serialize_embeddings(embeddings, dtype), iterations
+            ) + _time_ms(lambda: deserialize_embeddings(content, dtype), iterations)
+            print(
+                f"{batch_size} x {dim}: {dtype} {len(content) / 1024:.0f} KiB "
+                f"{binary_ms:.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compares payload size and encode + decode time of the JSON and "
+        "binary embedding responses of the model server"
+    )
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 1024])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    run_benchmark(
+        batch_sizes=args.batch_sizes, dim=args.dim, iterations=args.iterations
+    )
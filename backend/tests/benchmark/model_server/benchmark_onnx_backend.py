@@ -0,0 +1,120 @@
+import argparse
+import random
+import time
+from collections.abc import Callable
+from functools import partial
+
+import torch
+from sentence_transformers import CrossEncoder  # type: ignore
+from sentence_transformers import SentenceTransformer  # type: ignore
+
+from danswer.configs.model_configs import CROSS_EMBED_CONTEXT_SIZE
+from danswer.configs.model_configs import CROSS_ENCODER_MODEL_ENSEMBLE
+from danswer.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
+from danswer.configs.model_configs import DOCUMENT_ENCODER_MODEL
+from danswer.search.onnx_models import ACCURACY_SAMPLE_PASSAGES
+from danswer.search.onnx_models import ACCURACY_SAMPLE_QUERY
+from danswer.search.onnx_models import embedding_agreement
+from danswer.search.onnx_models import load_onnx_cross_encoder
+from danswer.search.onnx_models import load_onnx_embedding_model
+from danswer.search.onnx_models import score_agreement
+
+_WORDS = [
+    "connector",
+    "index",
+    "document",
+    "search",
+    "permission",
+    "token",
+    "answer",
+    "query",
+    "embedding",
+    "passage",
+]
+
+
+def _build_passages(num_passages: int, num_words: int) -> list[str]:
+    rng = random.Random(0)
+    return [
+        " ".join(rng.choice(_WORDS) for _ in range(rng.randint(1, num_words)))
+        for _ in range(num_passages)
+    ]
+
+
+def _time_secs(func: Callable[[], object]) -> float:
+    func()  # warm up
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def benchmark_embedding_model(passages: list[str], batch_size: int) -> None:
+    torch_model = SentenceTransformer(DOCUMENT_ENCODER_MODEL, device="cpu")
+    torch_model.max_seq_length = DOC_EMBEDDING_CONTEXT_SIZE
+    onnx_model = load_onnx_embedding_model(
+        DOCUMENT_ENCODER_MODEL, DOC_EMBEDDING_CONTEXT_SIZE
+    )
+    if onnx_model is None:
+        print(f"{DOCUMENT_ENCODER_MODEL}: ONNX export rejected")
+        return
+
+    sample = [ACCURACY_SAMPLE_QUERY] + ACCURACY_SAMPLE_PASSAGES
+    agreement = embedding_agreement(
+        torch_model.encode(sample), onnx_model.encode(sample)
+    )
+    torch_secs = _time_secs(
+        partial(torch_model.encode, passages, batch_size=batch_size)
+    )
+    onnx_secs = _time_secs(partial(onnx_model.encode, passages, batch_size=batch_size))
+    print(
+        f"{DOCUMENT_ENCODER_MODEL}: min cosine similarity {agreement:.4f}, "
+        f"torch {len(passages) / torch_secs:.1f} texts/s, "
+        f"onnx int8 {len(passages) / onnx_secs:.1f} texts/s"
+    )
+
+
+def benchmark_cross_encoders(passages: list[str], batch_size: int) -> None:
+    sample_pairs = [
+        (ACCURACY_SAMPLE_QUERY, passage) for passage in ACCURACY_SAMPLE_PASSAGES
+    ]
+    pairs = [(ACCURACY_SAMPLE_QUERY, passage) for passage in passages]
+    for model_name in CROSS_ENCODER_MODEL_ENSEMBLE:
+        torch_model = CrossEncoder(model_name, device="cpu")
+        torch_model.max_length = CROSS_EMBED_CONTEXT_SIZE
+        onnx_model = load_onnx_cross_encoder(model_name, CROSS_EMBED_CONTEXT_SIZE)
+        if onnx_model is None:
+            print(f"{model_name}: ONNX export rejected")
+            continue
+
+        agreement = score_agreement(
+            torch_model.predict(sample_pairs), onnx_model.predict(sample_pairs)
+        )
+        torch_secs = _time_secs(
+            partial(torch_model.predict, pairs, batch_size=batch_size)
+        )
+        onnx_secs = _time_secs(
+            partial(onnx_model.predict, pairs, batch_size=batch_size)
+        )
+        print(
+            f"{model_name}: score correlation {agreement:.4f}, "
+            f"torch {len(pairs) / torch_secs:.1f} pairs/s, "
+            f"onnx int8 {len(pairs) / onnx_secs:.1f} pairs/s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compares accuracy on the fixed sample and CPU throughput of the "
+        "torch and the int8 ONNX Runtime bi-encoder and cross-encoders. The ONNX "
+        "models are exported into ONNX_MODEL_CACHE_DIR if not already there"
+    )
+    parser.add_argument("--num-passages", type=int, default=256)
+    parser.add_argument("--max-words", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=torch.get_num_threads())
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    passages = _build_passages(args.num_passages, args.max_words)
+    benchmark_embedding_model(passages, args.batch_size)
+    benchmark_cross_encoders(passages, args.batch_size)
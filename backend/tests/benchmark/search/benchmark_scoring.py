@@ -0,0 +1,94 @@
+import argparse
+import random
+import time
+from collections.abc import Callable
+
+from danswer.indexing.models import InferenceChunk
+from danswer.search.search_runner import _rerank_chunks_by_sim_scores
+from danswer.search.search_runner import apply_boost
+from danswer.search.search_runner import apply_boost_legacy
+
+
+NUM_CROSS_ENCODERS = 2
+
+
+def make_chunks(num_chunks: int) -> list[InferenceChunk]:
+    return [
+        InferenceChunk(
+            chunk_id=0,
+            blurb="blurb",
+            content=f"content {ind}",
+            source_links=None,
+            section_continuation=False,
+            document_id=f"doc_{ind}",
+            source_type="web",
+            semantic_identifier=f"doc_{ind}",
+            boost=random.randint(-10, 10),
+            recency_bias=random.uniform(0.5, 1),
+            score=random.random(),
+            hidden=False,
+            metadata={},
+            match_highlights=[],
+            updated_at=None,
+        )
+        for ind in range(num_chunks)
+    ]
+
+
+def time_function(
+    func: Callable[[list[InferenceChunk]], list[InferenceChunk]],
+    chunks: list[InferenceChunk],
+    iterations: int,
+) -> float:
+    """Returns the mean time per call in milliseconds"""
+    total = 0.0
+    for _ in range(iterations):
+        # scores are overwritten in place, reset them between runs
+        for chunk in chunks:
+            chunk.score = random.random()
+        start = time.perf_counter()
+        func(chunks)
+        total += time.perf_counter() - start
+    return total / iterations * 1000
+
+
+def run_benchmark(chunk_counts: list[int], iterations: int) -> None:
+    for num_chunks in chunk_counts:
+        chunks = make_chunks(num_chunks)
+        sim_scores = [
+            [random.uniform(-10, 10) for _ in range(num_chunks)]
+            for _ in range(NUM_CROSS_ENCODERS)
+        ]
+
+        results = {
+            "apply_boost": time_function(apply_boost, chunks, iterations),
+            "apply_boost_legacy": time_function(apply_boost_legacy, chunks, iterations),
+            "semantic_reranking (scoring only)": time_function(
+                lambda c: _rerank_chunks_by_sim_scores(c, sim_scores),
+                chunks,
+                iterations,
+            ),
+        }
+
+        print(f"{num_chunks} chunks:")
+        for name, mean_ms in results.items():
+            print(f"\t{name}: {mean_ms:.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark of the search score normalization / boosting"
+    )
+    parser.add_argument(
+        "--chunk-counts",
+        type=int,
+        nargs="+",
+        default=[50, 500, 5000],
+        help="Number of chunks to score in each run",
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=100, help="Runs to average over"
+    )
+    args = parser.parse_args()
+
+    run_benchmark(chunk_counts=args.chunk_counts, iterations=args.iterations)
@@ -0,0 +1,80 @@
+import io
+import unittest
+
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject
+from pypdf.generic import DictionaryObject
+from pypdf.generic import NameObject
+
+from danswer.connectors.cross_connector_utils.file_utils import read_pdf_file
+from danswer.connectors.cross_connector_utils.file_utils import read_pdf_sections
+from danswer.connectors.cross_connector_utils.file_utils import spool_chunks
+
+
+def _build_pdf(page_texts: list[str]) -> io.BytesIO:
+    writer = PdfWriter()
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }
+        )
+    )
+    for text in page_texts:
+        page = writer.add_blank_page(width=612, height=792)
+        contents = DecodedStreamObject()
+        contents.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(contents)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+
+    pdf_file = io.BytesIO()
+    writer.write(pdf_file)
+    pdf_file.seek(0)
+    return pdf_file
+
+
+class TestFileUtils(unittest.TestCase):
+    def test_pdf_pages_grouped_into_sections(self) -> None:
+        pdf_file = _build_pdf([f"page {ind}" for ind in range(5)])
+
+        sections = read_pdf_sections(
+            pdf_file, file_name="test.pdf", link="https://a.com", pages_per_section=2
+        )
+
+        self.assertEqual(
+            [section.text for section in sections],
+            ["page 0\npage 1", "page 2\npage 3", "page 4"],
+        )
+        self.assertTrue(all(section.link == "https://a.com" for section in sections))
+
+    def test_pdf_extraction_stops_at_max_chars(self) -> None:
+        pdf_file = _build_pdf([f"page {ind}" for ind in range(5)])
+
+        sections = read_pdf_sections(
+            pdf_file,
+            file_name="test.pdf",
+            link="",
+            pages_per_section=10,
+            max_chars=15,
+        )
+
+        self.assertEqual(
+            [section.text for section in sections], ["page 0\npage 1\npag"]
+        )
+
+    def test_read_pdf_file_from_spooled_download(self) -> None:
+        content = _build_pdf(["first", "second"]).getvalue()
+        chunks = [content[start : start + 100] for start in range(0, len(content), 100)]
+
+        with spool_chunks(chunks) as spooled_file:
+            self.assertEqual(
+                read_pdf_file(spooled_file, file_name="test.pdf"), "first\nsecond"
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,30 @@
+import os
+import tempfile
+import threading
 import time
 import unittest
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from email.utils import format_datetime
+from typing import Any
 
+import requests
+from requests.adapters import BaseAdapter
+
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    parse_retry_after,
+)
 from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
     rate_limit_builder,
 )
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    RateLimitedSession,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import (
+    SharedTokenBucket,
+)
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import TokenBucket
 
 
 class TestRateLimit(unittest.TestCase):
@@ -32,5 +53,120 @@ class TestRateLimit(unittest.TestCase):
         self.assertGreater(time_to_finish_ratelimited, 5)
 
 
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self) -> None:
+        bucket = TokenBucket(rate=20, capacity=5)
+
+        start = time.monotonic()
+        for _ in range(5):
+            self.assertEqual(bucket.acquire(), 0)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        # 10 more calls need 10 / 20 seconds worth of tokens
+        for _ in range(10):
+            bucket.acquire()
+        self.assertGreater(time.monotonic() - start, 0.45)
+
+    def test_shared_across_threads(self) -> None:
+        bucket = TokenBucket(rate=50, capacity=1)
+        call_times: list[float] = []
+        lock = threading.Lock()
+
+        def _call() -> None:
+            for _ in range(5):
+                bucket.acquire()
+                with lock:
+                    call_times.append(time.monotonic())
+
+        threads = [threading.Thread(target=_call) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        call_times.sort()
+        self.assertEqual(len(call_times), 20)
+        # 19 calls over the initial token at 50 per second, regardless of the threads
+        self.assertGreater(call_times[-1] - call_times[0], 0.3)
+
+    def test_pause(self) -> None:
+        bucket = TokenBucket(rate=100, capacity=10)
+        bucket.pause(0.3)
+
+        start = time.monotonic()
+        bucket.acquire()
+        self.assertGreater(time.monotonic() - start, 0.25)
+
+    def test_shared_across_processes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "rate_limits.sqlite")
+            # separate connections to the same file, like separate worker processes
+            buckets = [
+                SharedTokenBucket("slack:abc", rate=20, db_path=db_path, capacity=2)
+                for _ in range(2)
+            ]
+            other_credential = SharedTokenBucket(
+                "slack:def", rate=20, db_path=db_path, capacity=2
+            )
+
+            start = time.monotonic()
+            for bucket in buckets:
+                self.assertEqual(bucket.acquire(), 0)
+            self.assertEqual(other_credential.acquire(), 0)
+            # both tokens of the credential were used, by either bucket
+            self.assertGreater(buckets[0].acquire(), 0)
+            buckets[1].pause(0.3)
+            buckets[0].acquire()
+            self.assertGreater(time.monotonic() - start, 0.3)
+
+
+class TestRetryAfter(unittest.TestCase):
+    def test_parse_retry_after(self) -> None:
+        self.assertEqual(parse_retry_after("30"), 30)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after("inf"))
+        retry_after = parse_retry_after(
+            format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60))
+        )
+        assert retry_after is not None
+        self.assertTrue(55 < retry_after <= 60)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+
+    def test_session_retries_rate_limited_requests(self) -> None:
+        status_codes = [429, 429, 200]
+        sent_times: list[float] = []
+
+        class _Adapter(BaseAdapter):
+            def send(
+                self, request: requests.PreparedRequest, *args: Any, **kwargs: Any
+            ) -> requests.Response:
+                sent_times.append(time.monotonic())
+                response = requests.Response()
+                response.status_code = status_codes[len(sent_times) - 1]
+                response.headers["Retry-After"] = "0.2"
+                response.request = request
+                response.url = str(request.url)
+                return response
+
+            def close(self) -> None:
+                pass
+
+        session = RateLimitedSession(TokenBucket(rate=100), max_retries=5)
+        session.mount("https://", _Adapter())
+
+        response = session.get("https://api.site.com/items")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(sent_times), 3)
+        self.assertGreater(sent_times[1] - sent_times[0], 0.15)
+
+        status_codes = [429, 429, 429]
+        sent_times.clear()
+        session.max_retries = 1
+        self.assertEqual(session.get("https://api.site.com/items").status_code, 429)
+        self.assertEqual(len(sent_times), 2)
+
+
 if __name__ == "__main__":
     unittest.main()
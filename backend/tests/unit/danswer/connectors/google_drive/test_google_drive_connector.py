@@ -0,0 +1,148 @@
+import threading
+import time
+import unittest
+from typing import Any
+from unittest import mock
+
+from danswer.configs.constants import IGNORE_FOR_QA
+from danswer.connectors.cross_connector_utils.rate_limit_wrapper import TokenBucket
+from danswer.connectors.google_drive.connector import GoogleDriveConnector
+from danswer.connectors.models import Section
+
+_CONNECTOR_MODULE = "danswer.connectors.google_drive.connector"
+
+
+def _build_files(num_files: int) -> list[dict[str, str]]:
+    return [
+        {
+            "id": str(ind),
+            "name": f"file {ind}",
+            "mimeType": "application/vnd.google-apps.document",
+            "webViewLink": f"https://drive.google.com/{ind}",
+            "modifiedTime": "2023-10-01T12:00:00.000Z",
+        }
+        for ind in range(num_files)
+    ]
+
+
+class TestGoogleDriveConnector(unittest.TestCase):
+    def setUp(self) -> None:
+        # a distinct service object per build
+        build_patch = mock.patch(
+            f"{_CONNECTOR_MODULE}.discovery.build",
+            side_effect=lambda *args, **kwargs: object(),
+        )
+        build_patch.start()
+        self.addCleanup(build_patch.stop)
+
+        self.connector = GoogleDriveConnector(num_threads=4, requests_per_second=1000)
+        self.connector.creds = mock.Mock()
+
+    def _fetch(self, files: list[dict[str, str]]) -> list[list[str]]:
+        with mock.patch(
+            f"{_CONNECTOR_MODULE}.get_all_files_batched",
+            return_value=iter([files[:5], files[5:]]),
+        ):
+            return [
+                [doc.semantic_identifier for doc in doc_batch]
+                for doc_batch in self.connector.load_from_state()
+            ]
+
+    def test_concurrent_extraction_keeps_batch_order(self) -> None:
+        files = _build_files(8)
+        service_by_thread: dict[int, object] = {}
+        active = 0
+        max_active = 0
+        lock = threading.Lock()
+
+        def _extract_sections(
+            file: dict[str, str], service: object, rate_limiter: TokenBucket
+        ) -> list[Section]:
+            nonlocal active, max_active
+            with lock:
+                # each thread always uses the same service and never another's
+                self.assertIs(
+                    service_by_thread.setdefault(threading.get_ident(), service),
+                    service,
+                )
+                active += 1
+                max_active = max(max_active, active)
+            # later files finish first
+            time.sleep(0.01 * (10 - int(file["id"])))
+            with lock:
+                active -= 1
+            return [Section(link=file["webViewLink"], text="contents")]
+
+        with mock.patch(
+            f"{_CONNECTOR_MODULE}.extract_sections", side_effect=_extract_sections
+        ):
+            doc_batches = self._fetch(files)
+
+        self.assertEqual(
+            doc_batches,
+            [
+                [f"file {ind}" for ind in range(5)],
+                [f"file {ind}" for ind in range(5, 8)],
+            ],
+        )
+        self.assertGreater(max_active, 1)
+        self.assertEqual(
+            len(set(map(id, service_by_thread.values()))), len(service_by_thread)
+        )
+
+    def test_document_sections(self) -> None:
+        files = _build_files(2)
+
+        def _extract_sections(file: dict[str, str], *args: Any) -> list[Section]:
+            if file["id"] == "1":
+                return []
+            return [
+                Section(link=file["webViewLink"], text="pages 1-10"),
+                Section(link=file["webViewLink"], text="pages 11-12"),
+            ]
+
+        with mock.patch(
+            f"{_CONNECTOR_MODULE}.extract_sections", side_effect=_extract_sections
+        ), mock.patch(
+            f"{_CONNECTOR_MODULE}.get_all_files_batched", return_value=iter([files])
+        ):
+            docs = next(self.connector.load_from_state())
+
+        self.assertEqual(
+            [section.text for section in docs[0].sections],
+            ["file 0 - pages 1-10", "pages 11-12"],
+        )
+        self.assertEqual(docs[0].metadata, {})
+        # files without text are indexed by their title only
+        self.assertEqual([section.text for section in docs[1].sections], ["file 1"])
+        self.assertEqual(docs[1].metadata, {IGNORE_FOR_QA: True})
+
+    def test_failed_files_are_skipped(self) -> None:
+        self.connector.continue_on_failure = True
+
+        def _extract_sections(file: dict[str, str], *args: Any) -> list[Section]:
+            if file["id"] == "3":
+                raise RuntimeError("export failed")
+            return [Section(link=file["webViewLink"], text="contents")]
+
+        with mock.patch(
+            f"{_CONNECTOR_MODULE}.extract_sections", side_effect=_extract_sections
+        ):
+            doc_batches = self._fetch(_build_files(6))
+
+        self.assertEqual(
+            doc_batches, [["file 0", "file 1", "file 2", "file 4"], ["file 5"]]
+        )
+
+    def test_failure_raises_without_continue_on_failure(self) -> None:
+        self.connector.continue_on_failure = False
+
+        with mock.patch(
+            f"{_CONNECTOR_MODULE}.extract_sections", side_effect=RuntimeError("failed")
+        ):
+            with self.assertRaises(RuntimeError):
+                self._fetch(_build_files(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
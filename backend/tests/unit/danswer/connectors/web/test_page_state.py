@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from datetime import timezone
+
+from danswer.connectors.web.page_state import PageState
+from danswer.connectors.web.page_state import WebPageStateStore
+
+
+class TestWebPageStateStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "web_page_state.sqlite")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_round_trip_per_connector(self) -> None:
+        page_state = PageState(
+            content_hash="abc",
+            etag='W/"1"',
+            last_modified="Wed, 21 Oct 2015 07:28:00 GMT",
+            links=["https://a.com/2"],
+        )
+        store = WebPageStateStore(self.db_path, connector_id=1)
+        store.put_many({"https://a.com/1": page_state})
+        WebPageStateStore(self.db_path, connector_id=2).put_many(
+            {"https://a.com/1": PageState(content_hash="def")}
+        )
+        store.close()
+
+        # persisted across instances, e.g. the next indexing run
+        self.assertEqual(
+            WebPageStateStore(self.db_path, connector_id=1).load(),
+            {"https://a.com/1": page_state},
+        )
+        self.assertEqual(
+            page_state.conditional_headers(),
+            {
+                "If-None-Match": 'W/"1"',
+                "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT",
+            },
+        )
+        self.assertEqual(PageState(content_hash="def").conditional_headers(), {})
+
+    def test_last_crawl_time_per_connector(self) -> None:
+        store = WebPageStateStore(self.db_path, connector_id=1)
+        self.assertIsNone(store.load_last_crawl_time())
+
+        crawl_time = datetime(2023, 10, 1, 12, 30, tzinfo=timezone.utc)
+        store.put_last_crawl_time(crawl_time)
+        store.close()
+
+        self.assertEqual(
+            WebPageStateStore(self.db_path, connector_id=1).load_last_crawl_time(),
+            crawl_time,
+        )
+        self.assertIsNone(
+            WebPageStateStore(self.db_path, connector_id=2).load_last_crawl_time()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import os
+import tempfile
+import unittest
+from collections.abc import AsyncGenerator
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+from unittest import mock
+
+from danswer.connectors.web.connector import WebConnector
+from danswer.connectors.web.crawler import CrawledPage
+from danswer.connectors.web.crawler import normalize_url
+from danswer.connectors.web.page_state import PageState
+from danswer.connectors.web.page_state import WebPageStateStore
+
+
+_PAGE_URLS = [f"https://a.com/{ind}" for ind in range(4)]
+
+
+class _FakeCrawler:
+    instances: list["_FakeCrawler"] = []
+    num_failed_pages = 0
+
+    def __init__(
+        self,
+        start_urls: list[str],
+        page_states: dict[str, PageState] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self.start_urls = start_urls
+        self.page_states = page_states
+        self.num_unchanged_pages = 0
+        _FakeCrawler.instances.append(self)
+
+    async def crawl(self) -> AsyncGenerator[CrawledPage, None]:
+        for url in self.start_urls:
+            yield CrawledPage(
+                url=url,
+                title=None,
+                sections=[],
+                page_state=PageState(content_hash=f"hash of {url}"),
+            )
+
+
+class TestWebConnectorPageStates(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.db_path = os.path.join(self.temp_dir.name, "web_page_state.sqlite")
+        _FakeCrawler.instances = []
+        patcher = mock.patch.multiple(
+            "danswer.connectors.web.connector",
+            WebCrawler=_FakeCrawler,
+            WEB_CONNECTOR_PAGE_STATE_PATH=self.db_path,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        urls_path = os.path.join(self.temp_dir.name, "urls.txt")
+        with open(urls_path, "w") as f:
+            f.write("\n".join(_PAGE_URLS))
+        self.connector = WebConnector(
+            urls_path, web_connector_type="upload", batch_size=2, connector_id=1
+        )
+
+    def _open_store(self) -> WebPageStateStore:
+        store = WebPageStateStore(self.db_path, connector_id=1)
+        self.addCleanup(store.close)
+        return store
+
+    def _saved_urls(self) -> set[str]:
+        return set(self._open_store().load())
+
+    def _index_all(self) -> None:
+        for doc_batch in self.connector.load_from_state():
+            self.connector.on_documents_indexed([doc.id for doc in doc_batch])
+
+    def test_saves_page_states_once_indexed(self) -> None:
+        for doc_batch in self.connector.load_from_state():
+            batch_urls = {normalize_url(doc.id) for doc in doc_batch}
+            self.assertFalse(batch_urls & self._saved_urls())
+            self.connector.on_documents_indexed([doc.id for doc in doc_batch])
+            self.assertLessEqual(batch_urls, self._saved_urls())
+
+        self.assertEqual(self._saved_urls(), {normalize_url(url) for url in _PAGE_URLS})
+
+        # the next crawl skips the unchanged pages
+        list(self.connector.load_from_state())
+        page_states = _FakeCrawler.instances[-1].page_states
+        assert page_states is not None
+        self.assertEqual(set(page_states), {normalize_url(url) for url in _PAGE_URLS})
+
+    def test_failed_batch_is_not_saved(self) -> None:
+        doc_batches = self.connector.load_from_state()
+        # the first batch fails to index while the next one is fetched, as in the
+        # staged indexing pipeline
+        next(doc_batches)
+        second_batch = next(doc_batches)
+        self.connector.on_documents_indexed([doc.id for doc in second_batch])
+        self.assertEqual(list(doc_batches), [])
+
+        self.assertEqual(
+            self._saved_urls(), {normalize_url(url) for url in _PAGE_URLS[2:]}
+        )
+        # the next crawl can't skip pages by their lastmod
+        self.assertIsNone(self._open_store().load_last_crawl_time())
+
+    def test_load_skips_pages_not_modified_since_last_crawl(self) -> None:
+        crawl_start = datetime.now(tz=timezone.utc)
+        self._index_all()
+        last_crawl_time = self._open_store().load_last_crawl_time()
+        assert last_crawl_time is not None
+        self.assertGreaterEqual(last_crawl_time, crawl_start - timedelta(seconds=1))
+
+        # e.g. the `lastmod` of the sitemap pages
+        self.connector.url_modified_times = {
+            _PAGE_URLS[0]: last_crawl_time - timedelta(days=1),
+            _PAGE_URLS[1]: last_crawl_time + timedelta(seconds=1),
+            _PAGE_URLS[3]: last_crawl_time - timedelta(seconds=1),
+        }
+        self._index_all()
+
+        self.assertEqual(
+            _FakeCrawler.instances[-1].start_urls, [_PAGE_URLS[1], _PAGE_URLS[2]]
+        )
+
+    def test_crawl_time_saved_once_all_pages_indexed(self) -> None:
+        doc_batches = list(self.connector.load_from_state())
+
+        # the crawl finished before its last batches were indexed
+        self.connector.on_documents_indexed([doc.id for doc in doc_batches[1]])
+        self.assertIsNone(self._open_store().load_last_crawl_time())
+        self.connector.on_documents_indexed([doc.id for doc in doc_batches[0]])
+        self.assertIsNotNone(self._open_store().load_last_crawl_time())
+
+    def test_crawl_time_not_saved_with_failed_pages(self) -> None:
+        with mock.patch.object(_FakeCrawler, "num_failed_pages", 1):
+            self._index_all()
+
+        self.assertEqual(self._saved_urls(), {normalize_url(url) for url in _PAGE_URLS})
+        self.assertIsNone(self._open_store().load_last_crawl_time())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,329 @@
+import asyncio
+import unittest
+from collections import Counter
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from datetime import datetime
+from datetime import timezone
+from unittest import mock
+
+import httpx
+
+from danswer.connectors.web.connector import WebConnector
+from danswer.connectors.web.crawler import CrawledPage
+from danswer.connectors.web.crawler import CrawlFrontier
+from danswer.connectors.web.crawler import FetchedPage
+from danswer.connectors.web.crawler import FetchMode
+from danswer.connectors.web.crawler import get_host
+from danswer.connectors.web.crawler import HttpFetcher
+from danswer.connectors.web.crawler import normalize_url
+from danswer.connectors.web.crawler import PageFetcher
+from danswer.connectors.web.crawler import WebCrawler
+from danswer.connectors.web.page_state import PageState
+
+_BASE_URL = "https://docs.site.com/"
+
+
+def _build_page(title: str, links: list[str]) -> str:
+    anchors = "".join(f'<a href="{link}">{link}</a>' for link in links)
+    return (
+        f"<html><head><title>{title}</title></head>"
+        f"<body><p>Contents of {title}</p>{anchors}</body></html>"
+    )
+
+
+# every page links to the next two and back to the first one
+_SITE = {
+    f"{_BASE_URL}{ind}": _build_page(
+        f"page {ind}", [f"/{ind + 1}", f"{ind + 2}#section", "/0"]
+    )
+    for ind in range(10)
+}
+# links outside of the site or the base URL are not followed
+_SITE[f"{_BASE_URL}0"] = _build_page(
+    "page 0", ["/1", "https://other.com/", "https://docs.site.com"]
+)
+
+
+class _FakeFetcher(PageFetcher):
+    def __init__(self, pages: dict[str, str]) -> None:
+        self.pages = pages
+        self.fetched: list[str] = []
+        self._num_active: Counter[str] = Counter()
+        self.max_active: dict[str, int] = defaultdict(int)
+
+    async def fetch_html(self, url: str) -> FetchedPage:
+        self.fetched.append(url)
+        host = get_host(url)
+        self._num_active[host] += 1
+        self.max_active[host] = max(self.max_active[host], self._num_active[host])
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self._num_active[host] -= 1
+        if url not in self.pages:
+            raise ValueError(f"{url} not found")
+        return FetchedPage(url=url, html=self.pages[url])
+
+
+class _FakeHttpFetcher(_FakeFetcher, HttpFetcher):
+    async def get_crawl_delay(self, url: str) -> float | None:
+        return None
+
+    async def close(self) -> None:
+        pass
+
+
+def _crawl(crawler: WebCrawler) -> list[CrawledPage]:
+    async def _collect() -> list[CrawledPage]:
+        return [page async for page in crawler.crawl()]
+
+    return asyncio.run(_collect())
+
+
+class TestCrawlFrontier(unittest.TestCase):
+    def test_normalize_url(self) -> None:
+        self.assertEqual(
+            normalize_url("HTTPS://Docs.Site.com:443?b=2&a=1#intro"),
+            "https://docs.site.com/?a=1&b=2",
+        )
+        self.assertEqual(
+            normalize_url("http://docs.site.com:8080/a/"),
+            "http://docs.site.com:8080/a/",
+        )
+
+    def test_per_host_limits(self) -> None:
+        frontier = CrawlFrontier(max_requests_per_host=2, crawl_delay=1.0)
+        for url in [
+            "https://a.com/1",
+            "https://A.com/1#top",
+            "https://a.com/2",
+            "https://a.com/3",
+            "https://b.com/1",
+        ]:
+            frontier.add(url)
+
+        self.assertEqual(frontier.pop(now=0), "https://a.com/1")
+        self.assertEqual(frontier.pop(now=0), "https://b.com/1")
+        # a.com's crawl delay hasn't passed yet
+        self.assertIsNone(frontier.pop(now=0.5))
+        self.assertEqual(frontier.next_request_time(), 1.0)
+        self.assertEqual(frontier.pop(now=1.0), "https://a.com/2")
+        # a.com has the max number of requests in progress
+        self.assertIsNone(frontier.pop(now=5.0))
+        self.assertIsNone(frontier.next_request_time())
+
+        frontier.release("https://a.com/1")
+        self.assertEqual(frontier.pop(now=5.0), "https://a.com/3")
+        for url in ["https://a.com/2", "https://a.com/3", "https://b.com/1"]:
+            self.assertFalse(frontier.is_exhausted)
+            frontier.release(url)
+        self.assertTrue(frontier.is_exhausted)
+
+
+class TestWebCrawler(unittest.TestCase):
+    def _build_crawler(
+        self, start_urls: list[str], fetch_mode: FetchMode, **kwargs: object
+    ) -> WebCrawler:
+        return WebCrawler(
+            start_urls=start_urls,
+            fetch_mode=fetch_mode,
+            num_workers=4,
+            max_requests_per_host=2,
+            crawl_delay=0,
+            http_fetcher=self.http_fetcher,
+            browser_fetcher=self.browser_fetcher,
+            **kwargs,  # type: ignore
+        )
+
+    def test_static_site_fetched_without_browser(self) -> None:
+        self.http_fetcher = _FakeHttpFetcher(_SITE)
+        self.browser_fetcher = _FakeFetcher(_SITE)
+        crawler = self._build_crawler(
+            [f"{_BASE_URL}0"], FetchMode.AUTO, link_base_url=_BASE_URL
+        )
+
+        pages = _crawl(crawler)
+
+        self.assertEqual(
+            sorted(page.url for page in pages),
+            sorted(_SITE),
+        )
+        self.assertEqual(
+            {page.title for page in pages}, {f"page {ind}" for ind in range(10)}
+        )
+        # only the first page was rendered, to check if the site needs it
+        self.assertEqual(self.browser_fetcher.fetched, [f"{_BASE_URL}0"])
+        self.assertEqual(crawler.host_fetch_modes, {"docs.site.com": FetchMode.HTTP})
+        self.assertEqual(self.http_fetcher.max_active["docs.site.com"], 2)
+
+    def test_javascript_site_rendered(self) -> None:
+        self.http_fetcher = _FakeHttpFetcher(
+            {url: "<html><body></body></html>" for url in _SITE}
+        )
+        self.browser_fetcher = _FakeFetcher(_SITE)
+        crawler = self._build_crawler(
+            [f"{_BASE_URL}0"], FetchMode.AUTO, link_base_url=_BASE_URL
+        )
+
+        pages = _crawl(crawler)
+
+        self.assertEqual(len(pages), len(_SITE))
+        # only the first page was also fetched without a browser
+        self.assertEqual(self.http_fetcher.fetched, [f"{_BASE_URL}0"])
+        self.assertEqual(crawler.host_fetch_modes, {"docs.site.com": FetchMode.BROWSER})
+
+    def test_start_urls_only_without_link_base_url(self) -> None:
+        pages = {
+            **_SITE,
+            "https://other.com/": _build_page("other", [f"{_BASE_URL}5"]),
+        }
+        self.http_fetcher = _FakeHttpFetcher(pages)
+        self.browser_fetcher = _FakeFetcher(pages)
+        start_urls = [f"{_BASE_URL}{ind}" for ind in range(8)] + [
+            "https://other.com/",
+            "https://other.com/missing",
+        ]
+
+        crawler = self._build_crawler(start_urls, FetchMode.HTTP)
+        crawled_pages = _crawl(crawler)
+
+        self.assertEqual(
+            sorted(page.url for page in crawled_pages), sorted(start_urls[:-1])
+        )
+        self.assertEqual(crawler.num_failed_pages, 1)
+        self.assertEqual(self.browser_fetcher.fetched, [])
+        self.assertEqual(self.http_fetcher.max_active["docs.site.com"], 2)
+
+
+class TestRevisitUnchangedPages(unittest.TestCase):
+    """Crawls `_SITE` twice through the real HttpFetcher, served with ETags"""
+
+    def setUp(self) -> None:
+        self.pages = dict(_SITE)
+        self.send_etags = True
+        self.requests: list[httpx.Request] = []
+
+    def _serve(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        url = str(request.url)
+        if url.endswith("/robots.txt") or url not in self.pages:
+            return httpx.Response(404)
+        etag = f'"{hash(self.pages[url])}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            text=self.pages[url],
+            headers={"ETag": etag} if self.send_etags else None,
+        )
+
+    def _crawl(self, page_states: dict[str, PageState]) -> WebCrawler:
+        self.requests = []
+        crawler = WebCrawler(
+            start_urls=[f"{_BASE_URL}0"],
+            link_base_url=_BASE_URL,
+            fetch_mode=FetchMode.HTTP,
+            num_workers=4,
+            crawl_delay=0,
+            http_fetcher=HttpFetcher(
+                {}, max_connections=4, transport=httpx.MockTransport(self._serve)
+            ),
+            browser_fetcher=_FakeFetcher({}),
+            page_states=page_states,
+        )
+        self.crawled_pages = _crawl(crawler)
+        return crawler
+
+    def test_only_changed_pages_crawled(self) -> None:
+        self._crawl({})
+        page_states = {
+            normalize_url(page.url): page.page_state
+            for page in self.crawled_pages
+            if page.page_state is not None
+        }
+        self.assertEqual(len(page_states), len(_SITE))
+
+        self.pages[f"{_BASE_URL}7"] = _build_page("page 7 edited", ["/8"])
+        crawler = self._crawl(page_states)
+
+        # the pages behind the unchanged ones were still reached
+        self.assertEqual([page.title for page in self.crawled_pages], ["page 7 edited"])
+        self.assertEqual(crawler.num_unchanged_pages, len(_SITE) - 1)
+        html_requests = [
+            request
+            for request in self.requests
+            if str(request.url) in _SITE and str(request.url) != f"{_BASE_URL}7"
+        ]
+        self.assertEqual(len(html_requests), len(_SITE) - 1)
+        self.assertTrue(
+            all("If-None-Match" in request.headers for request in html_requests)
+        )
+
+    def test_unchanged_content_without_validators(self) -> None:
+        self.send_etags = False
+        self._crawl({})
+        page_states = {
+            normalize_url(page.url): page.page_state
+            for page in self.crawled_pages
+            if page.page_state is not None
+        }
+        self.assertTrue(all(state.etag is None for state in page_states.values()))
+
+        crawler = self._crawl(page_states)
+
+        # every page is downloaded but none of them parsed again
+        self.assertEqual(self.crawled_pages, [])
+        self.assertEqual(crawler.num_unchanged_pages, len(_SITE))
+
+
+class TestWebConnectorSitemap(unittest.TestCase):
+    def test_poll_skips_pages_not_modified(self) -> None:
+        sitemap = (
+            "<urlset>"
+            "<url><loc>https://a.com/1</loc><lastmod>2023-10-01</lastmod></url>"
+            "<url><loc>https://a.com/2</loc>"
+            "<lastmod>2023-09-01T10:00:00+00:00</lastmod></url>"
+            "<url><loc>https://a.com/3</loc></url>"
+            "</urlset>"
+        )
+        with mock.patch("danswer.connectors.web.connector.requests.get") as get:
+            get.return_value.content = sitemap.encode()
+            connector = WebConnector(
+                "https://a.com/sitemap.xml", web_connector_type="sitemap"
+            )
+        self.assertEqual(
+            connector.to_visit_list,
+            ["https://a.com/1", "https://a.com/2", "https://a.com/3"],
+        )
+
+        crawled_urls: list[list[str]] = []
+
+        async def _crawl_pages() -> AsyncIterator[CrawledPage]:
+            for url in crawled_urls[-1]:
+                yield CrawledPage(url=url, title=None, sections=[])
+
+        def _build_crawler(start_urls: list[str], **kwargs: object) -> mock.Mock:
+            crawled_urls.append(start_urls)
+            return mock.Mock(crawl=_crawl_pages)
+
+        with mock.patch(
+            "danswer.connectors.web.connector.WebCrawler", side_effect=_build_crawler
+        ):
+            poll_start = datetime(2023, 10, 1, 12, tzinfo=timezone.utc).timestamp()
+            docs = [
+                doc
+                for doc_batch in connector.poll_source(poll_start, poll_start + 3600)
+                for doc in doc_batch
+            ]
+            list(connector.load_from_state())
+
+        # the date only lastmod may be later that day
+        self.assertEqual(
+            [doc.id for doc in docs], ["https://a.com/1", "https://a.com/3"]
+        )
+        self.assertEqual(crawled_urls[-1], connector.to_visit_list)
+
+
+if __name__ == "__main__":
+    unittest.main()
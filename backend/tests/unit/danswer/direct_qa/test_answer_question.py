@@ -0,0 +1,67 @@
+import json
+import unittest
+from collections.abc import Iterator
+from concurrent.futures import Future
+
+from danswer.direct_qa.answer_question import _stream_answer_after_retrieval
+from danswer.search.models import BaseFilters
+from danswer.search.models import QueryFlow
+from danswer.search.models import SearchType
+from danswer.server.models import QuestionRequest
+
+
+def _stream_packets(
+    intent_future: Future[tuple[SearchType, QueryFlow]],
+    disable_generative_answer: bool = False,
+) -> Iterator[dict]:
+    packets = _stream_answer_after_retrieval(
+        question=QuestionRequest(
+            query="what is danswer",
+            collection="danswer_index",
+            filters=BaseFilters(),
+            offset=None,
+            enable_auto_detect_filters=False,
+        ),
+        user=None,
+        db_session=None,  # type: ignore
+        # no documents found, so neither the QA model nor Postgres are used
+        ranked_chunks=None,
+        unranked_chunks=None,
+        time_cutoff=None,
+        favor_recent=False,
+        intent_future=intent_future,
+        disable_generative_answer=disable_generative_answer,
+    )
+    return (json.loads(packet) for packet in packets)
+
+
+class TestStreamAnswerAfterRetrieval(unittest.TestCase):
+    def test_documents_are_not_held_back_by_the_intent(self) -> None:
+        intent_future: Future[tuple[SearchType, QueryFlow]] = Future()
+        packets = _stream_packets(intent_future)
+
+        documents_packet = next(packets)
+        self.assertEqual(documents_packet["top_documents"], [])
+        self.assertIsNone(documents_packet["predicted_flow"])
+        self.assertIsNone(documents_packet["predicted_search"])
+
+        intent_future.set_result((SearchType.HYBRID, QueryFlow.QUESTION_ANSWER))
+        self.assertEqual(
+            list(packets),
+            [{"predicted_flow": "question-answer", "predicted_search": "hybrid"}],
+        )
+
+    def test_finished_intent_is_sent_with_the_documents(self) -> None:
+        intent_future: Future[tuple[SearchType, QueryFlow]] = Future()
+        intent_future.set_result((SearchType.SEMANTIC, QueryFlow.QUESTION_ANSWER))
+
+        packets = list(_stream_packets(intent_future, disable_generative_answer=True))
+
+        self.assertEqual(len(packets), 1)
+        # the frontend shouldn't offer QA when generative AI is disabled
+        self.assertEqual(packets[0]["predicted_flow"], "search")
+        self.assertEqual(packets[0]["predicted_search"], "semantic")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import re
+import unittest
+from typing import Any
+from unittest import mock
+
+from danswer.document_index.vespa import index as vespa_index
+
+
+class _FakeSearch:
+    """Answers the chunk id queries from `num_chunks` per document, with at most
+    `max_hits` hits per query like Vespa"""
+
+    def __init__(self, num_chunks: dict[str, int], max_hits: int) -> None:
+        self.num_chunks = num_chunks
+        self.max_hits = max_hits
+        self.queries: list[str] = []
+
+    def get(self, url: str, params: dict[str, Any]) -> mock.Mock:
+        yql = params["yql"]
+        self.queries.append(yql)
+        document_ids = [
+            re.sub(r"\\(.)", r"\1", escaped_id)
+            for escaped_id in re.findall(
+                r'document_id contains "((?:[^"\\]|\\.)*)"', yql
+            )
+        ]
+        min_chunk_id = int(re.search(r"chunk_id >= (\d+)", yql).group(1))  # type: ignore
+        hits = [
+            {
+                "fields": {
+                    "documentid": f"id:default:danswer_chunk::{document_id}-{chunk_id}",
+                    "document_id": document_id,
+                    "chunk_id": chunk_id,
+                }
+            }
+            for chunk_id in range(min_chunk_id, max(self.num_chunks.values()))
+            for document_id in document_ids
+            if chunk_id < self.num_chunks.get(document_id, 0)
+        ]
+        response = mock.Mock()
+        response.json.return_value = {
+            "root": {
+                "fields": {"totalCount": len(hits)},
+                "children": hits[: self.max_hits],
+            }
+        }
+        return response
+
+
+class TestExistingChunkIds(unittest.TestCase):
+    def _query(
+        self, num_chunks: dict[str, int], document_ids: list[str]
+    ) -> tuple[dict[str, set[str]], _FakeSearch]:
+        search = _FakeSearch(num_chunks, max_hits=10)
+        with mock.patch.object(
+            vespa_index, "_VESPA_SESSION", search
+        ), mock.patch.object(vespa_index, "_QUERY_MAX_HITS", 10):
+            return vespa_index._query_vespa_chunk_ids(document_ids), search
+
+    def test_single_query_when_chunks_fit(self) -> None:
+        chunk_ids, search = self._query({"a": 3, "b": 4}, ["a", "b", "missing"])
+
+        self.assertEqual(chunk_ids["a"], {"a-0", "a-1", "a-2"})
+        self.assertEqual(len(chunk_ids["b"]), 4)
+        self.assertNotIn("missing", chunk_ids)
+        self.assertEqual(len(search.queries), 1)
+
+    def test_large_documents_split_and_paged(self) -> None:
+        num_chunks = {"a": 6, "b": 6, "c": 25, 'd"quoted': 2}
+
+        chunk_ids, search = self._query(num_chunks, list(num_chunks))
+
+        self.assertEqual(
+            {document_id: len(ids) for document_id, ids in chunk_ids.items()},
+            num_chunks,
+        )
+        self.assertIn('document_id contains "d\\"quoted"', search.queries[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+from unittest import mock
+
+import requests
+
+from danswer.document_index.document_index_utils import get_uuid_from_chunk
+from danswer.document_index.interfaces import DocumentIndexingError
+from danswer.document_index.interfaces import DocumentInsertionRecord
+from danswer.document_index.vespa import index as vespa_index
+
+
+def _response(status_code: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    return response
+
+
+class TestPostWithBackpressure(unittest.TestCase):
+    def _post(self, side_effect: list) -> tuple[requests.Response, mock.Mock]:
+        with mock.patch.object(vespa_index, "_VESPA_SESSION") as session:
+            session.post.side_effect = side_effect
+            res = vespa_index._post_with_backpressure(
+                "http://vespa/doc", {}, max_retries=3, initial_backoff=0
+            )
+        return res, session.post
+
+    def test_transient_failures_retried(self) -> None:
+        res, post = self._post(
+            [
+                _response(502),
+                requests.ReadTimeout(),
+                _response(429),
+                _response(200),
+            ]
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(post.call_count, 4)
+
+    def test_gives_up_after_max_retries(self) -> None:
+        res, post = self._post([_response(500)] * 4)
+        self.assertEqual(res.status_code, 500)
+        self.assertEqual(post.call_count, 4)
+
+        with self.assertRaises(requests.ConnectionError):
+            self._post([requests.ConnectionError()] * 4)
+
+    def test_client_errors_not_retried(self) -> None:
+        res, post = self._post([_response(400)])
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(post.call_count, 1)
+
+
+def _chunk(document_id: str, chunk_id: int) -> mock.Mock:
+    chunk = mock.Mock(chunk_id=chunk_id)
+    chunk.source_document.id = document_id
+    return chunk
+
+
+class TestIndexVespaChunks(unittest.TestCase):
+    def test_failed_documents_are_reported(self) -> None:
+        chunks = [_chunk("doc_1", 0), _chunk("doc_2", 0), _chunk("doc_2", 1)]
+        # both documents had 3 chunks before, the last ones are now stale
+        existing_chunk_ids = {
+            document_id: {
+                str(get_uuid_from_chunk(_chunk(document_id, chunk_id)))  # type: ignore
+                for chunk_id in range(3)
+            }
+            for document_id in ["doc_1", "doc_2"]
+        }
+
+        with mock.patch.object(
+            vespa_index,
+            "_get_existing_chunk_ids_by_document_id",
+            return_value=existing_chunk_ids,
+        ), mock.patch.object(
+            vespa_index,
+            "_feed_vespa_chunks",
+            return_value=[
+                vespa_index._VespaFeedFailure(
+                    document_id="doc_2", chunk_id=1, error="bad chunk"
+                )
+            ],
+        ), mock.patch.object(
+            vespa_index, "_delete_vespa_chunks"
+        ) as delete_chunks:
+            with self.assertRaises(DocumentIndexingError) as context:
+                vespa_index._index_vespa_chunks(chunks)  # type: ignore
+
+        self.assertEqual(context.exception.failed_document_ids, {"doc_2"})
+        self.assertEqual(
+            context.exception.failed_chunk_ids_by_document_id, {"doc_2": [1]}
+        )
+        self.assertEqual(
+            context.exception.insertion_records,
+            {DocumentInsertionRecord(document_id="doc_1", already_existed=True)},
+        )
+        # the failed document keeps its old chunks until it is indexed again
+        (stale_chunk_ids,), _ = delete_chunks.call_args
+        self.assertEqual(
+            sorted(stale_chunk_ids),
+            sorted(
+                str(get_uuid_from_chunk(_chunk("doc_1", chunk_id)))  # type: ignore
+                for chunk_id in [1, 2]
+            ),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,332 @@
+import multiprocessing
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+from unittest import mock
+
+from llama_index.text_splitter import SentenceSplitter
+
+from danswer.configs.constants import DocumentSource
+from danswer.connectors.models import Document
+from danswer.connectors.models import Section
+from danswer.indexing import chunker
+from danswer.indexing.chunker import _TOKEN_COUNT_CACHE
+from danswer.indexing.chunker import chunk_document
+from danswer.indexing.chunker import Chunker
+from danswer.indexing.chunker import DefaultChunker
+from danswer.indexing.chunker import extract_blurb
+from danswer.indexing.chunker import ProcessPoolChunker
+from danswer.indexing.chunker import SECTION_SEPARATOR
+from danswer.indexing.models import DocAwareChunk
+from danswer.search import search_nlp_models
+from danswer.utils.text_processing import shared_precompare_cleanup
+
+
+_CHUNK_SIZE = 20
+_CHUNK_OVERLAP = 5
+_BLURB_SIZE = 8
+
+
+class WhitespaceSplit:
+    """Named like the HF pre-tokenizer whose token counts add up across sections"""
+
+
+class _WordTokenizer:
+    """Stands in for the HF tokenizer, which can't be downloaded in the tests"""
+
+    def __init__(self, is_fast: bool) -> None:
+        self.is_fast = is_fast
+        self.backend_tokenizer = mock.Mock(pre_tokenizer=WhitespaceSplit())
+
+    def tokenize(self, text: str) -> list[str]:
+        return text.split()
+
+    def __call__(self, texts: list[str], **kwargs: Any) -> dict[str, list[list[int]]]:
+        return {"input_ids": [list(range(len(text.split()))) for text in texts]}
+
+
+# The chunking before the token counts were reused, the current chunker must produce
+# exactly the same chunks
+
+
+def _baseline_extract_blurb(
+    text: str, blurb_size: int, tokenizer: _WordTokenizer
+) -> str:
+    blurb_splitter = SentenceSplitter(
+        tokenizer=tokenizer.tokenize, chunk_size=blurb_size, chunk_overlap=0
+    )
+    return blurb_splitter.split_text(text)[0]
+
+
+def _baseline_chunk_document(
+    document: Document, tokenizer: _WordTokenizer
+) -> list[DocAwareChunk]:
+    def _make_chunk(chunk_text: str, link_offsets: dict[int, str]) -> DocAwareChunk:
+        return DocAwareChunk(
+            source_document=document,
+            chunk_id=len(chunks),
+            blurb=_baseline_extract_blurb(chunk_text, _BLURB_SIZE, tokenizer),
+            content=chunk_text,
+            source_links=link_offsets,
+            section_continuation=False,
+        )
+
+    chunks: list[DocAwareChunk] = []
+    link_offsets: dict[int, str] = {}
+    chunk_text = ""
+    for section in document.sections:
+        section_tok_length = len(tokenizer.tokenize(section.text))
+        current_tok_length = len(tokenizer.tokenize(chunk_text))
+        curr_offset_len = len(shared_precompare_cleanup(chunk_text))
+
+        if section_tok_length > _CHUNK_SIZE:
+            if chunk_text:
+                chunks.append(_make_chunk(chunk_text, link_offsets))
+                link_offsets = {}
+                chunk_text = ""
+
+            start_chunk_id = len(chunks)
+            blurb = _baseline_extract_blurb(section.text, _BLURB_SIZE, tokenizer)
+            split_texts = SentenceSplitter(
+                tokenizer=tokenizer.tokenize,
+                chunk_size=_CHUNK_SIZE,
+                chunk_overlap=_CHUNK_OVERLAP,
+            ).split_text(section.text)
+            chunks.extend(
+                DocAwareChunk(
+                    source_document=document,
+                    chunk_id=start_chunk_id + chunk_ind,
+                    blurb=blurb,
+                    content=chunk_str,
+                    source_links={0: section.link},
+                    section_continuation=(chunk_ind != 0),
+                )
+                for chunk_ind, chunk_str in enumerate(split_texts)
+            )
+            continue
+
+        if (
+            current_tok_length
+            + len(tokenizer.tokenize(SECTION_SEPARATOR))
+            + section_tok_length
+            <= _CHUNK_SIZE
+        ):
+            chunk_text += (
+                SECTION_SEPARATOR + section.text if chunk_text else section.text
+            )
+            link_offsets[curr_offset_len] = section.link
+        else:
+            chunks.append(_make_chunk(chunk_text, link_offsets))
+            link_offsets = {0: section.link}
+            chunk_text = section.text
+
+    if chunk_text:
+        chunks.append(_make_chunk(chunk_text, link_offsets))
+    return chunks
+
+
+def _words(start: int, count: int) -> str:
+    return " ".join(f"word{ind}" for ind in range(start, start + count))
+
+
+def _make_document(texts: list[str]) -> Document:
+    return Document(
+        id="doc",
+        sections=[
+            Section(link=f"https://example.com/{ind}", text=text)
+            for ind, text in enumerate(texts)
+        ],
+        source=DocumentSource.WEB,
+        semantic_identifier="doc",
+        metadata={},
+    )
+
+
+_MIXED_SECTIONS = [
+    # short sections merged into one chunk, the empty section shares its link offset
+    # with the next section
+    "Short intro.",
+    "",
+    f"{_words(0, 6)}. Ends here!",
+    # a large section which is split on its own
+    f"{_words(10, 9)}. {_words(20, 12)}? {_words(40, 7)}. {_words(50, 5)}.",
+    # a chunk which fits in a single blurb
+    "Tail after the large section.",
+    "   ",
+    # doesn't fit in the previous chunk, over the blurb size so the blurb is split out
+    f"{_words(60, 8)}. {_words(70, 8)}.",
+    f"{_words(80, 10)}.",
+    "",
+]
+
+
+class TestChunkDocument(unittest.TestCase):
+    def setUp(self) -> None:
+        _TOKEN_COUNT_CACHE.clear()
+
+    def _check_matches_baseline(self, texts: list[str], is_fast: bool) -> None:
+        tokenizer = _WordTokenizer(is_fast=is_fast)
+        document = _make_document(texts)
+
+        with mock.patch(
+            "danswer.indexing.chunker.get_default_tokenizer", return_value=tokenizer
+        ):
+            chunks = chunk_document(
+                document,
+                chunk_tok_size=_CHUNK_SIZE,
+                subsection_overlap=_CHUNK_OVERLAP,
+                blurb_size=_BLURB_SIZE,
+            )
+        expected_chunks = _baseline_chunk_document(document, tokenizer)
+
+        self.assertEqual(len(chunks), len(expected_chunks))
+        for chunk, expected_chunk in zip(chunks, expected_chunks):
+            self.assertEqual(chunk.chunk_id, expected_chunk.chunk_id)
+            self.assertEqual(chunk.content, expected_chunk.content)
+            self.assertEqual(chunk.blurb, expected_chunk.blurb)
+            self.assertEqual(chunk.source_links, expected_chunk.source_links)
+            self.assertEqual(
+                chunk.section_continuation, expected_chunk.section_continuation
+            )
+
+    def test_matches_baseline_with_additive_token_counts(self) -> None:
+        self._check_matches_baseline(_MIXED_SECTIONS, is_fast=True)
+
+    def test_matches_baseline_when_retokenizing(self) -> None:
+        self._check_matches_baseline(_MIXED_SECTIONS, is_fast=False)
+
+    def test_matches_baseline_for_single_blurb_chunks(self) -> None:
+        self._check_matches_baseline(
+            [" Padded short section. ", "", "Second one.", _words(0, _BLURB_SIZE)],
+            is_fast=True,
+        )
+
+    def test_single_blurb_shortcut_matches_splitter(self) -> None:
+        tokenizer = _WordTokenizer(is_fast=True)
+        texts = [
+            "Tail after the large section.\n\n   ",
+            " Padded short section. ",
+            "One. Two three!\n\nFour?",
+            _words(0, _BLURB_SIZE),
+        ]
+
+        with mock.patch(
+            "danswer.indexing.chunker.get_default_tokenizer", return_value=tokenizer
+        ):
+            for text in texts:
+                self.assertEqual(
+                    extract_blurb(
+                        text, _BLURB_SIZE, token_count=len(tokenizer.tokenize(text))
+                    ),
+                    _baseline_extract_blurb(text, _BLURB_SIZE, tokenizer),
+                )
+
+    def test_mixed_sections_cover_all_cases(self) -> None:
+        tokenizer = _WordTokenizer(is_fast=True)
+        chunks = _baseline_chunk_document(_make_document(_MIXED_SECTIONS), tokenizer)
+
+        self.assertEqual(
+            chunks[0].source_links,
+            {0: "https://example.com/0", 10: "https://example.com/2"},
+        )
+        self.assertTrue(any(chunk.section_continuation for chunk in chunks))
+        self.assertTrue(any(chunk.blurb == chunk.content.strip() for chunk in chunks))
+        self.assertTrue(any(chunk.blurb != chunk.content.strip() for chunk in chunks))
+
+
+def _init_word_tokenizer_worker() -> None:
+    search_nlp_models._TOKENIZER = _WordTokenizer(is_fast=True)
+
+
+def _make_documents() -> list[Document]:
+    sentences = [f"{_words(ind * 10, 7)}." for ind in range(200)]
+    document_texts: list[list[str]] = [
+        _MIXED_SECTIONS,
+        # large enough to be split into several chunks
+        [" ".join(sentences)],
+        ["Only a short one."],
+        [" ".join(sentences[:80]), "", " ".join(sentences[80:])],
+        [],
+    ]
+    return [
+        Document(
+            id=f"doc_{doc_ind}",
+            sections=[
+                Section(link=f"https://example.com/{doc_ind}/{ind}", text=text)
+                for ind, text in enumerate(texts)
+            ],
+            source=DocumentSource.WEB,
+            semantic_identifier=f"doc_{doc_ind}",
+            metadata={},
+        )
+        for doc_ind, texts in enumerate(document_texts)
+    ]
+
+
+def _describe_chunks(chunks: list[DocAwareChunk]) -> list[tuple]:
+    return [
+        (
+            chunk.source_document.id,
+            chunk.chunk_id,
+            chunk.content,
+            chunk.blurb,
+            chunk.source_links,
+            chunk.section_continuation,
+        )
+        for chunk in chunks
+    ]
+
+
+class TestProcessPoolChunker(unittest.TestCase):
+    def setUp(self) -> None:
+        _TOKEN_COUNT_CACHE.clear()
+        patcher = mock.patch.object(
+            search_nlp_models, "_TOKENIZER", _WordTokenizer(is_fast=True)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Same pool as the chunker's own, with workers that don't need to download
+        # the tokenizer
+        self.pool = ProcessPoolExecutor(
+            max_workers=2,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_word_tokenizer_worker,
+        )
+        self.addCleanup(self.pool.shutdown)
+        self.get_chunking_pool = mock.Mock(return_value=self.pool)
+        patcher = mock.patch.object(
+            chunker, "_get_chunking_pool", self.get_chunking_pool
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _check_matches_default_chunker(self, process_pool_chunker: Chunker) -> None:
+        documents = _make_documents()
+        expected_chunks = [DefaultChunker().chunk(document) for document in documents]
+
+        chunks = list(process_pool_chunker.chunk_batch(documents))
+
+        self.assertEqual(len(chunks), len(documents))
+        self.assertGreater(len(chunks[1]), 1)
+        for document_chunks, expected_document_chunks in zip(chunks, expected_chunks):
+            self.assertEqual(
+                _describe_chunks(document_chunks),
+                _describe_chunks(expected_document_chunks),
+            )
+
+    def test_pooled_chunks_match_default_chunker(self) -> None:
+        self._check_matches_default_chunker(
+            ProcessPoolChunker(num_processes=2, min_batch_chars=0)
+        )
+        self.get_chunking_pool.assert_called_once_with(2)
+
+    def test_small_batch_chunks_match_default_chunker(self) -> None:
+        self._check_matches_default_chunker(
+            ProcessPoolChunker(num_processes=2, min_batch_chars=10_000_000)
+        )
+        self.get_chunking_pool.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from datetime import datetime
+from datetime import timezone
+
+from danswer.access.models import DocumentAccess
+from danswer.configs.constants import DocumentSource
+from danswer.connectors.models import Document
+from danswer.connectors.models import Section
+from danswer.indexing.content_hash import compute_document_access_hash
+from danswer.indexing.content_hash import compute_document_content_hash
+from danswer.indexing.content_hash import get_index_settings_fingerprint
+
+
+def _make_document(text: str, title: str | None = None) -> Document:
+    return Document(
+        id="doc",
+        sections=[
+            Section(link="https://example.com", text=text),
+            Section(link="https://example.com#2", text="second section"),
+        ],
+        source=DocumentSource.WEB,
+        semantic_identifier="Example",
+        metadata={"tags": ["a", "b"]},
+        doc_updated_at=datetime(2023, 11, 1, tzinfo=timezone.utc),
+        title=title,
+    )
+
+
+class TestContentHash(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index_settings = get_index_settings_fingerprint(
+            chunker_name="DefaultChunker", embedder_name="DefaultEmbedder"
+        )
+
+    def test_identical_content_matches(self) -> None:
+        self.assertEqual(
+            compute_document_content_hash(_make_document("text"), self.index_settings),
+            compute_document_content_hash(_make_document("text"), self.index_settings),
+        )
+
+    def test_content_changes_are_detected(self) -> None:
+        original = compute_document_content_hash(
+            _make_document("text"), self.index_settings
+        )
+        self.assertNotEqual(
+            original,
+            compute_document_content_hash(
+                _make_document("new text"), self.index_settings
+            ),
+        )
+        self.assertNotEqual(
+            original,
+            compute_document_content_hash(
+                _make_document("text", title="Title"), self.index_settings
+            ),
+        )
+
+    def test_index_settings_changes_are_detected(self) -> None:
+        other_settings = get_index_settings_fingerprint(
+            chunker_name="OtherChunker", embedder_name="DefaultEmbedder"
+        )
+        self.assertNotEqual(
+            compute_document_content_hash(_make_document("text"), self.index_settings),
+            compute_document_content_hash(_make_document("text"), other_settings),
+        )
+
+
+class TestAccessHash(unittest.TestCase):
+    def test_order_does_not_matter(self) -> None:
+        self.assertEqual(
+            compute_document_access_hash(
+                DocumentAccess(user_ids={"a", "b"}, is_public=False), ["x", "y"]
+            ),
+            compute_document_access_hash(
+                DocumentAccess(user_ids={"b", "a"}, is_public=False), ["y", "x"]
+            ),
+        )
+
+    def test_access_changes_are_detected(self) -> None:
+        original = compute_document_access_hash(
+            DocumentAccess(user_ids={"a"}, is_public=False), ["x"]
+        )
+        changed_access: list[tuple[DocumentAccess, list[str]]] = [
+            (DocumentAccess(user_ids={"a"}, is_public=True), ["x"]),
+            (DocumentAccess(user_ids={"a", "b"}, is_public=False), ["x"]),
+            (DocumentAccess(user_ids={"a"}, is_public=False), []),
+        ]
+        for access, document_sets in changed_access:
+            self.assertNotEqual(
+                original, compute_document_access_hash(access, document_sets)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from danswer.indexing.embedding_cache import build_embedding_cache_key
+from danswer.indexing.embedding_cache import EmbeddingCache
+
+
+def _key(text: str) -> bytes:
+    return build_embedding_cache_key(
+        model_name="model", normalize_embeddings=True, passage_prefix="", text=text
+    )
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "embedding_cache.sqlite")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_round_trip_and_hit_rate(self) -> None:
+        cache = EmbeddingCache(db_path=self.db_path, max_entries=10)
+        cache.put_many(
+            {
+                _key("a"): numpy.array([0.5, -0.25], dtype=numpy.float32),
+                _key("b"): numpy.array([1.0, 0.0], dtype=numpy.float32),
+            }
+        )
+
+        found = cache.get_many([_key("a"), _key("c")])
+        self.assertEqual(list(found), [_key("a")])
+        self.assertEqual(found[_key("a")].tolist(), [0.5, -0.25])
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.size), (1, 1, 2))
+
+        # persisted across instances, e.g. the next indexing run
+        self.assertIn(
+            _key("b"),
+            EmbeddingCache(self.db_path, max_entries=10).get_many([_key("b")]),
+        )
+
+    def test_key_depends_on_model_and_prefix(self) -> None:
+        self.assertNotEqual(
+            _key("a"),
+            build_embedding_cache_key(
+                model_name="other",
+                normalize_embeddings=True,
+                passage_prefix="",
+                text="a",
+            ),
+        )
+        self.assertNotEqual(
+            _key("a"),
+            build_embedding_cache_key(
+                model_name="model",
+                normalize_embeddings=True,
+                passage_prefix="passage: ",
+                text="a",
+            ),
+        )
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache = EmbeddingCache(db_path=self.db_path, max_entries=10)
+        for ind in range(10):
+            cache.put_many({_key(str(ind)): numpy.array([ind], dtype=numpy.float32)})
+        # mark the oldest entry as recently used
+        cache.get_many([_key("0")])
+
+        cache.put_many({_key("new"): numpy.array([1.0], dtype=numpy.float32)})
+
+        self.assertLessEqual(cache.stats().size, 10)
+        self.assertIn(_key("0"), cache.get_many([_key("0")]))
+        self.assertNotIn(_key("1"), cache.get_many([_key("1")]))
+
+    def test_counts_entries_without_scanning(self) -> None:
+        cache = EmbeddingCache(db_path=self.db_path, max_entries=10)
+        statements: list[str] = []
+        cache._conn.set_trace_callback(statements.append)
+
+        for ind in range(9):
+            cache.put_many({_key(str(ind)): numpy.array([1.0], dtype=numpy.float32)})
+        # already cached entries aren't counted again
+        cache.put_many({_key("0"): numpy.array([1.0], dtype=numpy.float32)})
+        self.assertEqual(cache.stats().size, 9)
+        self.assertFalse([sql for sql in statements if "COUNT(*)" in sql])
+
+        statements.clear()
+        found = cache.get_many([_key(str(ind)) for ind in range(5)])
+
+        self.assertEqual(len(found), 5)
+        # cache hits are only marked as used on the next write
+        self.assertFalse([sql for sql in statements if sql.startswith("UPDATE")])
+
+        cache.put_many({_key("new"): numpy.array([1.0], dtype=numpy.float32)})
+
+        self.assertEqual(
+            len([sql for sql in statements if sql.startswith("UPDATE")]), 5
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
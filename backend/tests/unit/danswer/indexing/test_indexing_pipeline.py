@@ -0,0 +1,317 @@
+import unittest
+from typing import Any
+from unittest import mock
+
+import numpy
+
+from danswer.access.models import DocumentAccess
+from danswer.configs.constants import DocumentSource
+from danswer.connectors.models import Document
+from danswer.connectors.models import IndexAttemptMetadata
+from danswer.connectors.models import Section
+from danswer.document_index.interfaces import DocumentIndexingError
+from danswer.document_index.interfaces import DocumentInsertionRecord
+from danswer.document_index.interfaces import UpdateRequest
+from danswer.indexing.chunker import Chunker
+from danswer.indexing.content_hash import get_index_settings_fingerprint
+from danswer.indexing.indexing_pipeline import build_indexing_pipeline_stages
+from danswer.indexing.indexing_pipeline import embed_indexing_batch
+from danswer.indexing.indexing_pipeline import IndexingBatch
+from danswer.indexing.indexing_pipeline import upsert_and_chunk_documents
+from danswer.indexing.indexing_pipeline import write_indexing_batch
+from danswer.indexing.models import ChunkEmbedding
+from danswer.indexing.models import DocAwareChunk
+from danswer.indexing.models import DocMetadataAwareIndexChunk
+from danswer.indexing.models import IndexChunk
+from danswer.search.models import Embedder
+from danswer.utils.staged_pipeline import StagedPipeline
+
+
+class _SectionChunker(Chunker):
+    def chunk(self, document: Document) -> list[DocAwareChunk]:
+        return [
+            DocAwareChunk(
+                chunk_id=ind,
+                blurb=section.text,
+                content=section.text,
+                source_links={0: section.link},
+                section_continuation=False,
+                source_document=document,
+            )
+            for ind, section in enumerate(document.sections)
+        ]
+
+
+class _FakeEmbedder(Embedder):
+    def embed(self, chunks: list[DocAwareChunk]) -> list[IndexChunk]:
+        return [
+            IndexChunk(
+                chunk_id=chunk.chunk_id,
+                blurb=chunk.blurb,
+                content=chunk.content,
+                source_links=chunk.source_links,
+                section_continuation=chunk.section_continuation,
+                source_document=chunk.source_document,
+                embeddings=ChunkEmbedding(
+                    full_embedding=numpy.zeros(2, dtype=numpy.float32),
+                    mini_chunk_embeddings=numpy.zeros((0, 2), dtype=numpy.float32),
+                ),
+            )
+            for chunk in chunks
+        ]
+
+
+class _FakeDocumentIndex:
+    def __init__(self, failing_document_ids: set[str] | None = None) -> None:
+        self.failing_document_ids = failing_document_ids or set()
+        self.indexed_chunks: list[DocMetadataAwareIndexChunk] = []
+        self.update_requests: list[UpdateRequest] = []
+
+    def update(self, update_requests: list[UpdateRequest]) -> None:
+        self.update_requests.extend(update_requests)
+
+    def index(
+        self, chunks: list[DocMetadataAwareIndexChunk]
+    ) -> set[DocumentInsertionRecord]:
+        insertion_records: set[DocumentInsertionRecord] = set()
+        failed_chunk_ids_by_document_id: dict[str, list[int]] = {}
+        for chunk in chunks:
+            document_id = chunk.source_document.id
+            if document_id in self.failing_document_ids:
+                failed_chunk_ids_by_document_id.setdefault(document_id, []).append(
+                    chunk.chunk_id
+                )
+            else:
+                self.indexed_chunks.append(chunk)
+                insertion_records.add(
+                    DocumentInsertionRecord(
+                        document_id=document_id, already_existed=False
+                    )
+                )
+
+        if failed_chunk_ids_by_document_id:
+            raise DocumentIndexingError(
+                failed_chunk_ids_by_document_id=failed_chunk_ids_by_document_id,
+                insertion_records=insertion_records,
+            )
+        return insertion_records
+
+
+def _make_document(doc_id: str, num_sections: int) -> Document:
+    return Document(
+        id=doc_id,
+        sections=[
+            Section(link=f"https://example.com/{doc_id}#{ind}", text=f"text {ind}")
+            for ind in range(num_sections)
+        ],
+        source=DocumentSource.WEB,
+        semantic_identifier=doc_id,
+        metadata={},
+    )
+
+
+class _FakePostgres:
+    """The bookkeeping the indexing steps do in Postgres, all documents start out new
+    and public"""
+
+    def __init__(self) -> None:
+        self.private_document_ids: set[str] = set()
+        self.content_hashes: dict[str, str] = {}
+        self.access_hashes: dict[str, str] = {}
+
+    def get_access_for_documents(
+        self, document_ids: list[str], db_session: Any
+    ) -> dict[str, DocumentAccess]:
+        return {
+            document_id: DocumentAccess(
+                user_ids=set(),
+                is_public=document_id not in self.private_document_ids,
+            )
+            for document_id in document_ids
+        }
+
+    def get_document_content_hashes(
+        self, db_session: Any, document_ids: list[str]
+    ) -> dict[str, str]:
+        return {
+            document_id: self.content_hashes[document_id]
+            for document_id in document_ids
+            if document_id in self.content_hashes
+        }
+
+    def get_document_access_hashes(
+        self, db_session: Any, document_ids: list[str]
+    ) -> dict[str, str]:
+        return {
+            document_id: self.access_hashes[document_id]
+            for document_id in document_ids
+            if document_id in self.access_hashes
+        }
+
+    def update_document_hashes(
+        self,
+        db_session: Any,
+        document_id_to_content_hash: dict[str, str],
+        document_id_to_access_hash: dict[str, str],
+    ) -> None:
+        self.content_hashes.update(document_id_to_content_hash)
+        self.access_hashes.update(document_id_to_access_hash)
+
+
+_DOC_BATCHES = [
+    [_make_document("doc_1", 2), _make_document("doc_2", 1)],
+    [_make_document("doc_3", 3)],
+]
+
+
+class _PatchedPostgresTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.postgres = _FakePostgres()
+        patcher = mock.patch.multiple(
+            "danswer.indexing.indexing_pipeline",
+            Session=mock.MagicMock(),
+            get_sqlalchemy_engine=mock.Mock(),
+            prepare_to_modify_documents=mock.Mock(),
+            upsert_documents_complete=mock.Mock(),
+            get_document_content_hashes=self.postgres.get_document_content_hashes,
+            get_document_access_hashes=self.postgres.get_document_access_hashes,
+            get_access_for_documents=self.postgres.get_access_for_documents,
+            fetch_document_sets_for_documents=mock.Mock(return_value=[]),
+            update_document_hashes=self.postgres.update_document_hashes,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestIndexingPipelineStages(_PatchedPostgresTestCase):
+    def _run(
+        self, document_index: _FakeDocumentIndex
+    ) -> list[tuple[list[str], int, int, list[str]]]:
+        stages = build_indexing_pipeline_stages(
+            index_attempt_metadata=IndexAttemptMetadata(
+                connector_id=1, credential_id=1
+            ),
+            chunker=_SectionChunker(),
+            embedder=_FakeEmbedder(),
+            document_index=document_index,  # type: ignore
+            num_chunk_workers=2,
+            num_embed_workers=2,
+        )
+        return sorted(StagedPipeline(stages=stages, queue_size=2).run(_DOC_BATCHES))
+
+    def test_runs_documents_through_all_stages(self) -> None:
+        document_index = _FakeDocumentIndex()
+
+        results = self._run(document_index)
+
+        self.assertEqual(
+            results, [(["doc_1", "doc_2"], 2, 3, []), (["doc_3"], 1, 3, [])]
+        )
+        self.assertEqual(
+            sorted(
+                (chunk.source_document.id, chunk.chunk_id)
+                for chunk in document_index.indexed_chunks
+            ),
+            [
+                ("doc_1", 0),
+                ("doc_1", 1),
+                ("doc_2", 0),
+                ("doc_3", 0),
+                ("doc_3", 1),
+                ("doc_3", 2),
+            ],
+        )
+        self.assertEqual(
+            sorted(self.postgres.content_hashes), ["doc_1", "doc_2", "doc_3"]
+        )
+        self.assertEqual(
+            sorted(self.postgres.access_hashes), ["doc_1", "doc_2", "doc_3"]
+        )
+
+    def test_failed_documents_are_left_out(self) -> None:
+        results = self._run(_FakeDocumentIndex(failing_document_ids={"doc_1"}))
+
+        self.assertEqual(results, [(["doc_2"], 1, 1, ["doc_1"]), (["doc_3"], 1, 3, [])])
+        # the failed document keeps its old content hash, so it isn't skipped next run
+        self.assertEqual(sorted(self.postgres.content_hashes), ["doc_2", "doc_3"])
+
+    def test_unchanged_documents_are_not_updated(self) -> None:
+        self._run(_FakeDocumentIndex())
+        document_index = _FakeDocumentIndex()
+
+        results = self._run(document_index)
+
+        self.assertEqual(
+            results, [(["doc_1", "doc_2"], 0, 0, []), (["doc_3"], 0, 0, [])]
+        )
+        self.assertEqual(document_index.indexed_chunks, [])
+        self.assertEqual(document_index.update_requests, [])
+
+    def test_only_changed_access_is_refreshed(self) -> None:
+        self._run(_FakeDocumentIndex())
+        self.postgres.private_document_ids = {"doc_2", "doc_3"}
+        document_index = _FakeDocumentIndex()
+
+        self._run(document_index)
+
+        self.assertEqual(document_index.indexed_chunks, [])
+        self.assertEqual(
+            sorted(
+                document_id
+                for request in document_index.update_requests
+                for document_id in request.document_ids
+            ),
+            ["doc_2", "doc_3"],
+        )
+        for request in document_index.update_requests:
+            assert request.access is not None
+            self.assertFalse(request.access.is_public)
+
+        # the refreshed access is recorded, the next run has nothing to update
+        document_index = _FakeDocumentIndex()
+        self._run(document_index)
+        self.assertEqual(document_index.update_requests, [])
+
+
+class TestWriteIndexingBatch(_PatchedPostgresTestCase):
+    def test_documents_indexed_by_another_worker_are_retried(self) -> None:
+        chunker = _SectionChunker()
+        index_settings = get_index_settings_fingerprint(
+            chunker_name=chunker.name, embedder_name="_FakeEmbedder"
+        )
+
+        def _chunk_and_embed(documents: list[Document]) -> IndexingBatch:
+            return embed_indexing_batch(
+                embedder=_FakeEmbedder(),
+                batch=upsert_and_chunk_documents(
+                    chunker=chunker,
+                    index_settings=index_settings,
+                    documents=documents,
+                    index_attempt_metadata=IndexAttemptMetadata(
+                        connector_id=1, credential_id=1
+                    ),
+                ),
+            )
+
+        documents = _DOC_BATCHES[0]
+        write_indexing_batch(
+            document_index=_FakeDocumentIndex(),  # type: ignore
+            batch=_chunk_and_embed(documents),
+        )
+        batch = _chunk_and_embed(documents)
+        self.assertEqual(batch.unchanged_document_ids, ["doc_1", "doc_2"])
+        # a newer version of doc_1 is written after the batch found it unchanged
+        self.postgres.content_hashes["doc_1"] = "newer version"
+        document_index = _FakeDocumentIndex()
+
+        _, _, failed_document_ids = write_indexing_batch(
+            document_index=document_index, batch=batch  # type: ignore
+        )
+
+        self.assertEqual(failed_document_ids, {"doc_1"})
+        self.assertEqual(self.postgres.content_hashes["doc_1"], "newer version")
+        self.assertEqual(document_index.update_requests, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy
+from transformers import DistilBertConfig  # type: ignore
+from transformers import DistilBertTokenizerFast  # type: ignore
+from transformers.utils import is_tf_available  # type: ignore
+
+from danswer.search.intent_models import INTENT_SAMPLE_QUERIES
+from danswer.search.intent_models import IntentClassifier
+from danswer.search.intent_models import load_torch_intent_model
+from danswer.search.intent_models import TFIntentClassifier
+from danswer.search.intent_models import TorchIntentClassifier
+
+_SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+
+
+@unittest.skipIf(
+    not is_tf_available(), "converting the TensorFlow weights needs TensorFlow"
+)
+class TestIntentModelRuntimes(unittest.TestCase):
+    """Same architecture as the intent model with random weights, saved with only
+    TensorFlow weights like the published model"""
+
+    def setUp(self) -> None:
+        from transformers import TFDistilBertForSequenceClassification
+
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self.model_dir = os.path.join(self._tmp_dir.name, "intent-model")
+        self.cache_dir = os.path.join(self._tmp_dir.name, "cache")
+
+        words = {
+            word.strip("?").lower()
+            for query in INTENT_SAMPLE_QUERIES
+            for word in query.split()
+        }
+        vocab_file = os.path.join(self._tmp_dir.name, "vocab.txt")
+        with open(vocab_file, "w") as f:
+            f.write("\n".join(_SPECIAL_TOKENS + sorted(words) + ["?"]))
+        self.tokenizer = DistilBertTokenizerFast(vocab_file=vocab_file)
+
+        config = DistilBertConfig(
+            vocab_size=self.tokenizer.vocab_size,
+            dim=32,
+            n_layers=2,
+            n_heads=2,
+            hidden_dim=64,
+            num_labels=3,
+            # spreads out the class probabilities of the random model
+            initializer_range=0.5,
+        )
+        tf_model = TFDistilBertForSequenceClassification(config)
+        tf_model(tf_model.dummy_inputs)
+        tf_model.save_pretrained(self.model_dir)
+
+        cache_patch = mock.patch(
+            "danswer.search.intent_models.INTENT_MODEL_CACHE_DIR", self.cache_dir
+        )
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+    def _predict_all(self, classifier: IntentClassifier) -> numpy.ndarray:
+        return numpy.array([classifier.predict(q) for q in INTENT_SAMPLE_QUERIES])
+
+    def test_torch_matches_tensorflow(self) -> None:
+        tf_probs = self._predict_all(
+            TFIntentClassifier(self.model_dir, self.tokenizer, 256)
+        )
+        # the first load converts the TensorFlow weights, the second uses the cache
+        for _ in range(2):
+            torch_classifier = TorchIntentClassifier(
+                load_torch_intent_model(self.model_dir), self.tokenizer, 256
+            )
+            numpy.testing.assert_allclose(
+                self._predict_all(torch_classifier), tf_probs, atol=0.02
+            )
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        self.assertTrue(numpy.all(tf_probs.std(axis=1) > 1))
+        numpy.testing.assert_allclose(tf_probs.sum(axis=1), 100, atol=0.02)
+
+    @unittest.skipIf(
+        importlib.util.find_spec("onnxruntime") is None, "onnxruntime not installed"
+    )
+    def test_onnx_matches_tensorflow(self) -> None:
+        from danswer.search.onnx_models import load_onnx_intent_model
+
+        tf_probs = self._predict_all(
+            TFIntentClassifier(self.model_dir, self.tokenizer, 256)
+        )
+        with mock.patch(
+            "danswer.search.onnx_models.ONNX_MODEL_CACHE_DIR", self.cache_dir
+        ):
+            onnx_classifier = load_onnx_intent_model(
+                self.model_dir, self.tokenizer, 256
+            )
+        assert onnx_classifier is not None
+        numpy.testing.assert_allclose(
+            self._predict_all(onnx_classifier), tf_probs, atol=0.02
+        )
+
+
+class TestLoadTorchIntentModelWithoutTensorFlow(unittest.TestCase):
+    def test_unconverted_model_needs_tensorflow(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_dir = os.path.join(tmp_dir, "intent-model")
+            # no torch weights, like the published model
+            DistilBertConfig(num_labels=3).save_pretrained(model_dir)
+
+            with mock.patch(
+                "danswer.search.intent_models.INTENT_MODEL_CACHE_DIR",
+                os.path.join(tmp_dir, "cache"),
+            ), mock.patch(
+                "danswer.search.intent_models.is_tf_available", return_value=False
+            ):
+                with self.assertRaises(RuntimeError):
+                    load_torch_intent_model(model_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from types import SimpleNamespace
+from typing import Any
+
+import numpy
+
+from danswer.search.onnx_models import embedding_agreement
+from danswer.search.onnx_models import OnnxCrossEncoder
+from danswer.search.onnx_models import score_agreement
+
+
+class _LengthLogitSession:
+    """Stands in for an InferenceSession, the logit of a pair is its token count"""
+
+    def get_inputs(self) -> list[SimpleNamespace]:
+        return [
+            SimpleNamespace(name="input_ids"),
+            SimpleNamespace(name="attention_mask"),
+        ]
+
+    def run(self, output_names: Any, inputs: dict[str, numpy.ndarray]) -> list:
+        return [inputs["attention_mask"].sum(axis=1, keepdims=True).astype("float32")]
+
+
+def _tokenize_pairs(
+    first: list[str], second: list[str], max_length: int, **kwargs: Any
+) -> dict[str, numpy.ndarray]:
+    lengths = [
+        min(len(a.split()) + len(b.split()), max_length) for a, b in zip(first, second)
+    ]
+    attention_mask = numpy.array(
+        [[1] * length + [0] * (max(lengths) - length) for length in lengths]
+    )
+    return {"input_ids": attention_mask.copy(), "attention_mask": attention_mask}
+
+
+class TestOnnxModels(unittest.TestCase):
+    def test_embedding_agreement(self) -> None:
+        embeddings = numpy.array([[1.0, 0.0], [0.0, 2.0]])
+        self.assertAlmostEqual(embedding_agreement(embeddings, embeddings * 3), 1.0)
+        self.assertAlmostEqual(
+            embedding_agreement(embeddings, numpy.array([[1.0, 1.0], [0.0, 1.0]])),
+            2**-0.5,
+        )
+
+    def test_score_agreement_ignores_scale(self) -> None:
+        scores = numpy.array([0.1, 0.7, 0.3, 0.9])
+        self.assertAlmostEqual(score_agreement(scores, scores * 10 - 2), 1.0)
+        self.assertLess(score_agreement(scores, scores[::-1]), 0)
+
+    def test_cross_encoder_predict(self) -> None:
+        cross_encoder = OnnxCrossEncoder(
+            session=_LengthLogitSession(),
+            tokenizer=_tokenize_pairs,
+            config=SimpleNamespace(num_labels=1),
+            max_length=4,
+        )
+        pairs = [("a b", "c"), ("a", "b c d e"), ("a", "")]
+
+        scores = cross_encoder.predict(pairs, batch_size=2)
+        self.assertEqual(scores.shape, (3,))
+        # sigmoid of the logits, as CrossEncoder does for single label models
+        numpy.testing.assert_allclose(
+            scores, 1 / (1 + numpy.exp(-numpy.array([3, 4, 1])))
+        )
+
+        self.assertAlmostEqual(
+            float(cross_encoder.predict(("a", "b"))), 1 / (1 + numpy.exp(-2))
+        )
+        self.assertEqual(cross_encoder.predict([]).shape, (0,))
+
+
+if __name__ == "__main__":
+    unittest.main()
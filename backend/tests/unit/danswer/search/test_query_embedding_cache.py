@@ -0,0 +1,26 @@
+import unittest
+from unittest import mock
+
+import numpy
+
+from danswer.search.search_runner import embed_query
+
+
+class TestQueryEmbeddingCache(unittest.TestCase):
+    def test_cached_embedding_not_shared_with_callers(self) -> None:
+        model = mock.Mock(model_name="test-model-cache-copy")
+        model.encode.return_value = numpy.array([[0.5, 0.25]])
+
+        first = embed_query("what is danswer", embedding_model=model)
+        first[0] = 100.0
+        second = embed_query("what is danswer", embedding_model=model)
+        second.append(1.0)
+
+        self.assertEqual(
+            embed_query("what is danswer", embedding_model=model), [0.5, 0.25]
+        )
+        model.encode.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
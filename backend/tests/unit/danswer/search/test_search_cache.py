@@ -0,0 +1,123 @@
+import unittest
+from datetime import datetime
+from datetime import timezone
+
+from danswer.dynamic_configs.interface import ConfigNotFoundError
+from danswer.dynamic_configs.interface import DynamicConfigStore
+from danswer.dynamic_configs.interface import JSON_ro
+from danswer.indexing.models import InferenceChunk
+from danswer.search.models import IndexFilters
+from danswer.search.models import SearchQuery
+from danswer.search.models import SearchType
+from danswer.search.search_cache import IndexGeneration
+from danswer.search.search_cache import InMemorySearchResultCacheBackend
+from danswer.search.search_cache import SearchResultCache
+
+
+class _InMemoryConfigStore(DynamicConfigStore):
+    def __init__(self) -> None:
+        self.values: dict[str, JSON_ro] = {}
+
+    def store(self, key: str, val: JSON_ro) -> None:
+        self.values[key] = val
+
+    def load(self, key: str) -> JSON_ro:
+        if key not in self.values:
+            raise ConfigNotFoundError
+        return self.values[key]
+
+    def delete(self, key: str) -> None:
+        self.values.pop(key)
+
+
+def _make_query(query: str, acl: list[str]) -> SearchQuery:
+    return SearchQuery(
+        query=query,
+        search_type=SearchType.HYBRID,
+        filters=IndexFilters(access_control_list=acl),
+        favor_recent=False,
+    )
+
+
+def _make_chunk(document_id: str) -> InferenceChunk:
+    return InferenceChunk(
+        chunk_id=0,
+        blurb="blurb",
+        content="content",
+        source_links={0: "https://example.com"},
+        section_continuation=False,
+        document_id=document_id,
+        source_type="web",
+        semantic_identifier=document_id,
+        boost=0,
+        recency_bias=1.0,
+        score=0.5,
+        hidden=False,
+        metadata={},
+        match_highlights=[],
+        updated_at=datetime(2023, 10, 1, tzinfo=timezone.utc),
+    )
+
+
+class TestSearchResultCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.store = _InMemoryConfigStore()
+        self.index_generation = IndexGeneration(self.store)
+        self.cache = SearchResultCache(
+            backend=InMemorySearchResultCacheBackend(max_size=10, ttl_seconds=None),
+            index_generation=self.index_generation,
+        )
+
+    def test_hit_with_normalized_query(self) -> None:
+        generation = self.cache.get_generation()
+        assert generation is not None
+        chunks = [_make_chunk("doc1")]
+        self.cache.put(
+            _make_query("What is Danswer?", ["PUBLIC"]), generation, chunks, []
+        )
+
+        cached = self.cache.get(
+            _make_query("  what is   danswer? ", ["PUBLIC"]), generation
+        )
+        self.assertIsNotNone(cached)
+        assert cached is not None
+        self.assertEqual(cached[0], chunks)
+        # returned chunks are copies, modifying them doesn't affect the cache
+        assert cached[0] is not None
+        cached[0][0].score = 100
+        self.assertEqual(chunks[0].score, 0.5)
+
+    def test_no_hit_across_acls(self) -> None:
+        generation = self.cache.get_generation()
+        assert generation is not None
+        self.cache.put(
+            _make_query("query", ["user_email:a@example.com", "PUBLIC"]),
+            generation,
+            [_make_chunk("private_doc")],
+            None,
+        )
+
+        self.assertIsNone(self.cache.get(_make_query("query", ["PUBLIC"]), generation))
+        self.assertIsNotNone(
+            self.cache.get(
+                _make_query("query", ["PUBLIC", "user_email:a@example.com"]),
+                generation,
+            )
+        )
+
+    def test_index_write_invalidates(self) -> None:
+        generation = self.cache.get_generation()
+        assert generation is not None
+        query = _make_query("query", ["PUBLIC"])
+        self.cache.put(query, generation, [_make_chunk("doc1")], None)
+
+        # a write from another process only updates the shared token
+        IndexGeneration(self.store).bump()
+        new_generation = self.cache.get_generation()
+        assert new_generation is not None
+        self.assertNotEqual(generation, new_generation)
+        self.assertIsNone(self.cache.get(query, new_generation))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,257 @@
+import copy
+import unittest
+
+from danswer.configs.model_configs import CROSS_ENCODER_RANGE_MAX
+from danswer.configs.model_configs import CROSS_ENCODER_RANGE_MIN
+from danswer.configs.model_configs import SIM_SCORE_RANGE_HIGH
+from danswer.configs.model_configs import SIM_SCORE_RANGE_LOW
+from danswer.document_index.document_index_utils import (
+    translate_boost_count_to_multiplier,
+)
+from danswer.indexing.models import InferenceChunk
+from danswer.search.models import RerankMetricsContainer
+from danswer.search.search_runner import _rerank_chunks_by_sim_scores
+from danswer.search.search_runner import apply_boost
+from danswer.search.search_runner import apply_boost_legacy
+
+
+# Pure Python versions of the scoring before it was vectorized with NumPy, the
+# vectorized functions must rank and score chunks exactly the same way
+
+
+def _baseline_rerank(
+    chunks: list[InferenceChunk], sim_scores: list[list[float]]
+) -> tuple[list[InferenceChunk], list[float], list[float]]:
+    num_chunks = len(chunks)
+    raw_sim_scores = [
+        sum(enc_scores[ind] for enc_scores in sim_scores) / len(sim_scores)
+        for ind in range(num_chunks)
+    ]
+    cross_models_min = min(min(enc_scores) for enc_scores in sim_scores)
+    normalized_b_s_scores = [
+        (
+            (raw_score - cross_models_min)
+            * translate_boost_count_to_multiplier(chunk.boost)
+            * chunk.recency_bias
+            + cross_models_min
+            - CROSS_ENCODER_RANGE_MIN
+        )
+        / (CROSS_ENCODER_RANGE_MAX - CROSS_ENCODER_RANGE_MIN)
+        for raw_score, chunk in zip(raw_sim_scores, chunks)
+    ]
+    scored_results = list(zip(normalized_b_s_scores, raw_sim_scores, chunks))
+    scored_results.sort(key=lambda x: x[0], reverse=True)
+    return (
+        [chunk for _, _, chunk in scored_results],
+        [score for score, _, _ in scored_results],
+        [raw_score for _, raw_score, _ in scored_results],
+    )
+
+
+def _baseline_apply_boost_legacy(
+    chunks: list[InferenceChunk],
+) -> tuple[list[InferenceChunk], list[float]]:
+    scores = [chunk.score or 0 for chunk in chunks]
+    boosts = [translate_boost_count_to_multiplier(chunk.boost) for chunk in chunks]
+
+    score_min = min(scores)
+    score_max = max(scores)
+    score_range = score_max - score_min
+
+    if score_range != 0:
+        unnormed_boosted_scores = [
+            ((score - score_min) / score_range) * boost * score_range + score_min
+            for score, boost in zip(scores, boosts)
+        ]
+    else:
+        unnormed_boosted_scores = [
+            score * boost for score, boost in zip(scores, boosts)
+        ]
+
+    norm_min = min(SIM_SCORE_RANGE_LOW, score_min)
+    norm_max = max(SIM_SCORE_RANGE_HIGH, score_max)
+    norm_range = norm_max - norm_min
+
+    if norm_range != 0:
+        re_normed_scores = [
+            (score - norm_min) / norm_range for score in unnormed_boosted_scores
+        ]
+    else:
+        re_normed_scores = unnormed_boosted_scores
+
+    rescored_chunks = list(zip(re_normed_scores, chunks))
+    rescored_chunks.sort(key=lambda x: x[0], reverse=True)
+    return (
+        [chunk for _, chunk in rescored_chunks],
+        [score for score, _ in rescored_chunks],
+    )
+
+
+def _baseline_apply_boost(
+    chunks: list[InferenceChunk],
+) -> tuple[list[InferenceChunk], list[float]]:
+    scores = [chunk.score or 0.0 for chunk in chunks]
+    norm_min = min(SIM_SCORE_RANGE_LOW, min(scores))
+    norm_max = max(SIM_SCORE_RANGE_HIGH, max(scores))
+    norm_range = norm_max - norm_min
+
+    boosted_scores = [
+        (score - norm_min)
+        * translate_boost_count_to_multiplier(chunk.boost)
+        * chunk.recency_bias
+        / norm_range
+        for score, chunk in zip(scores, chunks)
+    ]
+    rescored_chunks = list(zip(boosted_scores, chunks))
+    rescored_chunks.sort(key=lambda x: x[0], reverse=True)
+    return (
+        [chunk for _, chunk in rescored_chunks],
+        [score for score, _ in rescored_chunks],
+    )
+
+
+def _make_chunk(
+    ind: int, score: float | None, boost: int = 0, recency_bias: float = 1.0
+) -> InferenceChunk:
+    return InferenceChunk(
+        chunk_id=0,
+        blurb="blurb",
+        content=f"content {ind}",
+        source_links={0: f"https://example.com/{ind}"},
+        section_continuation=False,
+        document_id=f"doc_{ind}",
+        source_type="web",
+        semantic_identifier=f"doc_{ind}",
+        boost=boost,
+        recency_bias=recency_bias,
+        score=score,
+        hidden=False,
+        metadata={},
+        match_highlights=[],
+        updated_at=None,
+    )
+
+
+def _mixed_chunks() -> list[InferenceChunk]:
+    return [
+        _make_chunk(0, 0.62, boost=2, recency_bias=0.9),
+        _make_chunk(1, 0.3, boost=-3, recency_bias=0.75),
+        # Tied with the next chunk, the first one must stay first
+        _make_chunk(2, 0.5),
+        _make_chunk(3, 0.5),
+        # No score or recency from the index, Vespa returns a neutral recency bias
+        # for documents without an update time
+        _make_chunk(4, None, boost=5),
+        _make_chunk(5, 0.91, boost=-1, recency_bias=0.5),
+    ]
+
+
+def _doc_ids(chunks: list[InferenceChunk]) -> list[str]:
+    return [chunk.document_id for chunk in chunks]
+
+
+class TestSearchScoring(unittest.TestCase):
+    def _assert_scores_equal(
+        self, chunks: list[InferenceChunk], expected_scores: list[float]
+    ) -> None:
+        self.assertEqual(len(chunks), len(expected_scores))
+        for chunk, expected_score in zip(chunks, expected_scores):
+            assert chunk.score is not None
+            self.assertAlmostEqual(chunk.score, expected_score, places=12)
+
+    def _check_rerank(
+        self, chunks: list[InferenceChunk], sim_scores: list[list[float]]
+    ) -> list[InferenceChunk]:
+        expected_chunks, expected_scores, expected_raw_scores = _baseline_rerank(
+            copy.deepcopy(chunks), sim_scores
+        )
+        metrics: list[RerankMetricsContainer] = []
+
+        ranked_chunks = _rerank_chunks_by_sim_scores(
+            chunks, sim_scores, rerank_metrics_callback=metrics.append
+        )
+
+        self.assertEqual(_doc_ids(ranked_chunks), _doc_ids(expected_chunks))
+        self._assert_scores_equal(ranked_chunks, expected_scores)
+        self.assertEqual(len(metrics), 1)
+        self.assertEqual(
+            [metric.document_id for metric in metrics[0].metrics],
+            _doc_ids(expected_chunks),
+        )
+        for raw_score, expected_raw_score in zip(
+            metrics[0].raw_similarity_scores, expected_raw_scores
+        ):
+            self.assertAlmostEqual(raw_score, expected_raw_score, places=12)
+        return ranked_chunks
+
+    def test_rerank_matches_baseline(self) -> None:
+        self._check_rerank(
+            _mixed_chunks(),
+            [
+                [3.2, -1.5, 0.4, 0.4, 7.9, 2.2],
+                [2.8, -4.0, 1.1, 1.1, 6.5, 2.0],
+            ],
+        )
+
+    def test_rerank_ties_keep_order(self) -> None:
+        chunks = [_make_chunk(ind, None) for ind in range(4)]
+        ranked_chunks = self._check_rerank(
+            chunks, [[1.0, 2.0, 1.0, 2.0], [1.0, 2.0, 1.0, 2.0]]
+        )
+        self.assertEqual(_doc_ids(ranked_chunks), ["doc_1", "doc_3", "doc_0", "doc_2"])
+
+    def test_rerank_single_chunk(self) -> None:
+        self._check_rerank([_make_chunk(0, None, boost=3)], [[4.5], [3.5]])
+
+    def test_apply_boost_legacy_matches_baseline(self) -> None:
+        chunks = _mixed_chunks()
+        expected_chunks, expected_scores = _baseline_apply_boost_legacy(
+            copy.deepcopy(chunks)
+        )
+
+        boosted_chunks = apply_boost_legacy(chunks)
+
+        self.assertEqual(_doc_ids(boosted_chunks), _doc_ids(expected_chunks))
+        self._assert_scores_equal(boosted_chunks, expected_scores)
+
+    def test_apply_boost_legacy_single_chunk(self) -> None:
+        # A single chunk has no score range, the scores are only boosted
+        chunks = [_make_chunk(0, 0.7, boost=2)]
+        _, expected_scores = _baseline_apply_boost_legacy(copy.deepcopy(chunks))
+
+        boosted_chunks = apply_boost_legacy(chunks)
+
+        self.assertEqual(_doc_ids(boosted_chunks), ["doc_0"])
+        self._assert_scores_equal(boosted_chunks, expected_scores)
+
+    def test_apply_boost_matches_baseline(self) -> None:
+        chunks = _mixed_chunks()
+        expected_chunks, expected_scores = _baseline_apply_boost(copy.deepcopy(chunks))
+
+        boosted_chunks = apply_boost(chunks)
+
+        self.assertEqual(_doc_ids(boosted_chunks), _doc_ids(expected_chunks))
+        self._assert_scores_equal(boosted_chunks, expected_scores)
+
+    def test_apply_boost_ties_keep_order(self) -> None:
+        chunks = [_make_chunk(ind, 0.4) for ind in range(3)] + [_make_chunk(3, None)]
+        expected_chunks, expected_scores = _baseline_apply_boost(copy.deepcopy(chunks))
+
+        boosted_chunks = apply_boost(chunks)
+
+        self.assertEqual(_doc_ids(boosted_chunks), _doc_ids(expected_chunks))
+        self.assertEqual(_doc_ids(boosted_chunks), ["doc_0", "doc_1", "doc_2", "doc_3"])
+        self._assert_scores_equal(boosted_chunks, expected_scores)
+
+    def test_apply_boost_single_chunk(self) -> None:
+        chunks = [_make_chunk(0, 0.55, boost=-2, recency_bias=0.8)]
+        _, expected_scores = _baseline_apply_boost(copy.deepcopy(chunks))
+
+        boosted_chunks = apply_boost(chunks)
+
+        self.assertEqual(_doc_ids(boosted_chunks), ["doc_0"])
+        self._assert_scores_equal(boosted_chunks, expected_scores)
+
+
+if __name__ == "__main__":
+    unittest.main()
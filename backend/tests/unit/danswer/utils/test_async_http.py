@@ -0,0 +1,27 @@
+import asyncio
+import unittest
+
+import httpx
+
+from danswer.utils.async_http import PooledAsyncClient
+
+
+class TestPooledAsyncClient(unittest.TestCase):
+    def test_one_client_per_loop_closed_on_shutdown(self) -> None:
+        pooled_client = PooledAsyncClient(max_connections=4)
+
+        async def _get_clients() -> tuple[httpx.AsyncClient, httpx.AsyncClient]:
+            return pooled_client.get(), pooled_client.get()
+
+        first, same = asyncio.run(_get_clients())
+        second, _ = asyncio.run(_get_clients())
+
+        self.assertIs(first, same)
+        self.assertIsNot(first, second)
+        self.assertTrue(first.is_closed)
+        self.assertTrue(second.is_closed)
+        self.assertEqual(pooled_client._clients, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from danswer.utils.length_batching import build_length_bucketed_batches
+from danswer.utils.length_batching import run_length_bucketed
+
+
+class TestLengthBatching(unittest.TestCase):
+    def test_batches_respect_budget(self) -> None:
+        lengths = [5, 100, 7, 90, 6, 512, 95, 4]
+        batches = build_length_bucketed_batches(
+            lengths=lengths, max_batch_tokens=300, max_batch_size=3
+        )
+
+        self.assertEqual(sorted(ind for batch in batches for ind in batch), [*range(8)])
+        for batch in batches:
+            self.assertLessEqual(len(batch), 3)
+            padded_tokens = len(batch) * max(lengths[ind] for ind in batch)
+            # only an item longer than the budget may go over, and it is alone
+            self.assertTrue(padded_tokens <= 300 or len(batch) == 1)
+        # the longest texts are batched together, not with the short ones
+        self.assertIn([1, 6, 3], batches)
+        self.assertIn([5], batches)
+
+    def test_results_in_original_order(self) -> None:
+        items = ["a" * length for length in [3, 1, 8, 2, 8, 5]]
+        processed_batches: list[list[str]] = []
+
+        def _process(batch: list[str]) -> list[int]:
+            processed_batches.append(batch)
+            return [len(item) for item in batch]
+
+        results = run_length_bucketed(
+            items=items,
+            lengths=[len(item) for item in items],
+            process_batch=_process,
+            max_batch_tokens=16,
+            max_batch_size=10,
+        )
+
+        self.assertEqual(results, [3, 1, 8, 2, 8, 5])
+        self.assertEqual(len(processed_batches), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
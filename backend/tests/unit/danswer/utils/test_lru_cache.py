@@ -0,0 +1,40 @@
+import time
+import unittest
+
+from danswer.utils.lru_cache import TTLLRUCache
+
+
+class TestTTLLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self) -> None:
+        cache: TTLLRUCache[str, int] = TTLLRUCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        # touching "a" makes "b" the least recently used entry
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+        stats = cache.stats()
+        self.assertEqual(stats.hits, 3)
+        self.assertEqual(stats.misses, 1)
+        self.assertEqual(stats.size, 2)
+
+    def test_expires_entries(self) -> None:
+        cache: TTLLRUCache[str, int] = TTLLRUCache(max_size=2, ttl_seconds=0.1)
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        time.sleep(0.2)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats().size, 0)
+
+    def test_zero_size_disables(self) -> None:
+        cache: TTLLRUCache[str, int] = TTLLRUCache(max_size=0)
+        cache.put("a", 1)
+        self.assertIsNone(cache.get("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import threading
+import time
+import unittest
+from collections.abc import Iterator
+
+from danswer.utils.staged_pipeline import PipelineStage
+from danswer.utils.staged_pipeline import StagedPipeline
+
+
+class TestStagedPipeline(unittest.TestCase):
+    def test_runs_all_stages_in_order(self) -> None:
+        pipeline = StagedPipeline(
+            stages=[
+                PipelineStage(name="double", process=lambda x: x * 2),
+                PipelineStage(name="increment", process=lambda x: x + 1),
+            ],
+            queue_size=2,
+        )
+
+        self.assertEqual(list(pipeline.run(range(20))), [x * 2 + 1 for x in range(20)])
+        self.assertEqual([m.num_items for m in pipeline.metrics], [20, 20, 20])
+
+    def test_multiple_workers(self) -> None:
+        pipeline = StagedPipeline(
+            stages=[
+                PipelineStage(name="square", process=lambda x: x * x, num_workers=4),
+                PipelineStage(name="negate", process=lambda x: -x, num_workers=2),
+            ],
+            queue_size=2,
+        )
+
+        self.assertEqual(
+            sorted(pipeline.run(range(50))), sorted(-x * x for x in range(50))
+        )
+
+    def test_back_pressure_bounds_in_flight_items(self) -> None:
+        fetched = 0
+        lock = threading.Lock()
+
+        def _source() -> Iterator[int]:
+            nonlocal fetched
+            for item in range(100):
+                with lock:
+                    fetched += 1
+                yield item
+
+        def _slow(item: int) -> int:
+            time.sleep(0.01)
+            return item
+
+        pipeline = StagedPipeline(
+            stages=[PipelineStage(name="slow", process=_slow)], queue_size=2
+        )
+        for ind, _ in enumerate(pipeline.run(_source())):
+            with lock:
+                # 2 queues of size 2, one item in the worker, one in the fetcher
+                self.assertLessEqual(fetched - ind, 6)
+
+    def test_stage_error_is_raised(self) -> None:
+        def _fail_on_five(item: int) -> int:
+            if item == 5:
+                raise ValueError("bad item")
+            return item
+
+        pipeline = StagedPipeline(
+            stages=[PipelineStage(name="fail", process=_fail_on_five)], queue_size=2
+        )
+        with self.assertRaises(ValueError):
+            list(pipeline.run(range(10)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from model_server.batching import MicroBatcher
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_coalesces_concurrent_requests(self) -> None:
+        batch_sizes: list[int] = []
+        lock = threading.Lock()
+
+        def _double(items: list[int]) -> list[int]:
+            with lock:
+                batch_sizes.append(len(items))
+            return [item * 2 for item in items]
+
+        batcher: MicroBatcher[int, int] = MicroBatcher(
+            process_batch=_double, max_batch_size=64, max_wait_ms=200
+        )
+        requests = [[i, i + 100] for i in range(10)]
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(executor.map(batcher.run, requests))
+
+        self.assertEqual(results, [[i * 2, (i + 100) * 2] for i in range(10)])
+        self.assertEqual(sum(batch_sizes), 20)
+        self.assertLess(len(batch_sizes), 10)
+
+    def test_respects_max_batch_size(self) -> None:
+        batch_sizes: list[int] = []
+
+        def _identity(items: list[int]) -> list[int]:
+            batch_sizes.append(len(items))
+            return items
+
+        batcher: MicroBatcher[int, int] = MicroBatcher(
+            process_batch=_identity, max_batch_size=4, max_wait_ms=100
+        )
+        futures = [batcher.submit([i, i]) for i in range(5)]
+        futures.append(batcher.submit(list(range(6))))
+
+        self.assertEqual([f.result() for f in futures][-1], list(range(6)))
+        self.assertTrue(all(size <= 4 for size in batch_sizes[:-1]))
+        self.assertEqual(batch_sizes[-1], 6)
+
+    def test_propagates_errors(self) -> None:
+        def _fail(items: list[int]) -> list[int]:
+            raise ValueError("bad batch")
+
+        batcher: MicroBatcher[int, int] = MicroBatcher(
+            process_batch=_fail, max_batch_size=4, max_wait_ms=1
+        )
+        with self.assertRaises(ValueError):
+            batcher.run([1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+import numpy
+
+from shared_models.embedding_transport import deserialize_embeddings
+from shared_models.embedding_transport import get_embeddings_content_type
+from shared_models.embedding_transport import get_embeddings_dtype
+from shared_models.embedding_transport import serialize_embeddings
+
+
+class TestEmbeddingTransport(unittest.TestCase):
+    def setUp(self) -> None:
+        self.embeddings = numpy.random.default_rng(0).random((5, 384)).astype("float32")
+
+    def test_float32_round_trip_is_exact(self) -> None:
+        content = serialize_embeddings(self.embeddings, "float32")
+        self.assertEqual(len(content), 8 + 5 * 384 * 4)
+
+        decoded = deserialize_embeddings(content, "float32")
+        self.assertEqual(decoded.dtype, numpy.float32)
+        numpy.testing.assert_array_equal(decoded, self.embeddings)
+
+    def test_float16_round_trip(self) -> None:
+        content = serialize_embeddings(self.embeddings, "float16")
+        self.assertEqual(len(content), 8 + 5 * 384 * 2)
+
+        decoded = deserialize_embeddings(content, "float16")
+        self.assertEqual(decoded.dtype, numpy.float32)
+        numpy.testing.assert_allclose(decoded, self.embeddings, atol=1e-3)
+
+    def test_empty_and_truncated_payloads(self) -> None:
+        empty = numpy.empty((0, 384), dtype=numpy.float32)
+        self.assertEqual(
+            deserialize_embeddings(
+                serialize_embeddings(empty, "float32"), "float32"
+            ).shape,
+            (0, 384),
+        )
+
+        content = serialize_embeddings(self.embeddings, "float32")
+        with self.assertRaises(ValueError):
+            deserialize_embeddings(content[:-4], "float32")
+
+    def test_content_type_negotiation(self) -> None:
+        self.assertEqual(
+            get_embeddings_dtype(get_embeddings_content_type("float16")), "float16"
+        )
+        self.assertEqual(
+            get_embeddings_dtype("application/x-danswer-embeddings, application/json"),
+            "float32",
+        )
+        self.assertIsNone(get_embeddings_dtype("application/json"))
+        self.assertIsNone(get_embeddings_dtype("*/*"))
+        self.assertIsNone(get_embeddings_dtype(None))
+        # unknown dtypes fall back to JSON rather than failing the request
+        self.assertIsNone(
+            get_embeddings_dtype("application/x-danswer-embeddings; dtype=int8")
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -163,6 +163,14 @@ export const searchRequestStreamed = async ({
           return;
         }
 
+        // the intent prediction is sent on its own if it wasn't ready in time
+        // for the documents
+        if (Object.hasOwn(chunk, "predicted_flow")) {
+          updateSuggestedFlowType(chunk.predicted_flow);
+          updateSuggestedSearchType(chunk.predicted_search);
+          return;
+        }
+
         // check for query ID section
         if (chunk.query_event_id) {
           updateQueryEventId(chunk.query_event_id);